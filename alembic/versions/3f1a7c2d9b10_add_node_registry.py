@@ -0,0 +1,69 @@
+"""add node_registry: global node ID index across all layer tables
+
+Revision ID: 3f1a7c2d9b10
+Revises: 9c692b45aedb
+Create Date: 2026-10-16 09:12:41.530118
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1a7c2d9b10"
+down_revision: str | Sequence[str] | None = "9c692b45aedb"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Layer name -> table name for every registered model
+LAYER_TABLES = {
+    "Goal": "goals",
+    "Concept": "concepts",
+    "Context": "contexts",
+    "Constraints": "constraints",
+    "Requirements": "requirements",
+    "AcceptanceCriteria": "acceptance_criteria",
+    "InterfaceContract": "interface_contracts",
+    "Phase": "phases",
+    "Step": "steps",
+    "Task": "tasks",
+    "SubTask": "sub_tasks",
+    "Command": "commands",
+    "Label": "labels",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "node_registry",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("layer", sa.String(), nullable=False),
+        sa.Column("row_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "layer", "row_id", name="uq_node_registry_layer_row"
+        ),
+    )
+
+    # Backfill: register every existing row, one set-based insert per layer
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+    for layer, table in LAYER_TABLES.items():
+        if table not in existing or "id" not in {
+            column["name"] for column in inspector.get_columns(table)
+        }:
+            continue
+        op.execute(
+            sa.text(
+                "INSERT INTO node_registry (layer, row_id) "
+                f"SELECT :layer, id FROM {table} ORDER BY id"
+            ).bindparams(layer=layer)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("node_registry")
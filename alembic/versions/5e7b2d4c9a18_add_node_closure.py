@@ -0,0 +1,175 @@
+"""add node_closure: ancestor/descendant closure of the layer hierarchy
+
+Revision ID: 5e7b2d4c9a18
+Revises: c5d91e3a7f22
+Create Date: 2026-10-16 12:48:33.902714
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e7b2d4c9a18"
+down_revision: str | Sequence[str] | None = "c5d91e3a7f22"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Hierarchy join table -> (parent layer, column), (child layer, column)
+HIERARCHY_EDGES = [
+    (
+        "goals_concepts",
+        ("Goal", "goal_id"),
+        ("Concept", "concept_id"),
+    ),
+    (
+        "goals_contexts",
+        ("Goal", "goal_id"),
+        ("Context", "context_id"),
+    ),
+    (
+        "concepts_contexts",
+        ("Concept", "concept_id"),
+        ("Context", "context_id"),
+    ),
+    (
+        "requirements_concepts",
+        ("Concept", "concept_id"),
+        ("Requirements", "requirement_id"),
+    ),
+    (
+        "requirements_contexts",
+        ("Context", "context_id"),
+        ("Requirements", "requirement_id"),
+    ),
+    (
+        "constraints_goals",
+        ("Goal", "goal_id"),
+        ("Constraints", "constraint_id"),
+    ),
+    (
+        "constraints_requirements",
+        ("Constraints", "constraint_id"),
+        ("Requirements", "requirement_id"),
+    ),
+    (
+        "requirements_acceptance_criteria",
+        ("Requirements", "requirement_id"),
+        ("AcceptanceCriteria", "acceptance_criterion_id"),
+    ),
+    (
+        "acceptance_criteria_interface_contracts",
+        ("AcceptanceCriteria", "acceptance_criterion_id"),
+        ("InterfaceContract", "interface_contract_id"),
+    ),
+    (
+        "interface_contracts_phases",
+        ("InterfaceContract", "interface_contract_id"),
+        ("Phase", "phase_id"),
+    ),
+    (
+        "goals_tasks",
+        ("Goal", "goal_id"),
+        ("Task", "task_id"),
+    ),
+    (
+        "goals_phases",
+        ("Goal", "goal_id"),
+        ("Phase", "phase_id"),
+    ),
+    (
+        "phases_steps",
+        ("Phase", "phase_id"),
+        ("Step", "step_id"),
+    ),
+    (
+        "steps_tasks",
+        ("Step", "step_id"),
+        ("Task", "task_id"),
+    ),
+    (
+        "tasks_sub_tasks",
+        ("Task", "task_id"),
+        ("SubTask", "sub_task_id"),
+    ),
+    (
+        "sub_tasks_commands",
+        ("SubTask", "sub_task_id"),
+        ("Command", "command_id"),
+    ),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "node_closure",
+        sa.Column("ancestor_layer", sa.String(), nullable=False),
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_layer", sa.String(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.Column("paths", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "ancestor_layer",
+            "ancestor_id",
+            "descendant_layer",
+            "descendant_id",
+            "depth",
+        ),
+    )
+    op.create_index(
+        "ix_node_closure_descendant",
+        "node_closure",
+        ["descendant_layer", "descendant_id", "ancestor_layer"],
+    )
+
+    # Backfill: direct edges first, then extend one level per statement
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    edges = " UNION ALL ".join(
+        f"SELECT '{parent}' AS parent_layer, {parent_col} AS parent_id, "
+        f"'{child}' AS child_layer, {child_col} AS child_id FROM {table}"
+        for table, (parent, parent_col), (child, child_col) in HIERARCHY_EDGES
+        if table in existing
+    )
+    if not edges:
+        return
+
+    columns = (
+        "ancestor_layer, ancestor_id, descendant_layer, descendant_id, "
+        "depth, paths"
+    )
+    op.execute(
+        f"INSERT INTO node_closure ({columns}) "
+        "SELECT parent_layer, parent_id, child_layer, child_id, 1, COUNT(*) "
+        f"FROM ({edges}) AS e "
+        "GROUP BY parent_layer, parent_id, child_layer, child_id"
+    )
+    bind = op.get_bind()
+    depth = 1
+    while True:
+        extended = bind.execute(
+            sa.text(
+                f"INSERT INTO node_closure ({columns}) "
+                "SELECT c.ancestor_layer, c.ancestor_id, e.child_layer, "
+                "e.child_id, :next_depth, SUM(c.paths) "
+                f"FROM node_closure AS c JOIN ({edges}) AS e "
+                "ON e.parent_layer = c.descendant_layer "
+                "AND e.parent_id = c.descendant_id "
+                "WHERE c.depth = :depth "
+                "GROUP BY c.ancestor_layer, c.ancestor_id, "
+                "e.child_layer, e.child_id"
+            ),
+            {"depth": depth, "next_depth": depth + 1},
+        )
+        if not extended.rowcount:
+            break
+        depth += 1
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_node_closure_descendant", table_name="node_closure")
+    op.drop_table("node_closure")
@@ -0,0 +1,78 @@
+"""add layer filter indexes: status/owner/assignee/severity/work_type/created_at
+
+Revision ID: 8b4e2f6a1c37
+Revises: 3f1a7c2d9b10
+Create Date: 2026-10-16 10:03:17.204561
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8b4e2f6a1c37"
+down_revision: str | Sequence[str] | None = "3f1a7c2d9b10"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+LAYER_TABLES = [
+    "goals",
+    "concepts",
+    "contexts",
+    "constraints",
+    "requirements",
+    "acceptance_criteria",
+    "interface_contracts",
+    "phases",
+    "steps",
+    "tasks",
+    "sub_tasks",
+    "commands",
+]
+
+# Index name suffix -> indexed columns (mirrors models._layer_indexes)
+LAYER_INDEXES = {
+    "status_owner": ["status", "owner"],
+    "assignee_status": ["assignee", "status"],
+    "owner": ["owner"],
+    "severity": ["severity"],
+    "work_type": ["work_type"],
+    "created_at": ["created_at"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # PostgreSQL builds the indexes CONCURRENTLY so large layer tables stay
+    # writable; that cannot run inside the migration transaction.
+    bind = op.get_bind()
+    concurrently = bind.dialect.name == "postgresql"
+    inspector = sa.inspect(bind)
+    existing = set(inspector.get_table_names())
+    with op.get_context().autocommit_block():
+        for table in LAYER_TABLES:
+            if table not in existing:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table)}
+            for suffix, columns in LAYER_INDEXES.items():
+                if not present.issuperset(columns):
+                    continue
+                op.create_index(
+                    f"ix_{table}_{suffix}",
+                    table,
+                    columns,
+                    if_not_exists=True,
+                    postgresql_concurrently=concurrently,
+                )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for table in LAYER_TABLES:
+        if table not in existing:
+            continue
+        for suffix in LAYER_INDEXES:
+            op.drop_index(f"ix_{table}_{suffix}", table, if_exists=True)
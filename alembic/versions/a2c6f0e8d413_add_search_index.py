@@ -0,0 +1,191 @@
+"""add search_index: FTS5 / tsvector full-text index with sync triggers
+
+Revision ID: a2c6f0e8d413
+Revises: 5e7b2d4c9a18
+Create Date: 2026-10-16 14:05:52.671204
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a2c6f0e8d413"
+down_revision: str | Sequence[str] | None = "5e7b2d4c9a18"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Layer -> table; the position in this list is encoded in the index key
+LAYER_TABLES = [
+    ("Goal", "goals"),
+    ("Concept", "concepts"),
+    ("Context", "contexts"),
+    ("Constraints", "constraints"),
+    ("Requirements", "requirements"),
+    ("AcceptanceCriteria", "acceptance_criteria"),
+    ("InterfaceContract", "interface_contracts"),
+    ("Phase", "phases"),
+    ("Step", "steps"),
+    ("Task", "tasks"),
+    ("SubTask", "sub_tasks"),
+    ("Command", "commands"),
+    ("Label", "labels"),
+]
+
+# Index key = row id * KEY_STRIDE + layer position
+KEY_STRIDE = 16
+
+
+def _indexed_columns(layer: str) -> tuple[str, str, str]:
+    """SQL column expressions for (title, description, owner) of a layer."""
+    if layer == "Label":
+        return "name", "NULL", "NULL"
+    return "title", "description", "owner"
+
+
+def _watched_columns(layer: str) -> str:
+    """Columns whose update re-indexes the row."""
+    return ", ".join(
+        column
+        for column in ("id", *_indexed_columns(layer))
+        if column != "NULL"
+    )
+
+
+def _create_sqlite_index() -> None:
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "title, description, owner, tokenize='unicode61')"
+    )
+    for position, (layer, table) in enumerate(LAYER_TABLES):
+        values = [f"NEW.id * {KEY_STRIDE} + {position}"] + [
+            f"NEW.{c}" if c != "NULL" else c for c in _indexed_columns(layer)
+        ]
+        insert_new = (
+            "INSERT INTO search_index (rowid, title, description, owner) "
+            f"VALUES ({', '.join(values)});"
+        )
+        delete_old = (
+            "DELETE FROM search_index "
+            f"WHERE rowid = OLD.id * {KEY_STRIDE} + {position};"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_ai "
+            f"AFTER INSERT ON {table} BEGIN {insert_new} END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_ad "
+            f"AFTER DELETE ON {table} BEGIN {delete_old} END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_au "
+            f"AFTER UPDATE OF {_watched_columns(layer)} ON {table} "
+            f"BEGIN {delete_old} {insert_new} END"
+        )
+
+
+def _create_postgresql_index() -> None:
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS search_index ("
+        "key BIGINT PRIMARY KEY, "
+        "layer VARCHAR NOT NULL, "
+        "row_id INTEGER NOT NULL, "
+        "document TSVECTOR NOT NULL)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_search_index_document "
+        "ON search_index USING GIN (document)"
+    )
+    # The layer name and key position come from the trigger arguments,
+    # the columns from the row as JSON (labels have a name, not a title)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION search_index_sync() RETURNS trigger
+        AS $$
+        DECLARE
+            row_json JSONB;
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM search_index
+                WHERE key = OLD.id::BIGINT * 16 + TG_ARGV[1]::INTEGER;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                row_json := to_jsonb(NEW);
+                INSERT INTO search_index (key, layer, row_id, document)
+                VALUES (
+                    NEW.id::BIGINT * 16 + TG_ARGV[1]::INTEGER,
+                    TG_ARGV[0],
+                    NEW.id,
+                    setweight(to_tsvector('simple', coalesce(
+                        row_json->>'title', row_json->>'name', '')), 'A')
+                    || setweight(to_tsvector('simple', coalesce(
+                        row_json->>'description', '')), 'B')
+                    || setweight(to_tsvector('simple', coalesce(
+                        row_json->>'owner', '')), 'C')
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for position, (layer, table) in enumerate(LAYER_TABLES):
+        op.execute(f"DROP TRIGGER IF EXISTS search_{table}_sync ON {table}")
+        op.execute(
+            f"CREATE TRIGGER search_{table}_sync "
+            f"AFTER INSERT OR UPDATE OF {_watched_columns(layer)} "
+            f"OR DELETE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION "
+            f"search_index_sync('{layer}', '{position}')"
+        )
+
+
+def _populate_search_index(postgresql: bool) -> None:
+    """Index every existing layer row, one set-based insert per layer."""
+    op.execute("DELETE FROM search_index")
+    for position, (layer, table) in enumerate(LAYER_TABLES):
+        title, description, owner = _indexed_columns(layer)
+        key = f"id * {KEY_STRIDE} + {position}"
+        if postgresql:
+            op.execute(
+                "INSERT INTO search_index (key, layer, row_id, document) "
+                f"SELECT {key}, '{layer}', id, "
+                f"setweight(to_tsvector('simple', coalesce({title}, '')), "
+                "'A') || setweight(to_tsvector('simple', "
+                f"coalesce({description}, '')), 'B') "
+                "|| setweight(to_tsvector('simple', "
+                f"coalesce({owner}, '')), 'C') FROM {table}"
+            )
+        else:
+            op.execute(
+                "INSERT INTO search_index (rowid, title, description, owner) "
+                f"SELECT {key}, {title}, {description}, {owner} FROM {table}"
+            )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    existing = set(sa.inspect(bind).get_table_names())
+    if not {table for _, table in LAYER_TABLES} <= existing:
+        return  # layer tables not created yet; create_all will add the index
+    postgresql = bind.dialect.name == "postgresql"
+    if postgresql:
+        _create_postgresql_index()
+    else:
+        _create_sqlite_index()
+    _populate_search_index(postgresql)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        # Dropping the shared function takes every sync trigger with it
+        op.execute("DROP FUNCTION IF EXISTS search_index_sync() CASCADE")
+    else:
+        for _, table in LAYER_TABLES:
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS search_{table}_{suffix}")
+    op.execute("DROP TABLE IF EXISTS search_index")
@@ -0,0 +1,282 @@
+"""add node_closure maintenance triggers on the hierarchy join tables
+
+Revision ID: b7d2e9f4a610
+Revises: f1b7e4c9a235
+Create Date: 2026-10-16 21:04:17.263518
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d2e9f4a610"
+down_revision: str | Sequence[str] | None = "f1b7e4c9a235"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Hierarchy join table -> (parent layer, column), (child layer, column)
+HIERARCHY_EDGES = [
+    (
+        "goals_concepts",
+        ("Goal", "goal_id"),
+        ("Concept", "concept_id"),
+    ),
+    (
+        "goals_contexts",
+        ("Goal", "goal_id"),
+        ("Context", "context_id"),
+    ),
+    (
+        "concepts_contexts",
+        ("Concept", "concept_id"),
+        ("Context", "context_id"),
+    ),
+    (
+        "requirements_concepts",
+        ("Concept", "concept_id"),
+        ("Requirements", "requirement_id"),
+    ),
+    (
+        "requirements_contexts",
+        ("Context", "context_id"),
+        ("Requirements", "requirement_id"),
+    ),
+    (
+        "constraints_goals",
+        ("Goal", "goal_id"),
+        ("Constraints", "constraint_id"),
+    ),
+    (
+        "constraints_requirements",
+        ("Constraints", "constraint_id"),
+        ("Requirements", "requirement_id"),
+    ),
+    (
+        "requirements_acceptance_criteria",
+        ("Requirements", "requirement_id"),
+        ("AcceptanceCriteria", "acceptance_criterion_id"),
+    ),
+    (
+        "acceptance_criteria_interface_contracts",
+        ("AcceptanceCriteria", "acceptance_criterion_id"),
+        ("InterfaceContract", "interface_contract_id"),
+    ),
+    (
+        "interface_contracts_phases",
+        ("InterfaceContract", "interface_contract_id"),
+        ("Phase", "phase_id"),
+    ),
+    (
+        "goals_tasks",
+        ("Goal", "goal_id"),
+        ("Task", "task_id"),
+    ),
+    (
+        "goals_phases",
+        ("Goal", "goal_id"),
+        ("Phase", "phase_id"),
+    ),
+    (
+        "phases_steps",
+        ("Phase", "phase_id"),
+        ("Step", "step_id"),
+    ),
+    (
+        "steps_tasks",
+        ("Step", "step_id"),
+        ("Task", "task_id"),
+    ),
+    (
+        "tasks_sub_tasks",
+        ("Task", "task_id"),
+        ("SubTask", "sub_task_id"),
+    ),
+    (
+        "sub_tasks_commands",
+        ("SubTask", "sub_task_id"),
+        ("Command", "command_id"),
+    ),
+]
+
+CLOSURE_KEY = (
+    "ancestor_layer, ancestor_id, descendant_layer, descendant_id, depth"
+)
+
+
+def _side_sql(anchor: str, far: str, layer: str, row_id: str) -> str:
+    """Closure rows on one side of an edge end, plus the end itself."""
+    return (
+        f"SELECT {far}_layer AS layer, {far}_id AS row_id, depth, paths "
+        f"FROM node_closure WHERE {anchor}_layer = {layer} "
+        f"AND {anchor}_id = {row_id} "
+        f"UNION ALL SELECT {layer}, {row_id}, 0, 1"
+    )
+
+
+def _routes_sql(
+    parent_layer: str, parent_id: str, child_layer: str, child_id: str
+) -> str:
+    """SELECT of the closure rows one ``parent -> child`` edge creates."""
+    up = _side_sql("descendant", "ancestor", parent_layer, parent_id)
+    down = _side_sql("ancestor", "descendant", child_layer, child_id)
+    return (
+        "SELECT up.layer AS ancestor_layer, up.row_id AS ancestor_id, "
+        "down.layer AS descendant_layer, down.row_id AS descendant_id, "
+        "up.depth + down.depth + 1 AS depth, "
+        "SUM(up.paths * down.paths) AS paths "
+        f"FROM ({up}) AS up CROSS JOIN ({down}) AS down "
+        # WHERE keeps SQLite from reading ON CONFLICT as a join clause
+        "WHERE true GROUP BY up.layer, up.row_id, down.layer, "
+        "down.row_id, up.depth + down.depth + 1"
+    )
+
+
+def _add_routes_sql(*edge: str) -> str:
+    """Statement adding the routes through an edge."""
+    return (
+        f"INSERT INTO node_closure ({CLOSURE_KEY}, paths) "
+        f"{_routes_sql(*edge)} "
+        f"ON CONFLICT ({CLOSURE_KEY}) "
+        "DO UPDATE SET paths = node_closure.paths + excluded.paths;"
+    )
+
+
+def _remove_routes_sql(*edge: str) -> str:
+    """Statements subtracting the routes through an edge."""
+    matches = " AND ".join(
+        f"node_closure.{column} = routes.{column}"
+        for column in CLOSURE_KEY.split(", ")
+    )
+    up = _side_sql("descendant", "ancestor", edge[0], edge[1])
+    return (
+        "UPDATE node_closure SET paths = node_closure.paths - routes.paths "
+        f"FROM ({_routes_sql(*edge)}) AS routes WHERE {matches}; "
+        "DELETE FROM node_closure WHERE paths <= 0 AND "
+        "(ancestor_layer, ancestor_id) IN "
+        f"(SELECT layer, row_id FROM ({up}) AS up);"
+    )
+
+
+def _create_sqlite_triggers() -> None:
+    for table, (parent, parent_col), (child, child_col) in HIERARCHY_EDGES:
+        add = _add_routes_sql(
+            f"'{parent}'", f"NEW.{parent_col}", f"'{child}'", f"NEW.{child_col}"
+        )
+        remove = _remove_routes_sql(
+            f"'{parent}'", f"OLD.{parent_col}", f"'{child}'", f"OLD.{child_col}"
+        )
+        for suffix, event_name, body in (
+            ("ai", "INSERT", add),
+            ("ad", "DELETE", remove),
+            ("au", "UPDATE", f"{remove} {add}"),
+        ):
+            op.execute(
+                f"CREATE TRIGGER IF NOT EXISTS closure_{table}_{suffix} "
+                f"AFTER {event_name} ON {table} BEGIN {body} END"
+            )
+
+
+def _create_postgresql_triggers() -> None:
+    # One generic function; the layers and join columns of each table
+    # come from the trigger arguments, the ids from the row as JSON
+    edge = ("parent_layer", "parent_id", "child_layer", "child_id")
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION node_closure_sync() RETURNS trigger
+        AS $$
+        DECLARE
+            parent_layer TEXT := TG_ARGV[0];
+            child_layer TEXT := TG_ARGV[2];
+            parent_id INTEGER;
+            child_id INTEGER;
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                parent_id := (to_jsonb(OLD)->>TG_ARGV[1])::INTEGER;
+                child_id := (to_jsonb(OLD)->>TG_ARGV[3])::INTEGER;
+                {_remove_routes_sql(*edge)}
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                parent_id := (to_jsonb(NEW)->>TG_ARGV[1])::INTEGER;
+                child_id := (to_jsonb(NEW)->>TG_ARGV[3])::INTEGER;
+                {_add_routes_sql(*edge)}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table, (parent, parent_col), (child, child_col) in HIERARCHY_EDGES:
+        op.execute(f"DROP TRIGGER IF EXISTS closure_{table}_sync ON {table}")
+        op.execute(
+            f"CREATE TRIGGER closure_{table}_sync "
+            f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION node_closure_sync("
+            f"'{parent}', '{parent_col}', '{child}', '{child_col}')"
+        )
+
+
+def _populate_closure(bind: sa.Connection) -> None:
+    """Recompute node_closure from the join tables, one level at a time."""
+    edges = " UNION ALL ".join(
+        f"SELECT '{parent}' AS parent_layer, {parent_col} AS parent_id, "
+        f"'{child}' AS child_layer, {child_col} AS child_id FROM {table}"
+        for table, (parent, parent_col), (child, child_col) in HIERARCHY_EDGES
+    )
+    columns = f"{CLOSURE_KEY}, paths"
+    bind.execute(sa.text("DELETE FROM node_closure"))
+    bind.execute(
+        sa.text(
+            f"INSERT INTO node_closure ({columns}) "
+            "SELECT parent_layer, parent_id, child_layer, child_id, 1, "
+            f"COUNT(*) FROM ({edges}) AS e "
+            "GROUP BY parent_layer, parent_id, child_layer, child_id"
+        )
+    )
+    depth = 1
+    while True:
+        extended = bind.execute(
+            sa.text(
+                f"INSERT INTO node_closure ({columns}) "
+                "SELECT c.ancestor_layer, c.ancestor_id, e.child_layer, "
+                "e.child_id, :next_depth, SUM(c.paths) "
+                f"FROM node_closure AS c JOIN ({edges}) AS e "
+                "ON e.parent_layer = c.descendant_layer "
+                "AND e.parent_id = c.descendant_id "
+                "WHERE c.depth = :depth "
+                "GROUP BY c.ancestor_layer, c.ancestor_id, "
+                "e.child_layer, e.child_id"
+            ),
+            {"depth": depth, "next_depth": depth + 1},
+        )
+        if not extended.rowcount:
+            break
+        depth += 1
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    existing = set(sa.inspect(bind).get_table_names())
+    tables = {table for table, _, _ in HIERARCHY_EDGES} | {"node_closure"}
+    if not tables <= existing:
+        return  # join tables not created yet; create_all adds the triggers
+    if bind.dialect.name == "postgresql":
+        _create_postgresql_triggers()
+    else:
+        _create_sqlite_triggers()
+    # Links written around the old ORM hook may have left it stale
+    _populate_closure(bind)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        # Dropping the shared function takes every trigger with it
+        op.execute("DROP FUNCTION IF EXISTS node_closure_sync() CASCADE")
+        return
+    for table, _, _ in HIERARCHY_EDGES:
+        for suffix in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS closure_{table}_{suffix}")
@@ -0,0 +1,200 @@
+"""add association table primary keys and reverse-lookup indexes
+
+Revision ID: c5d91e3a7f22
+Revises: 8b4e2f6a1c37
+Create Date: 2026-10-16 11:26:05.418937
+
+"""
+from collections.abc import Iterator, Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d91e3a7f22"
+down_revision: str | Sequence[str] | None = "8b4e2f6a1c37"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Join table -> ((first column, FK target), (second column, FK target)).
+# The first column leads the primary key; the second gets a reverse index.
+Columns = tuple[tuple[str, str], tuple[str, str]]
+
+ASSOCIATION_TABLES: dict[str, Columns] = {
+    "goals_labels": (
+        ("goal_id", "goals.id"),
+        ("label_id", "labels.id"),
+    ),
+    "concepts_labels": (
+        ("concept_id", "concepts.id"),
+        ("label_id", "labels.id"),
+    ),
+    "contexts_labels": (
+        ("context_id", "contexts.id"),
+        ("label_id", "labels.id"),
+    ),
+    "goals_concepts": (
+        ("goal_id", "goals.id"),
+        ("concept_id", "concepts.id"),
+    ),
+    "goals_contexts": (
+        ("goal_id", "goals.id"),
+        ("context_id", "contexts.id"),
+    ),
+    "concepts_contexts": (
+        ("concept_id", "concepts.id"),
+        ("context_id", "contexts.id"),
+    ),
+    "requirements_concepts": (
+        ("requirement_id", "requirements.id"),
+        ("concept_id", "concepts.id"),
+    ),
+    "requirements_contexts": (
+        ("requirement_id", "requirements.id"),
+        ("context_id", "contexts.id"),
+    ),
+    "constraints_labels": (
+        ("constraint_id", "constraints.id"),
+        ("label_id", "labels.id"),
+    ),
+    "requirements_labels": (
+        ("requirement_id", "requirements.id"),
+        ("label_id", "labels.id"),
+    ),
+    "acceptance_criteria_labels": (
+        ("acceptance_criterion_id", "acceptance_criteria.id"),
+        ("label_id", "labels.id"),
+    ),
+    "interface_contracts_labels": (
+        ("interface_contract_id", "interface_contracts.id"),
+        ("label_id", "labels.id"),
+    ),
+    "phases_labels": (
+        ("phase_id", "phases.id"),
+        ("label_id", "labels.id"),
+    ),
+    "steps_labels": (
+        ("step_id", "steps.id"),
+        ("label_id", "labels.id"),
+    ),
+    "tasks_labels": (
+        ("task_id", "tasks.id"),
+        ("label_id", "labels.id"),
+    ),
+    "sub_tasks_labels": (
+        ("sub_task_id", "sub_tasks.id"),
+        ("label_id", "labels.id"),
+    ),
+    "commands_labels": (
+        ("command_id", "commands.id"),
+        ("label_id", "labels.id"),
+    ),
+    "constraints_goals": (
+        ("goal_id", "goals.id"),
+        ("constraint_id", "constraints.id"),
+    ),
+    "constraints_requirements": (
+        ("constraint_id", "constraints.id"),
+        ("requirement_id", "requirements.id"),
+    ),
+    "requirements_acceptance_criteria": (
+        ("requirement_id", "requirements.id"),
+        ("acceptance_criterion_id", "acceptance_criteria.id"),
+    ),
+    "acceptance_criteria_interface_contracts": (
+        ("acceptance_criterion_id", "acceptance_criteria.id"),
+        ("interface_contract_id", "interface_contracts.id"),
+    ),
+    "interface_contracts_phases": (
+        ("interface_contract_id", "interface_contracts.id"),
+        ("phase_id", "phases.id"),
+    ),
+    "goals_tasks": (
+        ("goal_id", "goals.id"),
+        ("task_id", "tasks.id"),
+    ),
+    "goals_phases": (
+        ("goal_id", "goals.id"),
+        ("phase_id", "phases.id"),
+    ),
+    "phases_steps": (
+        ("phase_id", "phases.id"),
+        ("step_id", "steps.id"),
+    ),
+    "steps_tasks": (
+        ("step_id", "steps.id"),
+        ("task_id", "tasks.id"),
+    ),
+    "tasks_sub_tasks": (
+        ("task_id", "tasks.id"),
+        ("sub_task_id", "sub_tasks.id"),
+    ),
+    "sub_tasks_commands": (
+        ("sub_task_id", "sub_tasks.id"),
+        ("command_id", "commands.id"),
+    ),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, columns in _existing_tables():
+        _rebuild(table, columns, primary_key=True)
+        reverse = columns[1][0]
+        op.create_index(f"ix_{table}_{reverse}", table, [reverse])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, columns in _existing_tables():
+        op.drop_index(f"ix_{table}_{columns[1][0]}", table, if_exists=True)
+        _rebuild(table, columns, primary_key=False)
+
+
+def _existing_tables() -> Iterator[tuple[str, Columns]]:
+    """Yield the join tables present in this database with both columns."""
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+    for table, columns in ASSOCIATION_TABLES.items():
+        if table not in existing:
+            continue
+        present = {column["name"] for column in inspector.get_columns(table)}
+        if present.issuperset(name for name, _ in columns):
+            yield table, columns
+
+
+def _rebuild(table: str, columns: Columns, primary_key: bool) -> None:
+    """Copy a join table into a fresh one, dropping duplicate links.
+
+    Neither SQLite nor a duplicate-laden table can take ``ADD PRIMARY KEY``
+    in place, so the rows are copied with ``SELECT DISTINCT`` into a new
+    table that is then swapped in. Links with a NULL side are dropped
+    because they can never satisfy the primary key.
+    """
+    staging = f"{table}_rebuild"
+    (first, _), (second, _) = columns
+    constraints = [
+        sa.ForeignKeyConstraint(
+            [name], [target], name=f"{table}_{name}_fkey"
+        )
+        for name, target in columns
+    ]
+    if primary_key:
+        constraints.append(
+            sa.PrimaryKeyConstraint(first, second, name=f"{table}_pkey")
+        )
+
+    op.create_table(
+        staging,
+        sa.Column(first, sa.Integer(), nullable=not primary_key),
+        sa.Column(second, sa.Integer(), nullable=not primary_key),
+        *constraints,
+    )
+    op.execute(
+        f"INSERT INTO {staging} ({first}, {second}) "
+        f"SELECT DISTINCT {first}, {second} FROM {table} "
+        f"WHERE {first} IS NOT NULL AND {second} IS NOT NULL"
+    )
+    op.drop_table(table)
+    op.rename_table(staging, table)
@@ -0,0 +1,68 @@
+"""add (updated_at, id) indexes for keyset-paginated cross-layer listing
+
+Revision ID: d4a8c1f6e2b9
+Revises: a2c6f0e8d413
+Create Date: 2026-10-16 15:12:40.518336
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d4a8c1f6e2b9"
+down_revision: str | Sequence[str] | None = "a2c6f0e8d413"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+LAYER_TABLES = [
+    "goals",
+    "concepts",
+    "contexts",
+    "constraints",
+    "requirements",
+    "acceptance_criteria",
+    "interface_contracts",
+    "phases",
+    "steps",
+    "tasks",
+    "sub_tasks",
+    "commands",
+    "labels",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built CONCURRENTLY on PostgreSQL, as for the other layer indexes
+    bind = op.get_bind()
+    concurrently = bind.dialect.name == "postgresql"
+    inspector = sa.inspect(bind)
+    existing = set(inspector.get_table_names())
+    with op.get_context().autocommit_block():
+        for table in LAYER_TABLES:
+            if table not in existing:
+                continue
+            # Legacy tables from the baseline revision (commands) may lack
+            # updated_at
+            present = {c["name"] for c in inspector.get_columns(table)}
+            if not present.issuperset(("updated_at", "id")):
+                continue
+            op.create_index(
+                f"ix_{table}_updated_at_id",
+                table,
+                ["updated_at", "id"],
+                if_not_exists=True,
+                postgresql_concurrently=concurrently,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for table in LAYER_TABLES:
+        if table not in existing:
+            continue
+        op.drop_index(f"ix_{table}_updated_at_id", table, if_exists=True)
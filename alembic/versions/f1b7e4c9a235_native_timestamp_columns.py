@@ -0,0 +1,321 @@
+"""convert ISO-string timestamps to timezone-aware DateTime columns
+
+created_at/updated_at (NOT NULL, server default now) and
+started_date/completion_date move from ``datetime.now().isoformat()``
+strings to ``timestamptz`` on PostgreSQL and UTC datetime text on SQLite.
+The old strings are naive local time: PostgreSQL reads them in the
+server's ``TimeZone`` setting, SQLite in the local time of the process
+running the migration.
+
+Large tables are converted without holding long locks:
+
+- PostgreSQL adds a ``<column>_tz`` shadow column per timestamp, keeps it in
+  step with a trigger while existing rows are backfilled in id-range
+  batches (each committed on its own), validates NOT NULL through a
+  ``NOT VALID`` check constraint, and then swaps the columns in one short
+  metadata-only transaction. Indexes are rebuilt CONCURRENTLY afterwards.
+- SQLite rewrites the values in committed id-range batches, then rebuilds
+  each table once to change the declared types and defaults (SQLite cannot
+  alter a column in place). Triggers on the table are recreated.
+
+Revision ID: f1b7e4c9a235
+Revises: d4a8c1f6e2b9
+Create Date: 2026-10-16 19:20:41.118305
+
+"""
+from collections.abc import Sequence
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f1b7e4c9a235"
+down_revision: str | Sequence[str] | None = "d4a8c1f6e2b9"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+LAYER_TABLES = [
+    "goals",
+    "concepts",
+    "contexts",
+    "constraints",
+    "requirements",
+    "acceptance_criteria",
+    "interface_contracts",
+    "phases",
+    "steps",
+    "tasks",
+    "sub_tasks",
+    "commands",
+    "labels",
+]
+
+# NOT NULL with a server default; the dates are optional
+TIMESTAMP_COLUMNS = ("created_at", "updated_at")
+DATE_COLUMNS = ("started_date", "completion_date")
+
+# Rows converted per committed batch
+BATCH_SIZE = 5000
+
+# Server default of the timestamps on SQLite: the current UTC time in the
+# text format SQLAlchemy stores datetimes in
+SQLITE_UTC_NOW = "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+def _string_columns(inspector: sa.Inspector, table: str) -> list[str]:
+    """Timestamp columns of ``table`` still stored as strings."""
+    return [
+        column["name"]
+        for column in inspector.get_columns(table)
+        if column["name"] in TIMESTAMP_COLUMNS + DATE_COLUMNS
+        and isinstance(column["type"], sa.String)
+    ]
+
+
+def _indexes(table: str) -> list[tuple[str, list[str]]]:
+    """The timestamp indexes declared on ``table`` by the models."""
+    if table == "labels":
+        return [("ix_labels_updated_at_id", ["updated_at", "id"])]
+    return [
+        (f"ix_{table}_created_at", ["created_at"]),
+        (f"ix_{table}_updated_at_id", ["updated_at", "id"]),
+        (f"ix_{table}_started_date", ["started_date"]),
+        (f"ix_{table}_completion_date", ["completion_date"]),
+    ]
+
+
+def _id_batches(bind: sa.Connection, table: str) -> list[tuple[int, int]]:
+    """Half-open ``[start, stop)`` id ranges covering ``table``."""
+    low, high = bind.execute(
+        sa.text(f"SELECT min(id), max(id) FROM {table}")
+    ).one()
+    if low is None:
+        return []
+    return [
+        (start, start + BATCH_SIZE)
+        for start in range(low, high + 1, BATCH_SIZE)
+    ]
+
+
+def _timestamptz(value: str) -> str:
+    """SQL reading an ISO string (empty means unset) as ``timestamptz``."""
+    return f"NULLIF({value}, '')::timestamptz"
+
+
+def _upgrade_postgresql(
+    bind: sa.Connection, table: str, columns: list[str]
+) -> None:
+    """Shadow-column backfill and swap for one PostgreSQL table."""
+    required = [c for c in columns if c in TIMESTAMP_COLUMNS]
+    sync = f"{table}_timestamps_tz"
+
+    for column in columns:
+        bind.execute(
+            sa.text(
+                f"ALTER TABLE {table} "
+                f"ADD COLUMN IF NOT EXISTS {column}_tz timestamptz"
+            )
+        )
+    # Rows written while the backfill runs are converted by the trigger
+    assignments = "; ".join(
+        f"NEW.{c}_tz := {_timestamptz(f'NEW.{c}')}" for c in columns
+    )
+    bind.execute(
+        sa.text(
+            f"CREATE OR REPLACE FUNCTION {sync}() RETURNS trigger AS $$ "
+            f"BEGIN {assignments}; RETURN NEW; END; "
+            "$$ LANGUAGE plpgsql"
+        )
+    )
+    bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {sync} ON {table}"))
+    bind.execute(
+        sa.text(
+            f"CREATE TRIGGER {sync} BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {sync}()"
+        )
+    )
+
+    backfill = ", ".join(f"{c}_tz = {_timestamptz(c)}" for c in columns)
+    for start, stop in _id_batches(bind, table):
+        bind.execute(
+            sa.text(
+                f"UPDATE {table} SET {backfill} "
+                "WHERE id >= :start AND id < :stop"
+            ),
+            {"start": start, "stop": stop},
+        )
+
+    # Validating a NOT VALID check scans the table without blocking
+    # writes; SET NOT NULL then reuses it instead of scanning again
+    for column in required:
+        check = f"{table}_{column}_tz_not_null"
+        bind.execute(
+            sa.text(
+                f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check}"
+            )
+        )
+        bind.execute(
+            sa.text(
+                f"ALTER TABLE {table} ADD CONSTRAINT {check} "
+                f"CHECK ({column}_tz IS NOT NULL) NOT VALID"
+            )
+        )
+        bind.execute(
+            sa.text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {check}")
+        )
+
+    # The swap only touches the catalog; a DO block runs it atomically.
+    # lock_timeout keeps it from queueing writers behind a long transaction.
+    swap = [
+        "PERFORM set_config('lock_timeout', '10s', true)",
+        f"DROP TRIGGER {sync} ON {table}",
+        f"DROP FUNCTION {sync}()",
+    ]
+    for column in columns:
+        swap += [
+            f"ALTER TABLE {table} DROP COLUMN {column}",
+            f"ALTER TABLE {table} RENAME COLUMN {column}_tz TO {column}",
+        ]
+    for column in required:
+        swap += [
+            f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL",
+            f"ALTER TABLE {table} "
+            f"DROP CONSTRAINT {table}_{column}_tz_not_null",
+            f"ALTER TABLE {table} "
+            f"ALTER COLUMN {column} SET DEFAULT CURRENT_TIMESTAMP",
+        ]
+    bind.execute(sa.text(f"DO $$ BEGIN {'; '.join(swap)}; END $$"))
+
+
+def _utc_text(value: str | None) -> str | None:
+    """Convert a naive local ISO string to SQLAlchemy's SQLite UTC format."""
+    if not value:
+        return None
+    if value[10:11] == " ":
+        return value  # converted by an earlier, interrupted run
+    parsed = datetime.fromisoformat(value).astimezone(timezone.utc)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _rebuild_sqlite(
+    table: str, columns: list[str], type_: sa.types.TypeEngine
+) -> None:
+    """Recreate a SQLite table with new declared types for ``columns``.
+
+    The columns are overridden at reflection rather than altered, so the
+    copy moves the stored text unchanged (an ALTER would CAST it to a
+    number). Triggers are not carried over by the copy and are recreated.
+    """
+    bind = op.get_bind()
+    triggers = bind.execute(
+        sa.text(
+            "SELECT sql FROM sqlite_master "
+            "WHERE type = 'trigger' AND tbl_name = :table"
+        ),
+        {"table": table},
+    ).scalars().all()
+
+    overrides = [
+        sa.Column(
+            column,
+            type_,
+            nullable=column not in TIMESTAMP_COLUMNS,
+            server_default=(
+                sa.text(SQLITE_UTC_NOW)
+                if column in TIMESTAMP_COLUMNS
+                and isinstance(type_, sa.DateTime)
+                else None
+            ),
+        )
+        for column in columns
+    ]
+    with op.batch_alter_table(
+        table, recreate="always", reflect_args=overrides
+    ):
+        pass
+
+    for trigger in triggers:
+        bind.execute(sa.text(trigger))
+
+
+def _upgrade_sqlite(
+    bind: sa.Connection, table: str, columns: list[str]
+) -> None:
+    """Batched value rewrite, then one rebuild, for one SQLite table."""
+    bind.connection.dbapi_connection.create_function(
+        "todowrite_utc_text", 1, _utc_text, deterministic=True
+    )
+    assignments = ", ".join(f"{c} = todowrite_utc_text({c})" for c in columns)
+    with op.get_context().autocommit_block():
+        for start, stop in _id_batches(bind, table):
+            bind.execute(
+                sa.text(
+                    f"UPDATE {table} SET {assignments} "
+                    "WHERE id >= :start AND id < :stop"
+                ),
+                {"start": start, "stop": stop},
+            )
+    _rebuild_sqlite(table, columns, sa.DateTime(timezone=True))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    postgresql = bind.dialect.name == "postgresql"
+    inspector = sa.inspect(bind)
+    existing = [t for t in LAYER_TABLES if t in inspector.get_table_names()]
+
+    for table in existing:
+        columns = _string_columns(inspector, table)
+        if not columns:
+            continue  # created by create_all with the new types
+        if postgresql:
+            with op.get_context().autocommit_block():
+                _upgrade_postgresql(bind, table, columns)
+        else:
+            _upgrade_sqlite(bind, table, columns)
+
+    # Dropping the string columns dropped their PostgreSQL indexes
+    with op.get_context().autocommit_block():
+        for table in existing:
+            present = {c["name"] for c in inspector.get_columns(table)}
+            for name, columns in _indexes(table):
+                if not present.issuperset(columns):
+                    continue  # legacy table (commands) without the column
+                op.create_index(
+                    name,
+                    table,
+                    columns,
+                    if_not_exists=True,
+                    postgresql_concurrently=postgresql,
+                )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Values become UTC strings; the full rewrite is acceptable here
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table in LAYER_TABLES:
+        if table not in inspector.get_table_names():
+            continue
+        columns = [
+            column["name"]
+            for column in inspector.get_columns(table)
+            if column["name"] in TIMESTAMP_COLUMNS + DATE_COLUMNS
+        ]
+        for name, _columns in _indexes(table):
+            if _columns[0] in DATE_COLUMNS:
+                op.drop_index(name, table, if_exists=True)
+        if bind.dialect.name == "postgresql":
+            for column in columns:
+                op.execute(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT, "
+                    f"ALTER COLUMN {column} TYPE VARCHAR USING "
+                    f"to_char({column} AT TIME ZONE 'UTC', "
+                    "'YYYY-MM-DD\"T\"HH24:MI:SS.US')"
+                )
+        else:
+            _rebuild_sqlite(table, columns, sa.String())
@@ -135,9 +135,10 @@ class ClaudeRuleEnforcer:
     def _enforce_database_content(self) -> None:
         """Database must contain required planning structure."""
         try:
-            from sqlalchemy import create_engine, text
+            from sqlalchemy import text
             from sqlalchemy.orm import sessionmaker
             from todowrite.core.models import Goal
+            from todowrite.database.engines import get_engine
 
             # Connect to PostgreSQL database
             db_url = os.environ.get("TODOWRITE_DATABASE_URL", "")
@@ -147,7 +148,7 @@ class ClaudeRuleEnforcer:
                 )
                 return
 
-            engine = create_engine(db_url)
+            engine = get_engine(db_url)
             Session = sessionmaker(bind=engine)
             session = Session()
 
@@ -1,7 +1,10 @@
 """Main CLI entry point for ToDoWrite."""
 
+import json
 import os
 import sys
+from datetime import datetime
+from typing import TextIO
 
 import click
 from rich.console import Console
@@ -11,8 +14,26 @@ from .version import __version__
 
 # Import from the ToDoWrite library
 try:
-    from sqlalchemy import create_engine, select
+    import yaml
     from sqlalchemy.orm import sessionmaker
+    from todowrite.core.bulk import BATCH_SIZE, import_items
+    from todowrite.core.columnar import (
+        COLUMNAR_BATCH_SIZE,
+        COLUMNAR_FORMATS,
+        export_columnar,
+    )
+    from todowrite.core.counts import (
+        count_items,
+        counters_enabled,
+        enable_counters,
+    )
+    from todowrite.core.export import (
+        EXPORT_BATCH_SIZE,
+        EXPORT_FORMATS,
+        export_nodes,
+    )
+    from todowrite.core.hierarchy import rebuild_closure
+    from todowrite.core.listing import list_items
     from todowrite.core.models import (
         AcceptanceCriteria,
         Command,
@@ -28,10 +49,27 @@ try:
         SubTask,
         Task,
     )
+    from todowrite.core.node_registry import (
+        backfill_node_registry,
+        get_node_id,
+        resolve_node,
+    )
     from todowrite.core.schema_validator import (
         DatabaseInitializationError,
         initialize_database,
     )
+    from todowrite.core.search import rebuild_search_index
+    from todowrite.core.search import search as search_index
+    from todowrite.database.config import get_sqlite_profile
+    from todowrite.database.engines import get_engine
+    from todowrite.storage.postgresql_copy import (
+        CHUNK_ROWS,
+        COPY_FORMATS,
+        IMPORT_MODES,
+        export_tables,
+        import_tables,
+    )
+    from todowrite.storage.sqlite_backend import SQLITE_PROFILES
 except ImportError as e:
     click.echo(
         f"Error: ToDoWrite library not found: {e}. Please install it first: "
@@ -81,9 +119,30 @@ LAYER_NAMES = {
 }
 
 
-def get_session(database_url: str = "sqlite:///todowrite.db"):
-    """Get SQLAlchemy session."""
-    engine = create_engine(database_url)
+def get_database_engine(
+    database_url: str = "sqlite:///todowrite.db",
+    sqlite_profile: str | None = None,
+):
+    """Get the shared SQLAlchemy engine for a database.
+
+    SQLite connections are tuned with ``sqlite_profile`` (default: the
+    ``--sqlite-profile`` option, TODOWRITE_SQLITE_PROFILE or balanced).
+    """
+    if sqlite_profile is None:
+        ctx = click.get_current_context(silent=True)
+        if ctx is not None and ctx.obj:
+            sqlite_profile = ctx.obj.get("sqlite_profile")
+    return get_engine(
+        database_url, sqlite_profile=sqlite_profile or get_sqlite_profile()
+    )
+
+
+def get_session(
+    database_url: str = "sqlite:///todowrite.db",
+    sqlite_profile: str | None = None,
+):
+    """Get SQLAlchemy session on the shared engine of a database."""
+    engine = get_database_engine(database_url, sqlite_profile)
     Session = sessionmaker(bind=engine)
     return Session(), engine
 
@@ -125,8 +184,18 @@ def get_current_username() -> str:
     default=lambda: os.environ.get("TODOWRITE_DATABASE_URL", "todowrite.db"),
     help="Database URL (default: TODOWRITE_DATABASE_URL env var or todowrite.db)",
 )
+@click.option(
+    "--sqlite-profile",
+    type=click.Choice(tuple(SQLITE_PROFILES)),
+    envvar="TODOWRITE_SQLITE_PROFILE",
+    default=None,
+    help="SQLite pragma profile "
+    "(default: TODOWRITE_SQLITE_PROFILE env var or balanced)",
+)
 @click.pass_context
-def cli(ctx: click.Context, database: str) -> None:
+def cli(
+    ctx: click.Context, database: str, sqlite_profile: str | None
+) -> None:
     """Todowrite CLI - Hierarchical Task Management System."""
     ctx.ensure_object(dict)
 
@@ -145,6 +214,7 @@ def cli(ctx: click.Context, database: str) -> None:
 
     ctx.obj["database_url"] = database_url
     ctx.obj["database_path"] = database
+    ctx.obj["sqlite_profile"] = sqlite_profile
 
 
 @cli.command()
@@ -216,10 +286,10 @@ def create(
         item = model_class(**kwargs)
         session.add(item)
         session.commit()
-        session.refresh(item)
 
         console.print(
-            f"✅ Created {layer.title()} '{title}' with ID {item.id}"
+            f"✅ Created {layer.title()} '{title}' "
+            f"with ID {get_node_id(session, item)}"
         )
 
     except Exception as e:
@@ -236,6 +306,19 @@ def create(
 @click.option(
     "--limit", type=int, default=20, help="Maximum number of items to show"
 )
+@click.option("--cursor", help="Continue from a previous page's cursor")
+@click.option(
+    "--updated-since",
+    type=click.DateTime(),
+    help="Only items updated at or after this time (local time)",
+)
+@click.option(
+    "--completed-between",
+    nargs=2,
+    type=click.DateTime(),
+    metavar="START END",
+    help="Only items completed in this range (local time, inclusive)",
+)
 @click.pass_context
 def list(
     ctx: click.Context,
@@ -243,52 +326,36 @@ def list(
     owner: str | None,
     status: str | None,
     limit: int,
+    cursor: str | None,
+    updated_since: datetime | None,
+    completed_between: tuple[datetime, datetime] | None,
 ) -> None:
-    """List items."""
+    """List items, most recently updated first."""
     database_url = ctx.obj["database_url"]
     session, _engine = get_session(database_url)
 
     try:
-        # Start with all models or filter by specific layer
+        layer_name = None
         if layer:
-            model_classes = [MODEL_MAP.get(layer.lower())]
-            if not model_classes or not model_classes[0]:
+            model_class = MODEL_MAP.get(layer.lower())
+            if not model_class:
                 console.print(f"❌ Unknown layer: {layer}")
                 return
-        else:
-            model_classes = [
-                Goal,
-                Concept,
-                Context,
-                Constraints,
-                Requirements,
-                AcceptanceCriteria,
-                InterfaceContract,
-                Phase,
-                Step,
-                Task,
-                SubTask,
-                Command,
-                Label,
-            ]
-
-        all_items = []
-        for model_class in model_classes:
-            if not model_class:
-                continue
-
-            query = select(model_class)
-
-            # Apply filters
-            if owner:
-                query = query.where(model_class.owner == owner)
-            if status:
-                query = query.where(model_class.status == status)
-
-            items = session.execute(query.limit(limit)).scalars().all()
-            all_items.extend(items)
+            layer_name = LAYER_NAMES[model_class]
+
+        # One UNION ALL query across all layers, keyset-paginated
+        page = list_items(
+            session,
+            layer=layer_name,
+            owner=owner,
+            status=status,
+            limit=limit,
+            cursor=cursor,
+            updated_since=updated_since,
+            completed_between=completed_between or None,
+        )
 
-        if not all_items:
+        if not page.items:
             console.print("No items found.")
             return
 
@@ -301,26 +368,20 @@ def list(
         table.add_column("Status", style="yellow")
         table.add_column("Progress", justify="right", style="blue")
 
-        for item in all_items:
-            # Handle different attribute names for different model types
-            if hasattr(item, "title"):
-                title = item.title or "No title"
-            elif hasattr(item, "name"):
-                title = item.name or "No name"
-            else:
-                title = "No title"
-
+        for item in page.items:
             table.add_row(
-                str(item.id),
-                LAYER_NAMES.get(type(item), "Unknown"),
-                title,
-                getattr(item, "owner", None) or "No owner",
-                getattr(item, "status", None) or "No status",
-                f"{item.progress}%" if hasattr(item, "progress") else "N/A",
+                str(item.node_id),
+                item.layer,
+                item.title or "No title",
+                item.owner or "No owner",
+                item.status or "No status",
+                f"{item.progress}%" if item.progress is not None else "N/A",
             )
 
         console.print(table)
-        console.print(f"\nTotal: {len(all_items)} items")
+        console.print(f"\nTotal: {len(page.items)} items")
+        if page.next_cursor:
+            console.print(f"Next page: --cursor {page.next_cursor}")
 
     except Exception as e:
         console.print(f"❌ Error listing items: {e}")
@@ -329,75 +390,63 @@ def list(
 
 
 @cli.command()
-@click.argument("item_id", type=int)
+@click.argument("item_id")
 @click.pass_context
-def get(ctx: click.Context, item_id: int) -> None:
-    """Get details of a specific item."""
+def get(ctx: click.Context, item_id: str) -> None:
+    """Get details of a specific item.
+
+    ITEM_ID is a global node ID (e.g. 17) or a typed ID (e.g. Task-3).
+    """
     database_url = ctx.obj["database_url"]
     session, _engine = get_session(database_url)
 
     try:
-        # Search in all model classes
-        for model_class in [
-            Goal,
-            Concept,
-            Context,
-            Constraints,
-            Requirements,
-            AcceptanceCriteria,
-            InterfaceContract,
-            Phase,
-            Step,
-            Task,
-            SubTask,
-            Command,
-            Label,
-        ]:
-            item = session.query(model_class).filter_by(id=item_id).first()
-            if item:
-                # Display item details
-                table = Table(
-                    title=f"{LAYER_NAMES.get(type(item), 'Unknown')} Details"
-                )
-                table.add_column("Field", style="cyan")
-                table.add_column("Value", style="white")
-
-                table.add_row("ID", str(item.id))
-                table.add_row("Type", LAYER_NAMES.get(type(item), "Unknown"))
-
-                # Handle different attribute names for different model types
-                if hasattr(item, "title"):
-                    title = item.title or "No title"
-                elif hasattr(item, "name"):
-                    title = item.name or "No name"
-                else:
-                    title = "No title"
-
-                table.add_row("Title", title)
-
-                if hasattr(item, "description") and item.description:
-                    table.add_row("Description", item.description)
-                if hasattr(item, "owner") and item.owner:
-                    table.add_row("Owner", item.owner)
-                if hasattr(item, "status") and item.status:
-                    table.add_row("Status", item.status)
-                if hasattr(item, "severity") and item.severity:
-                    table.add_row("Severity", item.severity)
-                if hasattr(item, "progress"):
-                    table.add_row("Progress", f"{item.progress}%")
-                if hasattr(item, "cmd") and item.cmd:
-                    table.add_row("Command", item.cmd)
-                if hasattr(item, "cmd_params") and item.cmd_params:
-                    table.add_row("Parameters", item.cmd_params)
-                if hasattr(item, "created_at") and item.created_at:
-                    table.add_row("Created", str(item.created_at))
-                if hasattr(item, "updated_at") and item.updated_at:
-                    table.add_row("Updated", str(item.updated_at))
-
-                console.print(table)
-                return
+        # One indexed registry lookup instead of probing every layer table
+        item = resolve_node(session, item_id)
+        if item is None:
+            console.print(f"❌ Item with ID {item_id} not found.")
+            return
+
+        # Display item details
+        layer_name = LAYER_NAMES.get(type(item), "Unknown")
+        table = Table(title=f"{layer_name} Details")
+        table.add_column("Field", style="cyan")
+        table.add_column("Value", style="white")
+
+        table.add_row("ID", str(get_node_id(session, item)))
+        table.add_row("Type", layer_name)
+        table.add_row("Row ID", str(item.id))
+
+        # Handle different attribute names for different model types
+        if hasattr(item, "title"):
+            title = item.title or "No title"
+        elif hasattr(item, "name"):
+            title = item.name or "No name"
+        else:
+            title = "No title"
+
+        table.add_row("Title", title)
+
+        if hasattr(item, "description") and item.description:
+            table.add_row("Description", item.description)
+        if hasattr(item, "owner") and item.owner:
+            table.add_row("Owner", item.owner)
+        if hasattr(item, "status") and item.status:
+            table.add_row("Status", item.status)
+        if hasattr(item, "severity") and item.severity:
+            table.add_row("Severity", item.severity)
+        if hasattr(item, "progress"):
+            table.add_row("Progress", f"{item.progress}%")
+        if hasattr(item, "cmd") and item.cmd:
+            table.add_row("Command", item.cmd)
+        if hasattr(item, "cmd_params") and item.cmd_params:
+            table.add_row("Parameters", item.cmd_params)
+        if hasattr(item, "created_at") and item.created_at:
+            table.add_row("Created", str(item.created_at))
+        if hasattr(item, "updated_at") and item.updated_at:
+            table.add_row("Updated", str(item.updated_at))
 
-        console.print(f"❌ Item with ID {item_id} not found.")
+        console.print(table)
 
     except Exception as e:
         console.print(f"❌ Error getting item: {e}")
@@ -408,71 +457,34 @@ def get(ctx: click.Context, item_id: int) -> None:
 @cli.command()
 @click.argument("query")
 @click.option("--layer", help="Search in specific layer only")
+@click.option("--limit", default=20, type=int, help="Results per page")
+@click.option("--page", default=1, type=int, help="Page number (1-based)")
 @click.pass_context
-def search(ctx: click.Context, query: str, layer: str | None) -> None:
-    """Search for items."""
+def search(
+    ctx: click.Context, query: str, layer: str | None, limit: int, page: int
+) -> None:
+    """Search for items (ranked full-text search)."""
     database_url = ctx.obj["database_url"]
     session, _engine = get_session(database_url)
 
     try:
-        # Determine which models to search
+        layer_name = None
         if layer:
-            model_classes = [MODEL_MAP.get(layer.lower())]
-            if not model_classes or not model_classes[0]:
+            model_class = MODEL_MAP.get(layer.lower())
+            if not model_class:
                 console.print(f"❌ Unknown layer: {layer}")
                 return
-        else:
-            model_classes = [
-                Goal,
-                Concept,
-                Context,
-                Constraints,
-                Requirements,
-                AcceptanceCriteria,
-                InterfaceContract,
-                Phase,
-                Step,
-                Task,
-                SubTask,
-                Command,
-                Label,
-            ]
-
-        matching_items = []
-        search_lower = query.lower()
-
-        for model_class in model_classes:
-            if not model_class:
-                continue
-
-            # Search in title and description fields
-            items = session.query(model_class).all()
-            for item in items:
-                match = False
-
-                if (
-                    (
-                        hasattr(item, "title")
-                        and item.title
-                        and search_lower in item.title.lower()
-                    )
-                    or (
-                        hasattr(item, "description")
-                        and item.description
-                        and search_lower in item.description.lower()
-                    )
-                    or (
-                        hasattr(item, "owner")
-                        and item.owner
-                        and search_lower in item.owner.lower()
-                    )
-                ):
-                    match = True
-
-                if match:
-                    matching_items.append(item)
+            layer_name = model_class.__name__
+
+        results = search_index(
+            session,
+            query,
+            layer=layer_name,
+            limit=limit,
+            offset=(max(page, 1) - 1) * limit,
+        )
 
-        if not matching_items:
+        if not results.hits:
             console.print(f"No items found matching '{query}'.")
             return
 
@@ -484,25 +496,24 @@ def search(ctx: click.Context, query: str, layer: str | None) -> None:
         table.add_column("Owner", style="green")
         table.add_column("Status", style="yellow")
 
-        for item in matching_items:
-            # Handle different attribute names for different model types
-            if hasattr(item, "title"):
-                title = item.title or "No title"
-            elif hasattr(item, "name"):
-                title = item.name or "No name"
-            else:
-                title = "No title"
-
+        for hit in results.hits:
+            item = hit.item
             table.add_row(
-                str(item.id),
+                str(hit.node_id),
                 LAYER_NAMES.get(type(item), "Unknown"),
-                title,
+                getattr(item, "title", None)
+                or getattr(item, "name", None)
+                or "No title",
                 getattr(item, "owner", None) or "No owner",
                 getattr(item, "status", None) or "No status",
             )
 
         console.print(table)
-        console.print(f"\nFound {len(matching_items)} matching items.")
+        first = results.offset + 1
+        last = results.offset + len(results.hits)
+        console.print(
+            f"\nShowing {first}-{last} of {results.total} matching items."
+        )
 
     except Exception as e:
         console.print(f"❌ Error searching items: {e}")
@@ -521,32 +532,23 @@ def stats(ctx: click.Context) -> None:
         table = Table(title="Database Statistics")
         table.add_column("Layer", style="cyan")
         table.add_column("Count", justify="right", style="green")
+        table.add_column("By status", style="yellow")
 
-        total_count = 0
-
-        for model_class in [
-            Goal,
-            Concept,
-            Context,
-            Constraints,
-            Requirements,
-            AcceptanceCriteria,
-            InterfaceContract,
-            Phase,
-            Step,
-            Task,
-            SubTask,
-            Command,
-            Label,
-        ]:
-            count = session.query(model_class).count()
+        # All layers and statuses in one grouped query
+        counts = count_items(session)
+        for layer, count in counts.layers.items():
             if count > 0:
-                table.add_row(
-                    LAYER_NAMES.get(model_class, "Unknown"), str(count)
+                by_status = ", ".join(
+                    f"{status}: {n}"
+                    for status, n in sorted(
+                        counts.statuses[layer].items(),
+                        key=lambda item: str(item[0]),
+                    )
+                    if status is not None
                 )
-                total_count += count
+                table.add_row(layer, str(count), by_status)
 
-        table.add_row("TOTAL", str(total_count), style="bold red")
+        table.add_row("TOTAL", str(counts.total), "", style="bold red")
         console.print(table)
 
     except Exception as e:
@@ -555,6 +557,326 @@ def stats(ctx: click.Context) -> None:
         session.close()
 
 
+@cli.command("import")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--upsert",
+    is_flag=True,
+    help="Update items given with an id (labels by name) instead of failing",
+)
+@click.option(
+    "--batch-size",
+    default=BATCH_SIZE,
+    type=click.IntRange(min=1),
+    help="Rows written per batch",
+)
+@click.pass_context
+def import_(
+    ctx: click.Context, file: str, upsert: bool, batch_size: int
+) -> None:
+    """Bulk import items from a JSON or YAML file.
+
+    The file holds a list of items, each with a "layer" key, or a mapping
+    of layer name to a list of items. Items may carry "labels" (names),
+    "parents" (node IDs such as Goal-1, or another item's "ref") and a
+    file-local "ref".
+    """
+    database_url = ctx.obj["database_url"]
+    session, _engine = get_session(database_url)
+
+    try:
+        with open(file, encoding="utf-8") as handle:
+            if file.endswith((".yaml", ".yml")):
+                data = yaml.safe_load(handle)
+            else:
+                data = json.load(handle)
+        if isinstance(data, dict):
+            data = [
+                {**item, "layer": layer}
+                for layer, items in data.items()
+                for item in items or []
+            ]
+
+        results = import_items(
+            session, data or [], upsert=upsert, batch_size=batch_size
+        )
+
+        table = Table(title="Import")
+        table.add_column("Layer", style="cyan")
+        table.add_column("Created", justify="right", style="green")
+        table.add_column("Updated", justify="right", style="green")
+        table.add_column("Labels", justify="right")
+        table.add_column("Links", justify="right")
+        table.add_column("Rows/s", justify="right", style="yellow")
+        for result in results:
+            table.add_row(
+                result.layer,
+                str(result.created),
+                str(result.updated),
+                str(result.labels),
+                str(result.links),
+                f"{result.rows_per_second:,.0f}",
+            )
+        console.print(table)
+
+        rows = sum(r.created + r.updated for r in results)
+        seconds = sum(r.seconds for r in results)
+        console.print(f"✅ Imported {rows} items in {seconds:.2f}s")
+
+    except Exception as e:
+        console.print(f"❌ Error importing items: {e}")
+        session.rollback()
+        sys.exit(1)
+    finally:
+        session.close()
+
+
+@cli.command()
+@click.argument("file", default="-", type=click.File("w", encoding="utf-8"))
+@click.option(
+    "--format",
+    "export_format",
+    type=click.Choice(tuple(EXPORT_FORMATS)),
+    help="Output format (default: from the file suffix, else ndjson)",
+)
+@click.option(
+    "--layer",
+    "layers",
+    multiple=True,
+    help="Export only this layer (repeatable)",
+)
+@click.option(
+    "--batch-size",
+    default=EXPORT_BATCH_SIZE,
+    type=click.IntRange(min=1),
+    help="Rows read per batch",
+)
+@click.pass_context
+def export(
+    ctx: click.Context,
+    file: TextIO,
+    export_format: str | None,
+    layers: tuple[str, ...],
+    batch_size: int,
+) -> None:
+    """Stream all nodes to FILE (default: stdout) as NDJSON or YAML."""
+    if export_format is None:
+        export_format = (
+            "yaml" if file.name.endswith((".yaml", ".yml")) else "ndjson"
+        )
+    database_url = ctx.obj["database_url"]
+    session, _engine = get_session(database_url)
+
+    try:
+        written = export_nodes(
+            session,
+            file,
+            format=export_format,
+            layers=layers or None,
+            batch_size=batch_size,
+        )
+        # Keep stdout clean for the data itself
+        click.echo(f"✅ Exported {written} nodes", err=True)
+
+    except Exception as e:
+        click.echo(f"❌ Error exporting nodes: {e}", err=True)
+        sys.exit(1)
+    finally:
+        session.close()
+
+
+@cli.command("export-columnar")
+@click.argument("directory", type=click.Path(file_okay=False))
+@click.option(
+    "--format",
+    "columnar_format",
+    type=click.Choice(tuple(COLUMNAR_FORMATS)),
+    default="parquet",
+    help="Parquet files or Arrow IPC files",
+)
+@click.option(
+    "--layer",
+    "layers",
+    multiple=True,
+    help="Export only this layer (repeatable)",
+)
+@click.option(
+    "--batch-size",
+    default=COLUMNAR_BATCH_SIZE,
+    type=click.IntRange(min=1),
+    help="Rows per record batch",
+)
+@click.pass_context
+def export_columnar_cmd(
+    ctx: click.Context,
+    directory: str,
+    columnar_format: str,
+    layers: tuple[str, ...],
+    batch_size: int,
+) -> None:
+    """Write layer tables and edge lists to DIRECTORY for analytics."""
+    database_url = ctx.obj["database_url"]
+    session, _engine = get_session(database_url)
+
+    try:
+        rows = export_columnar(
+            session,
+            directory,
+            format=columnar_format,
+            layers=layers or None,
+            batch_size=batch_size,
+        )
+
+        table = Table(title=f"Exported to {directory}")
+        table.add_column("File", style="cyan")
+        table.add_column("Rows", justify="right", style="green")
+        suffix = COLUMNAR_FORMATS[columnar_format]
+        for name, count in rows.items():
+            table.add_row(f"{name}.{suffix}", f"{count:,}")
+        console.print(table)
+
+    except Exception as e:
+        console.print(f"❌ Error exporting tables: {e}")
+        sys.exit(1)
+    finally:
+        session.close()
+
+
+@cli.command()
+@click.option(
+    "--target",
+    type=click.Choice(["all", "registry", "closure", "search", "counts"]),
+    default="all",
+    help="Which derived index to rebuild",
+)
+@click.pass_context
+def reindex(ctx: click.Context, target: str) -> None:
+    """Rebuild derived index tables for an existing database."""
+    database_url = ctx.obj["database_url"]
+    session, _engine = get_session(database_url)
+
+    try:
+        if target in ("all", "registry"):
+            added = backfill_node_registry(session)
+            console.print(
+                f"✅ Node registry: {sum(added.values())} nodes registered"
+            )
+        if target in ("all", "closure"):
+            rows = rebuild_closure(session)
+            console.print(f"✅ Hierarchy closure: {rows} rows rebuilt")
+        if target in ("all", "search"):
+            rows = rebuild_search_index(session)
+            console.print(f"✅ Search index: {rows} items indexed")
+        # The counters table is opt-in: "counts" enables it, "all" only
+        # rebuilds it when it is already enabled
+        if target == "counts" or (
+            target == "all" and counters_enabled(session)
+        ):
+            counts = enable_counters(session)
+            console.print(f"✅ Item counters: {counts.total} items counted")
+
+    except Exception as e:
+        console.print(f"❌ Error rebuilding indexes: {e}")
+        session.rollback()
+        sys.exit(1)
+    finally:
+        session.close()
+
+
+@cli.group()
+def copy() -> None:
+    """Bulk export/import of whole tables with PostgreSQL COPY."""
+
+
+def _print_copied(title: str, rows: dict[str, int]) -> None:
+    """Print rows copied per table, skipping tables with nothing new."""
+    table = Table(title=title)
+    table.add_column("Table", style="cyan")
+    table.add_column("Rows", justify="right", style="green")
+    for name, count in rows.items():
+        if count:
+            table.add_row(name, f"{count:,}")
+    table.add_row("TOTAL", f"{sum(rows.values()):,}", style="bold")
+    console.print(table)
+
+
+@copy.command("export")
+@click.argument("directory", type=click.Path(file_okay=False))
+@click.option(
+    "--format",
+    "copy_format",
+    type=click.Choice(COPY_FORMATS),
+    default="csv",
+    help="COPY data format",
+)
+@click.option(
+    "--chunk-rows",
+    default=CHUNK_ROWS,
+    type=click.IntRange(min=1),
+    help="Rows per chunk file",
+)
+@click.option(
+    "--table",
+    "tables",
+    multiple=True,
+    help="Export only this table (repeatable)",
+)
+@click.pass_context
+def copy_export(
+    ctx: click.Context,
+    directory: str,
+    copy_format: str,
+    chunk_rows: int,
+    tables: tuple[str, ...],
+) -> None:
+    """Export tables to DIRECTORY; rerun to resume an interrupted export."""
+    engine = get_database_engine(ctx.obj["database_url"])
+
+    try:
+        rows = export_tables(
+            engine,
+            directory,
+            tables=tables or None,
+            format=copy_format,
+            chunk_rows=chunk_rows,
+        )
+        _print_copied(f"Exported to {directory}", rows)
+    except Exception as e:
+        console.print(f"❌ Error exporting tables: {e}")
+        sys.exit(1)
+
+
+@copy.command("import")
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--table",
+    "tables",
+    multiple=True,
+    help="Import only this table (repeatable)",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(IMPORT_MODES),
+    default="empty",
+    help="Refuse, truncate or upsert into tables that already hold rows",
+)
+@click.pass_context
+def copy_import(
+    ctx: click.Context, directory: str, tables: tuple[str, ...], mode: str
+) -> None:
+    """Import an export DIRECTORY; rerun to resume an interrupted import."""
+    engine = get_database_engine(ctx.obj["database_url"])
+
+    try:
+        rows = import_tables(
+            engine, directory, tables=tables or None, mode=mode
+        )
+        _print_copied(f"Imported from {directory}", rows)
+    except Exception as e:
+        console.print(f"❌ Error importing tables: {e}")
+        sys.exit(1)
+
+
 def main() -> None:
     """Main entry point for the CLI."""
     cli()
@@ -33,6 +33,8 @@ from .core.models import (
     Goal,
     InterfaceContract,
     Label,  # Shared model for many-to-many relationships
+    NodeClosure,  # Ancestor/descendant closure of the hierarchy
+    NodeRegistry,  # Global node ID index across all layers
     Phase,
     Requirements,
     Step,
@@ -40,6 +42,35 @@ from .core.models import (
     Task,
 )
 
+# Bulk create/upsert (batched executemany, block-allocated ids)
+from .core.bulk import BulkResult, bulk_create, bulk_upsert, import_items
+
+# Columnar Parquet/Arrow export (needs the optional pyarrow)
+from .core.columnar import export_columnar
+
+# Cached item counts (one grouped query; optional counters table)
+from .core.counts import count_items, enable_counters
+
+# Streaming NDJSON/YAML export in the ToDoWrite schema shape
+from .core.export import export_nodes, iter_nodes
+
+# Hierarchy closure (single-query subtree and ancestor lookups)
+from .core.hierarchy import ancestors, descendants, rebuild_closure
+
+# Cross-layer listing (one UNION ALL query, keyset cursor pagination)
+from .core.listing import list_items
+
+# Global node registry (one ID space across all layers)
+from .core.node_registry import (
+    backfill_node_registry,
+    format_node_id,
+    get_node_id,
+    resolve_node,
+)
+
+# Full-text search (FTS5 on SQLite, tsvector on PostgreSQL)
+from .core.search import rebuild_search_index, search
+
 # Schema validation and database management
 from .core.schema_validator import (
     DatabaseInitializationError,
@@ -55,6 +86,7 @@ __all__ = [
     "AcceptanceCriteria",
     # Database utilities
     "Base",
+    "BulkResult",
     "Command",
     "Concept",
     "Constraints",
@@ -65,6 +97,8 @@ __all__ = [
     "Goal",
     "InterfaceContract",
     "Label",
+    "NodeClosure",
+    "NodeRegistry",
     "Phase",
     "Requirements",
     "SchemaValidationError",
@@ -77,9 +111,27 @@ __all__ = [
     "__description__",
     "__title__",
     "__version__",
+    "ancestors",
+    "backfill_node_registry",
+    "bulk_create",
+    "bulk_upsert",
+    "count_items",
     "create_engine",
+    "descendants",
+    "enable_counters",
+    "export_columnar",
+    "export_nodes",
+    "format_node_id",
+    "get_node_id",
     "get_schema_validator",
+    "import_items",
     "initialize_database",
+    "iter_nodes",
+    "list_items",
+    "rebuild_closure",
+    "rebuild_search_index",
+    "resolve_node",
+    "search",
     "sessionmaker",
     "validate_model_data",
 ]
@@ -11,6 +11,8 @@ from .models import (
     Goal,
     InterfaceContract,
     Label,
+    NodeClosure,
+    NodeRegistry,
     Phase,
     Requirements,
     Step,
@@ -35,6 +37,8 @@ __all__ = [
     "Goal",
     "InterfaceContract",
     "Label",
+    "NodeClosure",
+    "NodeRegistry",
     "Phase",
     "Requirements",
     "Step",
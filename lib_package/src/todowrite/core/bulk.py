@@ -0,0 +1,594 @@
+"""
+Bulk create and upsert for ToDoWrite layer models.
+
+Creating items one at a time through the ORM costs several round trips per
+row: the INSERT, the node registry entry, a refresh to learn the generated
+id, then one statement per label and parent link. Importing a large plan
+that way takes minutes.
+
+The bulk API writes each batch of rows with a handful of statements:
+
+1. Row ids for the whole batch are allocated up front by the engine's
+   :class:`~todowrite.core.sequence_manager.SequenceManager` (hi/lo
+   blocks of ``nextval`` values on PostgreSQL, so consecutive batches
+   share one reservation; the write lock plus ``max(id)`` on SQLite), so
+   nothing has to be read back before links can be written.
+2. Layer rows, registry entries, label links and parent links each go to
+   the database as one executemany per batch. The join tables' triggers
+   add the closure rows of the new links (:mod:`todowrite.core.hierarchy`).
+
+Rows are plain dicts of column values. Two extra keys attach links in the
+same batch: ``labels`` (label names, created when missing) and ``parents``
+(global node IDs, typed IDs such as ``"Goal-3"`` or model instances).
+Parents must exist before their children are written, so import higher
+layers first; :func:`import_items` does that for a mixed list.
+
+Every call reports its throughput in a :class:`BulkResult`.
+
+Example:
+    >>> from todowrite.core.bulk import bulk_create
+    >>>
+    >>> result = bulk_create(session, "Task", [
+    ...     {"title": "Write docs", "labels": ["docs"], "parents": ["Goal-1"]},
+    ...     {"title": "Ship it", "status": "in_progress"},
+    ... ])
+    >>> print(f"{result.created} rows at {result.rows_per_second:.0f}/s")
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from datetime import UTC, datetime
+from itertools import islice
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from sqlalchemy import Text, bindparam, insert, select, update
+
+from .counts import note_layer_writes
+from .hierarchy import HIERARCHY_EDGES, HierarchyEdge
+from .models import LABEL_TABLES, LAYER_MODELS, Base, NodeRegistry
+from .node_registry import format_node_id, layer_of, parse_node_id
+from .sequence_manager import sequence_manager_for
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping
+
+    from sqlalchemy import Connection, Table
+    from sqlalchemy.orm import Session
+
+# Rows written per batch of statements
+BATCH_SIZE = 1000
+
+NodeKey = tuple[str, int]
+
+
+class BulkResult(NamedTuple):
+    """Outcome and throughput of one bulk call."""
+
+    layer: str
+    ids: list[int]  # row ids, in input order
+    created: int
+    updated: int
+    labels: int  # label links added
+    links: int  # parent links added
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        """Rows written per second of wall-clock time."""
+        rows = self.created + self.updated
+        return rows / self.seconds if self.seconds > 0 else float(rows)
+
+
+# Child layer -> parent layer -> join table
+_PARENT_EDGES: dict[str, dict[str, HierarchyEdge]] = {}
+for _edge in HIERARCHY_EDGES:
+    _PARENT_EDGES.setdefault(_edge.child_layer, {})[_edge.parent_layer] = _edge
+
+
+def _batches(rows: Iterable[Mapping[str, Any]], size: int) -> Iterator[list]:
+    """Split ``rows`` into lists of at most ``size``."""
+    if size < 1:
+        raise ValueError("batch_size must be at least 1")
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _layer_model(layer: str) -> type[Base]:
+    model = LAYER_MODELS.get(layer)
+    if model is None:
+        raise ValueError(f"Unknown layer: {layer}")
+    return model
+
+
+def _split(
+    model: type[Base], batch: list[Mapping[str, Any]]
+) -> tuple[list[dict[str, Any]], list[list[str]], list[list[Any]]]:
+    """Separate column values from the ``labels`` and ``parents`` keys."""
+    table = model.__table__
+    values, labels, parents = [], [], []
+    for row in batch:
+        row = dict(row)
+        labels.append(list(row.pop("labels", None) or []))
+        parents.append(list(row.pop("parents", None) or []))
+        unknown = set(row) - set(table.c.keys())
+        if unknown:
+            raise ValueError(
+                f"Unknown {model.__name__} field(s): "
+                f"{', '.join(sorted(unknown))}"
+            )
+        for key, value in row.items():
+            # JSON text columns (extra_data, runtime_env, ...) take objects
+            if isinstance(value, dict | list) and isinstance(
+                table.c[key].type, Text
+            ):
+                row[key] = json.dumps(value)
+        values.append(row)
+    return values, labels, parents
+
+
+def _insert_rows(
+    connection: Connection,
+    layer: str,
+    rows: list[dict[str, Any]],
+    now: datetime,
+) -> list[int]:
+    """Insert ``rows`` with allocated ids and register them as nodes."""
+    if not rows:
+        return []
+    table = LAYER_MODELS[layer].__table__
+    ids = sequence_manager_for(connection.engine).allocate_ids(
+        table.name, len(rows), connection=connection
+    )
+    for row, row_id in zip(rows, ids, strict=True):
+        row["id"] = row_id
+
+    # executemany needs the same keys in every row: fill the gaps with the
+    # column default, or the batch timestamp for server-side defaults
+    for key in set().union(*rows):
+        column = table.c[key]
+        if column.default is not None and column.default.is_scalar:
+            default = column.default.arg
+        elif column.server_default is not None:
+            default = now
+        else:
+            default = None
+        for row in rows:
+            row.setdefault(key, default)
+
+    connection.execute(insert(table), rows)
+    connection.execute(
+        insert(NodeRegistry.__table__),
+        [{"layer": layer, "row_id": row_id} for row_id in ids],
+    )
+    return ids
+
+
+def _label_ids(
+    connection: Connection, names: set[str], now: datetime
+) -> dict[str, int]:
+    """Look up label ids by name, creating the missing labels."""
+    table = LAYER_MODELS["Label"].__table__
+    found = dict(
+        connection.execute(
+            select(table.c.name, table.c.id).where(table.c.name.in_(names))
+        ).all()
+    )
+    missing = sorted(names - set(found))
+    if missing:
+        ids = _insert_rows(
+            connection, "Label", [{"name": name} for name in missing], now
+        )
+        found.update(zip(missing, ids, strict=True))
+    return found
+
+
+def _parent_keys(
+    connection: Connection, layer: str, refs: set[Any]
+) -> dict[Any, NodeKey]:
+    """Resolve parent references and check they may parent ``layer``."""
+    keys: dict[Any, NodeKey] = {}
+    global_ids: dict[int, Any] = {}
+    for ref in refs:
+        if isinstance(ref, Base):
+            keys[ref] = (layer_of(ref), ref.id)
+        elif isinstance(ref, str) and not ref.strip().isdigit():
+            key = parse_node_id(ref)
+            if key is None:
+                raise ValueError(f"Invalid parent node ID: {ref!r}")
+            keys[ref] = key
+        else:
+            global_ids[int(ref)] = ref
+
+    if global_ids:
+        registry = NodeRegistry.__table__.c
+        found = {
+            row.id: (row.layer, row.row_id)
+            for row in connection.execute(
+                select(registry.id, registry.layer, registry.row_id).where(
+                    registry.id.in_(global_ids)
+                )
+            )
+        }
+        for node_id, ref in global_ids.items():
+            if node_id not in found:
+                raise ValueError(f"Unknown parent node: {ref}")
+            keys[ref] = found[node_id]
+
+    allowed = _PARENT_EDGES.get(layer, {})
+    by_layer: dict[str, set[int]] = {}
+    for parent_layer, row_id in keys.values():
+        if parent_layer not in allowed:
+            raise ValueError(f"A {parent_layer} cannot parent a {layer}")
+        by_layer.setdefault(parent_layer, set()).add(row_id)
+    # Typed IDs were not read from the database; make sure they exist
+    for parent_layer, row_ids in by_layer.items():
+        table = LAYER_MODELS[parent_layer].__table__
+        present = set(
+            connection.execute(
+                select(table.c.id).where(table.c.id.in_(row_ids))
+            ).scalars()
+        )
+        if row_ids - present:
+            missing = min(row_ids - present)
+            raise ValueError(
+                f"Unknown parent node: {format_node_id(parent_layer, missing)}"
+            )
+    return keys
+
+
+def _existing_pairs(
+    connection: Connection,
+    table: Table,
+    item_column: str,
+    other_column: str,
+    ids: list[int],
+) -> set[tuple[int, int]]:
+    """(item, other) pairs already in a join table for the given items."""
+    return set(
+        connection.execute(
+            select(table.c[item_column], table.c[other_column]).where(
+                table.c[item_column].in_(ids)
+            )
+        ).all()
+    )
+
+
+def _write_links(
+    connection: Connection,
+    layer: str,
+    ids: list[int],
+    labels: list[list[str]],
+    parents: list[list[Any]],
+    now: datetime,
+    created: bool,
+) -> tuple[int, int]:
+    """
+    Attach labels and parents to the rows ``ids`` of one batch.
+
+    Links that already exist are skipped for updated rows. Closure rows of
+    created rows are added set-based; those of updated rows, which may
+    have children of their own, edge by edge.
+
+    Returns:
+        Numbers of label links and parent links added
+    """
+    label_count = link_count = 0
+
+    names = {name for row_labels in labels for name in row_labels}
+    if names:
+        if layer not in LABEL_TABLES:
+            raise ValueError(f"{layer} items cannot carry labels")
+        table, item_column, label_column = LABEL_TABLES[layer]
+        label_ids = _label_ids(connection, names, now)
+        pairs = {
+            (row_id, label_ids[name])
+            for row_id, row_labels in zip(ids, labels, strict=True)
+            for name in row_labels
+        }
+        if not created:
+            pairs -= _existing_pairs(
+                connection, table, item_column, label_column, ids
+            )
+        if pairs:
+            connection.execute(
+                insert(table),
+                [
+                    {item_column: row_id, label_column: label_id}
+                    for row_id, label_id in sorted(pairs)
+                ],
+            )
+        label_count = len(pairs)
+
+    refs = {ref for row_parents in parents for ref in row_parents}
+    if refs:
+        keys = _parent_keys(connection, layer, refs)
+        edges: dict[str, set[tuple[int, int]]] = {}
+        for row_id, row_parents in zip(ids, parents, strict=True):
+            for ref in row_parents:
+                parent_layer, parent_id = keys[ref]
+                edges.setdefault(parent_layer, set()).add((parent_id, row_id))
+
+        link_count = 0
+        for parent_layer, pairs in edges.items():
+            edge = _PARENT_EDGES[layer][parent_layer]
+            if not created:
+                pairs -= {
+                    (parent_id, row_id)
+                    for row_id, parent_id in _existing_pairs(
+                        connection,
+                        edge.table,
+                        edge.child_column,
+                        edge.parent_column,
+                        ids,
+                    )
+                }
+            if pairs:
+                # The join table's triggers add the closure rows
+                connection.execute(
+                    insert(edge.table),
+                    [
+                        {edge.parent_column: parent, edge.child_column: child}
+                        for parent, child in sorted(pairs)
+                    ],
+                )
+            link_count += len(pairs)
+
+    return label_count, link_count
+
+
+def bulk_create(
+    session: Session,
+    layer: str,
+    rows: Iterable[Mapping[str, Any]],
+    batch_size: int = BATCH_SIZE,
+    commit: bool = True,
+) -> BulkResult:
+    """
+    Insert many items of one layer, with their labels and parent links.
+
+    Args:
+        session: Active SQLAlchemy session
+        layer: Layer name (e.g. ``"Task"``)
+        rows: Column values per item, optionally with ``labels`` (names)
+            and ``parents`` (node IDs or instances); ids are assigned
+        batch_size: Rows written per batch of statements
+        commit: Commit the session when done
+
+    Returns:
+        The new row ids in input order, link counts and throughput
+
+    Raises:
+        ValueError: If the layer, a field, a label or a parent is invalid
+    """
+    model = _layer_model(layer)
+    started = time.perf_counter()
+    session.flush()  # parents may still be pending ORM objects
+    connection = session.connection()
+    now = datetime.now(UTC)
+    ids: list[int] = []
+    labels = links = 0
+
+    for batch in _batches(rows, batch_size):
+        values, names, parents = _split(model, batch)
+        if any("id" in row for row in values):
+            raise ValueError(
+                "bulk_create assigns ids; use bulk_upsert to update rows"
+            )
+        batch_ids = _insert_rows(connection, layer, values, now)
+        batch_labels, batch_links = _write_links(
+            connection, layer, batch_ids, names, parents, now, created=True
+        )
+        ids += batch_ids
+        labels += batch_labels
+        links += batch_links
+
+    if ids:
+        note_layer_writes(session)
+    if commit:
+        session.commit()
+    return BulkResult(
+        layer, ids, len(ids), 0, labels, links, time.perf_counter() - started
+    )
+
+
+def bulk_upsert(
+    session: Session,
+    layer: str,
+    rows: Iterable[Mapping[str, Any]],
+    key: str = "id",
+    batch_size: int = BATCH_SIZE,
+    commit: bool = True,
+) -> BulkResult:
+    """
+    Update items matched on a unique column and create the rest.
+
+    Matched rows get the given columns overwritten (``updated_at`` is
+    refreshed) and any labels or parents they do not have yet. Rows
+    without a ``key`` value are created.
+
+    Args:
+        session: Active SQLAlchemy session
+        layer: Layer name (e.g. ``"Task"``)
+        rows: Column values per item, as for :func:`bulk_create`
+        key: Unique column matching rows to items: ``"id"``, or e.g.
+            ``"name"`` for labels (unmatched names are created)
+        batch_size: Rows written per batch of statements
+        commit: Commit the session when done
+
+    Returns:
+        The row ids in input order, created/updated counts and throughput
+
+    Raises:
+        ValueError: If ``key`` is not unique, an id does not exist, or a
+            field, label or parent is invalid
+    """
+    model = _layer_model(layer)
+    table = model.__table__
+    if key not in table.c or not (
+        table.c[key].primary_key or table.c[key].unique
+    ):
+        raise ValueError(f"{layer}.{key} is not a unique column")
+
+    started = time.perf_counter()
+    session.flush()  # parents may still be pending ORM objects
+    connection = session.connection()
+    now = datetime.now(UTC)
+    ids: list[int] = []
+    created = updated = labels = links = 0
+
+    for batch in _batches(rows, batch_size):
+        values, names, parents = _split(model, batch)
+        keys = {row[key] for row in values if row.get(key) is not None}
+        existing = dict(
+            connection.execute(
+                select(table.c[key], table.c.id).where(table.c[key].in_(keys))
+            ).all()
+        )
+        if key == "id" and keys - set(existing):
+            raise ValueError(f"No {layer} with id {min(keys - set(existing))}")
+
+        new, old = [], []
+        for i, row in enumerate(values):
+            (old if row.get(key) in existing else new).append(i)
+        batch_ids = [0] * len(values)
+
+        new_ids = _insert_rows(
+            connection, layer, [values[i] for i in new], now
+        )
+        for i, row_id in zip(new, new_ids, strict=True):
+            batch_ids[i] = row_id
+
+        # One executemany per distinct set of updated columns
+        groups: dict[frozenset[str], list[dict[str, Any]]] = {}
+        for i in old:
+            row = values[i]
+            batch_ids[i] = existing[row[key]]
+            columns = frozenset(row) - {key, "id"}
+            if columns:
+                groups.setdefault(columns, []).append(
+                    {**{c: row[c] for c in columns}, "_id": batch_ids[i]}
+                )
+        for group in groups.values():
+            connection.execute(
+                update(table).where(table.c.id == bindparam("_id")), group
+            )
+
+        for indexes, is_new in ((new, True), (old, False)):
+            if indexes:
+                batch_labels, batch_links = _write_links(
+                    connection,
+                    layer,
+                    [batch_ids[i] for i in indexes],
+                    [names[i] for i in indexes],
+                    [parents[i] for i in indexes],
+                    now,
+                    created=is_new,
+                )
+                labels += batch_labels
+                links += batch_links
+
+        ids += batch_ids
+        created += len(new)
+        updated += len(old)
+
+    if ids:
+        note_layer_writes(session, layer, ids)
+    if commit:
+        session.commit()
+    return BulkResult(
+        layer,
+        ids,
+        created,
+        updated,
+        labels,
+        links,
+        time.perf_counter() - started,
+    )
+
+
+def import_items(
+    session: Session,
+    items: Iterable[Mapping[str, Any]],
+    upsert: bool = False,
+    batch_size: int = BATCH_SIZE,
+    commit: bool = True,
+) -> list[BulkResult]:
+    """
+    Import a mixed list of items, one bulk call per layer.
+
+    Each item names its ``layer`` (case-insensitive). An item may carry a
+    file-local ``ref``; other items list that ref in ``parents`` to link to
+    it before it has an id. Layers are written top-down (labels first, then
+    Goal through Command) so parents always exist before their children.
+
+    Args:
+        session: Active SQLAlchemy session
+        items: Item dicts as for :func:`bulk_create`, plus ``layer`` and
+            an optional ``ref``
+        upsert: Update items given with an ``id`` (labels by ``name``)
+            instead of only creating
+        batch_size: Rows written per batch of statements
+        commit: Commit once every layer is written
+
+    Returns:
+        One result per layer written, in write order
+
+    Raises:
+        ValueError: If an item is invalid; nothing is committed then
+    """
+    names = {name.lower(): name for name in LAYER_MODELS}
+    by_layer: dict[str, list[dict[str, Any]]] = {}
+    for item in items:
+        item = dict(item)
+        layer = names.get(str(item.pop("layer", "")).lower())
+        if layer is None:
+            raise ValueError(f"Unknown layer in item: {dict(item)}")
+        by_layer.setdefault(layer, []).append(item)
+
+    refs: dict[str, str] = {}
+    results = []
+    order = ["Label", *(name for name in LAYER_MODELS if name != "Label")]
+    for layer in order:
+        rows = by_layer.get(layer)
+        if not rows:
+            continue
+        local = [row.pop("ref", None) for row in rows]
+        for row in rows:
+            if row.get("parents"):
+                row["parents"] = [
+                    refs.get(ref, ref) if isinstance(ref, str) else ref
+                    for ref in row["parents"]
+                ]
+        if upsert:
+            result = bulk_upsert(
+                session,
+                layer,
+                rows,
+                key="name" if layer == "Label" else "id",
+                batch_size=batch_size,
+                commit=False,
+            )
+        else:
+            result = bulk_create(
+                session, layer, rows, batch_size=batch_size, commit=False
+            )
+        for ref, row_id in zip(local, result.ids, strict=True):
+            if ref is not None:
+                refs[str(ref)] = format_node_id(layer, row_id)
+        results.append(result)
+
+    if commit:
+        session.commit()
+    return results
+
+
+__all__ = [
+    "BATCH_SIZE",
+    "BulkResult",
+    "bulk_create",
+    "bulk_upsert",
+    "import_items",
+]
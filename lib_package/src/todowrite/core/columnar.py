@@ -0,0 +1,284 @@
+"""
+Columnar Parquet / Arrow IPC export for analytics.
+
+Paging JSON through the REST API turns every value into a Python object
+twice. This export writes each layer table, a flattened hierarchy edge
+list and the item/label links straight into typed Arrow record batches:
+
+- integers as ``int64``, text as ``string``;
+- timestamps as native ``timestamp[us, UTC]``;
+- low-cardinality text (status, severity, work type, layer names) as
+  dictionary-encoded columns.
+
+Rows are read in batches with ``yield_per`` (a server-side cursor on
+PostgreSQL) as Core rows, transposed to columns and appended as one
+record batch (a Parquet row group) each, so memory is bounded by the
+batch size and a large export is dominated by I/O. Dictionaries grow
+across batches rather than being rebuilt per batch, which keeps the
+indices of one file comparable and lets Arrow IPC files use dictionary
+deltas.
+
+pyarrow is an optional dependency (``pip install todowrite[arrow]``).
+
+Example:
+    >>> from todowrite.core.columnar import export_columnar
+    >>>
+    >>> rows = export_columnar(session, "warehouse/", format="parquet")
+    >>> import pandas as pd
+    >>> tasks = pd.read_parquet("warehouse/tasks.parquet")
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Float,
+    Integer,
+    Numeric,
+    TypeDecorator,
+    literal,
+    select,
+    union_all,
+)
+
+from .export import export_layers
+from .hierarchy import HIERARCHY_EDGES
+from .models import LABEL_TABLES, LAYER_MODELS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy import Column, Connection, Select, Subquery
+    from sqlalchemy.orm import Session
+
+# Rows per record batch (and Parquet row group)
+COLUMNAR_BATCH_SIZE = 65_536
+
+# Output format -> file suffix
+COLUMNAR_FORMATS = {"parquet": "parquet", "arrow": "arrow"}
+
+# Text columns with few distinct values, written dictionary-encoded
+DICTIONARY_COLUMNS = frozenset(
+    {
+        "status",
+        "severity",
+        "work_type",
+        "layer",
+        "parent_layer",
+        "child_layer",
+    }
+)
+
+
+def _pyarrow() -> Any:
+    """Import pyarrow, explaining how to install it when missing."""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Columnar export needs pyarrow: pip install todowrite[arrow]"
+        ) from e
+    return pyarrow
+
+
+def _arrow_type(pa: Any, column: Column) -> Any:
+    """Arrow type for a SQLAlchemy column."""
+    if column.name in DICTIONARY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    type_ = column.type
+    if isinstance(type_, TypeDecorator):
+        type_ = type_.impl_instance
+    if isinstance(type_, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(type_, Boolean):
+        return pa.bool_()
+    if isinstance(type_, Integer):
+        return pa.int64()
+    if isinstance(type_, Float | Numeric):
+        return pa.float64()
+    return pa.string()
+
+
+class _DictionaryEncoder:
+    """Dictionary-encode one column across batches with a shared dictionary.
+
+    New values are appended to the dictionary, so every batch's
+    dictionary extends the previous one (an Arrow "delta").
+    """
+
+    def __init__(self, pa: Any) -> None:
+        self.pa = pa
+        self.positions: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def encode(self, values: Any) -> Any:
+        pa = self.pa
+        array = pa.array(values, pa.string())
+        for value in array.unique().drop_null().to_pylist():
+            if value not in self.positions:
+                self.positions[value] = len(self.values)
+                self.values.append(value)
+        dictionary = pa.array(self.values, pa.string())
+        indices = pa.compute.index_in(array, value_set=dictionary)
+        return pa.DictionaryArray.from_arrays(
+            indices.cast(pa.int32()), dictionary
+        )
+
+
+def _write(
+    connection: Connection,
+    query: Select,
+    path: Path,
+    format: str,
+    batch_size: int,
+) -> int:
+    """Stream ``query`` into one Parquet or Arrow IPC file."""
+    pa = _pyarrow()
+    schema = pa.schema(
+        [
+            pa.field(
+                column.name,
+                _arrow_type(pa, column),
+                nullable=getattr(column, "nullable", True),
+            )
+            for column in query.selected_columns
+        ]
+    )
+    encoders = {
+        field.name: _DictionaryEncoder(pa)
+        for field in schema
+        if pa.types.is_dictionary(field.type)
+    }
+
+    if format == "parquet":
+        writer = pa.parquet.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(
+            path,
+            schema,
+            options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+        )
+
+    rows = 0
+    with writer:
+        result = connection.execute(
+            query.execution_options(yield_per=batch_size)
+        )
+        for partition in result.partitions():
+            columns = [
+                encoders[field.name].encode(values)
+                if field.name in encoders
+                else pa.array(values, field.type)
+                for field, values in zip(
+                    schema, zip(*partition, strict=True), strict=True
+                )
+            ]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            rows += len(partition)
+    return rows
+
+
+def _edges_query() -> Subquery:
+    """Every hierarchy link as (parent_layer, parent_id, child_*)."""
+    return union_all(
+        *(
+            select(
+                literal(edge.parent_layer).label("parent_layer"),
+                edge.table.c[edge.parent_column].label("parent_id"),
+                literal(edge.child_layer).label("child_layer"),
+                edge.table.c[edge.child_column].label("child_id"),
+            )
+            for edge in HIERARCHY_EDGES
+        )
+    ).subquery()
+
+
+def _item_labels_query() -> Subquery:
+    """Every item/label link as (layer, item_id, label_id)."""
+    return union_all(
+        *(
+            select(
+                literal(layer).label("layer"),
+                table.c[item_column].label("item_id"),
+                table.c[label_column].label("label_id"),
+            )
+            for layer, (table, item_column, label_column) in (
+                LABEL_TABLES.items()
+            )
+        )
+    ).subquery()
+
+
+def export_columnar(
+    session: Session,
+    directory: str | Path,
+    format: str = "parquet",
+    layers: Iterable[str] | None = None,
+    batch_size: int = COLUMNAR_BATCH_SIZE,
+) -> dict[str, int]:
+    """
+    Write layer tables, edges and item labels as Parquet or Arrow files.
+
+    Files are named after their tables (``tasks.parquet``), plus
+    ``labels``, ``edges`` (hierarchy links) and ``item_labels``.
+
+    Args:
+        session: Active SQLAlchemy session
+        directory: Output directory (created if missing)
+        format: ``"parquet"`` or ``"arrow"`` (Arrow IPC file)
+        layers: Node layers to export (default: all); labels, edges and
+            item labels are always written
+        batch_size: Rows per record batch
+
+    Returns:
+        Rows written per file stem
+
+    Raises:
+        ValueError: If the format or a layer is unknown
+        ImportError: If pyarrow is not installed
+    """
+    if format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format: {format}")
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    selected = [*export_layers(layers), "Label"]
+    _pyarrow()
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = COLUMNAR_FORMATS[format]
+    connection = session.connection()
+
+    queries: dict[str, Select] = {}
+    for layer in selected:
+        table = LAYER_MODELS[layer].__table__
+        queries[table.name] = select(table).order_by(table.c.id)
+    edges = _edges_query()
+    queries["edges"] = select(edges)
+    item_labels = _item_labels_query()
+    queries["item_labels"] = select(item_labels)
+
+    return {
+        name: _write(
+            connection,
+            query,
+            directory / f"{name}.{suffix}",
+            format,
+            batch_size,
+        )
+        for name, query in queries.items()
+    }
+
+
+__all__ = [
+    "COLUMNAR_BATCH_SIZE",
+    "COLUMNAR_FORMATS",
+    "DICTIONARY_COLUMNS",
+    "export_columnar",
+]
@@ -0,0 +1,533 @@
+"""
+Item counts for ToDoWrite.
+
+Dashboards, ``todowrite stats`` and ``/api/stats`` all need the number of
+items per layer and per status. Instead of one ``COUNT(*)`` per table, the
+counts come from a single grouped ``UNION ALL`` query and are cached per
+engine. A cached result is reused until either
+
+- an ORM transaction that inserted, updated or deleted layer rows commits
+  in this process, or
+- the database reports a change made elsewhere: SQLite's
+  ``PRAGMA data_version`` (read on a dedicated watcher connection, so it
+  sees commits from every other connection; it is closed when the engine
+  is disposed) or, on PostgreSQL, the
+  insert/update/delete tuple counters in ``pg_stat_user_tables``, which
+  lag commits by up to the statistics flush interval (about a second).
+
+Cached results are also never older than ``MAX_AGE`` seconds.
+
+For O(1) reads on large databases an optional ``layer_counts`` table can
+be enabled with :func:`enable_counters`. Triggers keep it current on every
+insert, delete and status change; while it exists, counts are read from it
+directly. It is opt-in because every write to a layer then also updates
+one shared counter row, which serialises concurrent writers of the same
+layer and status on PostgreSQL.
+
+Example:
+    >>> from todowrite.core.counts import count_items
+    >>>
+    >>> counts = count_items(session)
+    >>> counts.layers["Task"], counts.statuses["Task"].get("done", 0)
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import weakref
+from itertools import chain
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from .models import LAYER_MODELS, Base
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy import MetaData
+    from sqlalchemy.engine import Connection, Engine, Result
+    from sqlalchemy.orm import SessionTransaction, UOWTransaction
+
+# Upper bound on the age of a cached result, in seconds
+MAX_AGE = 30.0
+
+# Table names come from the models, never from callers, so the SQL built
+# from them with f-strings is not injectable (hence the noqa: S608 below)
+_LAYER_TABLES = {
+    layer: model.__tablename__ for layer, model in LAYER_MODELS.items()
+}
+
+
+class ItemCounts(NamedTuple):
+    """Item counts per layer and per (layer, status)."""
+
+    layers: dict[str, int]
+    statuses: dict[str, dict[str | None, int]]
+    total: int
+
+
+def _has_status(layer: str) -> bool:
+    return hasattr(LAYER_MODELS[layer], "status")
+
+
+def _grouped_counts_sql() -> str:
+    """One UNION ALL over every layer, grouped by status where it exists."""
+    selects = []
+    for layer, table in _LAYER_TABLES.items():
+        if _has_status(layer):
+            selects.append(
+                f"SELECT '{layer}' AS layer, status, COUNT(*) AS n "  # noqa: S608
+                f"FROM {table} GROUP BY status"
+            )
+        else:
+            selects.append(
+                f"SELECT '{layer}' AS layer, NULL AS status, COUNT(*) AS n "  # noqa: S608
+                f"FROM {table}"
+            )
+    return " UNION ALL ".join(selects)
+
+
+def _build_counts(rows: Result[Any]) -> ItemCounts:
+    layers = dict.fromkeys(LAYER_MODELS, 0)
+    statuses: dict[str, dict[str | None, int]] = {
+        layer: {} for layer in LAYER_MODELS
+    }
+    for layer, status, n in rows:
+        if not n:
+            continue
+        layers[layer] += n
+        statuses[layer][status] = statuses[layer].get(status, 0) + n
+    return ItemCounts(layers, statuses, sum(layers.values()))
+
+
+def query_counts(connection: Connection | Session) -> ItemCounts:
+    """Count items with one grouped query (or the counters table), uncached."""
+    if counters_enabled(connection):
+        rows = connection.execute(
+            text(
+                "SELECT layer, NULLIF(status, ''), count FROM layer_counts"
+            )
+        )
+        return _build_counts(rows)
+    return _build_counts(connection.execute(text(_grouped_counts_sql())))
+
+
+def count_tables(
+    connection: Connection, table_names: list[str]
+) -> dict[str, int]:
+    """
+    Row counts of arbitrary tables in one ``UNION ALL`` query.
+
+    Tables that do not exist are reported as 0.
+    """
+    existing = set(inspect(connection).get_table_names())
+    counts = dict.fromkeys(table_names, 0)
+    present = [name for name in table_names if name in existing]
+    if present:
+        rows = connection.execute(
+            text(
+                " UNION ALL ".join(
+                    f"SELECT '{name}', COUNT(*) FROM {name}"  # noqa: S608
+                    for name in present
+                )
+            )
+        )
+        counts.update(dict(rows.all()))
+    return counts
+
+
+class _CountsCache:
+    """Cached counts of one engine and the state they were computed at."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.lock = threading.Lock()
+        self.counts: ItemCounts | None = None
+        self.generation = 0  # bumped by in-process commits
+        self.computed_generation = -1
+        self.computed_version: Any = None
+        self.computed_at = 0.0
+        self.watcher: sqlite3.Connection | None = None
+        url = engine.url
+        if url.get_backend_name() == "sqlite" and url.database not in (
+            None,
+            "",
+            ":memory:",
+        ):
+            # A connection of its own: data_version changes whenever any
+            # *other* connection commits, pooled ones included
+            self.watcher = sqlite3.connect(
+                url.database, isolation_level=None, check_same_thread=False
+            )
+            # Closed when the engine is disposed, or else with the cache
+            self._close_watcher = weakref.finalize(self, self.watcher.close)
+
+    def close(self) -> None:
+        """Close the watcher connection and forget the cached counts."""
+        if self.watcher is not None:
+            self._close_watcher()
+            self.watcher = None
+        self.counts = None
+
+    def external_version(self, session: Session) -> object:
+        """Change marker maintained by the database itself, if any."""
+        if self.watcher is not None:
+            return self.watcher.execute("PRAGMA data_version").fetchone()[0]
+        if session.get_bind().dialect.name == "postgresql":
+            return session.execute(
+                text(
+                    "SELECT COALESCE("
+                    "SUM(n_tup_ins + n_tup_upd + n_tup_del), 0) "
+                    "FROM pg_stat_user_tables WHERE relname = ANY(:tables)"
+                ),
+                {"tables": list(_LAYER_TABLES.values())},
+            ).scalar_one()
+        return None
+
+
+_caches: weakref.WeakKeyDictionary[Engine, _CountsCache] = (
+    weakref.WeakKeyDictionary()
+)
+_caches_lock = threading.Lock()
+
+
+def _engine_of(bind: Engine | Connection | Session) -> Engine:
+    bind = bind.get_bind() if isinstance(bind, Session) else bind
+    return getattr(bind, "engine", bind)
+
+
+def _cache_for(bind: Engine | Connection | Session) -> _CountsCache:
+    engine = _engine_of(bind)
+    with _caches_lock:
+        cache = _caches.get(engine)
+        if cache is None:
+            cache = _caches[engine] = _CountsCache(engine)
+            if not event.contains(engine, "engine_disposed", _drop_cache):
+                event.listen(engine, "engine_disposed", _drop_cache)
+        return cache
+
+
+def _drop_cache(engine: Engine) -> None:
+    """Close a disposed engine's watcher; later counts start a new cache."""
+    with _caches_lock:
+        cache = _caches.pop(engine, None)
+    if cache is not None:
+        with cache.lock:
+            cache.close()
+
+
+def counters_enabled(connection: Connection | Session) -> bool:
+    """
+    Whether the maintained ``layer_counts`` table exists.
+
+    Another process may enable or disable the counters at any time, so a
+    session probes once per transaction and a connection on every call.
+    """
+    if not isinstance(connection, Session):
+        return inspect(connection).has_table("layer_counts")
+    if "counters_enabled" not in connection.info:
+        connection.info["counters_enabled"] = inspect(
+            connection.connection()
+        ).has_table("layer_counts")
+    return connection.info["counters_enabled"]
+
+
+def count_items(session: Session, use_cache: bool = True) -> ItemCounts:
+    """
+    Count items per layer and per status.
+
+    Args:
+        session: Active SQLAlchemy session
+        use_cache: Reuse a cached result when nothing has changed since
+
+    Returns:
+        Counts per layer, per (layer, status), and the overall total
+    """
+    if session.info.get("counts_dirty"):
+        # This session has flushed but not committed layer changes, which
+        # only it can see; answer from its own view without caching
+        return query_counts(session)
+    if counters_enabled(session):
+        return query_counts(session)  # already O(1)
+    if not use_cache:
+        return query_counts(session)
+
+    cache = _cache_for(session)
+    with cache.lock:
+        generation = cache.generation
+        version = cache.external_version(session)
+        if (
+            cache.counts is not None
+            and cache.computed_generation == generation
+            and cache.computed_version == version
+            and time.monotonic() - cache.computed_at < MAX_AGE
+        ):
+            return cache.counts
+
+        counts = query_counts(session)
+        cache.counts = counts
+        cache.computed_generation = generation
+        cache.computed_version = version
+        cache.computed_at = time.monotonic()
+        return counts
+
+
+def invalidate_counts(
+    bind: Engine | Connection | Session | None = None,
+) -> None:
+    """
+    Drop cached counts.
+
+    Args:
+        bind: Engine, connection or session whose cache to drop; None drops
+            the caches of every engine
+    """
+    with _caches_lock:
+        caches = list(_caches.values()) if bind is None else [
+            _caches.get(_engine_of(bind))
+        ]
+    for cache in caches:
+        if cache is not None:
+            with cache.lock:
+                cache.generation += 1
+                cache.counts = None
+
+
+def note_layer_writes(
+    session: Session, layer: str | None = None, ids: Iterable[int] = ()
+) -> None:
+    """
+    Record that this transaction changed layer rows.
+
+    Cached counts are then bypassed by this session and dropped when it
+    commits. ORM flushes call this automatically; code writing layer rows
+    with Core statements (such as the bulk API) calls it directly.
+
+    Args:
+        session: Session whose transaction wrote the rows
+        layer: Layer of the rows written
+        ids: Ids of existing rows changed; cached copies of them (see
+            ``todowrite.storage.cache``) are dropped on commit
+    """
+    session.info["counts_dirty"] = True
+    if layer is not None:
+        session.info.setdefault("written_rows", set()).update(
+            (layer, row_id) for row_id in ids
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _note_layer_writes(
+    session: Session, _flush_context: UOWTransaction
+) -> None:
+    if any(
+        type(instance).__name__ in LAYER_MODELS
+        for instance in chain(session.new, session.dirty, session.deleted)
+    ):
+        note_layer_writes(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # a SAVEPOINT was released; nothing is visible yet
+    if session.info.pop("counts_dirty", False):
+        invalidate_counts(session.get_bind())
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_on_end(
+    session: Session, transaction: SessionTransaction
+) -> None:
+    # Rolled back or closed without commit: nothing became visible. The
+    # counters probe is per transaction either way.
+    if transaction.parent is None:
+        session.info.pop("counts_dirty", None)
+        session.info.pop("written_rows", None)
+        session.info.pop("counters_enabled", None)
+
+
+# --- Optional maintained counters table ------------------------------------
+
+
+def _create_sqlite_counters(connection: Connection) -> None:
+    for layer, table in _LAYER_TABLES.items():
+        new_status = "coalesce(NEW.status, '')" if _has_status(layer) else "''"
+        old_status = "coalesce(OLD.status, '')" if _has_status(layer) else "''"
+        increment = (
+            "INSERT INTO layer_counts (layer, status, count) "  # noqa: S608
+            f"VALUES ('{layer}', {new_status}, 1) "
+            "ON CONFLICT (layer, status) DO UPDATE SET count = count + 1;"
+        )
+        decrement = (
+            "UPDATE layer_counts SET count = count - 1 "  # noqa: S608
+            f"WHERE layer = '{layer}' AND status = {old_status};"
+        )
+        connection.execute(
+            text(
+                f"CREATE TRIGGER IF NOT EXISTS counts_{table}_ai "
+                f"AFTER INSERT ON {table} BEGIN {increment} END"
+            )
+        )
+        connection.execute(
+            text(
+                f"CREATE TRIGGER IF NOT EXISTS counts_{table}_ad "
+                f"AFTER DELETE ON {table} BEGIN {decrement} END"
+            )
+        )
+        if _has_status(layer):
+            connection.execute(
+                text(
+                    f"CREATE TRIGGER IF NOT EXISTS counts_{table}_au "
+                    f"AFTER UPDATE OF status ON {table} "
+                    f"WHEN {old_status} <> {new_status} "
+                    f"BEGIN {decrement} {increment} END"
+                )
+            )
+
+
+def _create_postgresql_counters(connection: Connection) -> None:
+    # Status is read from the row as JSON so labels (no status column)
+    # share the trigger function
+    connection.execute(
+        text(
+            """
+            CREATE OR REPLACE FUNCTION layer_counts_sync() RETURNS trigger
+            AS $$
+            DECLARE
+                old_status VARCHAR;
+                new_status VARCHAR;
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    old_status := coalesce(to_jsonb(OLD)->>'status', '');
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    new_status := coalesce(to_jsonb(NEW)->>'status', '');
+                END IF;
+                IF TG_OP = 'UPDATE' AND old_status = new_status THEN
+                    RETURN NULL;
+                END IF;
+                IF old_status IS NOT NULL THEN
+                    UPDATE layer_counts SET count = count - 1
+                    WHERE layer = TG_ARGV[0] AND status = old_status;
+                END IF;
+                IF new_status IS NOT NULL THEN
+                    INSERT INTO layer_counts (layer, status, count)
+                    VALUES (TG_ARGV[0], new_status, 1)
+                    ON CONFLICT (layer, status)
+                    DO UPDATE SET count = layer_counts.count + 1;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+    )
+    for layer, table in _LAYER_TABLES.items():
+        watched = "UPDATE OF status OR " if _has_status(layer) else ""
+        connection.execute(
+            text(f"DROP TRIGGER IF EXISTS counts_{table}_sync ON {table}")
+        )
+        connection.execute(
+            text(
+                f"CREATE TRIGGER counts_{table}_sync "
+                f"AFTER INSERT OR {watched}DELETE ON {table} "
+                "FOR EACH ROW EXECUTE FUNCTION "
+                f"layer_counts_sync('{layer}')"
+            )
+        )
+
+
+def populate_counters(connection: Connection) -> None:
+    """Replace the ``layer_counts`` rows with counts of the layer tables."""
+    connection.execute(text("DELETE FROM layer_counts"))
+    connection.execute(
+        text(
+            "INSERT INTO layer_counts (layer, status, count) "  # noqa: S608
+            "SELECT layer, COALESCE(status, ''), SUM(n) "
+            f"FROM ({_grouped_counts_sql()}) AS grouped "
+            "GROUP BY layer, COALESCE(status, '')"
+        )
+    )
+
+
+def enable_counters(session: Session) -> ItemCounts:
+    """
+    Create (or rebuild) the maintained ``layer_counts`` table.
+
+    Creates the table and its triggers if missing and reloads it from the
+    layer tables in the same transaction.
+
+    Args:
+        session: Active SQLAlchemy session (committed on success)
+
+    Returns:
+        The counts the table now holds
+    """
+    connection = session.connection()
+    connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS layer_counts ("
+            "layer VARCHAR NOT NULL, "
+            "status VARCHAR NOT NULL DEFAULT '', "
+            "count BIGINT NOT NULL, "
+            "PRIMARY KEY (layer, status))"
+        )
+    )
+    if connection.dialect.name == "postgresql":
+        _create_postgresql_counters(connection)
+    else:
+        _create_sqlite_counters(connection)
+    populate_counters(connection)
+    session.commit()
+    return query_counts(session)
+
+
+def drop_counters(connection: Connection) -> None:
+    """Drop the ``layer_counts`` table and its triggers."""
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            text("DROP FUNCTION IF EXISTS layer_counts_sync() CASCADE")
+        )
+    else:
+        for table in _LAYER_TABLES.values():
+            for suffix in ("ai", "ad", "au"):
+                connection.execute(
+                    text(f"DROP TRIGGER IF EXISTS counts_{table}_{suffix}")
+                )
+    connection.execute(text("DROP TABLE IF EXISTS layer_counts"))
+    invalidate_counts(connection)
+
+
+def disable_counters(session: Session) -> None:
+    """Stop maintaining the counters table and fall back to cached queries."""
+    drop_counters(session.connection())
+    session.commit()
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_with_schema(
+    _target: MetaData, connection: Connection, **_kw: object
+) -> None:
+    """Drop the counters table, which would go stale without its triggers."""
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        drop_counters(connection)
+
+
+__all__ = [
+    "MAX_AGE",
+    "ItemCounts",
+    "count_items",
+    "count_tables",
+    "counters_enabled",
+    "disable_counters",
+    "drop_counters",
+    "enable_counters",
+    "invalidate_counts",
+    "note_layer_writes",
+    "populate_counters",
+    "query_counts",
+]
@@ -0,0 +1,371 @@
+"""
+Streaming export of ToDoWrite nodes as NDJSON or YAML.
+
+Nodes are written in the shape of ``configs/schemas/todowrite.schema.json``:
+a schema ID such as ``TSK-12``, the layer, title and description, the
+remaining columns and label names under ``metadata``, resolved parent and
+child ``links``, and a ``command`` block for Command nodes. A command's
+``ac_ref`` is its ``acceptance_criteria_id``, or else the nearest
+AcceptanceCriteria above it in the hierarchy; the schema requires one,
+so a command with neither is an error rather than an invalid document.
+
+Memory stays constant whatever the database size. Each layer table is
+read with ``yield_per`` (a server-side cursor on PostgreSQL) as plain
+rows, never ORM objects, so nothing accumulates in the identity map.
+Labels and links are fetched per partition of rows with three set-based
+queries, and every node is formatted and handed on before the next
+partition is read.
+
+Example:
+    >>> from todowrite.core.export import export_nodes
+    >>>
+    >>> with open("plan.ndjson", "w") as file:
+    ...     written = export_nodes(session, file, format="ndjson")
+"""
+
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+import yaml
+from sqlalchemy import Text, literal, select, union_all
+
+from .hierarchy import HIERARCHY_EDGES
+from .models import LABEL_TABLES, LAYER_MODELS, NodeClosure
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+    from typing import TextIO
+
+    from sqlalchemy import Connection, Row, Select
+    from sqlalchemy.orm import Session
+
+# libyaml's emitter when PyYAML was built with it
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Rows read per partition (and per round of label/link queries)
+EXPORT_BATCH_SIZE = 1000
+
+# Layer -> node ID prefix used by the ToDoWrite schema
+LAYER_PREFIXES = {
+    "Goal": "GOAL",
+    "Concept": "CON",
+    "Context": "CTX",
+    "Constraints": "CST",
+    "Requirements": "R",
+    "AcceptanceCriteria": "AC",
+    "InterfaceContract": "IF",
+    "Phase": "PH",
+    "Step": "STP",
+    "Task": "TSK",
+    "SubTask": "SUB",
+    "Command": "CMD",
+}
+
+# Columns that become top-level fields or the command block, not metadata
+_NODE_COLUMNS = {"id", "title", "description"}
+_COMMAND_COLUMNS = {
+    "acceptance_criteria_id",
+    "cmd",
+    "cmd_params",
+    "runtime_env",
+    "artifacts",
+}
+
+
+def schema_node_id(layer: str, row_id: int) -> str:
+    """Schema node ID of a layer row, e.g. ``schema_node_id("Task", 12)``."""
+    return f"{LAYER_PREFIXES[layer]}-{row_id}"
+
+
+def export_layers(layers: Iterable[str] | None = None) -> list[str]:
+    """
+    Node layers to export, in hierarchy order.
+
+    Args:
+        layers: Layer names (case-insensitive); default every node layer
+
+    Raises:
+        ValueError: If a name is not a node layer
+    """
+    if layers is None:
+        return list(LAYER_PREFIXES)
+    names = {name.lower(): name for name in LAYER_PREFIXES}
+    wanted = set()
+    for layer in layers:
+        if layer.lower() not in names:
+            raise ValueError(f"Unknown layer: {layer}")
+        wanted.add(names[layer.lower()])
+    return [layer for layer in LAYER_PREFIXES if layer in wanted]
+
+
+def layer_query(layer: str) -> Select:
+    """Rows of one layer table in id order."""
+    table = LAYER_MODELS[layer].__table__
+    return select(table).order_by(table.c.id)
+
+
+def _json_value(value: str) -> Any:
+    """Decode a JSON object or array stored as text; keep other text."""
+    try:
+        decoded = json.loads(value)
+    except ValueError:
+        return value
+    return decoded if isinstance(decoded, dict | list) else value
+
+
+def _links(
+    connection: Connection, layer: str, ids: list[int]
+) -> tuple[dict[int, list[str]], dict[int, list[str]]]:
+    """Parent and child schema IDs of the rows ``ids``, one query each."""
+    found: list[dict[int, list[str]]] = []
+    for own, other in (("child", "parent"), ("parent", "child")):
+        branches = [
+            select(
+                edge.table.c[getattr(edge, f"{own}_column")].label("row_id"),
+                literal(getattr(edge, f"{other}_layer")).label("layer"),
+                edge.table.c[getattr(edge, f"{other}_column")].label("id"),
+            ).where(edge.table.c[getattr(edge, f"{own}_column")].in_(ids))
+            for edge in HIERARCHY_EDGES
+            if getattr(edge, f"{own}_layer") == layer
+        ]
+        links: dict[int, list[str]] = defaultdict(list)
+        if branches:
+            query = union_all(*branches) if len(branches) > 1 else branches[0]
+            for row in connection.execute(
+                query.order_by("row_id", "layer", "id")
+            ):
+                links[row.row_id].append(schema_node_id(row.layer, row.id))
+        found.append(links)
+    return found[0], found[1]
+
+
+def _labels(
+    connection: Connection, layer: str, ids: list[int]
+) -> dict[int, list[str]]:
+    """Label names of the rows ``ids``."""
+    labels: dict[int, list[str]] = defaultdict(list)
+    if layer not in LABEL_TABLES:
+        return labels
+    table, item_column, label_column = LABEL_TABLES[layer]
+    label_table = LAYER_MODELS["Label"].__table__
+    rows = connection.execute(
+        select(table.c[item_column], label_table.c.name)
+        .join(label_table, label_table.c.id == table.c[label_column])
+        .where(table.c[item_column].in_(ids))
+        .order_by(table.c[item_column], label_table.c.name)
+    )
+    for row_id, name in rows:
+        labels[row_id].append(name)
+    return labels
+
+
+def _ac_refs(connection: Connection, ids: list[int]) -> dict[int, int]:
+    """Nearest AcceptanceCriteria ancestor of the Command rows ``ids``."""
+    closure = NodeClosure.__table__.c
+    rows = connection.execute(
+        select(closure.descendant_id, closure.ancestor_id)
+        .where(
+            closure.descendant_layer == "Command",
+            closure.descendant_id.in_(ids),
+            closure.ancestor_layer == "AcceptanceCriteria",
+        )
+        .order_by(closure.descendant_id, closure.depth, closure.ancestor_id)
+    )
+    nearest: dict[int, int] = {}
+    for command_id, criteria_id in rows:
+        nearest.setdefault(command_id, criteria_id)
+    return nearest
+
+
+def node_documents(
+    connection: Connection, layer: str, rows: Sequence[Row]
+) -> list[dict[str, Any]]:
+    """
+    Build schema-shaped node documents for a partition of layer rows.
+
+    Args:
+        connection: Connection to read labels and links with
+        layer: Layer the rows belong to
+        rows: Rows of :func:`layer_query` for that layer
+
+    Returns:
+        One document per row, in row order
+
+    Raises:
+        ValueError: If a Command has no acceptance criteria to reference
+    """
+    if not rows:
+        return []
+    table = LAYER_MODELS[layer].__table__
+    ids = [row.id for row in rows]
+    parents, children = _links(connection, layer, ids)
+    labels = _labels(connection, layer, ids)
+    ac_refs: dict[int, int] = {}
+    if layer == "Command":
+        unset = [row.id for row in rows if row.acceptance_criteria_id is None]
+        if unset:
+            ac_refs = _ac_refs(connection, unset)
+
+    documents = []
+    for row in rows:
+        values = row._mapping
+        metadata: dict[str, Any] = {}
+        for column in table.columns:
+            name = column.name
+            value = values[name]
+            if value is None or name in _NODE_COLUMNS:
+                continue
+            if layer == "Command" and name in _COMMAND_COLUMNS:
+                continue
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(column.type, Text):
+                value = _json_value(value)
+            metadata[name] = value
+        if labels.get(row.id):
+            metadata["labels"] = labels[row.id]
+
+        document = {
+            "id": schema_node_id(layer, row.id),
+            "layer": layer,
+            "title": values["title"],
+            "description": values["description"] or "",
+            "metadata": metadata,
+            "links": {
+                "parents": parents.get(row.id, []),
+                "children": children.get(row.id, []),
+            },
+        }
+        if layer == "Command":
+            document["command"] = _command_block(values, ac_refs)
+        documents.append(document)
+    return documents
+
+
+def _command_block(values: Any, ac_refs: dict[int, int]) -> dict[str, Any]:
+    """The schema ``command`` block of a Command row."""
+    criteria_id = values["acceptance_criteria_id"]
+    if criteria_id is None:
+        criteria_id = ac_refs.get(values["id"])
+    if criteria_id is None:
+        raise ValueError(
+            f"Command {schema_node_id('Command', values['id'])} has no "
+            "acceptance criteria: set acceptance_criteria_id or link it "
+            "below an AcceptanceCriteria node"
+        )
+    shell = " ".join(
+        part for part in (values["cmd"], values["cmd_params"]) if part
+    )
+    run: dict[str, Any] = {"shell": shell}
+    if values["runtime_env"]:
+        run["env"] = _json_value(values["runtime_env"])
+    command: dict[str, Any] = {
+        "run": run,
+        "ac_ref": schema_node_id("AcceptanceCriteria", criteria_id),
+    }
+    if values["artifacts"]:
+        artifacts = _json_value(values["artifacts"])
+        command["artifacts"] = (
+            artifacts if isinstance(artifacts, list) else [artifacts]
+        )
+    return command
+
+
+def iter_nodes(
+    session: Session,
+    layers: Iterable[str] | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield every node document, layer by layer, in constant memory.
+
+    Args:
+        session: Active SQLAlchemy session
+        layers: Layers to export (default: all node layers)
+        batch_size: Rows fetched per partition
+
+    Yields:
+        Schema-shaped node documents
+
+    Raises:
+        ValueError: If a Command has no acceptance criteria to reference
+    """
+    connection = session.connection()
+    for layer in export_layers(layers):
+        result = connection.execute(
+            layer_query(layer).execution_options(yield_per=batch_size)
+        )
+        for partition in result.partitions():
+            yield from node_documents(connection, layer, partition)
+
+
+def format_ndjson(node: dict[str, Any]) -> str:
+    """One node as an NDJSON line."""
+    return json.dumps(node, ensure_ascii=False) + "\n"
+
+
+def format_yaml(node: dict[str, Any]) -> str:
+    """One node as an item of a YAML sequence; items concatenate."""
+    return yaml.dump(
+        [node], Dumper=_YAML_DUMPER, sort_keys=False, allow_unicode=True
+    )
+
+
+# Export format -> (node formatter, media type)
+EXPORT_FORMATS: dict[str, tuple[Callable[[dict[str, Any]], str], str]] = {
+    "ndjson": (format_ndjson, "application/x-ndjson"),
+    "yaml": (format_yaml, "application/yaml"),
+}
+
+
+def export_nodes(
+    session: Session,
+    file: TextIO,
+    format: str = "ndjson",
+    layers: Iterable[str] | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> int:
+    """
+    Stream nodes into a text file as NDJSON or YAML.
+
+    Args:
+        session: Active SQLAlchemy session
+        file: Writable text file
+        format: ``"ndjson"`` or ``"yaml"``
+        layers: Layers to export (default: all node layers)
+        batch_size: Rows fetched per partition
+
+    Returns:
+        Number of nodes written
+
+    Raises:
+        ValueError: If the format or a layer is unknown, or a Command has
+            no acceptance criteria to reference
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    formatter = EXPORT_FORMATS[format][0]
+    written = 0
+    for node in iter_nodes(session, layers, batch_size):
+        file.write(formatter(node))
+        written += 1
+    return written
+
+
+__all__ = [
+    "EXPORT_BATCH_SIZE",
+    "EXPORT_FORMATS",
+    "LAYER_PREFIXES",
+    "export_layers",
+    "export_nodes",
+    "format_ndjson",
+    "format_yaml",
+    "iter_nodes",
+    "layer_query",
+    "node_documents",
+    "schema_node_id",
+]
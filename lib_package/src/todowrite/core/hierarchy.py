@@ -0,0 +1,689 @@
+"""
+Closure-table index of the ToDoWrite layer hierarchy.
+
+The hierarchy is stored as parent/child rows in the join tables
+(``goals_tasks``, ``tasks_sub_tasks``, ...), so walking a subtree through
+the ORM costs one lazy load per level. The ``node_closure`` table stores
+every (ancestor, descendant, depth) pair instead, which turns subtree and
+ancestor lookups into a single indexed query.
+
+Database triggers on each join table keep the closure current: adding a
+parent -> child row adds every route through it, removing one subtracts
+them. Links written through the ORM, Core statements, raw SQL, COPY or
+another process are all reflected. The triggers are created together
+with the schema (``Base.metadata.create_all``); ``rebuild_closure``
+installs them in older databases and recomputes the table from the join
+tables.
+
+Example:
+    >>> from todowrite.core.hierarchy import ancestors, descendants
+    >>>
+    >>> commands = descendants(session, goal, layer="Command")
+    >>> parents = ancestors(session, "Command-3")
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from sqlalchemy import (
+    delete,
+    event,
+    func,
+    insert,
+    literal,
+    select,
+    text,
+    union_all,
+)
+
+from .models import ASSOCIATION_TABLES, LAYER_MODELS, Base, NodeClosure
+from .node_registry import layer_of, lookup_node, parse_node_id
+
+if TYPE_CHECKING:
+    from sqlalchemy import (
+        ColumnElement,
+        Connection,
+        MetaData,
+        Subquery,
+        Table,
+    )
+    from sqlalchemy.orm import Session
+
+NodeKey = tuple[str, int]
+
+
+class HierarchyEdge(NamedTuple):
+    """A join table read as parent -> child between two layers."""
+
+    table: Table
+    parent_layer: str
+    parent_column: str
+    child_layer: str
+    child_column: str
+
+
+# Layer rank: a parent always sits higher in the 12-layer order
+_LAYER_RANK = {
+    name: rank for rank, name in enumerate(LAYER_MODELS) if name != "Label"
+}
+_TABLE_LAYERS = {
+    model.__tablename__: name
+    for name, model in LAYER_MODELS.items()
+    if name in _LAYER_RANK
+}
+
+
+def _hierarchy_edges() -> list[HierarchyEdge]:
+    """Read the parent/child direction of every hierarchy join table."""
+    edges = []
+    for table in ASSOCIATION_TABLES:
+        ends = []
+        for column in table.columns:
+            target = next(iter(column.foreign_keys)).column.table.name
+            ends.append((_TABLE_LAYERS.get(target), column.name))
+        if any(layer is None for layer, _ in ends):
+            continue  # label tables are tags, not hierarchy
+        ends.sort(key=lambda end: _LAYER_RANK[end[0]])
+        (parent, parent_col), (child, child_col) = ends
+        edges.append(
+            HierarchyEdge(table, parent, parent_col, child, child_col)
+        )
+    return edges
+
+
+HIERARCHY_EDGES: list[HierarchyEdge] = _hierarchy_edges()
+
+
+# (parent layer, child layer) -> join table
+_EDGES_BY_LAYERS = {
+    (edge.parent_layer, edge.child_layer): edge for edge in HIERARCHY_EDGES
+}
+
+# Primary key of node_closure
+_CLOSURE_KEY = (
+    "ancestor_layer",
+    "ancestor_id",
+    "descendant_layer",
+    "descendant_id",
+    "depth",
+)
+
+
+def _node_key(session: Session, node: Base | int | str) -> NodeKey | None:
+    """Resolve a model instance, global node ID or typed ID to a key."""
+    if isinstance(node, Base):
+        return layer_of(node), node.id
+    if isinstance(node, str) and not node.strip().isdigit():
+        key = parse_node_id(node)
+        if key is None:
+            raise ValueError(f"Invalid node ID: {node!r}")
+        return key
+    return lookup_node(session, int(node))
+
+
+def descendants(
+    session: Session, node: Base | int | str, layer: str | None = None
+) -> list[Base]:
+    """
+    Return every node below ``node`` in the hierarchy.
+
+    Args:
+        session: Active SQLAlchemy session
+        node: Model instance, global node ID or typed ID (``"Goal-1"``)
+        layer: Only return descendants of this layer (e.g. ``"Command"``)
+
+    Returns:
+        Model instances ordered by layer and row id, loaded with one
+        indexed query
+    """
+    key = _node_key(session, node)
+    if key is None:
+        return []
+    closure = NodeClosure.__table__.c
+    scope = (closure.ancestor_layer == key[0]) & (
+        closure.ancestor_id == key[1]
+    )
+    return _load_related(
+        session,
+        scope,
+        closure.descendant_layer,
+        closure.descendant_id,
+        layer,
+    )
+
+
+def ancestors(
+    session: Session, node: Base | int | str, layer: str | None = None
+) -> list[Base]:
+    """
+    Return every node above ``node`` in the hierarchy.
+
+    Args:
+        session: Active SQLAlchemy session
+        node: Model instance, global node ID or typed ID (``"Command-3"``)
+        layer: Only return ancestors of this layer (e.g. ``"Goal"``)
+
+    Returns:
+        Model instances ordered by layer and row id, loaded with one
+        indexed query
+    """
+    key = _node_key(session, node)
+    if key is None:
+        return []
+    closure = NodeClosure.__table__.c
+    scope = (closure.descendant_layer == key[0]) & (
+        closure.descendant_id == key[1]
+    )
+    return _load_related(
+        session,
+        scope,
+        closure.ancestor_layer,
+        closure.ancestor_id,
+        layer,
+    )
+
+
+def _load_related(
+    session: Session,
+    scope: ColumnElement[bool],
+    layer_column: ColumnElement[str],
+    id_column: ColumnElement[int],
+    layer: str | None,
+) -> list[Base]:
+    """Load the layer rows the closure rows in ``scope`` point at.
+
+    One statement: the distinct (layer, id) keys in scope, outer-joined
+    to each candidate layer table on its primary key.
+    """
+    if layer is not None and layer not in _LAYER_RANK:
+        raise ValueError(f"Unknown layer: {layer}")
+    layers = [layer] if layer is not None else list(_LAYER_RANK)
+    keys = (
+        select(layer_column.label("layer"), id_column.label("row_id"))
+        .where(scope, layer_column.in_(layers))
+        .distinct()
+        .subquery("keys")
+    )
+    models = [LAYER_MODELS[name] for name in layers]
+    query = select(*models).select_from(keys)
+    for name, model in zip(layers, models, strict=True):
+        query = query.outerjoin(
+            model, (keys.c.layer == name) & (model.id == keys.c.row_id)
+        )
+
+    nodes = [
+        next(node for node in row if node is not None)
+        for row in session.execute(query)
+    ]
+    return sorted(
+        nodes, key=lambda node: (_LAYER_RANK[layer_of(node)], node.id)
+    )
+
+
+def _edge_between(parent_layer: str, child_layer: str) -> HierarchyEdge:
+    edge = _EDGES_BY_LAYERS.get((parent_layer, child_layer))
+    if edge is None:
+        raise ValueError(
+            f"No hierarchy link from {parent_layer} to {child_layer}"
+        )
+    return edge
+
+
+def _edge_row(
+    edge: HierarchyEdge, parent: NodeKey, child: NodeKey
+) -> ColumnElement[bool]:
+    table = edge.table
+    return (table.c[edge.parent_column] == parent[1]) & (
+        table.c[edge.child_column] == child[1]
+    )
+
+
+def link(
+    connection: Connection | Session, parent: NodeKey, child: NodeKey
+) -> bool:
+    """
+    Add the ``parent -> child`` row to the join table of the two layers.
+
+    The closure follows through the join table's triggers, as it does for
+    any other write to it.
+
+    Args:
+        connection: Connection or session of the writing transaction
+        parent: (layer, row id) of the parent
+        child: (layer, row id) of the child
+
+    Returns:
+        Whether the link was new
+
+    Raises:
+        ValueError: If the parent layer does not sit above the child's
+    """
+    edge = _edge_between(parent[0], child[0])
+    exists = connection.execute(
+        select(literal(1))
+        .select_from(edge.table)
+        .where(_edge_row(edge, parent, child))
+    ).first()
+    if exists:
+        return False
+    connection.execute(
+        insert(edge.table).values(
+            {edge.parent_column: parent[1], edge.child_column: child[1]}
+        )
+    )
+    return True
+
+
+def unlink(
+    connection: Connection | Session, parent: NodeKey, child: NodeKey
+) -> bool:
+    """
+    Remove the ``parent -> child`` row from the join table of the layers.
+
+    Returns:
+        Whether there was such a link
+
+    Raises:
+        ValueError: If the parent layer does not sit above the child's
+    """
+    edge = _edge_between(parent[0], child[0])
+    result = connection.execute(
+        delete(edge.table).where(_edge_row(edge, parent, child))
+    )
+    return result.rowcount > 0
+
+
+# The trigger SQL below is assembled from closure column names and the
+# layers and join columns of the models, never from outside input, so the
+# f-strings are not injectable (hence the noqa: S608)
+
+
+def _side_sql(anchor: str, far: str, layer: str, row_id: str) -> str:
+    """Closure rows on one side of an edge end, plus the end itself.
+
+    ``anchor``/``far`` name the closure column prefix matched against the
+    end and the one returned (``descendant``/``ancestor`` for the nodes
+    above a parent). ``layer`` and ``row_id`` are SQL expressions.
+    """
+    return (
+        f"SELECT {far}_layer AS layer, {far}_id AS row_id, "  # noqa: S608
+        "depth, paths "
+        f"FROM node_closure WHERE {anchor}_layer = {layer} "
+        f"AND {anchor}_id = {row_id} "
+        f"UNION ALL SELECT {layer}, {row_id}, 0, 1"
+    )
+
+
+def _routes_sql(
+    parent_layer: str, parent_id: str, child_layer: str, child_id: str
+) -> str:
+    """SELECT of the closure rows one ``parent -> child`` edge creates.
+
+    Each ancestor of the parent (itself included) reaches each descendant
+    of the child (itself included) through the edge, at the summed depth
+    and with the product of the path counts on either side. Arguments
+    are SQL expressions.
+    """
+    up = _side_sql("descendant", "ancestor", parent_layer, parent_id)
+    down = _side_sql("ancestor", "descendant", child_layer, child_id)
+    return (
+        "SELECT up.layer AS ancestor_layer, "  # noqa: S608
+        "up.row_id AS ancestor_id, "
+        "down.layer AS descendant_layer, down.row_id AS descendant_id, "
+        "up.depth + down.depth + 1 AS depth, "
+        "SUM(up.paths * down.paths) AS paths "
+        f"FROM ({up}) AS up CROSS JOIN ({down}) AS down "
+        # WHERE keeps SQLite from reading ON CONFLICT as a join clause
+        "WHERE true GROUP BY up.layer, up.row_id, down.layer, "
+        "down.row_id, up.depth + down.depth + 1"
+    )
+
+
+def _add_routes_sql(*edge: str) -> str:
+    """Statement adding the routes through an edge (see ``_routes_sql``)."""
+    return (
+        f"INSERT INTO node_closure ({', '.join(_CLOSURE_KEY)}, paths) "
+        f"{_routes_sql(*edge)} "
+        f"ON CONFLICT ({', '.join(_CLOSURE_KEY)}) "
+        "DO UPDATE SET paths = node_closure.paths + excluded.paths;"
+    )
+
+
+def _remove_routes_sql(*edge: str) -> str:
+    """Statements subtracting the routes through an edge."""
+    matches = " AND ".join(
+        f"node_closure.{column} = routes.{column}" for column in _CLOSURE_KEY
+    )
+    # Only rows below the parent's ancestors can have dropped to zero
+    up = _side_sql("descendant", "ancestor", edge[0], edge[1])
+    return (
+        "UPDATE node_closure "  # noqa: S608
+        "SET paths = node_closure.paths - routes.paths "
+        f"FROM ({_routes_sql(*edge)}) AS routes WHERE {matches}; "
+        "DELETE FROM node_closure WHERE paths <= 0 AND "
+        "(ancestor_layer, ancestor_id) IN "
+        f"(SELECT layer, row_id FROM ({up}) AS up);"
+    )
+
+
+def create_closure_triggers(connection: Connection) -> None:
+    """Create the triggers that maintain the closure (idempotent)."""
+    if connection.dialect.name == "postgresql":
+        _create_postgresql_triggers(connection)
+    else:
+        _create_sqlite_triggers(connection)
+
+
+def drop_closure_triggers(connection: Connection) -> None:
+    """Drop the closure maintenance triggers."""
+    if connection.dialect.name == "postgresql":
+        # Dropping the shared function takes every trigger with it
+        connection.execute(
+            text("DROP FUNCTION IF EXISTS node_closure_sync() CASCADE")
+        )
+        return
+    for edge in HIERARCHY_EDGES:
+        for suffix in ("ai", "ad", "au"):
+            connection.execute(
+                text(
+                    "DROP TRIGGER IF EXISTS "
+                    f"closure_{edge.table.name}_{suffix}"
+                )
+            )
+
+
+def _create_sqlite_triggers(connection: Connection) -> None:
+    for edge in HIERARCHY_EDGES:
+        table = edge.table.name
+
+        def ends(row: str, edge: HierarchyEdge = edge) -> tuple[str, ...]:
+            return (
+                f"'{edge.parent_layer}'",
+                f"{row}.{edge.parent_column}",
+                f"'{edge.child_layer}'",
+                f"{row}.{edge.child_column}",
+            )
+
+        add = _add_routes_sql(*ends("NEW"))
+        remove = _remove_routes_sql(*ends("OLD"))
+        for suffix, event_name, body in (
+            ("ai", "INSERT", add),
+            ("ad", "DELETE", remove),
+            ("au", "UPDATE", f"{remove} {add}"),
+        ):
+            connection.execute(
+                text(
+                    f"CREATE TRIGGER IF NOT EXISTS closure_{table}_{suffix} "
+                    f"AFTER {event_name} ON {table} BEGIN {body} END"
+                )
+            )
+
+
+def _create_postgresql_triggers(connection: Connection) -> None:
+    # One generic function; the layers and join columns of each table
+    # come from the trigger arguments, the ids from the row as JSON
+    edge = ("parent_layer", "parent_id", "child_layer", "child_id")
+    connection.execute(
+        text(
+            f"""
+            CREATE OR REPLACE FUNCTION node_closure_sync() RETURNS trigger
+            AS $$
+            DECLARE
+                parent_layer TEXT := TG_ARGV[0];
+                child_layer TEXT := TG_ARGV[2];
+                parent_id INTEGER;
+                child_id INTEGER;
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    parent_id := (to_jsonb(OLD)->>TG_ARGV[1])::INTEGER;
+                    child_id := (to_jsonb(OLD)->>TG_ARGV[3])::INTEGER;
+                    {_remove_routes_sql(*edge)}
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    parent_id := (to_jsonb(NEW)->>TG_ARGV[1])::INTEGER;
+                    child_id := (to_jsonb(NEW)->>TG_ARGV[3])::INTEGER;
+                    {_add_routes_sql(*edge)}
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+    )
+    for edge in HIERARCHY_EDGES:
+        table = edge.table.name
+        connection.execute(
+            text(f"DROP TRIGGER IF EXISTS closure_{table}_sync ON {table}")
+        )
+        connection.execute(
+            text(
+                f"CREATE TRIGGER closure_{table}_sync "
+                f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                "FOR EACH ROW EXECUTE FUNCTION node_closure_sync("
+                f"'{edge.parent_layer}', '{edge.parent_column}', "
+                f"'{edge.child_layer}', '{edge.child_column}')"
+            )
+        )
+
+
+def _edges_subquery() -> Subquery:
+    """All hierarchy links as (parent layer, parent id, child layer, id)."""
+    return union_all(
+        *(
+            select(
+                literal(edge.parent_layer).label("parent_layer"),
+                edge.table.c[edge.parent_column].label("parent_id"),
+                literal(edge.child_layer).label("child_layer"),
+                edge.table.c[edge.child_column].label("child_id"),
+            )
+            for edge in HIERARCHY_EDGES
+        )
+    ).subquery("edges")
+
+
+class TreeEdge(NamedTuple):
+    """One parent -> child link of a subtree, ``depth`` levels down."""
+
+    depth: int
+    parent_layer: str
+    parent_id: int
+    child_layer: str
+    child_id: int
+
+
+def subtree_edges(
+    session: Session, node: Base | int | str, max_depth: int
+) -> list[TreeEdge]:
+    """
+    Fetch every link of the subtree under ``node`` in one recursive query.
+
+    Walks the hierarchy join tables with a recursive CTE (SQLite and
+    PostgreSQL), so the whole subtree costs one round trip instead of one
+    lazy load per node and level. A node reachable along several routes
+    appears once per route.
+
+    Args:
+        session: Active SQLAlchemy session
+        node: Model instance, global node ID or typed ID (``"Goal-1"``)
+        max_depth: Deepest level to include (children of the root are 1)
+
+    Returns:
+        Links ordered by depth, parent and child
+    """
+    key = _node_key(session, node)
+    if key is None or max_depth < 1:
+        return []
+
+    edges = _edges_subquery()
+    tree = (
+        select(
+            literal(1).label("depth"),
+            edges.c.parent_layer,
+            edges.c.parent_id,
+            edges.c.child_layer,
+            edges.c.child_id,
+        )
+        .where(edges.c.parent_layer == key[0], edges.c.parent_id == key[1])
+        .cte("tree", recursive=True)
+    )
+    tree = tree.union_all(
+        select(
+            (tree.c.depth + 1).label("depth"),
+            edges.c.parent_layer,
+            edges.c.parent_id,
+            edges.c.child_layer,
+            edges.c.child_id,
+        )
+        .join(
+            tree,
+            (edges.c.parent_layer == tree.c.child_layer)
+            & (edges.c.parent_id == tree.c.child_id),
+        )
+        .where(tree.c.depth < max_depth)
+    )
+    rows = session.execute(
+        select(tree).order_by(
+            tree.c.depth,
+            tree.c.parent_layer,
+            tree.c.parent_id,
+            tree.c.child_layer,
+            tree.c.child_id,
+        )
+    ).all()
+    return [TreeEdge(*row) for row in rows]
+
+
+def rebuild_closure(session: Session) -> int:
+    """
+    Recompute the closure table and make sure its triggers exist.
+
+    For databases created before the closure (or its triggers) existed.
+
+    Args:
+        session: Active SQLAlchemy session (committed on success)
+
+    Returns:
+        Number of closure rows written
+    """
+    connection = session.connection()
+    create_closure_triggers(connection)
+    total = populate_closure(connection)
+    session.commit()
+    return total
+
+
+def populate_closure(connection: Connection) -> int:
+    """
+    Replace the closure contents with what the join tables imply.
+
+    Runs one set-based insert per depth level, so the cost grows with the
+    depth of the hierarchy (at most 11 levels), not the number of nodes.
+
+    Args:
+        connection: Connection of the writing transaction
+
+    Returns:
+        Number of closure rows written
+    """
+    closure = NodeClosure.__table__
+    c = closure.c
+    edges = _edges_subquery()
+    columns = [
+        "ancestor_layer",
+        "ancestor_id",
+        "descendant_layer",
+        "descendant_id",
+        "depth",
+        "paths",
+    ]
+
+    connection.execute(delete(closure))
+    connection.execute(
+        insert(closure).from_select(
+            columns,
+            select(
+                edges.c.parent_layer,
+                edges.c.parent_id,
+                edges.c.child_layer,
+                edges.c.child_id,
+                literal(1),
+                func.count(),
+            ).group_by(
+                edges.c.parent_layer,
+                edges.c.parent_id,
+                edges.c.child_layer,
+                edges.c.child_id,
+            ),
+        )
+    )
+
+    depth = 1
+    while True:
+        extended = connection.execute(
+            insert(closure).from_select(
+                columns,
+                select(
+                    c.ancestor_layer,
+                    c.ancestor_id,
+                    edges.c.child_layer,
+                    edges.c.child_id,
+                    literal(depth + 1),
+                    func.sum(c.paths),
+                )
+                .join(
+                    edges,
+                    (edges.c.parent_layer == c.descendant_layer)
+                    & (edges.c.parent_id == c.descendant_id),
+                )
+                .where(c.depth == depth)
+                .group_by(
+                    c.ancestor_layer,
+                    c.ancestor_id,
+                    edges.c.child_layer,
+                    edges.c.child_id,
+                ),
+            )
+        )
+        if not extended.rowcount:
+            break
+        depth += 1
+
+    total = connection.execute(
+        select(func.count()).select_from(closure)
+    ).scalar_one()
+    return total
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_with_schema(
+    _target: MetaData, connection: Connection, **_kw: object
+) -> None:
+    """Create the closure triggers alongside the join tables."""
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        create_closure_triggers(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_with_schema(
+    _target: MetaData, connection: Connection, **_kw: object
+) -> None:
+    """Drop the closure triggers before the join tables go away."""
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        drop_closure_triggers(connection)
+
+
+__all__ = [
+    "HIERARCHY_EDGES",
+    "HierarchyEdge",
+    "TreeEdge",
+    "ancestors",
+    "create_closure_triggers",
+    "descendants",
+    "drop_closure_triggers",
+    "link",
+    "populate_closure",
+    "rebuild_closure",
+    "subtree_edges",
+    "unlink",
+]
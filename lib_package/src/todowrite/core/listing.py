@@ -0,0 +1,266 @@
+"""
+Cross-layer listing for ToDoWrite.
+
+Lists items from every layer table as one stream, newest first, with a
+single ``UNION ALL`` query. Pages are addressed by an opaque keyset cursor
+rather than an offset: each page resumes strictly after the last row of
+the previous one, so page 500 costs the same as page 1.
+
+Every layer branch of the union carries its own keyset predicate and
+``LIMIT``, served by the ``(updated_at, id)`` index on each layer table;
+the outer query merges at most ``limit + 1`` rows per layer.
+``updated_since`` narrows that same index scan; ``completed_between`` is
+a range scan of the ``completion_date`` index.
+
+Example:
+    >>> from todowrite.core.listing import list_items
+    >>>
+    >>> page = list_items(session, status="in_progress", limit=50)
+    >>> more = list_items(session, status="in_progress", limit=50,
+    ...                   cursor=page.next_cursor)
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from sqlalchemy import (
+    Integer,
+    String,
+    and_,
+    literal,
+    null,
+    select,
+    tuple_,
+    union_all,
+)
+
+from .models import LAYER_MODELS, NodeRegistry
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+
+class ListedItem(NamedTuple):
+    """One row of the cross-layer projection."""
+
+    layer: str
+    id: int
+    node_id: int | None
+    title: str | None
+    status: str | None
+    owner: str | None
+    progress: int | None
+    updated_at: datetime
+
+
+class ItemPage(NamedTuple):
+    """A page of listed items and the cursor for the page after it."""
+
+    items: list[ListedItem]
+    next_cursor: str | None
+
+
+def encode_cursor(item: ListedItem) -> str:
+    """Encode the sort key of ``item`` as an opaque URL-safe cursor."""
+    key = json.dumps([item.updated_at.isoformat(), item.layer, item.id])
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str, int]:
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, layer, row_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+        updated_at = datetime.fromisoformat(updated_at)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not (layer in LAYER_MODELS and isinstance(row_id, int)):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return updated_at, layer, row_id
+
+
+def _column(model: Any, name: str, type_: Any) -> Any:
+    """Model column ``name``, or a typed NULL for layers without it."""
+    column = getattr(model, name, None)
+    if column is None:
+        return null().cast(type_).label(name)
+    return column.label(name)
+
+
+def _branch(
+    layer: str,
+    filters: dict[str, str],
+    after: tuple[datetime, str, int] | None,
+    limit: int,
+    updated_since: datetime | None = None,
+    completed_between: tuple[datetime, datetime] | None = None,
+) -> Any:
+    """Select the first ``limit`` rows of one layer after the cursor."""
+    model = LAYER_MODELS[layer]
+    title = getattr(model, "title", None)
+    if title is None:
+        title = getattr(model, "name", None)
+    query = select(
+        literal(layer, String).label("layer"),
+        model.id.label("id"),
+        title.label("title"),
+        _column(model, "status", String),
+        _column(model, "owner", String),
+        _column(model, "progress", Integer),
+        model.updated_at.label("updated_at"),
+    )
+    for name, value in filters.items():
+        query = query.where(getattr(model, name) == value)
+    if updated_since is not None:
+        query = query.where(model.updated_at >= updated_since)
+    if completed_between is not None:
+        query = query.where(
+            model.completion_date.between(*completed_between)
+        )
+
+    if after is not None:
+        # The global order is (updated_at, layer, id) descending. The layer
+        # is constant within a branch, so the cursor reduces to a
+        # predicate the (updated_at, id) index can seek to directly.
+        updated_at, after_layer, row_id = after
+        if layer < after_layer:
+            query = query.where(model.updated_at <= updated_at)
+        elif layer == after_layer:
+            query = query.where(
+                tuple_(model.updated_at, model.id) < tuple_(updated_at, row_id)
+            )
+        else:
+            query = query.where(model.updated_at < updated_at)
+
+    return (
+        query.order_by(model.updated_at.desc(), model.id.desc())
+        .limit(limit)
+        .subquery()
+    )
+
+
+def list_items(
+    session: Session,
+    layer: str | None = None,
+    owner: str | None = None,
+    status: str | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+    updated_since: datetime | None = None,
+    completed_between: tuple[datetime, datetime] | None = None,
+) -> ItemPage:
+    """
+    List items across layers, most recently updated first.
+
+    Args:
+        session: Active SQLAlchemy session
+        layer: Restrict the listing to one layer (e.g. ``"Task"``)
+        owner: Only items with this owner
+        status: Only items with this status
+        limit: Page size
+        cursor: ``next_cursor`` of the previous page, or None for page 1
+        updated_since: Only items updated at or after this time
+        completed_between: Only items whose ``completion_date`` lies in
+            this inclusive ``(start, end)`` range
+
+    Returns:
+        The page of items and the cursor for the next page (None when this
+        is the last page)
+
+    Raises:
+        ValueError: If the layer or cursor is invalid
+    """
+    if layer is not None and layer not in LAYER_MODELS:
+        raise ValueError(f"Unknown layer: {layer}")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+
+    after = decode_cursor(cursor) if cursor else None
+    filters = {
+        name: value
+        for name, value in (("owner", owner), ("status", status))
+        if value is not None
+    }
+    columns = [*filters]
+    if completed_between is not None:
+        columns.append("completion_date")
+    # Layers without a filtered column (e.g. Label) can never match it
+    layers = [
+        name
+        for name, model in LAYER_MODELS.items()
+        if (layer is None or name == layer)
+        and all(hasattr(model, column) for column in columns)
+    ]
+    if not layers:
+        return ItemPage([], None)
+
+    # Fetch one extra row to learn whether another page follows
+    branches = [
+        select(*branch.c)
+        for branch in (
+            _branch(
+                name,
+                filters,
+                after,
+                limit + 1,
+                updated_since=updated_since,
+                completed_between=completed_between,
+            )
+            for name in layers
+        )
+    ]
+    union = (
+        branches[0] if len(branches) == 1 else union_all(*branches)
+    ).subquery("items")
+
+    rows = session.execute(
+        select(union, NodeRegistry.id.label("node_id"))
+        .outerjoin(
+            NodeRegistry,
+            and_(
+                NodeRegistry.layer == union.c.layer,
+                NodeRegistry.row_id == union.c.id,
+            ),
+        )
+        .order_by(
+            union.c.updated_at.desc(), union.c.layer.desc(), union.c.id.desc()
+        )
+        .limit(limit + 1)
+    ).all()
+
+    items = [
+        ListedItem(
+            layer=row.layer,
+            id=row.id,
+            node_id=row.node_id,
+            title=row.title,
+            status=row.status,
+            owner=row.owner,
+            progress=row.progress,
+            updated_at=row.updated_at,
+        )
+        for row in rows[:limit]
+    ]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > limit else None
+    return ItemPage(items, next_cursor)
+
+
+__all__ = [
+    "ItemPage",
+    "ListedItem",
+    "decode_cursor",
+    "encode_cursor",
+    "list_items",
+]
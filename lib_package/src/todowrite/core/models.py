@@ -19,6 +19,8 @@ Key Models:
 - SubTask: Breakdown of tasks into smaller units
 - Command: Executable commands and scripts
 - Label: Tags and categorization system
+- NodeRegistry: Global node ID index across all layer tables
+- NodeClosure: Ancestor/descendant closure of the layer hierarchy
 
 Example:
     >>> from todowrite.core.models import Goal
@@ -34,98 +36,216 @@ Example:
 from __future__ import annotations
 
 import json
-from datetime import datetime
-from typing import Any, Literal
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any, ClassVar, Literal
 
 from sqlalchemy import (
     Column,
+    DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
     Text,
+    TypeDecorator,
+    UniqueConstraint,
+    event,
 )
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
     mapped_column,
     relationship,
 )
+from sqlalchemy.sql.functions import FunctionElement
+
+if TYPE_CHECKING:
+    from sqlalchemy import Connection
+    from sqlalchemy.engine import Dialect
+    from sqlalchemy.orm import Mapper
+    from sqlalchemy.sql.compiler import SQLCompiler
 
 
 class Base(DeclarativeBase):
     """SQLAlchemy declarative base for all ToDoWrite models."""
 
-
-# Join tables (lexical order, no primary keys)
+    # Read server-generated timestamps back with RETURNING on INSERT and
+    # UPDATE instead of a lazy refresh (which async sessions cannot do)
+    __mapper_args__: ClassVar[dict[str, Any]] = {"eager_defaults": True}
+
+
+class utc_now(FunctionElement[datetime]):  # lower case: a SQL function
+    """Current UTC time, evaluated by the database.
+
+    Used as the server default of every timestamp column. On SQLite it
+    renders in the same text format SQLAlchemy stores datetimes in, so
+    defaulted and bound values compare correctly.
+    """
+
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(utc_now)
+def _utc_now(element: utc_now, compiler: SQLCompiler, **kw: object) -> str:
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utc_now, "sqlite")
+def _utc_now_sqlite(
+    element: utc_now, compiler: SQLCompiler, **kw: object
+) -> str:
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+class UTCDateTime(TypeDecorator[datetime]):
+    """Timezone-aware timestamp, always returned in UTC.
+
+    PostgreSQL stores ``timestamptz``. SQLite has no timezone support, so
+    values are normalized to UTC before storage and tagged as UTC when
+    read back; stored values then compare chronologically. Naive inputs are
+    taken as local time, the convention of the old ``isoformat()`` strings,
+    and ISO 8601 strings are parsed.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(
+        self, value: datetime | str | None, dialect: Dialect
+    ) -> datetime | None:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        value = value.astimezone(UTC)
+        if dialect.name == "sqlite":
+            return value.replace(tzinfo=None)
+        return value
+
+    def process_result_value(
+        self, value: datetime | None, dialect: Dialect
+    ) -> datetime | None:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=UTC)
+        return value.astimezone(UTC)
+
+
+def _layer_indexes(table_name: str) -> tuple[Index, ...]:
+    """Secondary indexes on the filter columns shared by every layer table.
+
+    The composites serve the CLI/web ``status`` + ``owner`` filters and
+    assignee work queues; their leading columns also cover single-column
+    ``status`` and ``assignee`` lookups. ``(updated_at, id)`` serves the
+    keyset-paginated cross-layer listing and ``updated_since`` filters;
+    the date indexes serve ``completed_between``-style range filters.
+    """
+    return (
+        Index(f"ix_{table_name}_status_owner", "status", "owner"),
+        Index(f"ix_{table_name}_assignee_status", "assignee", "status"),
+        Index(f"ix_{table_name}_owner", "owner"),
+        Index(f"ix_{table_name}_severity", "severity"),
+        Index(f"ix_{table_name}_work_type", "work_type"),
+        Index(f"ix_{table_name}_created_at", "created_at"),
+        Index(f"ix_{table_name}_updated_at_id", "updated_at", "id"),
+        Index(f"ix_{table_name}_started_date", "started_date"),
+        Index(f"ix_{table_name}_completion_date", "completion_date"),
+    )
+
+
+# Join tables (lexical order, composite primary keys)
 goals_labels = Table(
     "goals_labels",  # Goal < Label (alphabetical)
     Base.metadata,
-    Column("goal_id", Integer, ForeignKey("goals.id")),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column("goal_id", Integer, ForeignKey("goals.id"), primary_key=True),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 concepts_labels = Table(
     "concepts_labels",  # Concept < Label (alphabetical)
     Base.metadata,
-    Column("concept_id", Integer, ForeignKey("concepts.id")),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column("concept_id", Integer, ForeignKey("concepts.id"), primary_key=True),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 contexts_labels = Table(
     "contexts_labels",  # Context < Label (alphabetical)
     Base.metadata,
-    Column("context_id", Integer, ForeignKey("contexts.id")),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column("context_id", Integer, ForeignKey("contexts.id"), primary_key=True),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 goals_concepts = Table(
     "goals_concepts",  # Goal < Concept (alphabetical)
     Base.metadata,
-    Column("goal_id", Integer, ForeignKey("goals.id")),
-    Column("concept_id", Integer, ForeignKey("concepts.id")),
+    Column("goal_id", Integer, ForeignKey("goals.id"), primary_key=True),
+    Column("concept_id", Integer, ForeignKey("concepts.id"), primary_key=True),
 )
 
 goals_contexts = Table(
     "goals_contexts",  # Goal < Context (alphabetical)
     Base.metadata,
-    Column("goal_id", Integer, ForeignKey("goals.id")),
-    Column("context_id", Integer, ForeignKey("contexts.id")),
+    Column("goal_id", Integer, ForeignKey("goals.id"), primary_key=True),
+    Column("context_id", Integer, ForeignKey("contexts.id"), primary_key=True),
 )
 
 concepts_contexts = Table(
     "concepts_contexts",  # Concept < Context (alphabetical)
     Base.metadata,
-    Column("concept_id", Integer, ForeignKey("concepts.id")),
-    Column("context_id", Integer, ForeignKey("contexts.id")),
+    Column("concept_id", Integer, ForeignKey("concepts.id"), primary_key=True),
+    Column("context_id", Integer, ForeignKey("contexts.id"), primary_key=True),
 )
 
 requirements_concepts = Table(
     "requirements_concepts",  # Requirement < Concept (alphabetical)
     Base.metadata,
-    Column("requirement_id", Integer, ForeignKey("requirements.id")),
-    Column("concept_id", Integer, ForeignKey("concepts.id")),
+    Column(
+        "requirement_id",
+        Integer,
+        ForeignKey("requirements.id"),
+        primary_key=True,
+    ),
+    Column("concept_id", Integer, ForeignKey("concepts.id"), primary_key=True),
 )
 
 requirements_contexts = Table(
     "requirements_contexts",  # Requirement < Context (alphabetical)
     Base.metadata,
-    Column("requirement_id", Integer, ForeignKey("requirements.id")),
-    Column("context_id", Integer, ForeignKey("contexts.id")),
+    Column(
+        "requirement_id",
+        Integer,
+        ForeignKey("requirements.id"),
+        primary_key=True,
+    ),
+    Column("context_id", Integer, ForeignKey("contexts.id"), primary_key=True),
 )
 
 constraints_labels = Table(
     "constraints_labels",  # Constraints < Label (alphabetical)
     Base.metadata,
-    Column("constraint_id", Integer, ForeignKey("constraints.id")),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column(
+        "constraint_id",
+        Integer,
+        ForeignKey("constraints.id"),
+        primary_key=True,
+    ),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 requirements_labels = Table(
     "requirements_labels",  # Requirements < Label (alphabetical)
     Base.metadata,
-    Column("requirement_id", Integer, ForeignKey("requirements.id")),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column(
+        "requirement_id",
+        Integer,
+        ForeignKey("requirements.id"),
+        primary_key=True,
+    ),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 acceptance_criteria_labels = Table(
@@ -135,52 +255,58 @@ acceptance_criteria_labels = Table(
         "acceptance_criterion_id",
         Integer,
         ForeignKey("acceptance_criteria.id"),
+        primary_key=True,
     ),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 interface_contracts_labels = Table(
     "interface_contracts_labels",  # InterfaceContract < Label (alphabetical)
     Base.metadata,
     Column(
-        "interface_contract_id", Integer, ForeignKey("interface_contracts.id")
+        "interface_contract_id",
+        Integer,
+        ForeignKey("interface_contracts.id"),
+        primary_key=True,
     ),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 phases_labels = Table(
     "phases_labels",  # Phase < Label (alphabetical)
     Base.metadata,
-    Column("phase_id", Integer, ForeignKey("phases.id")),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column("phase_id", Integer, ForeignKey("phases.id"), primary_key=True),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 steps_labels = Table(
     "steps_labels",  # Step < Label (alphabetical)
     Base.metadata,
-    Column("step_id", Integer, ForeignKey("steps.id")),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column("step_id", Integer, ForeignKey("steps.id"), primary_key=True),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 tasks_labels = Table(
     "tasks_labels",  # Task < Label (alphabetical)
     Base.metadata,
-    Column("task_id", Integer, ForeignKey("tasks.id")),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column("task_id", Integer, ForeignKey("tasks.id"), primary_key=True),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 sub_tasks_labels = Table(
     "sub_tasks_labels",  # SubTask < Label (alphabetical)
     Base.metadata,
-    Column("sub_task_id", Integer, ForeignKey("sub_tasks.id")),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column(
+        "sub_task_id", Integer, ForeignKey("sub_tasks.id"), primary_key=True
+    ),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 commands_labels = Table(
     "commands_labels",  # Command < Label (alphabetical)
     Base.metadata,
-    Column("command_id", Integer, ForeignKey("commands.id")),
-    Column("label_id", Integer, ForeignKey("labels.id")),
+    Column("command_id", Integer, ForeignKey("commands.id"), primary_key=True),
+    Column("label_id", Integer, ForeignKey("labels.id"), primary_key=True),
 )
 
 # Layer association tables (proper ToDoWrite Models style)
@@ -188,27 +314,48 @@ commands_labels = Table(
 constraints_goals = Table(
     "constraints_goals",
     Base.metadata,
-    Column("goal_id", Integer, ForeignKey("goals.id")),
-    Column("constraint_id", Integer, ForeignKey("constraints.id")),
+    Column("goal_id", Integer, ForeignKey("goals.id"), primary_key=True),
+    Column(
+        "constraint_id",
+        Integer,
+        ForeignKey("constraints.id"),
+        primary_key=True,
+    ),
 )
 
 # Constraints + Requirements = constraints_requirements
 constraints_requirements = Table(
     "constraints_requirements",
     Base.metadata,
-    Column("constraint_id", Integer, ForeignKey("constraints.id")),
-    Column("requirement_id", Integer, ForeignKey("requirements.id")),
+    Column(
+        "constraint_id",
+        Integer,
+        ForeignKey("constraints.id"),
+        primary_key=True,
+    ),
+    Column(
+        "requirement_id",
+        Integer,
+        ForeignKey("requirements.id"),
+        primary_key=True,
+    ),
 )
 
 # Requirements + AcceptanceCriteria = requirements_acceptance_criteria
 requirements_acceptance_criteria = Table(
     "requirements_acceptance_criteria",
     Base.metadata,
-    Column("requirement_id", Integer, ForeignKey("requirements.id")),
+    Column(
+        "requirement_id",
+        Integer,
+        ForeignKey("requirements.id"),
+        primary_key=True,
+    ),
     Column(
         "acceptance_criterion_id",
         Integer,
         ForeignKey("acceptance_criteria.id"),
+        primary_key=True,
     ),
 )
 
@@ -220,9 +367,13 @@ acceptance_criteria_interface_contracts = Table(
         "acceptance_criterion_id",
         Integer,
         ForeignKey("acceptance_criteria.id"),
+        primary_key=True,
     ),
     Column(
-        "interface_contract_id", Integer, ForeignKey("interface_contracts.id")
+        "interface_contract_id",
+        Integer,
+        ForeignKey("interface_contracts.id"),
+        primary_key=True,
     ),
 )
 
@@ -231,9 +382,12 @@ interface_contracts_phases = Table(
     "interface_contracts_phases",
     Base.metadata,
     Column(
-        "interface_contract_id", Integer, ForeignKey("interface_contracts.id")
+        "interface_contract_id",
+        Integer,
+        ForeignKey("interface_contracts.id"),
+        primary_key=True,
     ),
-    Column("phase_id", Integer, ForeignKey("phases.id")),
+    Column("phase_id", Integer, ForeignKey("phases.id"), primary_key=True),
 )
 
 # Hierarchical associations (following association patterns)
@@ -241,50 +395,67 @@ interface_contracts_phases = Table(
 goals_tasks = Table(
     "goals_tasks",  # Goal < Task (alphabetical)
     Base.metadata,
-    Column("goal_id", Integer, ForeignKey("goals.id")),
-    Column("task_id", Integer, ForeignKey("tasks.id")),
+    Column("goal_id", Integer, ForeignKey("goals.id"), primary_key=True),
+    Column("task_id", Integer, ForeignKey("tasks.id"), primary_key=True),
 )
 
 # Goal has many Phases, Phases belong to Goal
 goals_phases = Table(
     "goals_phases",  # Goal < Phase (alphabetical)
     Base.metadata,
-    Column("goal_id", Integer, ForeignKey("goals.id")),
-    Column("phase_id", Integer, ForeignKey("phases.id")),
+    Column("goal_id", Integer, ForeignKey("goals.id"), primary_key=True),
+    Column("phase_id", Integer, ForeignKey("phases.id"), primary_key=True),
 )
 
 # Phase has many Steps, Steps belong to Phase
 phases_steps = Table(
     "phases_steps",  # Phase < Step (alphabetical)
     Base.metadata,
-    Column("phase_id", Integer, ForeignKey("phases.id")),
-    Column("step_id", Integer, ForeignKey("steps.id")),
+    Column("phase_id", Integer, ForeignKey("phases.id"), primary_key=True),
+    Column("step_id", Integer, ForeignKey("steps.id"), primary_key=True),
 )
 
 # Step has many Tasks, Tasks belong to Step (additional to Goal->Task)
 steps_tasks = Table(
     "steps_tasks",  # Step < Task (alphabetical)
     Base.metadata,
-    Column("step_id", Integer, ForeignKey("steps.id")),
-    Column("task_id", Integer, ForeignKey("tasks.id")),
+    Column("step_id", Integer, ForeignKey("steps.id"), primary_key=True),
+    Column("task_id", Integer, ForeignKey("tasks.id"), primary_key=True),
 )
 
 # Task has many SubTasks, SubTasks belong to Task
 tasks_sub_tasks = Table(
     "tasks_sub_tasks",  # Task < SubTask (alphabetical)
     Base.metadata,
-    Column("task_id", Integer, ForeignKey("tasks.id")),
-    Column("sub_task_id", Integer, ForeignKey("sub_tasks.id")),
+    Column("task_id", Integer, ForeignKey("tasks.id"), primary_key=True),
+    Column(
+        "sub_task_id", Integer, ForeignKey("sub_tasks.id"), primary_key=True
+    ),
 )
 
 # SubTask has many Commands, Commands belong to SubTask
 sub_tasks_commands = Table(
     "sub_tasks_commands",  # SubTask < Command (alphabetical)
     Base.metadata,
-    Column("sub_task_id", Integer, ForeignKey("sub_tasks.id")),
-    Column("command_id", Integer, ForeignKey("commands.id")),
+    Column(
+        "sub_task_id", Integer, ForeignKey("sub_tasks.id"), primary_key=True
+    ),
+    Column("command_id", Integer, ForeignKey("commands.id"), primary_key=True),
+)
+
+# Every table declared so far is a join table
+ASSOCIATION_TABLES: tuple[Table, ...] = tuple(
+    table
+    for table in Base.metadata.tables.values()
+    if len(table.primary_key.columns) == 2
 )
 
+# Reverse-lookup indexes: the composite primary key leads with the first
+# column, so lookups by the second column need their own index
+for _table in ASSOCIATION_TABLES:
+    _reverse = list(_table.columns)[1]
+    Index(f"ix_{_table.name}_{_reverse.name}", _reverse)
+
 
 LayerType = Literal[
     "Goal",
@@ -310,6 +481,7 @@ class Goal(Base):
     """ToDoWrite Goal model for hierarchical task management."""
 
     __tablename__ = "goals"
+    __table_args__ = _layer_indexes("goals")
 
     # Primary key (Integer for SQLite autoincrement compatibility)
     id: Mapped[int] = mapped_column(
@@ -321,8 +493,8 @@ class Goal(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields (flattened for now, could be separate table)
     owner: Mapped[str | None] = mapped_column(String)
@@ -335,16 +507,16 @@ class Goal(Base):
 
     # Timestamps: created_at readonly, updated_at updates on save
     # created_at: Set once on creation, never changes (readonly)
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
 
     # updated_at: Updates on every save (writable)
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships (bidirectional with back_populates)
@@ -382,6 +554,7 @@ class Concept(Base):
     """ToDoWrite Concept model for hierarchical task management."""
 
     __tablename__ = "concepts"
+    __table_args__ = _layer_indexes("concepts")
 
     # Primary key (Integer for SQLite autoincrement compatibility)
     id: Mapped[int] = mapped_column(
@@ -393,8 +566,8 @@ class Concept(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields (flattened for now, could be separate table)
     owner: Mapped[str | None] = mapped_column(String)
@@ -406,14 +579,14 @@ class Concept(Base):
     extra_data: Mapped[str | None] = mapped_column(Text)  # JSON string
 
     # Timestamp conventions - created_at readonly, updated_at writable
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -443,6 +616,7 @@ class Context(Base):
     """ToDoWrite Context model for hierarchical task management."""
 
     __tablename__ = "contexts"
+    __table_args__ = _layer_indexes("contexts")
 
     # Primary key convention
     id: Mapped[int] = mapped_column(
@@ -454,8 +628,8 @@ class Context(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields
     owner: Mapped[str | None] = mapped_column(String)
@@ -467,14 +641,14 @@ class Context(Base):
     extra_data: Mapped[str | None] = mapped_column(Text)
 
     # Timestamp conventions
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -504,6 +678,7 @@ class Constraints(Base):
     """ToDoWrite Constraints model for hierarchical task management."""
 
     __tablename__ = "constraints"
+    __table_args__ = _layer_indexes("constraints")
 
     # Primary key convention
     id: Mapped[int] = mapped_column(
@@ -515,8 +690,8 @@ class Constraints(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields
     owner: Mapped[str | None] = mapped_column(String)
@@ -528,14 +703,14 @@ class Constraints(Base):
     extra_data: Mapped[str | None] = mapped_column(Text)
 
     # Timestamp conventions
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -560,6 +735,7 @@ class Requirements(Base):
     """ToDoWrite Requirements model for hierarchical task management."""
 
     __tablename__ = "requirements"
+    __table_args__ = _layer_indexes("requirements")
 
     # Primary key convention
     id: Mapped[int] = mapped_column(
@@ -571,8 +747,8 @@ class Requirements(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields
     owner: Mapped[str | None] = mapped_column(String)
@@ -584,14 +760,14 @@ class Requirements(Base):
     extra_data: Mapped[str | None] = mapped_column(Text)
 
     # Timestamp conventions
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -632,6 +808,7 @@ class AcceptanceCriteria(Base):
     """ToDoWrite AcceptanceCriteria model for hierarchical task management."""
 
     __tablename__ = "acceptance_criteria"
+    __table_args__ = _layer_indexes("acceptance_criteria")
 
     # Primary key convention
     id: Mapped[int] = mapped_column(
@@ -643,8 +820,8 @@ class AcceptanceCriteria(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields
     owner: Mapped[str | None] = mapped_column(String)
@@ -656,14 +833,14 @@ class AcceptanceCriteria(Base):
     extra_data: Mapped[str | None] = mapped_column(Text)
 
     # Timestamp conventions
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -692,6 +869,7 @@ class InterfaceContract(Base):
     """ToDoWrite InterfaceContract model for hierarchical task management."""
 
     __tablename__ = "interface_contracts"
+    __table_args__ = _layer_indexes("interface_contracts")
 
     # Primary key convention
     id: Mapped[int] = mapped_column(
@@ -703,8 +881,8 @@ class InterfaceContract(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields
     owner: Mapped[str | None] = mapped_column(String)
@@ -716,14 +894,14 @@ class InterfaceContract(Base):
     extra_data: Mapped[str | None] = mapped_column(Text)
 
     # Timestamp conventions
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -752,6 +930,7 @@ class Phase(Base):
     """ToDoWrite Phase model for hierarchical task management."""
 
     __tablename__ = "phases"
+    __table_args__ = _layer_indexes("phases")
 
     # Primary key convention
     id: Mapped[int] = mapped_column(
@@ -763,8 +942,8 @@ class Phase(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields
     owner: Mapped[str | None] = mapped_column(String)
@@ -776,14 +955,14 @@ class Phase(Base):
     extra_data: Mapped[str | None] = mapped_column(Text)
 
     # Timestamp conventions
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -813,6 +992,7 @@ class Step(Base):
     """ToDoWrite Step model for hierarchical task management."""
 
     __tablename__ = "steps"
+    __table_args__ = _layer_indexes("steps")
 
     # Primary key convention
     id: Mapped[int] = mapped_column(
@@ -824,8 +1004,8 @@ class Step(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields
     owner: Mapped[str | None] = mapped_column(String)
@@ -837,14 +1017,14 @@ class Step(Base):
     extra_data: Mapped[str | None] = mapped_column(Text)
 
     # Timestamp conventions
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -867,6 +1047,7 @@ class Task(Base):
     """ToDoWrite Task model for hierarchical task management."""
 
     __tablename__ = "tasks"
+    __table_args__ = _layer_indexes("tasks")
 
     # Primary key convention
     id: Mapped[int] = mapped_column(
@@ -878,8 +1059,8 @@ class Task(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields
     owner: Mapped[str | None] = mapped_column(String)
@@ -891,14 +1072,14 @@ class Task(Base):
     extra_data: Mapped[str | None] = mapped_column(Text)
 
     # Timestamp conventions
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -926,6 +1107,7 @@ class SubTask(Base):
     """ToDoWrite SubTask model for hierarchical task management."""
 
     __tablename__ = "sub_tasks"
+    __table_args__ = _layer_indexes("sub_tasks")
 
     # Primary key convention
     id: Mapped[int] = mapped_column(
@@ -937,8 +1119,8 @@ class SubTask(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields
     owner: Mapped[str | None] = mapped_column(String)
@@ -950,14 +1132,14 @@ class SubTask(Base):
     extra_data: Mapped[str | None] = mapped_column(Text)
 
     # Timestamp conventions
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -980,6 +1162,7 @@ class Label(Base):
     """Represents a label that can be attached to goals and other models."""
 
     __tablename__ = "labels"
+    __table_args__ = (Index("ix_labels_updated_at_id", "updated_at", "id"),)
 
     # Primary key (Integer for SQLite autoincrement compatibility)
     id: Mapped[int] = mapped_column(
@@ -992,14 +1175,14 @@ class Label(Base):
     )  # Uses 'name', not 'label'
 
     # Timestamp conventions - created_at readonly, updated_at writable
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships (bidirectional with back_populates)
@@ -1049,6 +1232,7 @@ class Command(Base):
     """ToDoWrite Command model for hierarchical task management."""
 
     __tablename__ = "commands"
+    __table_args__ = _layer_indexes("commands")
 
     # Primary key convention
     id: Mapped[int] = mapped_column(
@@ -1060,8 +1244,8 @@ class Command(Base):
     description: Mapped[str | None] = mapped_column(Text)
     status: Mapped[str] = mapped_column(String, default="planned")
     progress: Mapped[int | None] = mapped_column(Integer)
-    started_date: Mapped[str | None] = mapped_column(String)
-    completion_date: Mapped[str | None] = mapped_column(String)
+    started_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
+    completion_date: Mapped[datetime | None] = mapped_column(UTCDateTime)
 
     # Metadata fields
     owner: Mapped[str | None] = mapped_column(String)
@@ -1088,14 +1272,14 @@ class Command(Base):
     )  # JSON string with expected outputs (log files, generated files, etc.)
 
     # Timestamp conventions
-    created_at: Mapped[str] = mapped_column(
-        String, default=lambda: datetime.now().isoformat(), nullable=False
+    created_at: Mapped[datetime] = mapped_column(
+        UTCDateTime, server_default=utc_now(), nullable=False
     )
-    updated_at: Mapped[str] = mapped_column(
-        String,
-        default=lambda: datetime.now().isoformat(),
+    updated_at: Mapped[datetime] = mapped_column(
+        UTCDateTime,
+        server_default=utc_now(),
         nullable=False,
-        onupdate=lambda: datetime.now().isoformat(),
+        onupdate=utc_now(),
     )
 
     # Relationships
@@ -1129,6 +1313,136 @@ class Command(Base):
         self.artifacts = json.dumps(value)
 
 
+class NodeRegistry(Base):
+    """Global node index mapping one ID space onto (layer, row id).
+
+    Every layer table numbers its rows independently, so a bare integer is
+    ambiguous across layers. Each row gets exactly one registry entry whose
+    ``id`` is unique across the whole database; resolving a global ID is a
+    single primary-key read instead of probing every layer table.
+    """
+
+    __tablename__ = "node_registry"
+    __table_args__ = (
+        UniqueConstraint("layer", "row_id", name="uq_node_registry_layer_row"),
+    )
+
+    # Global node ID (unique across all layers)
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=True, nullable=False
+    )
+
+    # Layer name (model class name, e.g. "Task") and the row id in its table
+    layer: Mapped[str] = mapped_column(String, nullable=False)
+    row_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class NodeClosure(Base):
+    """Transitive closure of the layer hierarchy.
+
+    One row per (ancestor, descendant, depth) reachable through the
+    hierarchy join tables, with ``paths`` counting the distinct routes of
+    that length. A node can have several parents (a Task under both a Goal
+    and a Step), so path counts let unlinking one route leave the others
+    intact. Maintained by ``todowrite.core.hierarchy``.
+    """
+
+    __tablename__ = "node_closure"
+    __table_args__ = (
+        Index(
+            "ix_node_closure_descendant",
+            "descendant_layer",
+            "descendant_id",
+            "ancestor_layer",
+        ),
+    )
+
+    # Primary key leads with the ancestor so subtree reads are index seeks
+    ancestor_layer: Mapped[str] = mapped_column(String, primary_key=True)
+    ancestor_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    descendant_layer: Mapped[str] = mapped_column(String, primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Number of distinct routes of this depth between the two nodes
+    paths: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+
+# Layer name -> model class (12 layers + Label)
+LAYER_MODELS: dict[str, type[Base]] = {
+    "Goal": Goal,
+    "Concept": Concept,
+    "Context": Context,
+    "Constraints": Constraints,
+    "Requirements": Requirements,
+    "AcceptanceCriteria": AcceptanceCriteria,
+    "InterfaceContract": InterfaceContract,
+    "Phase": Phase,
+    "Step": Step,
+    "Task": Task,
+    "SubTask": SubTask,
+    "Command": Command,
+    "Label": Label,
+}
+
+
+def _label_tables() -> dict[str, tuple[Table, str, str]]:
+    """Map each layer to its label join table and (item, label) columns."""
+    layers = {
+        model.__tablename__: name for name, model in LAYER_MODELS.items()
+    }
+    tables = {}
+    for table in ASSOCIATION_TABLES:
+        targets = {
+            next(iter(column.foreign_keys)).column.table.name: column.name
+            for column in table.columns
+        }
+        others = set(targets) - {"labels"}
+        if "labels" in targets and len(others) == 1:
+            (other,) = others
+            if other in layers:
+                tables[layers[other]] = (
+                    table,
+                    targets[other],
+                    targets["labels"],
+                )
+    return tables
+
+
+# Layer name -> (label join table, item column, label column)
+LABEL_TABLES: dict[str, tuple[Table, str, str]] = _label_tables()
+
+
+def _register_node(
+    _mapper: Mapper[Base], connection: Connection, target: Base
+) -> None:
+    """Add a registry entry for a freshly inserted layer row."""
+    connection.execute(
+        NodeRegistry.__table__.insert().values(
+            layer=type(target).__name__, row_id=target.id
+        )
+    )
+
+
+def _unregister_node(
+    _mapper: Mapper[Base], connection: Connection, target: Base
+) -> None:
+    """Drop the registry entry of a deleted layer row."""
+    registry = NodeRegistry.__table__
+    connection.execute(
+        registry.delete().where(
+            registry.c.layer == type(target).__name__,
+            registry.c.row_id == target.id,
+        )
+    )
+
+
+# Keep the global node registry in sync with every layer table
+for _model in LAYER_MODELS.values():
+    event.listen(_model, "after_insert", _register_node)
+    event.listen(_model, "after_delete", _unregister_node)
+
+
 class Metadata:
     """Extensible metadata for ToDoWrite nodes."""
 
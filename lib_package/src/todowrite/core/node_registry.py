@@ -0,0 +1,193 @@
+"""
+Global node registry for ToDoWrite.
+
+Every layer table numbers its rows independently, so ``Goal 3`` and
+``Task 3`` share the integer 3. The ``node_registry`` table gives each row a
+global node ID that is unique across all layers and maps it back to
+(layer, row id). The mapping is maintained by ORM events declared next to
+the models; this module provides lookups and the backfill for databases
+created before the registry existed.
+
+Two ID forms are accepted wherever a node is resolved:
+- Global node ID: an integer such as ``17`` (one indexed registry read)
+- Typed node ID: ``<Layer>-<row id>`` such as ``Task-3`` (no registry read)
+
+Example:
+    >>> from todowrite.core.node_registry import resolve_node
+    >>>
+    >>> item = resolve_node(session, 17)
+    >>> item = resolve_node(session, "Task-3")
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import delete, func, insert, literal, select
+
+from .models import LAYER_MODELS, Base, NodeRegistry
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+# Case-insensitive layer lookup for parsing typed node IDs
+_LAYER_NAMES = {name.lower(): name for name in LAYER_MODELS}
+
+
+def layer_of(item: Base | type[Base]) -> str:
+    """Return the layer name of a model instance or model class."""
+    model = item if isinstance(item, type) else type(item)
+    if model.__name__ not in LAYER_MODELS:
+        raise ValueError(f"Not a ToDoWrite layer model: {model.__name__}")
+    return model.__name__
+
+
+def format_node_id(layer: str, row_id: int) -> str:
+    """Format a typed node ID such as ``Task-3``."""
+    return f"{layer}-{row_id}"
+
+
+def parse_node_id(value: str) -> tuple[str, int] | None:
+    """
+    Parse a typed node ID into (layer, row id).
+
+    Args:
+        value: Typed node ID such as ``Task-3`` (layer name is case-insensitive)
+
+    Returns:
+        Tuple of (layer name, row id), or None if the value is not a typed ID
+    """
+    layer, sep, row_id = value.strip().rpartition("-")
+    if not sep or not row_id.isdigit():
+        return None
+    name = _LAYER_NAMES.get(layer.lower())
+    if name is None:
+        return None
+    return name, int(row_id)
+
+
+def node_id_subquery(model: type[Base]) -> Any:
+    """
+    Correlated scalar subquery yielding the global node ID of ``model`` rows.
+
+    Add it to a select to fetch node IDs alongside rows in the same query:
+    ``select(Task, node_id_subquery(Task).label("node_id"))``.
+    """
+    return (
+        select(NodeRegistry.id)
+        .where(
+            NodeRegistry.layer == layer_of(model),
+            NodeRegistry.row_id == model.id,
+        )
+        .scalar_subquery()
+    )
+
+
+def get_node_id(session: Session, item: Base) -> int | None:
+    """Return the global node ID of a persisted model instance."""
+    return session.execute(
+        select(NodeRegistry.id).where(
+            NodeRegistry.layer == layer_of(item),
+            NodeRegistry.row_id == item.id,
+        )
+    ).scalar_one_or_none()
+
+
+def lookup_node(session: Session, node_id: int) -> tuple[str, int] | None:
+    """Map a global node ID to (layer, row id) with one indexed read."""
+    row = session.execute(
+        select(NodeRegistry.layer, NodeRegistry.row_id).where(
+            NodeRegistry.id == node_id
+        )
+    ).first()
+    return (row.layer, row.row_id) if row else None
+
+
+def resolve_node(session: Session, node_id: int | str) -> Base | None:
+    """
+    Load the model instance identified by a global or typed node ID.
+
+    Args:
+        session: Active SQLAlchemy session
+        node_id: Global node ID (``17`` or ``"17"``) or typed ID (``"Task-3"``)
+
+    Returns:
+        The model instance, or None if no such node exists
+    """
+    if isinstance(node_id, str) and not node_id.strip().isdigit():
+        location = parse_node_id(node_id)
+    else:
+        location = lookup_node(session, int(node_id))
+
+    if location is None:
+        return None
+
+    layer, row_id = location
+    return session.get(LAYER_MODELS[layer], row_id)
+
+
+def backfill_node_registry(session: Session) -> dict[str, int]:
+    """
+    Bring the registry in line with the layer tables.
+
+    Registers every layer row that has no entry yet and removes entries whose
+    row no longer exists. Runs two set-based statements per layer, so it is
+    safe to re-run on large databases.
+
+    Args:
+        session: Active SQLAlchemy session (committed on success)
+
+    Returns:
+        Mapping of layer name to number of rows newly registered
+    """
+    registry = NodeRegistry.__table__
+    added: dict[str, int] = {}
+
+    for layer, model in LAYER_MODELS.items():
+        table = model.__table__
+        before = _registered_count(session, layer)
+
+        session.execute(
+            delete(registry).where(
+                registry.c.layer == layer,
+                registry.c.row_id.not_in(select(table.c.id)),
+            )
+        )
+        pruned = before - _registered_count(session, layer)
+
+        missing = select(literal(layer), table.c.id).where(
+            ~select(registry.c.id)
+            .where(
+                registry.c.layer == layer,
+                registry.c.row_id == table.c.id,
+            )
+            .exists()
+        )
+        session.execute(
+            insert(registry).from_select(["layer", "row_id"], missing)
+        )
+        added[layer] = _registered_count(session, layer) - before + pruned
+
+    session.commit()
+    return added
+
+
+def _registered_count(session: Session, layer: str) -> int:
+    """Count registry entries for one layer."""
+    return session.execute(
+        select(func.count())
+        .select_from(NodeRegistry)
+        .where(NodeRegistry.layer == layer)
+    ).scalar_one()
+
+
+__all__ = [
+    "backfill_node_registry",
+    "format_node_id",
+    "get_node_id",
+    "layer_of",
+    "lookup_node",
+    "node_id_subquery",
+    "parse_node_id",
+    "resolve_node",
+]
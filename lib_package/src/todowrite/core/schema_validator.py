@@ -11,11 +11,12 @@ from typing import Any
 
 from sqlalchemy import (
     Engine,
-    create_engine,
     text,
 )
 from sqlalchemy.orm import sessionmaker
 
+from ..database.engines import get_engine
+from .counts import count_tables
 from .exceptions import ToDoWriteError
 from .models import Base
 
@@ -285,7 +286,7 @@ class DatabaseSchemaInitializer:
         Returns:
             SQLAlchemy engine for the created database
         """
-        engine = create_engine(database_url)
+        engine = get_engine(database_url)
 
         try:
             self.validator.initialize_database_from_schema(
@@ -308,7 +309,7 @@ class DatabaseSchemaInitializer:
 
     def verify_database_structure(self, database_url: str) -> bool:
         """Verify that database matches the schema structure."""
-        engine = create_engine(database_url)
+        engine = get_engine(database_url)
 
         try:
             self.validator._verify_database_structure(engine)
@@ -318,29 +319,22 @@ class DatabaseSchemaInitializer:
 
     def get_database_status(self, database_url: str) -> dict[str, Any]:
         """Get status information about the database."""
-        engine = create_engine(database_url)
+        engine = get_engine(database_url)
 
         try:
             schema_summary = self.validator.get_schema_summary()
 
             with engine.connect() as conn:
-                # Count records in each table
-                table_counts = {}
-
-                for (
-                    _model_name,
-                    model_schema,
-                ) in self.validator.get_all_model_schemas().items():
-                    table_name = model_schema["table_name"]
-
-                    try:
-                        result = conn.execute(
-                            text(f"SELECT COUNT(*) FROM {table_name}")
+                # Count records in every table with one UNION ALL query
+                table_counts = count_tables(
+                    conn,
+                    [
+                        model_schema["table_name"]
+                        for model_schema in (
+                            self.validator.get_all_model_schemas().values()
                         )
-                        count = result.scalar()
-                        table_counts[table_name] = count
-                    except:
-                        table_counts[table_name] = 0
+                    ],
+                )
 
                 return {
                     "database_url": database_url,
@@ -0,0 +1,453 @@
+"""
+Native full-text search over all ToDoWrite layers.
+
+A single ``search_index`` holds the title, description and owner of every
+layer row (labels contribute their name as the title):
+
+- SQLite: an FTS5 virtual table ranked with ``bm25``
+- PostgreSQL: a table with a weighted ``tsvector`` column, a GIN index and
+  ``ts_rank_cd`` ranking
+
+Database triggers on each layer table keep the index in sync, so rows
+written through the ORM, raw SQL or another process are all searchable.
+The index and its triggers are created together with the schema
+(``Base.metadata.create_all``); ``rebuild_search_index`` repopulates it for
+existing databases.
+
+Index keys encode (layer, row id) as ``row_id * 16 + layer position`` so
+triggers can address an entry without a lookup.
+
+Example:
+    >>> from todowrite.core.search import search
+    >>>
+    >>> results = search(session, "deploy pipeline", limit=20)
+    >>> for hit in results.hits:
+    ...     print(hit.layer, hit.item.title, hit.rank)
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from sqlalchemy import event, text
+
+from .models import LAYER_MODELS, Base
+from .node_registry import node_id_subquery
+
+if TYPE_CHECKING:
+    from sqlalchemy import Connection, MetaData
+    from sqlalchemy.orm import Session
+
+# SQL in this module is assembled from model table and column names and
+# constant fragments; query terms are always bound parameters, so the
+# f-strings are not injectable (hence the noqa: S608)
+
+_KEY_STRIDE = 16
+
+# Layer name -> position encoded in the index key
+_LAYER_POSITIONS = {
+    name: position for position, name in enumerate(LAYER_MODELS)
+}
+_POSITION_LAYERS = dict(enumerate(LAYER_MODELS))
+
+# Column weights: title, description, owner
+_SQLITE_BM25_WEIGHTS = "10.0, 3.0, 1.0"
+
+
+class SearchHit(NamedTuple):
+    """One ranked search result."""
+
+    layer: str
+    row_id: int
+    rank: float
+    item: Base
+    node_id: int | None = None  # global node ID (node registry)
+
+
+class SearchResults(NamedTuple):
+    """One page of ranked search results."""
+
+    query: str
+    total: int
+    limit: int
+    offset: int
+    hits: list[SearchHit]
+
+
+def _indexed_columns(layer: str) -> tuple[str, str, str]:
+    """SQL column expressions for (title, description, owner) of a layer."""
+    if layer == "Label":
+        return "name", "NULL", "NULL"
+    return "title", "description", "owner"
+
+
+def _terms(query: str) -> list[str]:
+    """Split a user query into plain word terms (no operator syntax)."""
+    return re.findall(r"\w+", query)
+
+
+def create_search_index(connection: Connection) -> None:
+    """Create the search index and its sync triggers (idempotent)."""
+    if connection.dialect.name == "postgresql":
+        _create_postgresql_index(connection)
+    else:
+        _create_sqlite_index(connection)
+
+
+def drop_search_index(connection: Connection) -> None:
+    """Drop the search index and its sync triggers."""
+    if connection.dialect.name == "postgresql":
+        # Dropping the shared function takes every sync trigger with it
+        connection.execute(
+            text("DROP FUNCTION IF EXISTS search_index_sync() CASCADE")
+        )
+    else:
+        for model in LAYER_MODELS.values():
+            for suffix in ("ai", "ad", "au"):
+                connection.execute(
+                    text(
+                        "DROP TRIGGER IF EXISTS "
+                        f"search_{model.__tablename__}_{suffix}"
+                    )
+                )
+    connection.execute(text("DROP TABLE IF EXISTS search_index"))
+
+
+def _sqlite_row_values(row: str, position: int, columns: tuple) -> str:
+    """VALUES tuple indexing trigger row ``NEW``/``OLD`` of one layer."""
+    values = [f"{row}.id * {_KEY_STRIDE} + {position}"]
+    values += [f"{row}.{c}" if c != "NULL" else c for c in columns]
+    return f"({', '.join(values)})"
+
+
+def _create_sqlite_index(connection: Connection) -> None:
+    connection.execute(
+        text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "title, description, owner, tokenize='unicode61')"
+        )
+    )
+    for layer, model in LAYER_MODELS.items():
+        table = model.__tablename__
+        position = _LAYER_POSITIONS[layer]
+        columns = _indexed_columns(layer)
+
+        insert_new = (
+            "INSERT INTO search_index "  # noqa: S608
+            "(rowid, title, description, owner) "
+            f"VALUES {_sqlite_row_values('NEW', position, columns)};"
+        )
+        delete_old = (
+            "DELETE FROM search_index "  # noqa: S608
+            f"WHERE rowid = OLD.id * {_KEY_STRIDE} + {position};"
+        )
+        watched = ", ".join(
+            column for column in ("id", *columns) if column != "NULL"
+        )
+        connection.execute(
+            text(
+                f"CREATE TRIGGER IF NOT EXISTS search_{table}_ai "
+                f"AFTER INSERT ON {table} BEGIN {insert_new} END"
+            )
+        )
+        connection.execute(
+            text(
+                f"CREATE TRIGGER IF NOT EXISTS search_{table}_ad "
+                f"AFTER DELETE ON {table} BEGIN {delete_old} END"
+            )
+        )
+        connection.execute(
+            text(
+                f"CREATE TRIGGER IF NOT EXISTS search_{table}_au "
+                f"AFTER UPDATE OF {watched} ON {table} "
+                f"BEGIN {delete_old} {insert_new} END"
+            )
+        )
+
+
+def _create_postgresql_index(connection: Connection) -> None:
+    connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS search_index ("
+            "key BIGINT PRIMARY KEY, "
+            "layer VARCHAR NOT NULL, "
+            "row_id INTEGER NOT NULL, "
+            "document TSVECTOR NOT NULL)"
+        )
+    )
+    connection.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_search_index_document "
+            "ON search_index USING GIN (document)"
+        )
+    )
+    # One generic trigger function; the layer name and key position come
+    # from the trigger arguments, the columns from the row as JSON so
+    # labels (which have a name instead of a title) share the code path.
+    connection.execute(
+        text(
+            """
+            CREATE OR REPLACE FUNCTION search_index_sync() RETURNS trigger
+            AS $$
+            DECLARE
+                row_json JSONB;
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM search_index
+                    WHERE key = OLD.id::BIGINT * 16 + TG_ARGV[1]::INTEGER;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    row_json := to_jsonb(NEW);
+                    INSERT INTO search_index (key, layer, row_id, document)
+                    VALUES (
+                        NEW.id::BIGINT * 16 + TG_ARGV[1]::INTEGER,
+                        TG_ARGV[0],
+                        NEW.id,
+                        setweight(to_tsvector('simple', coalesce(
+                            row_json->>'title', row_json->>'name', '')), 'A')
+                        || setweight(to_tsvector('simple', coalesce(
+                            row_json->>'description', '')), 'B')
+                        || setweight(to_tsvector('simple', coalesce(
+                            row_json->>'owner', '')), 'C')
+                    );
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+    )
+    for layer, model in LAYER_MODELS.items():
+        table = model.__tablename__
+        watched = ", ".join(
+            column
+            for column in ("id", *_indexed_columns(layer))
+            if column != "NULL"
+        )
+        connection.execute(
+            text(f"DROP TRIGGER IF EXISTS search_{table}_sync ON {table}")
+        )
+        connection.execute(
+            text(
+                f"CREATE TRIGGER search_{table}_sync "
+                f"AFTER INSERT OR UPDATE OF {watched} OR DELETE ON {table} "
+                "FOR EACH ROW EXECUTE FUNCTION "
+                f"search_index_sync('{layer}', '{_LAYER_POSITIONS[layer]}')"
+            )
+        )
+
+
+def rebuild_search_index(session: Session) -> int:
+    """
+    Repopulate the search index from the layer tables.
+
+    Creates the index and triggers if missing, then reloads every layer
+    with one set-based insert each.
+
+    Args:
+        session: Active SQLAlchemy session (committed on success)
+
+    Returns:
+        Number of rows indexed
+    """
+    connection = session.connection()
+    create_search_index(connection)
+    total = populate_search_index(connection)
+    session.commit()
+    return total
+
+
+def populate_search_index(connection: Connection) -> int:
+    """Replace the index contents with every layer row; return row count."""
+    connection.execute(text("DELETE FROM search_index"))
+
+    postgresql = connection.dialect.name == "postgresql"
+    for layer, model in LAYER_MODELS.items():
+        table = model.__tablename__
+        position = _LAYER_POSITIONS[layer]
+        title, description, owner = _indexed_columns(layer)
+        key = f"id * {_KEY_STRIDE} + {position}"
+        if postgresql:
+            connection.execute(
+                text(
+                    "INSERT INTO search_index "  # noqa: S608
+                    "(key, layer, row_id, document) "
+                    f"SELECT {key}, :layer, id, "
+                    "setweight(to_tsvector('simple', "
+                    f"coalesce({title}, '')), 'A')"
+                    " || setweight(to_tsvector('simple', "
+                    f"coalesce({description}, '')), 'B')"
+                    " || setweight(to_tsvector('simple', "
+                    f"coalesce({owner}, '')), 'C') FROM {table}"
+                ),
+                {"layer": layer},
+            )
+        else:
+            connection.execute(
+                text(
+                    "INSERT INTO search_index "  # noqa: S608
+                    "(rowid, title, description, owner) "
+                    f"SELECT {key}, {title}, {description}, {owner} "
+                    f"FROM {table}"
+                )
+            )
+
+    return connection.execute(
+        text("SELECT count(*) FROM search_index")
+    ).scalar_one()
+
+
+def search(
+    session: Session,
+    query: str,
+    layer: str | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> SearchResults:
+    """
+    Run a ranked full-text search across all layers.
+
+    Every word of ``query`` must match (as a word prefix) in the title,
+    description or owner. Title matches rank above description matches,
+    which rank above owner matches.
+
+    Args:
+        session: Active SQLAlchemy session
+        query: Free-text query; operator characters are ignored
+        layer: Restrict results to one layer (e.g. ``"Task"``)
+        limit: Page size
+        offset: Number of ranked results to skip
+
+    Returns:
+        The requested page of hits plus the total number of matches
+    """
+    if layer is not None and layer not in _LAYER_POSITIONS:
+        raise ValueError(f"Unknown layer: {layer}")
+
+    terms = _terms(query)
+    if not terms:
+        return SearchResults(query, 0, limit, offset, [])
+
+    if session.get_bind().dialect.name == "postgresql":
+        rows, total = _search_postgresql(session, terms, layer, limit, offset)
+    else:
+        rows, total = _search_sqlite(session, terms, layer, limit, offset)
+
+    # Hydrate only the requested page, one query per layer on it, with
+    # the node IDs read in the same query
+    ids_by_layer: dict[str, list[int]] = {}
+    for hit_layer, row_id, _rank in rows:
+        ids_by_layer.setdefault(hit_layer, []).append(row_id)
+    items: dict[tuple[str, int], tuple[Base, int | None]] = {}
+    for hit_layer, ids in ids_by_layer.items():
+        model = LAYER_MODELS[hit_layer]
+        page = session.query(model, node_id_subquery(model)).filter(
+            model.id.in_(ids)
+        )
+        for item, node_id in page:
+            items[(hit_layer, item.id)] = (item, node_id)
+
+    hits = [
+        SearchHit(hit_layer, row_id, rank, *items[(hit_layer, row_id)])
+        for hit_layer, row_id, rank in rows
+        if (hit_layer, row_id) in items
+    ]
+    return SearchResults(query, total, limit, offset, hits)
+
+
+def _search_sqlite(
+    session: Session,
+    terms: list[str],
+    layer: str | None,
+    limit: int,
+    offset: int,
+) -> tuple[list[tuple[str, int, float]], int]:
+    match = " ".join(f'"{term}"*' for term in terms)
+    where = "search_index MATCH :match"
+    params: dict[str, Any] = {"match": match}
+    if layer is not None:
+        where += f" AND rowid % {_KEY_STRIDE} = :position"
+        params["position"] = _LAYER_POSITIONS[layer]
+
+    total = session.execute(
+        text(f"SELECT count(*) FROM search_index WHERE {where}"),  # noqa: S608
+        params,
+    ).scalar_one()
+    rows = session.execute(
+        text(
+            "SELECT rowid, "  # noqa: S608
+            f"bm25(search_index, {_SQLITE_BM25_WEIGHTS}) AS rank "
+            f"FROM search_index WHERE {where} "
+            "ORDER BY rank, rowid LIMIT :limit OFFSET :offset"
+        ),
+        {**params, "limit": limit, "offset": offset},
+    ).all()
+    return [
+        (
+            _POSITION_LAYERS[key % _KEY_STRIDE],
+            key // _KEY_STRIDE,
+            -rank,  # bm25 is lower-is-better; report higher-is-better
+        )
+        for key, rank in rows
+    ], total
+
+
+def _search_postgresql(
+    session: Session,
+    terms: list[str],
+    layer: str | None,
+    limit: int,
+    offset: int,
+) -> tuple[list[tuple[str, int, float]], int]:
+    where = "document @@ to_tsquery('simple', :tsquery)"
+    params: dict[str, Any] = {
+        "tsquery": " & ".join(f"{term}:*" for term in terms)
+    }
+    if layer is not None:
+        where += " AND layer = :layer"
+        params["layer"] = layer
+
+    total = session.execute(
+        text(f"SELECT count(*) FROM search_index WHERE {where}"),  # noqa: S608
+        params,
+    ).scalar_one()
+    rows = session.execute(
+        text(
+            "SELECT layer, row_id, "  # noqa: S608
+            "ts_rank_cd(document, to_tsquery('simple', :tsquery)) AS rank "
+            f"FROM search_index WHERE {where} "
+            "ORDER BY rank DESC, key LIMIT :limit OFFSET :offset"
+        ),
+        {**params, "limit": limit, "offset": offset},
+    ).all()
+    return [(row.layer, row.row_id, float(row.rank)) for row in rows], total
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_with_schema(
+    _target: MetaData, connection: Connection, **_kw: object
+) -> None:
+    """Create the search index alongside the layer tables."""
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        create_search_index(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_with_schema(
+    _target: MetaData, connection: Connection, **_kw: object
+) -> None:
+    """Drop the search index before the layer tables go away."""
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        drop_search_index(connection)
+
+
+__all__ = [
+    "SearchHit",
+    "SearchResults",
+    "create_search_index",
+    "drop_search_index",
+    "populate_search_index",
+    "rebuild_search_index",
+    "search",
+]
@@ -10,25 +10,151 @@ Features:
 - Prevention of duplicate key constraint errors
 - Support for all ToDoWrite model tables
 - Multi-database support (PostgreSQL sequences + SQLite3 AUTOINCREMENT)
+
+Checks are set-based: one catalog query finds the managed tables and
+their sequence state (``pg_class``/``pg_sequence_last_value`` or
+``sqlite_master``/``sqlite_sequence``) and one ``UNION ALL`` aggregate
+reads every ``MAX(id)``, however many rows the tables hold. Drifted
+sequences are fixed together in one transaction. Rather than checking
+before each insert, a :class:`SequenceMonitor` can repeat the check on
+a background thread; ``ensure_sequence_before_insert`` skips tables
+found healthy within the last ``check_interval`` seconds.
+
+Rows inserted with explicit ids need no read-back before their links
+are written. :func:`reserve_ids` reserves such ids inside the inserting
+transaction; ``SequenceManager.allocate_ids`` hands them out hi/lo
+style, reserving a block of ``id_block_size`` per round trip and
+serving later calls from what is left of it. :func:`sequence_manager_for`
+keeps one manager per engine, so blocks outlive the call that reserved
+them; the bulk API (:mod:`todowrite.core.bulk`) allocates through it.
+
+Example:
+    >>> from todowrite.core.sequence_manager import SequenceMonitor
+    >>>
+    >>> manager = SequenceManager(url)
+    >>> monitor = SequenceMonitor(manager, interval=60).start()
+    >>> goal_ids = manager.allocate_ids("goals", 3)
+    >>> monitor.stop()
 """
 
 from __future__ import annotations
 
 import os
-
-from sqlalchemy import create_engine, text
+import threading
+import time
+import weakref
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..database.engines import get_engine
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy import Connection, Engine
+
+# Seconds a table found healthy is trusted before it is checked again
+CHECK_INTERVAL = 60.0
+
+# Ids reserved per round trip by SequenceManager.allocate_ids
+ID_BLOCK_SIZE = 100
+
+
+def _sqlite_autoincrement(connection: Connection, table_name: str) -> bool:
+    """Whether a SQLite table keeps its high-water mark in sqlite_sequence."""
+    sql = connection.execute(
+        text(
+            "SELECT sql FROM sqlite_master "
+            "WHERE type = 'table' AND name = :table"
+        ),
+        {"table": table_name},
+    ).scalar()
+    return sql is not None and "AUTOINCREMENT" in sql.upper()
+
+
+def reserve_ids(
+    connection: Connection, table_name: str, count: int
+) -> list[int]:
+    """
+    Reserve ``count`` primary keys of a table for explicit inserts.
+
+    On PostgreSQL the ids come from the table's sequence (``nextval``
+    over a series) and stay reserved whatever becomes of the
+    transaction. On SQLite the write lock is taken first and ids above
+    ``MAX(id)`` are handed out (moving ``sqlite_sequence`` past them for
+    AUTOINCREMENT tables); they are reserved until ``connection``'s
+    transaction ends.
+
+    Args:
+        connection: Connection whose transaction will insert the rows
+        table_name: Table to reserve ids of
+        count: Number of ids
+
+    Returns:
+        The reserved ids
+    """
+    if count == 0:
+        return []
+    if connection.dialect.name == "postgresql":
+        return list(
+            connection.execute(
+                text(
+                    "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                    "FROM generate_series(1, :count)"
+                ),
+                {"table": table_name, "count": count},
+            ).scalars()
+        )
+    quoted = connection.dialect.identifier_preparer.quote(table_name)
+    # A write that matches nothing takes the write lock, keeping other
+    # writers from claiming the range
+    connection.execute(text(f"UPDATE {quoted} SET id = id WHERE 0"))
+    start = connection.execute(
+        text(f"SELECT COALESCE(MAX(id), 0) FROM {quoted}")
+    ).scalar_one()
+    if _sqlite_autoincrement(connection, table_name):
+        seq = connection.execute(
+            text("SELECT seq FROM sqlite_sequence WHERE name = :table"),
+            {"table": table_name},
+        ).scalar()
+        start = max(start, seq or 0)
+        connection.execute(
+            text(
+                "UPDATE sqlite_sequence SET seq = :seq WHERE name = :table"
+                if seq is not None
+                else "INSERT INTO sqlite_sequence (name, seq) "
+                "VALUES (:table, :seq)"
+            ),
+            {"table": table_name, "seq": start + count},
+        )
+    return list(range(start + 1, start + 1 + count))
 
 
 class SequenceManager:
     """Manages PostgreSQL sequences to prevent ID conflicts."""
 
-    def __init__(self, database_url: str | None = None):
-        """Initialize the sequence manager."""
+    def __init__(
+        self,
+        database_url: str | None = None,
+        check_interval: float = CHECK_INTERVAL,
+        id_block_size: int = ID_BLOCK_SIZE,
+        engine: Engine | None = None,
+    ):
+        """Initialize the sequence manager.
+
+        ``engine`` runs the manager on an existing engine (its URL is
+        then used) instead of the registry's engine for ``database_url``.
+        """
+        if engine is not None:
+            database_url = engine.url.render_as_string(hide_password=False)
         self.database_url = database_url or os.getenv("TODOWRITE_DATABASE_URL")
         if not self.database_url:
             raise ValueError("Database URL is required")
 
-        self.engine = create_engine(self.database_url)
+        self.engine = engine or get_engine(self.database_url)
 
         # Detect database type
         self.db_type = self._detect_database_type()
@@ -53,6 +179,17 @@ class SequenceManager:
             "claude_sessions",
         ]
 
+        self.check_interval = check_interval
+        # Monotonic time each table was last found healthy
+        self._healthy_at: dict[str, float] = {}
+
+        if id_block_size < 1:
+            raise ValueError("id_block_size must be at least 1")
+        self.id_block_size = id_block_size
+        # Reserved ids not handed out yet, per table
+        self._spare_ids: dict[str, deque[int]] = {}
+        self._id_lock = threading.Lock()
+
     def _detect_database_type(self) -> str:
         """Detect if we're using PostgreSQL or SQLite3."""
         url = self.database_url.lower()
@@ -64,174 +201,312 @@ class SequenceManager:
             # Default to PostgreSQL for safety
             return "postgresql"
 
-    def validate_all_sequences(self) -> dict[str, dict[str, int]]:
-        """Validate all managed table sequences."""
-        results = {}
+    def _read_health(
+        self, tables: Iterable[str] | None = None
+    ) -> dict[str, dict[str, Any]]:
+        """Max id and sequence state of tables, in two statements.
 
+        A catalog query finds which tables exist (and, for PostgreSQL,
+        their sequences and last values); one ``UNION ALL`` aggregate
+        then reads every ``MAX(id)``.
+        """
+        tables = list(self.managed_tables if tables is None else tables)
         with self.engine.connect() as conn:
-            for table in self.managed_tables:
-                try:
-                    result = conn.execute(
-                        text(f"SELECT id FROM {table} ORDER BY id")
-                    )
-                    records = result.fetchall()
-
-                    if records:
-                        max_id = max(record[0] for record in records)
-
-                        if self.db_type == "postgresql":
-                            # PostgreSQL: Check sequence
-                            seq_result = conn.execute(
-                                text(f"SELECT last_value FROM {table}_id_seq")
-                            )
-                            seq_value = seq_result.fetchone()[0]
-                            needs_fix = seq_value <= max_id
-                        else:
-                            # SQLite3: Check sqlite_sequence table
-                            try:
-                                seq_result = conn.execute(
-                                    text(f"SELECT seq FROM sqlite_sequence WHERE name = '{table}'")
-                                )
-                                seq_row = seq_result.fetchone()
-                                seq_value = seq_row[0] if seq_row else 0
-                                needs_fix = seq_value <= max_id
-                            except Exception:
-                                # Table might not exist in sqlite_sequence yet
-                                seq_value = 0
-                                needs_fix = True
-
-                        results[table] = {
-                            "max_id": max_id,
-                            "current_sequence": seq_value,
-                            "needs_fix": needs_fix,
-                        }
-                    else:
-                        results[table] = {
-                            "max_id": 0,
-                            "current_sequence": 1,
-                            "needs_fix": False,
-                        }
-
-                except Exception as e:
-                    results[table] = {"error": str(e), "needs_fix": False}
+            if conn.dialect.name == "postgresql":
+                catalog = self._postgresql_catalog(conn, tables)
+            else:
+                catalog = self._sqlite_catalog(conn, tables)
+            max_ids = self._max_ids(conn, [t for t in tables if t in catalog])
+
+        results: dict[str, dict[str, Any]] = {}
+        now = time.monotonic()
+        for table in tables:
+            if table not in catalog:
+                results[table] = {
+                    "error": f"Table {table} does not exist",
+                    "needs_fix": False,
+                }
+                continue
+            sequence, last_value = catalog[table]
+            max_id = max_ids[table]
+            if last_value is None:
+                # No sequence state: SQLite without AUTOINCREMENT (or
+                # not used yet) takes MAX(id) + 1, a fresh PostgreSQL
+                # sequence starts at 1
+                last_value = max_id if sequence is None else 0
+            needs_fix = last_value < max_id
+            results[table] = {
+                "max_id": max_id,
+                "current_sequence": last_value,
+                "needs_fix": needs_fix,
+                "sequence": sequence,
+            }
+            if not needs_fix:
+                self._healthy_at[table] = now
+        return results
 
+    @staticmethod
+    def _postgresql_catalog(
+        conn: Connection, tables: list[str]
+    ) -> dict[str, tuple[str | None, int | None]]:
+        """Existing tables with their id sequence and its last value."""
+        rows = conn.execute(
+            text(
+                "SELECT c.relname, s.seq, pg_sequence_last_value(s.seq) "
+                "FROM pg_class c "
+                "CROSS JOIN LATERAL (SELECT CAST(pg_get_serial_sequence("
+                "quote_ident(c.relname), 'id') AS regclass) AS seq) s "
+                "WHERE c.relnamespace = CAST(current_schema() AS "
+                "regnamespace) AND c.relkind IN ('r', 'p') "
+                "AND c.relname = ANY(:tables)"
+            ),
+            {"tables": tables},
+        )
+        return {
+            name: (None if seq is None else str(seq), last_value)
+            for name, seq, last_value in rows
+        }
+
+    @staticmethod
+    def _sqlite_catalog(
+        conn: Connection, tables: list[str]
+    ) -> dict[str, tuple[str | None, int | None]]:
+        """Existing tables with their sqlite_sequence value, if any.
+
+        Only AUTOINCREMENT tables have a ``sqlite_sequence`` row; the
+        rest reuse ``MAX(id) + 1`` and cannot drift.
+        """
+        names = ", ".join(f":t{i}" for i in range(len(tables)))
+        params = {f"t{i}": table for i, table in enumerate(tables)}
+        existing = set(
+            conn.execute(
+                text(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' "
+                    f"AND name IN ({names}, 'sqlite_sequence')"
+                ),
+                params,
+            ).scalars()
+        )
+        sequences: dict[str, int] = {}
+        if "sqlite_sequence" in existing:
+            sequences = dict(
+                conn.execute(
+                    text(
+                        "SELECT name, seq FROM sqlite_sequence "
+                        f"WHERE name IN ({names})"
+                    ),
+                    params,
+                ).all()
+            )
+        return {
+            table: ("sqlite_sequence", sequences[table])
+            if table in sequences
+            else (None, None)
+            for table in tables
+            if table in existing
+        }
+
+    @staticmethod
+    def _max_ids(conn: Connection, tables: list[str]) -> dict[str, int]:
+        """``MAX(id)`` of every table in one statement (0 when empty)."""
+        if not tables:
+            return {}
+        quote = conn.dialect.identifier_preparer.quote
+        rows = conn.execute(
+            text(
+                " UNION ALL ".join(
+                    f"SELECT {i}, COALESCE(MAX(id), 0) FROM {quote(table)}"
+                    for i, table in enumerate(tables)
+                )
+            )
+        )
+        return {tables[i]: max_id for i, max_id in rows}
+
+    def validate_all_sequences(self) -> dict[str, dict[str, Any]]:
+        """Validate all managed table sequences.
+
+        Returns:
+            Per table: ``max_id``, ``current_sequence`` (the last id
+            handed out), ``needs_fix`` (the next id would collide with an
+            existing row) and ``sequence``; or ``error`` for a table
+            that does not exist
+        """
+        return self._read_health()
+
+    def heal_sequences(
+        self, tables: Iterable[str] | None = None, force: bool = False
+    ) -> dict[str, bool]:
+        """Move drifted sequences past their table's ``MAX(id)``.
+
+        All fixes are made in one transaction. A sequence is never moved
+        backwards, so a concurrent insert made since the check is safe.
+
+        Args:
+            tables: Tables to check (default: all managed tables)
+            force: Also reset sequences that have not drifted
+
+        Returns:
+            Per table, whether its sequence is now correct
+        """
+        health = self._read_health(tables)
+        drifted = {
+            table: info
+            for table, info in health.items()
+            if "error" not in info
+            and info["sequence"] is not None
+            and info["max_id"] > 0
+            and (info["needs_fix"] or force)
+        }
+        results = {
+            table: "error" not in info for table, info in health.items()
+        }
+        if not drifted:
+            return results
+
+        try:
+            with self.engine.begin() as conn:
+                if conn.dialect.name == "postgresql":
+                    conn.execute(
+                        text(
+                            "SELECT setval(v.seq, GREATEST(v.max_id, "
+                            "pg_sequence_last_value(v.seq))) FROM unnest("
+                            "CAST(:seqs AS regclass[]), "
+                            "CAST(:max_ids AS bigint[])) AS v(seq, max_id)"
+                        ),
+                        {
+                            "seqs": [i["sequence"] for i in drifted.values()],
+                            "max_ids": [i["max_id"] for i in drifted.values()],
+                        },
+                    )
+                else:
+                    conn.execute(
+                        text(
+                            "UPDATE sqlite_sequence SET seq = MAX(seq, "
+                            ":max_id) WHERE name = :name"
+                        ),
+                        [
+                            {"name": table, "max_id": info["max_id"]}
+                            for table, info in drifted.items()
+                        ],
+                    )
+        except SQLAlchemyError as e:
+            print(f"Error fixing sequences: {e}")
+            results.update(dict.fromkeys(drifted, False))
+        else:
+            now = time.monotonic()
+            for table in drifted:
+                self._healthy_at[table] = now
         return results
 
     def fix_all_sequences(self, force: bool = False) -> dict[str, bool]:
         """Fix all sequences that need correction."""
-        validation = self.validate_all_sequences()
-        fixed_results = {}
-
-        with self.engine.connect() as conn:
-            for table, info in validation.items():
-                if "error" in info:
-                    fixed_results[table] = False
-                    continue
-
-                if info["needs_fix"] or force:
-                    try:
-                        new_seq_value = info["max_id"] + 1
-                        if self.db_type == "postgresql":
-                            # PostgreSQL: Reset sequence
-                            conn.execute(
-                                text(
-                                    f"ALTER SEQUENCE {table}_id_seq RESTART WITH {new_seq_value}"
-                                )
-                            )
-                        else:
-                            # SQLite3: Update sqlite_sequence table
-                            conn.execute(
-                                text(f"UPDATE sqlite_sequence SET seq = {new_seq_value} WHERE name = '{table}'")
-                            )
-                            # If no entry exists, insert one
-                            conn.execute(
-                                text(f"INSERT OR IGNORE INTO sqlite_sequence (name, seq) VALUES ('{table}', {new_seq_value})")
-                            )
-
-                        conn.commit()
-                        fixed_results[table] = True
-                    except Exception as e:
-                        print(f"Error fixing sequence for {table}: {e}")
-                        fixed_results[table] = False
-                else:
-                    fixed_results[table] = True  # No fix needed
-
-        return fixed_results
+        return self.heal_sequences(force=force)
 
     def ensure_sequence_before_insert(self, table_name: str) -> None:
-        """Ensure sequence is correct before inserting into a table."""
+        """Ensure sequence is correct before inserting into a table.
+
+        A table found healthy within the last ``check_interval`` seconds
+        (by this call, a check, or a running ``SequenceMonitor``) is not
+        checked again, so this is free on the insert path.
+        """
         if table_name not in self.managed_tables:
             return
-
-        with self.engine.connect() as conn:
-            try:
-                # Get current max ID
-                result = conn.execute(
-                    text(f"SELECT COALESCE(MAX(id), 0) FROM {table_name}")
-                )
-                max_id = result.fetchone()[0]
-
-                # Get current sequence
-                result = conn.execute(
-                    text(f"SELECT last_value FROM {table_name}_id_seq")
-                )
-                seq_value = result.fetchone()[0]
-
-                # Fix sequence if needed
-                if seq_value <= max_id:
-                    new_seq_value = max_id + 1
-                    conn.execute(
-                        text(
-                            f"ALTER SEQUENCE {table_name}_id_seq RESTART WITH {new_seq_value}"
-                        )
+        healthy_at = self._healthy_at.get(table_name)
+        if (
+            healthy_at is not None
+            and time.monotonic() - healthy_at < self.check_interval
+        ):
+            return
+        try:
+            self.heal_sequences([table_name])
+        except SQLAlchemyError as e:
+            print(f"Error ensuring sequence for {table_name}: {e}")
+
+    def allocate_ids(
+        self,
+        table_name: str,
+        count: int = 1,
+        connection: Connection | None = None,
+    ) -> list[int]:
+        """
+        Ids for rows to be inserted with explicit primary keys.
+
+        Ids left over from earlier reservations are handed out first.
+        The rest come from a new block of at least ``id_block_size``
+        ids, whose surplus is kept for later calls; ids never used
+        leave gaps, as rolled-back sequence values do.
+
+        Blocks outlive transactions only where the reservation does:
+        always on PostgreSQL, and for SQLite AUTOINCREMENT tables when
+        no ``connection`` is given (the block is then committed on its
+        own). Otherwise SQLite ids are reserved on ``connection``
+        exactly as :func:`reserve_ids` does, with no surplus.
+
+        Args:
+            table_name: Managed table to allocate ids of
+            count: Number of ids
+            connection: Connection of the inserting transaction, if any
+
+        Returns:
+            ``count`` ids, not necessarily consecutive
+
+        Raises:
+            ValueError: If the table is not managed, or is a SQLite
+                table without AUTOINCREMENT and no connection is given
+        """
+        if table_name not in self.managed_tables:
+            raise ValueError(f"Table {table_name} is not managed")
+        with self._id_lock:
+            spare = self._spare_ids.setdefault(table_name, deque())
+            ids = [spare.popleft() for _ in range(min(count, len(spare)))]
+        need = count - len(ids)
+        if need == 0:
+            return ids
+
+        size = max(need, self.id_block_size)
+        if (connection or self.engine).dialect.name == "postgresql":
+            if connection is not None:
+                block = reserve_ids(connection, table_name, size)
+            else:
+                with self.engine.connect() as conn:
+                    block = reserve_ids(conn, table_name, size)
+        elif connection is not None:
+            return ids + reserve_ids(connection, table_name, need)
+        else:
+            with self.engine.begin() as conn:
+                if not _sqlite_autoincrement(conn, table_name):
+                    raise ValueError(
+                        f"{table_name} has no AUTOINCREMENT sequence to "
+                        "reserve ids in; pass the inserting connection"
                     )
-                    conn.commit()
+                block = reserve_ids(conn, table_name, size)
 
-            except Exception as e:
-                print(f"Error ensuring sequence for {table_name}: {e}")
+        with self._id_lock:
+            self._spare_ids[table_name].extend(block[need:])
+        return ids + block[:need]
 
-    def get_table_status(self, table_name: str) -> dict[str, int]:
+    def get_table_status(self, table_name: str) -> dict[str, Any]:
         """Get status for a specific table."""
         if table_name not in self.managed_tables:
             return {"error": f"Table {table_name} is not managed"}
 
-        with self.engine.connect() as conn:
-            try:
-                # Get record count and max ID
-                result = conn.execute(
-                    text(
-                        f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {table_name}"
-                    )
-                )
-                count, max_id = result.fetchone()
-
-                # Get sequence value
-                if self.db_type == "postgresql":
-                    result = conn.execute(
-                        text(f"SELECT last_value FROM {table_name}_id_seq")
-                    )
-                    seq_value = result.fetchone()[0]
-                else:
-                    # SQLite3: Check sqlite_sequence table
-                    try:
-                        result = conn.execute(
-                            text(f"SELECT seq FROM sqlite_sequence WHERE name = '{table_name}'")
-                        )
-                        seq_row = result.fetchone()
-                        seq_value = seq_row[0] if seq_row else 0
-                    except Exception:
-                        seq_value = 0
-
-                return {
-                    "table": table_name,
-                    "record_count": count,
-                    "max_id": max_id,
-                    "current_sequence": seq_value,
-                    "needs_fix": seq_value <= max_id,
-                }
-
-            except Exception as e:
-                return {"error": str(e)}
+        try:
+            info = self._read_health([table_name])[table_name]
+            if "error" in info:
+                return {"error": info["error"]}
+            with self.engine.connect() as conn:
+                count = conn.execute(
+                    text(f"SELECT COUNT(*) FROM {table_name}")
+                ).scalar_one()
+        except SQLAlchemyError as e:
+            return {"error": str(e)}
+        return {
+            "table": table_name,
+            "record_count": count,
+            "max_id": info["max_id"],
+            "current_sequence": info["current_sequence"],
+            "needs_fix": info["needs_fix"],
+        }
 
     def report_status(self) -> str:
         """Generate a comprehensive status report."""
@@ -266,6 +541,94 @@ class SequenceManager:
         return "\n".join(report_lines)
 
 
+_managers: weakref.WeakKeyDictionary[Engine, SequenceManager] = (
+    weakref.WeakKeyDictionary()
+)
+_managers_lock = threading.Lock()
+
+
+def sequence_manager_for(engine: Engine) -> SequenceManager:
+    """
+    The process-wide :class:`SequenceManager` of an engine.
+
+    Id blocks reserved by ``allocate_ids`` stay with the manager, so
+    callers sharing it draw later ids from the same block instead of
+    reserving a new one each time.
+    """
+    with _managers_lock:
+        manager = _managers.get(engine)
+        if manager is None:
+            manager = _managers[engine] = SequenceManager(engine=engine)
+        return manager
+
+
+class SequenceMonitor:
+    """
+    Check and heal sequences periodically on a background thread.
+
+    Args:
+        manager: Sequence manager to run checks with
+        interval: Seconds between checks
+        heal: Fix drifted sequences (otherwise only record them)
+    """
+
+    def __init__(
+        self,
+        manager: SequenceManager,
+        interval: float = CHECK_INTERVAL,
+        heal: bool = True,
+    ) -> None:
+        self.manager = manager
+        self.interval = interval
+        self.heal = heal
+        self.checks = 0
+        self.drifted: list[str] = []
+        self.last_error: Exception | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> SequenceMonitor:
+        """Start checking on a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="todowrite-sequence-monitor", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop checking and wait for the thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def check(self) -> list[str]:
+        """Run one check now.
+
+        Returns:
+            Tables whose sequence had drifted
+        """
+        health = self.manager.validate_all_sequences()
+        drifted = [
+            table for table, info in health.items() if info["needs_fix"]
+        ]
+        if drifted and self.heal:
+            self.manager.heal_sequences(drifted)
+        self.checks += 1
+        self.drifted = drifted
+        return drifted
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check()
+                self.last_error = None
+            except SQLAlchemyError as e:
+                self.last_error = e
+            self._stop.wait(self.interval)
+
+
 def ensure_sequences_before_init():
     """Ensure all sequences are correct before database initialization."""
     try:
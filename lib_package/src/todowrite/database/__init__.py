@@ -20,9 +20,12 @@ from .config import (
     StoragePreference,
     StorageType,
     determine_storage_backend,
+    get_pool_settings,
+    get_sqlite_profile,
     get_storage_info,
     set_storage_preference,
 )
+from .engines import dispose_engines, get_engine
 
 __all__ = [
     "AcceptanceCriteria",
@@ -42,6 +45,10 @@ __all__ = [
     "SubTask",
     "Task",
     "determine_storage_backend",
+    "dispose_engines",
+    "get_engine",
+    "get_pool_settings",
+    "get_sqlite_profile",
     "get_storage_info",
     "set_storage_preference",
 ]
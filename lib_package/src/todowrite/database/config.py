@@ -77,12 +77,69 @@ def get_storage_preference() -> StoragePreference:
     return storage_preference
 
 
+# Connection pool settings: environment variable -> (engine option, default)
+POOL_SETTINGS: dict[str, tuple[str, float]] = {
+    "TODOWRITE_DB_POOL_SIZE": ("pool_size", 10),
+    "TODOWRITE_DB_MAX_OVERFLOW": ("max_overflow", 20),
+    "TODOWRITE_DB_POOL_TIMEOUT": ("pool_timeout", 30.0),
+    "TODOWRITE_DB_POOL_RECYCLE": ("pool_recycle", 1800),
+}
+
+
+def get_pool_settings() -> dict[str, float]:
+    """Get queue pool options for ``create_engine`` from the environment.
+
+    Environment Variables:
+        TODOWRITE_DB_POOL_SIZE: Connections kept open (default 10)
+        TODOWRITE_DB_MAX_OVERFLOW: Extra connections under load (default 20)
+        TODOWRITE_DB_POOL_TIMEOUT: Seconds to wait for a free connection
+            before failing (default 30)
+        TODOWRITE_DB_POOL_RECYCLE: Seconds after which a connection is
+            replaced (default 1800)
+
+    Raises:
+        ValueError: If a variable is set but is not a number
+    """
+    settings: dict[str, float] = {}
+    for variable, (option, default) in POOL_SETTINGS.items():
+        raw = os.getenv(variable, "").strip()
+        if not raw:
+            settings[option] = default
+            continue
+        try:
+            settings[option] = type(default)(raw)
+        except ValueError as e:
+            raise ValueError(
+                f"{variable} must be a number, got {raw!r}"
+            ) from e
+    return settings
+
+
+# SQLite pragma profile used when none is given explicitly
+DEFAULT_SQLITE_PROFILE = "balanced"
+
+
+def get_sqlite_profile() -> str:
+    """Get the SQLite pragma profile name from the environment.
+
+    Environment Variables:
+        TODOWRITE_SQLITE_PROFILE: ``durable``, ``balanced`` (default) or
+            ``bulk-load``; see ``todowrite.storage.sqlite_backend``
+    """
+    return (
+        os.getenv("TODOWRITE_SQLITE_PROFILE", "").strip()
+        or DEFAULT_SQLITE_PROFILE
+    )
+
+
 def check_postgresql_connection(url: str) -> bool:
     """Test if PostgreSQL connection is available."""
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
 
-        engine = create_engine(url, pool_pre_ping=True, pool_timeout=5)
+        from .engines import get_engine
+
+        engine = get_engine(url)
         with engine.connect() as conn:
             result = conn.execute(text("SELECT 1"))
             return result.scalar() == 1
@@ -307,9 +364,11 @@ def _extract_port_from_container(container: dict[str, Any]) -> int:
 def check_sqlite_connection(url: str) -> bool:
     """Test if SQLite connection is available."""
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
+
+        from .engines import get_engine
 
-        engine = create_engine(url)
+        engine = get_engine(url)
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
         return True
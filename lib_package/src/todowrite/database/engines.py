@@ -0,0 +1,192 @@
+"""
+Process-wide engine registry for ToDoWrite.
+
+An engine owns a connection pool, so calling ``create_engine`` per call
+(per CLI command, per status check, per helper object) pays for pool and
+dialect setup every time and leaves pools open until garbage collection
+gets to them; against PostgreSQL those idle connections count towards
+``max_connections``. :func:`get_engine` hands out one shared engine per
+URL and option set instead:
+
+- Engines are created on first use and reused afterwards.
+- PostgreSQL engines get the ``TODOWRITE_DB_POOL_*`` pool settings
+  (``get_pool_settings``) and ``pool_pre_ping`` unless given explicitly.
+- SQLite engines can be tuned with a pragma profile
+  (``todowrite.storage.sqlite_backend``), applied once at creation. A
+  pooled SQLite connection whose database file has since been deleted
+  or replaced is discarded on checkout, so a recreated file is never
+  read through a connection to the old one. Relative SQLite paths are
+  resolved against the current directory at each call, as they would
+  be by a fresh engine.
+- In-memory SQLite URLs (``sqlite://``, ``sqlite:///:memory:``) are not
+  shared: each such database lives and dies with its engine, so every
+  call gets a fresh, unregistered engine and with it an empty database.
+- At most ``MAX_ENGINES`` engines are kept; the least recently used one
+  is disposed when another is needed. A disposed engine stays usable and
+  simply opens new connections, so callers holding it are not broken.
+- Every engine is disposed at interpreter exit.
+
+Example:
+    >>> from todowrite.database.engines import get_engine
+    >>>
+    >>> engine = get_engine("postgresql://localhost/todowrite")
+    >>> engine is get_engine("postgresql://localhost/todowrite")
+    True
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import create_engine, event, exc, make_url
+
+from .config import get_pool_settings
+
+if TYPE_CHECKING:
+    from sqlalchemy import URL, Engine
+    from sqlalchemy.engine.interfaces import DBAPIConnection
+    from sqlalchemy.pool import ConnectionPoolEntry, PoolProxiedConnection
+
+# Engines kept open at once
+MAX_ENGINES = 32
+
+_engines: OrderedDict[tuple, Engine] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _freeze(value: object) -> object:
+    """A hashable stand-in for an option value."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _file_identity(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def _drop_stale_file_connections(engine: Engine, path: str) -> None:
+    """Reconnect when the SQLite file changed under a pooled connection."""
+
+    @event.listens_for(engine, "connect")
+    def _remember_file(
+        dbapi_connection: DBAPIConnection, record: ConnectionPoolEntry
+    ) -> None:
+        record.info["file_identity"] = _file_identity(path)
+
+    @event.listens_for(engine, "checkout")
+    def _check_file(
+        dbapi_connection: DBAPIConnection,
+        record: ConnectionPoolEntry,
+        proxy: PoolProxiedConnection,
+    ) -> None:
+        if record.info.get("file_identity") != _file_identity(path):
+            raise exc.DisconnectionError(f"{path} was replaced")
+
+
+def _create(
+    url: URL, sqlite_profile: str | None, options: dict[str, Any]
+) -> Engine:
+    engine = create_engine(url, **options)
+    if sqlite_profile is not None:
+        from ..storage.sqlite_backend import apply_sqlite_profile
+
+        apply_sqlite_profile(engine, sqlite_profile)
+    return engine
+
+
+def get_engine(
+    url: str | URL, sqlite_profile: str | None = None, **options: object
+) -> Engine:
+    """
+    The shared engine for a URL and set of ``create_engine`` options.
+
+    Args:
+        url: Database URL
+        sqlite_profile: SQLite pragma profile to apply (None: SQLite
+            defaults); ignored for other databases
+        **options: Further ``create_engine`` options; engines with
+            different options are separate
+
+    Returns:
+        An engine shared with every caller asking for the same; a new,
+        unshared engine for in-memory SQLite
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    sqlite_memory = backend == "sqlite" and url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+    sqlite_file = backend == "sqlite" and not sqlite_memory
+    if sqlite_file and not url.query.get("uri"):
+        # A relative path means the file under the current directory,
+        # which may differ from one call to the next
+        url = url.set(database=os.path.abspath(url.database))
+    if backend == "postgresql":
+        options = {
+            "pool_pre_ping": True,
+            **get_pool_settings(),
+            **options,
+        }
+    if backend != "sqlite":
+        sqlite_profile = None
+    if sqlite_memory:
+        # Sharing would hand every caller the same database
+        return _create(url, sqlite_profile, options)
+    key = (
+        url.render_as_string(hide_password=False),
+        sqlite_profile,
+        _freeze(options),
+    )
+
+    with _lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            _engines.move_to_end(key)
+            return engine
+        engine = _create(url, sqlite_profile, options)
+        if sqlite_file:
+            _drop_stale_file_connections(engine, url.database)
+        _engines[key] = engine
+        while len(_engines) > MAX_ENGINES:
+            _, evicted = _engines.popitem(last=False)
+            evicted.dispose()
+        return engine
+
+
+def dispose_engines() -> None:
+    """Dispose of every registered engine and forget them."""
+    with _lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        engine.dispose()
+
+
+def engine_count() -> int:
+    """Engines currently registered."""
+    with _lock:
+        return len(_engines)
+
+
+atexit.register(dispose_engines)
+
+
+__all__ = [
+    "MAX_ENGINES",
+    "dispose_engines",
+    "engine_count",
+    "get_engine",
+]
@@ -34,6 +34,19 @@ from ..core.schema_validator import (
     validate_model_data,
 )
 
+# Storage backend contract and factory
+from .backends import StorageBackend
+
+# Read-through record cache
+from .cache import CachedBackend, EntityCache
+from .factory import create_storage_backend
+
+# COPY-based bulk export/import (PostgreSQL)
+from .postgresql_copy import export_tables, import_tables
+
+# Plan-directory storage with an in-memory index
+from .yaml_backend import YAMLBackend
+
 # Re-export YAML management if it exists
 try:
     from .yaml_manager import YAMLManager
@@ -45,16 +58,23 @@ except ImportError:
 
 
 __all__ = [
+    "CachedBackend",
     "DatabaseSchemaInitializer",
+    "EntityCache",
     "SchemaValidationError",
+    "StorageBackend",
     "StorageConnectionError",
     "StorageError",
     "StorageQueryError",
     # ToDoWrite Models schema validation
     "ToDoWriteSchemaValidator",
+    "YAMLBackend",
     # Conditional exports
     "YAMLManager",
+    "create_storage_backend",
+    "export_tables",
     "get_schema_validator",
+    "import_tables",
     "initialize_database",
     "validate_model_data",
 ]
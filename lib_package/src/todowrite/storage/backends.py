@@ -0,0 +1,225 @@
+"""
+Storage backend contract for ToDoWrite.
+
+Every database backend hands out SQLAlchemy sessions and runs writes
+through :meth:`StorageBackend.write` (one transaction per call unless a
+backend queues them), and on top of those two primitives offers the
+same batch-first record API:
+
+- :meth:`~StorageBackend.save_many` inserts or updates many records in
+  one transaction (one flush, multi-row statements);
+- :meth:`~StorageBackend.get_many` loads records by id with one
+  ``IN`` query per chunk of ids;
+- :meth:`~StorageBackend.delete_many` deletes records by id in one
+  transaction, through the ORM so the hierarchy closure, node registry
+  and count cache stay in step;
+- :meth:`~StorageBackend.iter_layer` streams a whole layer
+  ``batch_size`` rows per fetch (a server-side cursor on PostgreSQL);
+- :meth:`~StorageBackend.transaction` hands out a session whose work
+  commits together, for changes that must land atomically.
+
+The single-record methods are the batch methods with one item, so a
+caller moving many records never needs a round trip per record.
+
+Example:
+    >>> from todowrite.storage.sqlite_backend import SQLiteBackend
+    >>>
+    >>> backend = SQLiteBackend("todowrite.db")
+    >>> backend.connect()
+    >>> tasks = backend.save_many([Task(title=f"t{i}") for i in range(100)])
+    >>> backend.get_many(Task, [task.id for task in tasks[:10]])
+    >>> with backend.transaction() as session:
+    ...     session.add(Goal(title="Ship"))
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from sqlalchemy import select
+
+from ..core.models import LAYER_MODELS
+from . import StorageConnectionError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+
+    from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+# Ids per IN list (well under SQLite's bound parameter limit)
+ID_CHUNK_SIZE = 1000
+
+# Rows fetched per round trip by iter_layer
+ITER_BATCH_SIZE = 1000
+
+
+def _chunks(ids: Sequence[int], size: int) -> Iterable[Sequence[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start : start + size]
+
+
+class StorageBackend(ABC):
+    """Contract shared by the database backends."""
+
+    backend_name: str
+
+    @abstractmethod
+    def connect(self) -> None:
+        """Open the engine (and create tables if needed)."""
+
+    @abstractmethod
+    def disconnect(self) -> None:
+        """Dispose of the engine and its connections."""
+
+    @abstractmethod
+    def get_session(self) -> Session:
+        """A new session for reading."""
+
+    def write(self, fn: Callable[[Session], T]) -> T:
+        """Run ``fn(session)`` in a committed transaction.
+
+        ``fn`` must not commit or roll back itself.
+        """
+        with self.transaction() as session:
+            return fn(session)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Session]:
+        """
+        A session whose changes commit together when the block exits.
+
+        An exception inside the block rolls everything back and is
+        re-raised. Work inside the block goes through the yielded
+        session, not through other backend write methods.
+        """
+        with self.get_session() as session, session.begin():
+            yield session
+
+    def save_many(self, records: Iterable[Any]) -> list[Any]:
+        """
+        Insert new records and update changed ones in one transaction.
+
+        Args:
+            records: Model instances, new or loaded earlier
+
+        Returns:
+            The records, with ids and server defaults loaded
+        """
+        records = list(records)
+        if not records:
+            return records
+
+        def save(session: Session) -> list[Any]:
+            session.add_all(records)
+            session.flush()
+            return records
+
+        return self.write(save)
+
+    def get_many(
+        self, model: type[T], ids: Iterable[int]
+    ) -> list[T | None]:
+        """
+        Load records by id, one query per :data:`ID_CHUNK_SIZE` ids.
+
+        Args:
+            model: Model class
+            ids: Primary keys
+
+        Returns:
+            One entry per id, in the same order (None where missing)
+        """
+        ids = list(ids)
+        found: dict[int, Any] = {}
+        with self.get_session() as session:
+            for chunk in _chunks(sorted(set(ids)), ID_CHUNK_SIZE):
+                for record in session.scalars(
+                    select(model).where(model.id.in_(chunk))
+                ):
+                    found[record.id] = record
+        return [found.get(record_id) for record_id in ids]
+
+    def delete_many(self, model: type, ids: Iterable[int]) -> int:
+        """
+        Delete records by id in one transaction.
+
+        Args:
+            model: Model class
+            ids: Primary keys; missing ones are ignored
+
+        Returns:
+            Number of records deleted
+        """
+        ids = sorted(set(ids))
+        if not ids:
+            return 0
+
+        def delete(session: Session) -> int:
+            deleted = 0
+            for chunk in _chunks(ids, ID_CHUNK_SIZE):
+                for record in session.scalars(
+                    select(model).where(model.id.in_(chunk))
+                ):
+                    session.delete(record)
+                    deleted += 1
+            return deleted
+
+        return self.write(delete)
+
+    def iter_layer(
+        self, layer: str, batch_size: int = ITER_BATCH_SIZE
+    ) -> Iterator[Any]:
+        """
+        Stream every record of a layer in id order.
+
+        Records of one fetch are detached once the next is read, so
+        memory is bounded by ``batch_size``.
+
+        Args:
+            layer: Layer name, e.g. ``"Task"``
+            batch_size: Rows fetched per round trip
+
+        Raises:
+            ValueError: If the layer is unknown
+        """
+        if layer not in LAYER_MODELS:
+            raise ValueError(f"Unknown layer: {layer}")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        return self._iter_layer(LAYER_MODELS[layer], batch_size)
+
+    def _iter_layer(self, model: type, batch_size: int) -> Iterator[Any]:
+        with self.get_session() as session:
+            result = session.scalars(
+                select(model)
+                .order_by(model.id)
+                .execution_options(yield_per=batch_size)
+            )
+            for partition in result.partitions():
+                yield from partition
+                for record in partition:
+                    session.expunge(record)
+
+    def save_record(self, record: T) -> T:
+        """Save one record (see :meth:`save_many`)."""
+        return self.save_many([record])[0]
+
+    def get_record(self, model: type[T], record_id: int) -> T | None:
+        """Load one record by id (see :meth:`get_many`)."""
+        return self.get_many(model, [record_id])[0]
+
+    def delete_record(self, record: Any) -> bool:
+        """Delete one record; False if it was already gone."""
+        return self.delete_many(type(record), [record.id]) == 1
+
+
+__all__ = [
+    "ID_CHUNK_SIZE",
+    "ITER_BATCH_SIZE",
+    "StorageBackend",
+    "StorageConnectionError",
+]
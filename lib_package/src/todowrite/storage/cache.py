@@ -0,0 +1,310 @@
+"""
+Read-through entity cache for ToDoWrite storage backends.
+
+Web and CLI traffic reads the same Goals, Phases and Labels over and
+over. :class:`CachedBackend` wraps a backend so that ``get_many`` and
+``get_record`` answer from memory and only go to the database for the
+records they miss:
+
+- Entries are keyed by ``(layer, id)`` (the model class name, as in
+  ``LAYER_MODELS``), kept in least-recently-used order and bounded both
+  in number (``max_entries``) and in age (``ttl`` seconds).
+- An ORM flush records every row it inserted, updated or deleted on the
+  session; when that transaction commits, their entries are dropped
+  before the committing call returns. Core statements that change rows
+  report them with ``todowrite.core.counts.note_layer_writes`` (the bulk
+  API does). A rolled-back transaction drops nothing; a rolled-back
+  SAVEPOINT drops its rows when the enclosing transaction commits,
+  which costs a re-read and nothing else.
+- A read that started before a commit invalidated anything does not
+  store its result, so a slow reader cannot put back a row that a
+  concurrent commit has just replaced.
+- :meth:`EntityCache.stats` reports hits, misses, evictions, expired
+  entries and invalidations.
+
+Cached records are detached and shared by every caller: treat them as
+read-only and change rows through a session. Commits made by other
+processes are not seen until ``ttl`` expires.
+
+Example:
+    >>> from todowrite.storage.cache import CachedBackend
+    >>>
+    >>> backend = CachedBackend(SQLiteBackend("todowrite.db"), ttl=60)
+    >>> backend.connect()
+    >>> goals = backend.get_many(Goal, [1, 2, 3])  # one query
+    >>> goals = backend.get_many(Goal, [1, 2, 3])  # no query
+    >>> backend.cache.stats().hits
+    3
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from itertools import chain
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..core.models import Base
+from .backends import ITER_BATCH_SIZE, StorageBackend
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from contextlib import AbstractContextManager
+
+T = TypeVar("T")
+
+# Entries kept before the least recently used is evicted
+MAX_ENTRIES = 10_000
+
+# Seconds an entry is served before it is read again
+TTL = 300.0
+
+CacheKey = tuple[str, int]
+
+
+@dataclass
+class CacheStats:
+    """Counters of an :class:`EntityCache`.
+
+    Attributes:
+        hits: Lookups answered from the cache
+        misses: Lookups that went to the database
+        evictions: Entries dropped to stay within ``max_entries``
+        expired: Entries dropped for being older than ``ttl``
+        invalidations: Entries dropped because their row changed
+        size: Entries held now
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expired: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class EntityCache:
+    """
+    Thread-safe LRU of records with a time-to-live.
+
+    Args:
+        max_entries: Entries kept before the least recently used goes
+        ttl: Seconds an entry may be served
+    """
+
+    def __init__(
+        self, max_entries: int = MAX_ENTRIES, ttl: float = TTL
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[CacheKey, tuple[Any, float]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._generation = 0  # bumped by every invalidation
+        _caches.add(self)
+
+    @property
+    def generation(self) -> int:
+        """Invalidation counter; pass the value read before a database
+        read to :meth:`put`."""
+        return self._generation
+
+    def get(self, key: CacheKey) -> Any | None:
+        """A cached record, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                self._stats.expired += 1
+                entry = None
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return entry[0]
+
+    def put(self, key: CacheKey, record: Any, generation: int) -> None:
+        """
+        Cache a record read from the database.
+
+        Args:
+            key: ``(layer, id)``
+            record: Detached model instance
+            generation: :attr:`generation` read before the record was;
+                if anything was invalidated since, the record may be
+                older than the row and is not stored
+        """
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (record, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def invalidate(self, keys: Iterable[CacheKey]) -> None:
+        """Drop the entries of changed rows."""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._generation += 1
+            self._stats.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """A consistent snapshot of the counters."""
+        with self._lock:
+            return replace(self._stats, size=len(self._entries))
+
+
+_caches: weakref.WeakSet[EntityCache] = weakref.WeakSet()
+
+# Anything else that needs the rows written by each transaction (such as
+# the invalidation publishers of ``todowrite.storage.invalidation``)
+_row_consumers: weakref.WeakSet[Any] = weakref.WeakSet()
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_rows(session: Session, _flush_context: Any) -> None:
+    if not _caches and not _row_consumers:
+        return
+    written = session.info.setdefault("written_rows", set())
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, Base):
+            # New rows get their identity key only after this event
+            identity = inspect(instance).identity
+            row_id = identity[0] if identity else instance.id
+            if row_id is not None:
+                written.add((type(instance).__name__, row_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # a SAVEPOINT was released; nothing is visible yet
+    written = session.info.pop("written_rows", None)
+    if written:
+        for cache in list(_caches):
+            cache.invalidate(written)
+
+
+class CachedBackend(StorageBackend):
+    """
+    A storage backend whose record reads go through an
+    :class:`EntityCache`.
+
+    Writes, sessions and streaming go straight to the wrapped backend;
+    other attributes (``metrics``, ``pool_stats``, ...) are its own.
+
+    Args:
+        backend: Backend to wrap
+        max_entries: Entries kept before the least recently used goes
+        ttl: Seconds an entry may be served
+    """
+
+    def __init__(
+        self,
+        backend: StorageBackend,
+        max_entries: int = MAX_ENTRIES,
+        ttl: float = TTL,
+    ) -> None:
+        self.backend = backend
+        self.cache = EntityCache(max_entries, ttl)
+
+    @property
+    def backend_name(self) -> str:  # type: ignore[override]
+        """Name of the wrapped backend."""
+        return self.backend.backend_name
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "backend":  # not set yet
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    def connect(self) -> None:
+        """Connect the wrapped backend."""
+        self.backend.connect()
+
+    def disconnect(self) -> None:
+        """Disconnect the wrapped backend and empty the cache."""
+        self.backend.disconnect()
+        self.cache.clear()
+
+    def get_session(self) -> Session:
+        """A session of the wrapped backend (not cached)."""
+        return self.backend.get_session()
+
+    def write(self, fn: Callable[[Session], T]) -> T:
+        """Run a write on the wrapped backend."""
+        return self.backend.write(fn)
+
+    def transaction(self) -> AbstractContextManager[Session]:
+        """A transaction of the wrapped backend."""
+        return self.backend.transaction()
+
+    def iter_layer(
+        self, layer: str, batch_size: int = ITER_BATCH_SIZE
+    ) -> Iterator[Any]:
+        """Stream a layer from the wrapped backend (not cached)."""
+        return self.backend.iter_layer(layer, batch_size)
+
+    def get_many(
+        self, model: type[T], ids: Iterable[int]
+    ) -> list[T | None]:
+        """
+        Load records by id, from the cache where possible.
+
+        Missing rows are not cached; asking again queries again.
+        """
+        ids = list(ids)
+        layer = model.__name__
+        found: dict[int, Any] = {}
+        missing = []
+        for record_id in dict.fromkeys(ids):
+            record = self.cache.get((layer, record_id))
+            if record is None:
+                missing.append(record_id)
+            else:
+                found[record_id] = record
+        if missing:
+            generation = self.cache.generation
+            for record in self.backend.get_many(model, missing):
+                if record is not None:
+                    found[record.id] = record
+                    self.cache.put((layer, record.id), record, generation)
+        return [found.get(record_id) for record_id in ids]
+
+
+__all__ = [
+    "MAX_ENTRIES",
+    "TTL",
+    "CacheStats",
+    "CachedBackend",
+    "EntityCache",
+]
@@ -0,0 +1,412 @@
+"""
+Cross-process invalidation for the entity cache.
+
+:class:`~todowrite.storage.cache.CachedBackend` drops cached records
+when this process commits, but web workers and long-running CLI
+sessions each hold their own cache. The invalidation bus tells every
+other process which rows a commit changed, so each drops exactly those
+keys instead of waiting for their TTL:
+
+- Publishing: every transaction committed on an engine passed to
+  :func:`publish_invalidations` emits one :class:`InvalidationEvent`
+  ``(layer, id, version)`` per row it wrote, inside that transaction,
+  so a rollback publishes nothing.
+
+  - On PostgreSQL the events go out with ``pg_notify`` on the
+    ``todowrite_invalidate`` channel, which delivers them when the
+    transaction commits. ``version`` is the transaction id.
+  - On SQLite they are rows of a small ``cache_changes`` table.
+    ``version`` is the row's sequence number; only the last
+    ``RETAIN_CHANGES`` rows are kept.
+
+- Subscribing: an :class:`InvalidationSubscriber` thread receives the
+  events and drops the affected keys from its caches.
+
+  - On PostgreSQL it ``LISTEN`` s on one dedicated connection.
+  - On SQLite it reads ``PRAGMA data_version`` every ``poll_interval``
+    seconds on a connection of its own (the counter changes whenever
+    another connection commits, as in ``todowrite.core.counts``) and
+    only queries ``cache_changes`` when it moved.
+
+  When events may have been missed (the SQLite table was pruned past
+  the subscriber, or the PostgreSQL connection dropped), the
+  subscriber clears its caches rather than serve stale rows.
+
+:func:`connect_invalidation_bus` wires both sides up for a cached
+backend.
+
+Example:
+    >>> from todowrite.storage.invalidation import connect_invalidation_bus
+    >>>
+    >>> backend = CachedBackend(SQLiteBackend("todowrite.db"))
+    >>> backend.connect()
+    >>> subscriber = connect_invalidation_bus(backend)
+    >>> ...  # commits in other processes now evict from backend.cache
+    >>> subscriber.stop()
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import select
+import sqlite3
+import threading
+import weakref
+from functools import partial
+from typing import TYPE_CHECKING, NamedTuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from . import StorageConnectionError
+from .cache import _row_consumers
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from sqlalchemy import Connection, Engine
+
+    from .cache import CachedBackend, EntityCache
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL NOTIFY channel
+CHANNEL = "todowrite_invalidate"
+
+# SQLite table of published changes; a constant, so the SQL naming it
+# through f-strings takes no outside input (noqa: S608 below)
+CHANGES_TABLE = "cache_changes"
+
+# Seconds between SQLite data_version polls (and LISTEN wake-ups)
+POLL_INTERVAL = 0.5
+
+# Most recent SQLite change rows kept for subscribers
+RETAIN_CHANGES = 10_000
+
+# Bytes per NOTIFY payload (PostgreSQL's limit is 8000)
+MAX_PAYLOAD = 7_900
+
+
+class InvalidationEvent(NamedTuple):
+    """One row changed by a committed transaction."""
+
+    layer: str
+    id: int
+    version: int
+
+
+class _Publisher:
+    """Publishing state of one engine."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.dialect = engine.dialect.name
+        self.published = 0
+
+
+_publishers: weakref.WeakKeyDictionary[Engine, _Publisher] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def publish_invalidations(engine: Engine) -> None:
+    """
+    Publish the rows written by every commit on ``engine``.
+
+    On SQLite this creates the ``cache_changes`` table if needed.
+
+    Raises:
+        ValueError: If the database is neither SQLite nor PostgreSQL
+    """
+    if engine in _publishers:
+        return
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                f"CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "layer TEXT NOT NULL, row_id INTEGER NOT NULL)"
+            )
+    elif dialect != "postgresql":
+        raise ValueError(f"No invalidation bus for {dialect}")
+    publisher = _Publisher(engine)
+    _publishers[engine] = publisher
+    _row_consumers.add(publisher)
+
+
+def stop_publishing(engine: Engine) -> None:
+    """Stop publishing the commits on ``engine``."""
+    publisher = _publishers.pop(engine, None)
+    if publisher is not None:
+        _row_consumers.discard(publisher)
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_on_commit(session: Session) -> None:
+    if not _publishers:
+        return
+    if session.in_nested_transaction():
+        return  # a SAVEPOINT; the rows go out with the outer commit
+    bind = session.get_bind()
+    publisher = _publishers.get(getattr(bind, "engine", bind))
+    if publisher is None:
+        return
+    session.flush()  # the commit's own flush has not run yet
+    written = session.info.get("written_rows")
+    if not written:
+        return
+    connection = session.connection()
+    if publisher.dialect == "postgresql":
+        _notify(connection, sorted(written))
+    else:
+        _record_changes(connection, publisher, sorted(written))
+
+
+def _notify(connection: Connection, rows: list[tuple[str, int]]) -> None:
+    """Queue NOTIFYs carrying ``rows``; sent when the commit lands."""
+    version = connection.execute(text("SELECT txid_current()")).scalar_one()
+    chunk: list[tuple[str, int]] = []
+    size = 0
+    for row in rows:
+        row_size = len(row[0]) + len(str(row[1])) + 8
+        if chunk and size + row_size > MAX_PAYLOAD:
+            _notify_chunk(connection, version, chunk)
+            chunk, size = [], 0
+        chunk.append(row)
+        size += row_size
+    _notify_chunk(connection, version, chunk)
+
+
+def _notify_chunk(
+    connection: Connection, version: int, rows: list[tuple[str, int]]
+) -> None:
+    connection.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": CHANNEL,
+            "payload": json.dumps({"version": version, "rows": rows}),
+        },
+    )
+
+
+def _record_changes(
+    connection: Connection, publisher: _Publisher, rows: list[tuple[str, int]]
+) -> None:
+    connection.execute(
+        text(
+            f"INSERT INTO {CHANGES_TABLE} (layer, row_id) "  # noqa: S608
+            "VALUES (:layer, :row_id)"
+        ),
+        [{"layer": layer, "row_id": row_id} for layer, row_id in rows],
+    )
+    publisher.published += 1
+    if publisher.published % 100 == 0:
+        connection.execute(
+            text(
+                f"DELETE FROM {CHANGES_TABLE} WHERE seq <= "  # noqa: S608
+                f"(SELECT MAX(seq) FROM {CHANGES_TABLE}) - :retain"
+            ),
+            {"retain": RETAIN_CHANGES},
+        )
+
+
+class InvalidationSubscriber:
+    """
+    Drop cache entries of rows committed by other processes.
+
+    Args:
+        engine: Engine of the database to follow (for PostgreSQL, one
+            of its connections is held for ``LISTEN`` while running)
+        caches: Caches to invalidate
+        poll_interval: Seconds between polls (SQLite) or wake-ups
+            (PostgreSQL)
+        on_events: Called with each batch of received events
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        caches: Iterable[EntityCache],
+        poll_interval: float = POLL_INTERVAL,
+        on_events: Callable[[list[InvalidationEvent]], None] | None = None,
+    ) -> None:
+        self.engine = engine
+        self.caches = list(caches)
+        self.poll_interval = poll_interval
+        self.on_events = on_events
+        self.events = 0
+        self.resets = 0
+        self.last_version: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> InvalidationSubscriber:
+        """Start following the database on a background thread.
+
+        Raises:
+            ValueError: If the database is neither SQLite nor PostgreSQL
+        """
+        dialect = self.engine.dialect.name
+        if dialect == "sqlite":
+            # Ask for the starting point now, so no commit made after
+            # start() returns is missed
+            watcher = self._sqlite_watcher()
+            target: Callable[[], None] = partial(self._poll_sqlite, watcher)
+        elif dialect == "postgresql":
+            target = self._listen_postgresql
+        else:
+            raise ValueError(f"No invalidation bus for {dialect}")
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=target, name="todowrite-cache-invalidation", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop following and wait for the thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _dispatch(self, events: list[InvalidationEvent]) -> None:
+        if not events:
+            return
+        keys = {(event.layer, event.id) for event in events}
+        for cache in self.caches:
+            cache.invalidate(keys)
+        self.events += len(events)
+        self.last_version = events[-1].version
+        if self.on_events is not None:
+            self.on_events(events)
+
+    def _reset(self) -> None:
+        """Events may have been missed: drop everything."""
+        for cache in self.caches:
+            cache.clear()
+        self.resets += 1
+
+    def _sqlite_watcher(self) -> sqlite3.Connection:
+        url = self.engine.url
+        if url.database in (None, "", ":memory:"):
+            raise StorageConnectionError(
+                "An in-memory SQLite database has no other processes"
+            )
+        watcher = sqlite3.connect(
+            url.database,
+            uri=bool(url.query.get("uri")),
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self.last_version = watcher.execute(
+            f"SELECT COALESCE(MAX(seq), 0) FROM {CHANGES_TABLE}"  # noqa: S608
+        ).fetchone()[0]
+        return watcher
+
+    def _poll_sqlite(self, watcher: sqlite3.Connection) -> None:
+        try:
+            data_version = None
+            while not self._stop.wait(self.poll_interval):
+                current = watcher.execute("PRAGMA data_version").fetchone()
+                if current[0] == data_version:
+                    continue
+                data_version = current[0]
+                self._read_changes(watcher)
+        except sqlite3.Error:
+            logger.exception("Cache invalidation polling failed")
+            self._reset()
+        finally:
+            watcher.close()
+
+    def _read_changes(self, watcher: sqlite3.Connection) -> None:
+        first = watcher.execute(
+            f"SELECT MIN(seq) FROM {CHANGES_TABLE}"  # noqa: S608
+        ).fetchone()[0]
+        if first is not None and first > self.last_version + 1:
+            self._reset()  # pruned past us
+            self.last_version = first - 1
+        rows = watcher.execute(
+            f"SELECT layer, row_id, seq FROM {CHANGES_TABLE} "  # noqa: S608
+            "WHERE seq > ? ORDER BY seq",
+            (self.last_version,),
+        ).fetchall()
+        self._dispatch([InvalidationEvent(*row) for row in rows])
+
+    def _listen_postgresql(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen_once()
+            except Exception:
+                logger.exception("Cache invalidation LISTEN failed")
+            # Whatever was sent while not listening is lost
+            self._reset()
+            self._stop.wait(self.poll_interval)
+
+    def _listen_once(self) -> None:
+        raw = self.engine.raw_connection()
+        try:
+            connection = raw.driver_connection
+            connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute(f"LISTEN {CHANNEL}")
+            psycopg2 = hasattr(connection, "poll")
+            while not self._stop.is_set():
+                if psycopg2:
+                    select.select([connection], [], [], self.poll_interval)
+                    connection.poll()
+                    notifies = list(connection.notifies)
+                    connection.notifies.clear()
+                else:
+                    notifies = list(
+                        connection.notifies(timeout=self.poll_interval)
+                    )
+                for notify in notifies:
+                    self._dispatch(_parse_payload(notify.payload))
+        finally:
+            raw.invalidate()  # never return a LISTENing connection
+
+
+def _parse_payload(payload: str) -> list[InvalidationEvent]:
+    message = json.loads(payload)
+    return [
+        InvalidationEvent(layer, row_id, message["version"])
+        for layer, row_id in message["rows"]
+    ]
+
+
+def connect_invalidation_bus(
+    backend: CachedBackend, poll_interval: float = POLL_INTERVAL
+) -> InvalidationSubscriber:
+    """
+    Publish a cached backend's commits and follow everyone else's.
+
+    The backend must be connected. Commits go through its writer
+    (``SQLiteBackend(single_writer=True)``) or its engine.
+
+    Returns:
+        The started subscriber; call ``stop()`` before disconnecting
+    """
+    inner = backend.backend
+    writer = getattr(inner, "writer", None)
+    engine = writer.engine if writer is not None else inner.engine
+    if engine is None:
+        raise StorageConnectionError("Not connected - call connect() first")
+    publish_invalidations(engine)
+    return InvalidationSubscriber(
+        engine, [backend.cache], poll_interval
+    ).start()
+
+
+__all__ = [
+    "CHANGES_TABLE",
+    "CHANNEL",
+    "POLL_INTERVAL",
+    "RETAIN_CHANGES",
+    "InvalidationEvent",
+    "InvalidationSubscriber",
+    "connect_invalidation_bus",
+    "publish_invalidations",
+    "stop_publishing",
+]
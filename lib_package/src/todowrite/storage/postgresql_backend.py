@@ -1,48 +1,191 @@
 """
 PostgreSQL storage backend for ToDoWrite.
 
-PostgreSQL implementation using SQLAlchemy for Rails ActiveRecord compatibility.
+Runs the :class:`~todowrite.storage.backends.StorageBackend` contract on
+one pooled engine:
+
+- Pool size, overflow, timeout and recycle default to the
+  ``TODOWRITE_DB_POOL_*`` environment variables
+  (``todowrite.database.config.get_pool_settings``); each can be set per
+  backend. Connections are pinged on checkout, since a server restart
+  or idle timeout can drop them.
+- Statements are compiled once and cached per engine
+  (``statement_cache_size`` entries). With the psycopg 3 driver
+  (``postgresql+psycopg://``) they are also prepared on the server after
+  ``prepare_threshold`` executions on a connection; psycopg2 has no
+  server-side prepared statements, so there only the compile cache
+  applies.
+- ``iter_layer`` streams a whole layer through a server-side cursor,
+  ``batch_size`` rows per fetch, instead of loading the result set into
+  memory.
+- :meth:`PostgreSQLBackend.pool_stats` reports pool occupancy.
+
+Example:
+    >>> from todowrite.storage.postgresql_backend import PostgreSQLBackend
+    >>>
+    >>> backend = PostgreSQLBackend("postgresql://localhost/todowrite")
+    >>> backend.connect()
+    >>> for task in backend.iter_layer("Task", batch_size=5000):
+    ...     print(task.title)
+    >>> backend.pool_stats()
+    {'size': 10, 'checked_in': 1, 'checked_out': 0, 'overflow': -9, ...}
 """
 
-from typing import Any
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
 
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..core.models import Base
+from ..database.config import get_pool_settings
+from . import StorageConnectionError
 from .backends import StorageBackend
 
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+
+logger = logging.getLogger(__name__)
+
+# Compiled statements cached per engine
+STATEMENT_CACHE_SIZE = 500
+
+# Executions on one connection before psycopg 3 prepares a statement
+PREPARE_THRESHOLD = 5
+
 
 class PostgreSQLBackend(StorageBackend):
     """PostgreSQL storage backend implementation."""
 
+    backend_name = "postgresql"
+
     def __init__(
-        self, database_url: str, pool_size: int = 5, max_overflow: int = 10
+        self,
+        database_url: str,
+        pool_size: int | None = None,
+        max_overflow: int | None = None,
+        pool_timeout: float | None = None,
+        pool_recycle: int | None = None,
+        statement_cache_size: int = STATEMENT_CACHE_SIZE,
+        prepare_threshold: int | None = PREPARE_THRESHOLD,
     ) -> None:
+        """Initialize the backend; nothing connects until :meth:`connect`.
+
+        Args:
+            database_url: PostgreSQL URL
+            pool_size: Connections kept open
+            max_overflow: Extra connections allowed under load
+            pool_timeout: Seconds to wait for a free connection
+            pool_recycle: Seconds after which a connection is replaced
+            statement_cache_size: Compiled statements cached
+            prepare_threshold: Executions before psycopg 3 prepares a
+                statement on the server (None: never)
+
+        Pool options left as None come from ``get_pool_settings()``.
+        """
         self.database_url = database_url
-        self.pool_size = pool_size
-        self.max_overflow = max_overflow
-        self.backend_name = "postgresql"
-        self._engine = None
-        self._session = None
+        self.pool_settings = get_pool_settings()
+        for option, value in (
+            ("pool_size", pool_size),
+            ("max_overflow", max_overflow),
+            ("pool_timeout", pool_timeout),
+            ("pool_recycle", pool_recycle),
+        ):
+            if value is not None:
+                self.pool_settings[option] = value
+        self.statement_cache_size = statement_cache_size
+        self.prepare_threshold = prepare_threshold
+        self.engine: Engine | None = None
+        self.Session: sessionmaker | None = None
+
+    @property
+    def pool_size(self) -> int:
+        """Connections kept open."""
+        return int(self.pool_settings["pool_size"])
+
+    @property
+    def max_overflow(self) -> int:
+        """Extra connections allowed under load."""
+        return int(self.pool_settings["max_overflow"])
 
     def connect(self) -> None:
-        """Establish PostgreSQL connection."""
-        # Placeholder implementation for Rails ActiveRecord compatibility
-        pass
+        """Create the pooled engine and the tables."""
+        connect_args: dict[str, Any] = {}
+        if make_url(self.database_url).get_driver_name() == "psycopg":
+            connect_args["prepare_threshold"] = self.prepare_threshold
+        try:
+            self.engine = create_engine(
+                self.database_url,
+                pool_pre_ping=True,
+                query_cache_size=self.statement_cache_size,
+                connect_args=connect_args,
+                **self.pool_settings,
+            )
+            Base.metadata.create_all(self.engine)
+        except Exception as e:
+            if self.engine is not None:
+                self.engine.dispose()
+                self.engine = None
+            raise StorageConnectionError(
+                f"Failed to connect to PostgreSQL: {e}"
+            ) from e
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+        logger.info(
+            "Connected to PostgreSQL (pool_size=%s, max_overflow=%s)",
+            self.pool_size,
+            self.max_overflow,
+        )
 
     def disconnect(self) -> None:
-        """Close PostgreSQL connection."""
-        # Placeholder implementation for Rails ActiveRecord compatibility
-        pass
-
-    def save_record(self, record: Any) -> Any:
-        """Save a record to PostgreSQL."""
-        # Placeholder implementation for Rails ActiveRecord compatibility
-        return record
-
-    def get_record(self, model_class: type, record_id: int) -> Any | None:
-        """Get a record by ID from PostgreSQL."""
-        # Placeholder implementation for Rails ActiveRecord compatibility
-        return None
-
-    def delete_record(self, record: Any) -> bool:
-        """Delete a record from PostgreSQL."""
-        # Placeholder implementation for Rails ActiveRecord compatibility
-        return True
+        """Close every pooled connection."""
+        if self.engine:
+            self.engine.dispose()
+            self.engine = None
+            self.Session = None
+            logger.info("Disconnected from PostgreSQL")
+
+    def get_session(self) -> Session:
+        """Get a SQLAlchemy session on the pool."""
+        if not self.Session:
+            raise StorageConnectionError(
+                "Not connected - call connect() first"
+            )
+        return self.Session()
+
+    def pool_stats(self) -> dict[str, int]:
+        """
+        Current pool occupancy.
+
+        Returns:
+            ``size`` (configured), ``checked_in`` (idle), ``checked_out``
+            (in use), ``overflow`` (open beyond ``size``; negative while
+            the pool is not full yet) and ``max_overflow``
+
+        Raises:
+            StorageConnectionError: If not connected
+        """
+        if not self.engine:
+            raise StorageConnectionError(
+                "Not connected - call connect() first"
+            )
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": self.max_overflow,
+        }
+
+    def test_connection(self) -> bool:
+        """Test database connection."""
+        try:
+            if not self.engine:
+                return False
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                return True
+        except Exception:
+            return False
@@ -0,0 +1,588 @@
+"""
+COPY-based bulk export and import for PostgreSQL.
+
+Moving millions of rows through INSERT/SELECT costs a round trip and a
+Python object per row. ``COPY ... TO STDOUT`` / ``COPY ... FROM STDIN``
+streams rows in PostgreSQL's own CSV or binary format instead, straight
+between the server and a file, so memory stays flat however large the
+table is.
+
+Every layer and association table is copied in chunks of
+``chunk_rows`` rows, walked in primary-key order (keyset
+ranges, so each chunk is an index range scan). Each chunk is one file in
+the export directory, recorded in ``manifest.json`` once it is complete:
+
+- An interrupted export picks up after the last recorded chunk. The
+  export reads from one REPEATABLE READ snapshot, so a run is consistent
+  across tables; a resumed run continues from a newer snapshot.
+- Import commits each chunk in one transaction with its entry in the
+  target's ``copy_import_progress`` table, so an interrupted import is
+  simply run again and continues after the last committed chunk.
+  Sequences are moved past the imported ids, and the progress cleared,
+  at the end.
+
+An import refuses tables that already hold rows unless told what to do
+with them: ``mode="truncate"`` empties them first, ``mode="upsert"``
+loads each chunk through a temporary table and overwrites the rows whose
+primary key already exists. A truncating import of some tables must
+include every table referencing them (``goals`` needs ``goals_labels``,
+``goals_tasks``, ...); it is refused otherwise, as emptying those
+tables would lose rows the import does not reload.
+
+Row triggers (search index, item counters, hierarchy closure) fire on
+COPY FROM as they do on INSERT, so derived tables stay in step; the
+closure table itself is therefore not copied. TRUNCATE bypasses row
+triggers, so the truncate mode rebuilds the derived tables afterwards.
+
+The node registry is not copied either: global node IDs are allocated
+by each database on its own, so copying them would clash with the ids
+the target has handed out. COPY fires no ORM events, so the import
+registers the rows it loaded (``backfill_node_registry``) when it ends.
+
+Example:
+    >>> from sqlalchemy import create_engine
+    >>> from todowrite.storage.postgresql_copy import (
+    ...     export_tables,
+    ...     import_tables,
+    ... )
+    >>>
+    >>> source = create_engine("postgresql://host/todowrite")
+    >>> export_tables(source, "/var/backups/todowrite", format="binary")
+    >>> target = create_engine("postgresql://replica/todowrite")
+    >>> import_tables(target, "/var/backups/todowrite")
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    func,
+    inspect,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..core.counts import populate_counters
+from ..core.hierarchy import populate_closure
+from ..core.models import Base, NodeClosure, NodeRegistry
+from ..core.node_registry import backfill_node_registry
+from ..core.search import populate_search_index
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy import ColumnElement, Connection, Engine
+
+# Rows per exported chunk file
+CHUNK_ROWS = 100_000
+
+COPY_FORMATS = ("csv", "binary")
+
+MANIFEST = "manifest.json"
+
+IMPORT_MODES = ("empty", "truncate", "upsert")
+
+# Tables rebuilt from their source tables rather than copied: the
+# closure by triggers, the registry when an import ends
+DERIVED_TABLES = frozenset(
+    {NodeClosure.__tablename__, NodeRegistry.__tablename__}
+)
+
+# Chunks committed per export and table, written in each chunk's
+# transaction; kept out of Base.metadata so it is never copied itself
+IMPORT_PROGRESS = Table(
+    "copy_import_progress",
+    MetaData(),
+    Column("export_id", String, primary_key=True),
+    Column("table_name", String, primary_key=True),
+    Column("chunks", Integer, nullable=False),
+)
+
+# Bytes moved per read when streaming a file into COPY FROM
+_BUFFER_SIZE = 1 << 16
+
+
+def copy_tables(names: Iterable[str] | None = None) -> list[Table]:
+    """
+    Tables the pipeline copies, parents before the tables referencing them.
+
+    Tables in ``DERIVED_TABLES`` are left out; they are rebuilt from
+    the copied tables instead.
+
+    Args:
+        names: Restrict to these table names (default: all copied tables)
+
+    Raises:
+        ValueError: If a name is not a copied model table
+    """
+    tables = [
+        table
+        for table in Base.metadata.sorted_tables
+        if table.name not in DERIVED_TABLES
+    ]
+    if names is None:
+        return tables
+    wanted = set(names)
+    unknown = wanted - {table.name for table in tables}
+    if unknown:
+        raise ValueError(f"Unknown table(s): {', '.join(sorted(unknown))}")
+    return [table for table in tables if table.name in wanted]
+
+
+def _check_dialect(engine: Engine) -> None:
+    if engine.dialect.name != "postgresql":
+        raise ValueError(
+            "COPY import/export needs a PostgreSQL database, "
+            f"not {engine.dialect.name}"
+        )
+
+
+def _key(table: Table) -> ColumnElement[Any]:
+    """The table's primary key as one (row-valued) expression."""
+    return tuple_(*table.primary_key.columns)
+
+
+def _key_range(
+    table: Table, after: list[Any] | None, last: list[Any] | None
+) -> list[ColumnElement[bool]]:
+    """Conditions selecting primary keys in ``(after, last]``."""
+    conditions = []
+    if after is not None:
+        conditions.append(_key(table) > tuple_(*after))
+    if last is not None:
+        conditions.append(_key(table) <= tuple_(*last))
+    return conditions
+
+
+def _chunk_end(
+    connection: Connection, table: Table, after: list[Any] | None, rows: int
+) -> list[Any] | None:
+    """Primary key of the ``rows``-th row after ``after`` (None: past end)."""
+    row = connection.execute(
+        select(*table.primary_key.columns)
+        .where(*_key_range(table, after, None))
+        .order_by(*table.primary_key.columns)
+        .offset(rows - 1)
+        .limit(1)
+    ).first()
+    return None if row is None else list(row)
+
+
+def _copy_out(connection: Connection, sql: str, file: IO[bytes]) -> None:
+    """Run ``COPY ... TO STDOUT``, streaming the data into ``file``."""
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(sql, file)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                for data in copy:
+                    file.write(data)
+    finally:
+        cursor.close()
+
+
+def _copy_in(connection: Connection, sql: str, file: IO[bytes]) -> None:
+    """Run ``COPY ... FROM STDIN``, streaming the data from ``file``."""
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(sql, file, size=_BUFFER_SIZE)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                while data := file.read(_BUFFER_SIZE):
+                    copy.write(data)
+    finally:
+        cursor.close()
+
+
+def _read_manifest(directory: Path) -> dict[str, Any] | None:
+    path = directory / MANIFEST
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_manifest(directory: Path, manifest: dict[str, Any]) -> None:
+    """Replace the manifest atomically, so a crash never leaves half of it."""
+    path = directory / MANIFEST
+    partial = path.with_suffix(".json.part")
+    partial.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(partial, path)
+
+
+def export_tables(
+    engine: Engine,
+    directory: str | Path,
+    tables: Iterable[str] | None = None,
+    format: str = "csv",
+    chunk_rows: int = CHUNK_ROWS,
+) -> dict[str, int]:
+    """
+    Export tables to chunk files with ``COPY ... TO STDOUT``.
+
+    Running it again on the same directory resumes an interrupted export;
+    finished tables are skipped.
+
+    Args:
+        engine: Engine for the PostgreSQL source database
+        directory: Export directory (created if missing)
+        tables: Table names to export (default: every model table)
+        format: ``"csv"`` (portable) or ``"binary"`` (faster, needs the
+            same column types on import)
+        chunk_rows: Rows per chunk file
+
+    Returns:
+        Rows exported by this run, per table
+
+    Raises:
+        ValueError: If the database is not PostgreSQL, an option is
+            invalid, or the directory holds an export in another format
+    """
+    if format not in COPY_FORMATS:
+        raise ValueError(f"Unknown COPY format: {format}")
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be at least 1")
+    _check_dialect(engine)
+    selected = copy_tables(tables)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    manifest = _read_manifest(directory) or {"format": format, "tables": {}}
+    if manifest["format"] != format:
+        raise ValueError(
+            f"{directory} holds a {manifest['format']} export; "
+            f"cannot resume it as {format}"
+        )
+    # Imports record their progress under this id
+    if "id" not in manifest:
+        manifest["id"] = uuid.uuid4().hex
+        _write_manifest(directory, manifest)
+
+    exported: dict[str, int] = {}
+    with engine.connect().execution_options(
+        isolation_level="REPEATABLE READ"
+    ) as connection:
+        connection.execute(text("SET TRANSACTION READ ONLY"))
+        for table in selected:
+            entry = manifest["tables"].setdefault(
+                table.name,
+                {
+                    "columns": [column.name for column in table.columns],
+                    "chunks": [],
+                    "done": False,
+                },
+            )
+            exported[table.name] = 0
+            if entry["done"]:
+                continue
+
+            after = entry["chunks"][-1]["last"] if entry["chunks"] else None
+            while not entry["done"]:
+                rows = chunk_rows
+                last = _chunk_end(connection, table, after, chunk_rows)
+                if last is None:
+                    # Fewer rows than a full chunk remain: this is the tail
+                    rows = connection.execute(
+                        select(func.count())
+                        .select_from(table)
+                        .where(*_key_range(table, after, None))
+                    ).scalar_one()
+                    entry["done"] = True
+                    if rows:
+                        last = _chunk_end(connection, table, after, rows)
+
+                if rows:
+                    query = (
+                        select(*table.columns)
+                        .where(*_key_range(table, after, last))
+                        .compile(
+                            dialect=connection.dialect,
+                            compile_kwargs={"literal_binds": True},
+                        )
+                    )
+                    name = f"{table.name}.{len(entry['chunks']):06d}.{format}"
+                    partial = directory / f"{name}.part"
+                    with open(partial, "wb") as file:
+                        _copy_out(
+                            connection,
+                            f"COPY ({query}) TO STDOUT "
+                            f"WITH (FORMAT {format})",
+                            file,
+                        )
+                    os.replace(partial, directory / name)
+                    entry["chunks"].append(
+                        {"file": name, "rows": rows, "last": last}
+                    )
+                    exported[table.name] += rows
+                _write_manifest(directory, manifest)
+                after = last
+
+    return exported
+
+
+def _reset_sequences(connection: Connection, tables: list[Table]) -> None:
+    """Move serial sequences past the ids COPY wrote explicitly."""
+    for table in tables:
+        key = list(table.primary_key.columns)
+        if len(key) != 1 or not isinstance(key[0].type, Integer):
+            continue
+        # setval ignores tables without a sequence (NULL name); an empty
+        # table restarts its sequence at 1
+        connection.execute(
+            select(
+                func.setval(
+                    func.pg_get_serial_sequence(table.name, key[0].name),
+                    func.coalesce(func.max(key[0]), 1),
+                    func.max(key[0]).is_not(None),
+                )
+            ).select_from(table)
+        )
+
+
+def _check_truncatable(tables: list[Table]) -> None:
+    """Refuse to truncate tables referenced from outside the selection.
+
+    PostgreSQL rejects a TRUNCATE of a referenced table unless the
+    referencing tables are emptied with it.
+    """
+    names = {table.name for table in tables}
+    referencing = sorted(
+        table.name
+        for table in copy_tables()
+        if table.name not in names
+        and any(key.column.table.name in names for key in table.foreign_keys)
+    )
+    if referencing:
+        raise ValueError(
+            "mode='truncate' cannot empty the selected tables while "
+            f"{', '.join(referencing)} reference them; include those "
+            "tables in the import or import every table"
+        )
+
+
+def _prepare_target(
+    connection: Connection, tables: list[Table], mode: str
+) -> None:
+    """Check, or empty, tables an import has not started loading yet."""
+    filled = [
+        table.name
+        for table in tables
+        if connection.execute(select(table).limit(1)).first() is not None
+    ]
+    if not filled or mode == "upsert":
+        return
+    if mode == "empty":
+        raise ValueError(
+            f"Target table(s) already hold rows: {', '.join(filled)}; "
+            "pass mode='truncate' to replace them or mode='upsert' to "
+            "merge the export into them"
+        )
+    names = ", ".join(f'"{table.name}"' for table in tables)
+    connection.execute(text(f"TRUNCATE {names}"))
+
+    # TRUNCATE fires no row triggers, so rebuild what they maintain
+    populate_closure(connection)
+    inspector = inspect(connection)
+    if inspector.has_table("search_index"):
+        populate_search_index(connection)
+    if inspector.has_table("layer_counts"):
+        populate_counters(connection)
+
+
+def _upsert_chunk(
+    connection: Connection,
+    table: Table,
+    columns: list[str],
+    format: str,
+    file: IO[bytes],
+) -> None:
+    """Load a chunk, overwriting rows whose primary key already exists."""
+    quoted = ", ".join(f'"{name}"' for name in columns)
+    connection.execute(
+        text(
+            f'CREATE TEMPORARY TABLE copy_chunk (LIKE "{table.name}") '
+            "ON COMMIT DROP"
+        )
+    )
+    _copy_in(
+        connection,
+        f"COPY copy_chunk ({quoted}) FROM STDIN WITH (FORMAT {format})",
+        file,
+    )
+    key = [column.name for column in table.primary_key.columns]
+    conflict = ", ".join(f'"{name}"' for name in key)
+    updates = [
+        f'"{name}" = EXCLUDED."{name}"' for name in columns if name not in key
+    ]
+    action = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+    connection.execute(
+        text(
+            f'INSERT INTO "{table.name}" ({quoted}) '
+            f"SELECT {quoted} FROM copy_chunk "
+            f"ON CONFLICT ({conflict}) {action}"
+        )
+    )
+
+
+def import_tables(
+    engine: Engine,
+    directory: str | Path,
+    tables: Iterable[str] | None = None,
+    mode: str = "empty",
+) -> dict[str, int]:
+    """
+    Load an export directory with ``COPY ... FROM STDIN``.
+
+    Each chunk is committed on its own, together with the import's
+    progress in the ``copy_import_progress`` table, so an interrupted
+    import is resumed by running it again. The progress lives in the
+    target database: drop that table too when resetting a target by hand.
+
+    Args:
+        engine: Engine for the PostgreSQL target database (schema created)
+        directory: Directory written by :func:`export_tables`
+        tables: Table names to import (default: every exported table)
+        mode: How to treat target tables that already hold rows when the
+            import starts on them: ``"empty"`` refuses them,
+            ``"truncate"`` empties them, ``"upsert"`` overwrites rows
+            whose primary key matches and keeps the others
+
+    Returns:
+        Rows imported by this run, per table
+
+    Raises:
+        ValueError: If the database is not PostgreSQL, the mode is
+            unknown, the directory has no manifest or an unfinished table,
+            a target table holds rows in ``"empty"`` mode, or a table
+            outside the selection references one to truncate
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode: {mode}")
+    _check_dialect(engine)
+    directory = Path(directory)
+    manifest = _read_manifest(directory)
+    if manifest is None:
+        raise ValueError(f"No {MANIFEST} in {directory}")
+    if "id" not in manifest:
+        raise ValueError(
+            f"{directory / MANIFEST} predates import progress tracking; "
+            "run the export again to update it"
+        )
+    export_id = manifest["id"]
+    format = manifest["format"]
+    selected = [
+        table
+        for table in copy_tables(tables)
+        if table.name in manifest["tables"]
+    ]
+    for table in selected:
+        if not manifest["tables"][table.name]["done"]:
+            raise ValueError(
+                f"Export of {table.name} is incomplete; "
+                "run the export again to finish it"
+            )
+    if mode == "truncate":
+        _check_truncatable(selected)
+
+    progress = IMPORT_PROGRESS.c
+    imported: dict[str, int] = {}
+    with engine.connect() as connection:
+        with connection.begin():
+            IMPORT_PROGRESS.create(connection, checkfirst=True)
+            committed = dict(
+                connection.execute(
+                    select(progress.table_name, progress.chunks).where(
+                        progress.export_id == export_id
+                    )
+                ).all()
+            )
+            _prepare_target(
+                connection,
+                [table for table in selected if table.name not in committed],
+                mode,
+            )
+
+        for table in selected:
+            entry = manifest["tables"][table.name]
+            columns = ", ".join(f'"{name}"' for name in entry["columns"])
+            imported[table.name] = 0
+            start = committed.get(table.name, 0)
+            for number, chunk in enumerate(entry["chunks"][start:], start):
+                with connection.begin():
+                    with open(directory / chunk["file"], "rb") as file:
+                        if mode == "upsert":
+                            _upsert_chunk(
+                                connection,
+                                table,
+                                entry["columns"],
+                                format,
+                                file,
+                            )
+                        else:
+                            _copy_in(
+                                connection,
+                                f'COPY "{table.name}" ({columns}) '
+                                f"FROM STDIN WITH (FORMAT {format})",
+                                file,
+                            )
+                    connection.execute(
+                        insert(IMPORT_PROGRESS)
+                        .values(
+                            export_id=export_id,
+                            table_name=table.name,
+                            chunks=number + 1,
+                        )
+                        .on_conflict_do_update(
+                            index_elements=[
+                                progress.export_id,
+                                progress.table_name,
+                            ],
+                            set_={"chunks": number + 1},
+                        )
+                    )
+                imported[table.name] += chunk["rows"]
+
+        with connection.begin():
+            _reset_sequences(connection, selected)
+            # The session joins this transaction; its commit leaves the
+            # transaction open, so the registry lands with the rest
+            with Session(bind=connection) as session:
+                backfill_node_registry(session)
+            connection.execute(
+                delete(IMPORT_PROGRESS).where(
+                    progress.export_id == export_id,
+                    progress.table_name.in_(
+                        [table.name for table in selected]
+                    ),
+                )
+            )
+
+    return imported
+
+
+__all__ = [
+    "CHUNK_ROWS",
+    "COPY_FORMATS",
+    "DERIVED_TABLES",
+    "IMPORT_MODES",
+    "IMPORT_PROGRESS",
+    "MANIFEST",
+    "copy_tables",
+    "export_tables",
+    "import_tables",
+]
@@ -0,0 +1,364 @@
+"""
+Single-writer queue for SQLite.
+
+SQLite allows one writer at a time per database file. When CLI runs and
+web workers write concurrently, every connection races for that lock,
+backs off inside ``busy_timeout`` and sometimes gives up with "database
+is locked". The queue removes the race instead of waiting it out:
+
+- Writes are callables ``fn(session)`` submitted to an in-process queue
+  and run by one writer thread on one connection.
+- Whatever is queued when the writer becomes free is committed as one
+  transaction (group commit), so a burst of small writes costs one
+  commit and one WAL sync. Each write runs in its own SAVEPOINT, so a
+  write that raises is rolled back alone and the rest of the group
+  still commits.
+- Across processes, writers take an exclusive lock on a lock file
+  (``<database>.write-lock``) before ``BEGIN IMMEDIATE``, so they queue
+  on the lock in turn instead of retrying.
+
+A caller that needs several statements to land atomically, with its
+own control flow in between, borrows the writer's session with
+:meth:`SQLiteWriteQueue.transaction`: the writer pauses inside a
+SAVEPOINT of its current group until the block exits.
+
+Readers stay off this path: in WAL mode they read a snapshot while the
+writer works (see ``SQLiteBackend(single_writer=True)``).
+
+:class:`WriteQueueMetrics` reports queue depth and lock wait time.
+
+Example:
+    >>> from todowrite.storage.sqlite_writer import SQLiteWriteQueue
+    >>>
+    >>> writer = SQLiteWriteQueue(engine, lock_path="todowrite.db.write-lock")
+    >>> future = writer.submit(lambda session: session.add(Task(title="t")))
+    >>> future.result()
+    >>> writer.metrics().max_queue_depth
+    >>> writer.close()
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import IO, TYPE_CHECKING, Any, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import StorageConnectionError
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process queueing only
+    fcntl = None
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+    from sqlalchemy import Connection, Engine
+    from sqlalchemy.engine.interfaces import DBAPIConnection
+    from sqlalchemy.pool import ConnectionPoolEntry
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Most writes committed together in one transaction
+MAX_GROUP_SIZE = 256
+
+
+@dataclass
+class WriteQueueMetrics:
+    """Counters of a :class:`SQLiteWriteQueue`.
+
+    Attributes:
+        queue_depth: Writes waiting for the writer now
+        max_queue_depth: Highest ``queue_depth`` seen
+        writes: Writes run (committed or failed)
+        failed_writes: Writes that raised and were rolled back
+        commits: Transactions committed (one per group)
+        lock_waits: Times the writer acquired the write lock
+        lock_wait_seconds: Total time spent waiting for the write lock
+            (lock file and SQLite's own lock)
+        max_lock_wait_seconds: Longest single wait for the write lock
+    """
+
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    writes: int = 0
+    failed_writes: int = 0
+    commits: int = 0
+    lock_waits: int = 0
+    lock_wait_seconds: float = 0.0
+    max_lock_wait_seconds: float = 0.0
+
+    @property
+    def writes_per_commit(self) -> float:
+        """Average group size; above 1 when group commit is paying off."""
+        return self.writes / self.commits if self.commits else 0.0
+
+
+@dataclass
+class _Write:
+    fn: Callable[[Session], Any]
+    future: Future
+
+
+class _TransactionAborted(Exception):
+    """Raised on the writer thread to roll back a borrowed transaction.
+
+    The caller's own exception stays on the caller's thread: re-raising a
+    ``KeyboardInterrupt`` or ``SystemExit`` on the writer would stop it.
+    """
+
+
+def _begin_immediate(engine: Engine) -> None:
+    """Take SQLite's write lock when a transaction starts, not on the
+    first write, so waiting happens up front and never mid-transaction.
+
+    pysqlite's own transaction handling is switched off so that
+    ``BEGIN`` and SAVEPOINTs are issued exactly as SQLAlchemy asks.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _no_implicit_begin(
+        dbapi_connection: DBAPIConnection, record: ConnectionPoolEntry
+    ) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection: Connection) -> None:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+class SQLiteWriteQueue:
+    """
+    Funnel writes through one connection on one writer thread.
+
+    Args:
+        engine: Engine for the database file; the queue uses one of its
+            connections and disposes of it on :meth:`close`
+        lock_path: Lock file shared with writers in other processes
+            (None: serialize within this process only)
+        max_group_size: Most writes committed in one transaction
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        lock_path: str | Path | None = None,
+        max_group_size: int = MAX_GROUP_SIZE,
+    ) -> None:
+        if max_group_size < 1:
+            raise ValueError("max_group_size must be at least 1")
+        _begin_immediate(engine)
+        self.engine = engine
+        self.max_group_size = max_group_size
+        self._queue: queue.Queue[_Write | None] = queue.Queue()
+        self._metrics = WriteQueueMetrics()
+        self._metrics_lock = threading.Lock()
+        self._closed = False
+        self._lending = threading.local()
+        self._lock_file: IO[str] | None = None
+        if lock_path is not None and fcntl is not None:
+            self._lock_file = open(lock_path, "a")  # noqa: SIM115
+        self._thread = threading.Thread(
+            target=self._run, name="todowrite-sqlite-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, fn: Callable[[Session], T]) -> Future[T]:
+        """
+        Queue a write.
+
+        ``fn`` receives the writer's session and must not commit or roll
+        back; its return value resolves the future once the group it ran
+        in has committed. Objects it returns stay loaded after commit.
+
+        Raises:
+            StorageConnectionError: If the queue is closed
+            RuntimeError: If called from a write (it would wait on itself)
+        """
+        if self._closed:
+            raise StorageConnectionError("SQLite write queue is closed")
+        if threading.current_thread() is self._thread or getattr(
+            self._lending, "active", False
+        ):
+            raise RuntimeError("Cannot queue a write from inside a write")
+        future: Future[T] = Future()
+        with self._metrics_lock:
+            self._metrics.queue_depth += 1
+            self._metrics.max_queue_depth = max(
+                self._metrics.max_queue_depth, self._metrics.queue_depth
+            )
+        self._queue.put(_Write(fn, future))
+        return future
+
+    def write(self, fn: Callable[[Session], T]) -> T:
+        """Queue a write and wait for its result (see :meth:`submit`)."""
+        return self.submit(fn).result()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Session]:
+        """
+        Borrow the writer's session for a block of work.
+
+        The block runs on the calling thread while the writer waits; its
+        changes commit with the writer's group when the block exits, and
+        an exception rolls them back and is re-raised.
+
+        Raises:
+            StorageConnectionError: If the queue is closed
+            OperationalError: If the writer cannot open the connection or
+                take the write lock
+            RuntimeError: If called from a write or another transaction
+        """
+        lent: Future[Session] = Future()
+        finished = threading.Event()
+        failed: list[BaseException] = []
+
+        def lend(session: Session) -> None:
+            lent.set_result(session)
+            finished.wait()
+            if failed:
+                raise _TransactionAborted  # roll the savepoint back
+
+        def fail_lent(done: Future[None]) -> None:
+            # The group failed before reaching ``lend`` (connect, BEGIN)
+            if not lent.done() and done.exception() is not None:
+                lent.set_exception(done.exception())
+
+        future = self.submit(lend)
+        future.add_done_callback(fail_lent)
+        session = lent.result()
+        self._lending.active = True
+        try:
+            yield session
+            session.flush()
+        except BaseException as e:
+            failed.append(e)
+            raise
+        finally:
+            self._lending.active = False
+            finished.set()
+            try:
+                future.result()
+            except BaseException:
+                if not failed:
+                    raise
+
+    def metrics(self) -> WriteQueueMetrics:
+        """A consistent snapshot of the queue's counters."""
+        with self._metrics_lock:
+            return replace(self._metrics)
+
+    def close(self) -> None:
+        """Finish queued writes, stop the writer and dispose the engine."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        if self._lock_file is not None:
+            self._lock_file.close()
+        self.engine.dispose()
+
+    def _run(self) -> None:
+        while True:
+            write = self._queue.get()
+            if write is None:
+                return
+            group = [write]
+            stop = False
+            while len(group) < self.max_group_size:
+                try:
+                    write = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if write is None:
+                    stop = True
+                    break
+                group.append(write)
+            with self._metrics_lock:
+                self._metrics.queue_depth -= len(group)
+            self._commit(group)
+            if stop:
+                return
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Hold the cross-process lock file, if there is one."""
+        if self._lock_file is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _commit(self, group: list[_Write]) -> None:
+        """Run a group of writes in one transaction and resolve them."""
+        results: list[tuple[_Write, Any, BaseException | None]] = []
+        started = time.perf_counter()
+        # BaseException throughout: a write that raises KeyboardInterrupt
+        # or SystemExit must fail its future, not kill the writer thread
+        # and leave every caller in the group waiting forever.
+        try:
+            with (
+                self._write_lock(),
+                Session(self.engine, expire_on_commit=False) as session,
+                session.begin(),
+            ):
+                session.connection()  # BEGIN IMMEDIATE
+                self._lock_acquired(time.perf_counter() - started)
+                for write in group:
+                    try:
+                        with session.begin_nested():
+                            result = write.fn(session)
+                    except BaseException as e:
+                        results.append((write, None, e))
+                    else:
+                        results.append((write, result, None))
+        except BaseException as e:
+            logger.exception("SQLite group commit failed")
+            for write in group:
+                write.future.set_exception(e)
+            with self._metrics_lock:
+                self._metrics.writes += len(group)
+                self._metrics.failed_writes += len(group)
+            return
+
+        failed = 0
+        for write, result, error in results:
+            if error is None:
+                write.future.set_result(result)
+            else:
+                failed += 1
+                write.future.set_exception(error)
+        with self._metrics_lock:
+            self._metrics.writes += len(group)
+            self._metrics.failed_writes += failed
+            self._metrics.commits += 1
+
+    def _lock_acquired(self, waited: float) -> None:
+        with self._metrics_lock:
+            self._metrics.lock_waits += 1
+            self._metrics.lock_wait_seconds += waited
+            self._metrics.max_lock_wait_seconds = max(
+                self._metrics.max_lock_wait_seconds, waited
+            )
+
+
+__all__ = [
+    "MAX_GROUP_SIZE",
+    "SQLiteWriteQueue",
+    "WriteQueueMetrics",
+]
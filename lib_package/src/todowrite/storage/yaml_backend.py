@@ -0,0 +1,582 @@
+"""
+YAML plan-directory backend with an in-memory index and a journal.
+
+A plan directory holds one schema-shaped node per file, grouped by
+layer (``configs/plans/tasks/TSK-12.yaml``, the layout ``make tw-init``
+creates and ``tw_validate`` checks). Parsing that tree on every call
+would cost a full scan per lookup, so the backend reads it once on
+:meth:`YAMLBackend.connect` into memory, indexed by node ID, by layer
+and by parent:
+
+- :meth:`~YAMLBackend.get_many`, :meth:`~YAMLBackend.children` and
+  :meth:`~YAMLBackend.parents` are dictionary lookups, O(1) per node.
+- ``links.parents`` is the source of truth for the hierarchy; the
+  ``links.children`` of a returned node are filled in from the parent
+  index, so the two never disagree.
+
+Changes are never written into the canonical files directly. Each batch
+(:meth:`~YAMLBackend.save_many`, :meth:`~YAMLBackend.delete_many` or a
+:meth:`~YAMLBackend.transaction`) is appended to the journal as one new
+file in ``.journal/``, written to a temporary name, synced and renamed,
+so a batch is either fully on disk or absent. On startup the journal is
+replayed over the canonical files.
+
+Compaction rewrites the canonical files of the nodes changed since the
+last compaction (and removes those of deleted nodes), then drops the
+journal files it covered. It runs on a background thread once
+``compact_after`` journal files have accumulated, and on
+:meth:`~YAMLBackend.disconnect`. Journal operations are idempotent, so
+a compaction interrupted half way is repaired by the next replay.
+
+The backend serves one process at a time.
+
+Example:
+    >>> from todowrite.storage.yaml_backend import YAMLBackend
+    >>>
+    >>> backend = YAMLBackend("configs/plans")
+    >>> backend.connect()
+    >>> goal, task = backend.save_many(
+    ...     [
+    ...         {"layer": "Goal", "title": "Ship"},
+    ...         {"layer": "Task", "title": "Write", "parents": ["GOAL-1"]},
+    ...     ]
+    ... )
+    >>> backend.children("GOAL-1")
+    ['TSK-1']
+    >>> backend.disconnect()  # compacts the journal into the YAML files
+"""
+
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import yaml
+
+from ..core.export import LAYER_PREFIXES
+from . import StorageConnectionError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# libyaml's parser and emitter when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Layer -> directory of its node files (as created by ``make tw-init``)
+LAYER_DIRECTORIES = {
+    "Goal": "goals",
+    "Concept": "concepts",
+    "Context": "contexts",
+    "Constraints": "constraints",
+    "Requirements": "requirements",
+    "AcceptanceCriteria": "acceptance_criteria",
+    "InterfaceContract": "interface_contracts",
+    "Phase": "phases",
+    "Step": "steps",
+    "Task": "tasks",
+    "SubTask": "subtasks",
+    "Command": "commands",
+}
+
+JOURNAL_DIRECTORY = ".journal"
+
+# Journal files that trigger a background compaction
+COMPACT_AFTER = 100
+
+_PREFIX_LAYERS = {prefix: layer for layer, prefix in LAYER_PREFIXES.items()}
+_LAYER_NAMES = {layer.lower(): layer for layer in LAYER_PREFIXES}
+_NUMBERED_ID = re.compile(r"^([A-Z]+)-(\d+)$")
+
+
+def _layer_of(node_id: str) -> str:
+    """Layer named by a node ID's prefix."""
+    prefix = node_id.split("-", 1)[0]
+    if prefix not in _PREFIX_LAYERS:
+        raise ValueError(f"Unknown node ID prefix: {node_id}")
+    return _PREFIX_LAYERS[prefix]
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Write a file so that readers see the old or the new content."""
+    partial = path.with_name(f".{path.name}.part")
+    with open(partial, "w", encoding="utf-8") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(partial, path)
+
+
+def _dump(data: object) -> str:
+    return yaml.dump(
+        data, Dumper=_YAML_DUMPER, sort_keys=False, allow_unicode=True
+    )
+
+
+class YAMLTransaction:
+    """Changes staged by :meth:`YAMLBackend.transaction`."""
+
+    def __init__(self, backend: YAMLBackend) -> None:
+        self._backend = backend
+        self.operations: list[dict[str, Any]] = []
+        self._staged: dict[str, dict[str, Any] | None] = {}
+
+    def save(self, node: dict[str, Any]) -> str:
+        """Stage a node to create or replace; returns its ID."""
+        stored = self._backend._prepare(node, self)
+        self.operations.append({"put": stored})
+        self._staged[stored["id"]] = stored
+        return stored["id"]
+
+    def delete(self, node_id: str) -> None:
+        """Stage a node deletion."""
+        self.operations.append({"delete": node_id})
+        self._staged[node_id] = None
+
+    def staged(self, node_id: str) -> dict[str, Any] | None:
+        """The node as this transaction leaves it (None: absent)."""
+        if node_id in self._staged:
+            return self._staged[node_id]
+        return self._backend._nodes.get(node_id)
+
+
+class YAMLBackend:
+    """
+    Plan directory storage with an in-memory index and a journal.
+
+    Nodes are ToDoWrite schema documents (``id``, ``layer``, ``title``,
+    ``description``, ``metadata``, ``links``, and ``command`` for
+    Command nodes).
+
+    Args:
+        directory: Plan directory (created on first write if missing)
+        compact_after: Journal files that trigger background compaction
+    """
+
+    backend_name = "yaml"
+
+    def __init__(
+        self, directory: str | Path, compact_after: int = COMPACT_AFTER
+    ) -> None:
+        if compact_after < 1:
+            raise ValueError("compact_after must be at least 1")
+        self.directory = Path(directory)
+        self.journal_directory = self.directory / JOURNAL_DIRECTORY
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._compacting = threading.Lock()
+        self._compactor: threading.Thread | None = None
+        self._connected = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self._nodes: dict[str, dict[str, Any]] = {}
+        self._layers: dict[str, dict[str, None]] = {
+            layer: {} for layer in LAYER_PREFIXES
+        }
+        self._children: dict[str, dict[str, None]] = {}
+        self._next_number: dict[str, int] = {}
+        self._dirty: set[str] = set()
+        self._journal: list[Path] = []
+        self._sequence = 0
+        self.load_seconds = 0.0
+
+    def connect(self) -> None:
+        """Load the plan directory and replay the journal into memory.
+
+        Raises:
+            StorageConnectionError: If a file cannot be read or parsed
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._reset()
+            try:
+                listed: dict[str, list[str]] = {}
+                for layer, name in LAYER_DIRECTORIES.items():
+                    for path in sorted((self.directory / name).glob("*.yaml")):
+                        node = yaml.load(
+                            path.read_text(encoding="utf-8"),
+                            Loader=_YAML_LOADER,  # noqa: S506 - safe loader
+                        )
+                        listed[node["id"]] = self._load_node(node, layer, path)
+                self._link_listed_children(listed)
+                self._replay_journal()
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                self._reset()
+                raise StorageConnectionError(
+                    f"Failed to load YAML plans from {self.directory}: {e}"
+                ) from e
+            self._connected = True
+            self.load_seconds = time.perf_counter() - started
+        logger.info(
+            "Loaded %d YAML nodes from %s in %.3fs",
+            len(self._nodes),
+            self.directory,
+            self.load_seconds,
+        )
+
+    def _load_node(self, node: object, layer: str, path: Path) -> list[str]:
+        """Index a node read from a file; returns its listed children."""
+        if not isinstance(node, dict) or "id" not in node:
+            raise ValueError(f"{path} is not a node document")
+        if _layer_of(node["id"]) != layer:
+            raise ValueError(f"{path} holds a node of another layer")
+        node.setdefault("layer", layer)
+        node.setdefault("description", "")
+        links = node.setdefault("links", {})
+        links.setdefault("parents", [])
+        children = links.pop("children", None) or []
+        self._index(node)
+        return children
+
+    def _link_listed_children(self, listed: dict[str, list[str]]) -> None:
+        """Turn ``links.children`` of loaded files into parent links."""
+        for parent_id, children in listed.items():
+            for child_id in children:
+                child = self._nodes.get(child_id)
+                if child is None:
+                    continue
+                parents = child["links"]["parents"]
+                if parent_id not in parents:
+                    parents.append(parent_id)
+                    self._children.setdefault(parent_id, {})[child_id] = None
+
+    def _replay_journal(self) -> None:
+        if not self.journal_directory.is_dir():
+            return
+        for path in sorted(self.journal_directory.glob("*.yaml")):
+            operations = yaml.load(
+                path.read_text(encoding="utf-8"),
+                Loader=_YAML_LOADER,  # noqa: S506 - safe loader
+            )
+            self._apply(operations or [])
+            self._journal.append(path)
+            self._sequence = max(self._sequence, int(path.stem))
+
+    def _index(self, node: dict[str, Any]) -> None:
+        """Add or replace a node in the indexes."""
+        node_id = node["id"]
+        previous = self._nodes.get(node_id)
+        if previous is not None:
+            for parent_id in previous["links"]["parents"]:
+                self._children.get(parent_id, {}).pop(node_id, None)
+        node["links"].pop("children", None)
+        self._nodes[node_id] = node
+        self._layers[node["layer"]][node_id] = None
+        for parent_id in node["links"]["parents"]:
+            self._children.setdefault(parent_id, {})[node_id] = None
+        match = _NUMBERED_ID.match(node_id)
+        if match:
+            prefix, number = match.group(1), int(match.group(2))
+            self._next_number[prefix] = max(
+                self._next_number.get(prefix, 1), number + 1
+            )
+
+    def _unindex(self, node_id: str) -> None:
+        """Remove a node and every parent link pointing at it."""
+        node = self._nodes.pop(node_id, None)
+        if node is None:
+            return
+        self._layers[node["layer"]].pop(node_id, None)
+        for parent_id in node["links"]["parents"]:
+            self._children.get(parent_id, {}).pop(node_id, None)
+        for child_id in self._children.pop(node_id, {}):
+            parents = self._nodes[child_id]["links"]["parents"]
+            parents.remove(node_id)
+            self._dirty.add(child_id)
+
+    def _apply(self, operations: list[dict[str, Any]]) -> None:
+        """Apply journal operations, marking every file they touch.
+
+        Parents are marked too: their files list ``links.children``.
+        """
+        for operation in operations:
+            node_id = operation.get("delete")
+            if node_id is None:
+                node = copy.deepcopy(operation["put"])
+                node_id = node["id"]
+                self._dirty.update(node["links"]["parents"])
+            previous = self._nodes.get(node_id)
+            if previous is not None:
+                self._dirty.update(previous["links"]["parents"])
+            if "put" in operation:
+                self._index(node)
+            else:
+                self._unindex(node_id)
+            self._dirty.add(node_id)
+
+    def _materialize(self, node: dict[str, Any]) -> dict[str, Any]:
+        """A caller's copy of a node, with ``links.children`` filled in."""
+        document = copy.deepcopy(node)
+        document["links"]["children"] = list(
+            self._children.get(node["id"], {})
+        )
+        return document
+
+    def _prepare(
+        self, node: dict[str, Any], transaction: YAMLTransaction
+    ) -> dict[str, Any]:
+        """Validate a node and give it an ID; returns the stored form."""
+        if not isinstance(node, dict):
+            raise ValueError("A node must be a mapping")
+        node = copy.deepcopy(node)
+        node_id = node.get("id")
+        layer = node.get("layer")
+        if layer is None and node_id is None:
+            raise ValueError("A node needs a layer or an id")
+        if layer is not None:
+            if str(layer).lower() not in _LAYER_NAMES:
+                raise ValueError(f"Unknown layer: {layer}")
+            layer = _LAYER_NAMES[str(layer).lower()]
+        if node_id is None:
+            prefix = LAYER_PREFIXES[layer]
+            with self._lock:
+                number = self._next_number.get(prefix, 1)
+                self._next_number[prefix] = number + 1
+            node_id = f"{prefix}-{number}"
+        elif layer is not None and _layer_of(node_id) != layer:
+            raise ValueError(f"{node_id} is not a {layer} ID")
+        node["id"] = node_id
+        node["layer"] = layer = layer or _layer_of(node_id)
+        if not isinstance(node.get("title"), str) or not node["title"]:
+            raise ValueError(f"{node_id} needs a title")
+        node.setdefault("description", "")
+        if (layer == "Command") != ("command" in node):
+            raise ValueError(
+                f"{node_id}: only Command nodes have a command block"
+            )
+
+        links = node.get("links") or {}
+        parents = node.pop("parents", None)
+        if parents is None:
+            parents = links.get("parents", [])
+        for parent_id in parents:
+            if parent_id == node_id:
+                raise ValueError(f"{node_id} cannot be its own parent")
+            if transaction.staged(parent_id) is None:
+                raise ValueError(f"{node_id}: no parent node {parent_id}")
+        node["links"] = {"parents": list(dict.fromkeys(parents))}
+        return node
+
+    @contextmanager
+    def transaction(self) -> Iterator[YAMLTransaction]:
+        """
+        Stage saves and deletes that are journaled and applied together.
+
+        Nothing is written or indexed if the block raises, and the IDs
+        numbered for its nodes are handed out again.
+
+        Raises:
+            StorageConnectionError: If not connected
+        """
+        if not self._connected:
+            raise StorageConnectionError(
+                "Not connected - call connect() first"
+            )
+        with self._lock:
+            numbers = dict(self._next_number)
+            transaction = YAMLTransaction(self)
+            try:
+                yield transaction
+            except BaseException:
+                self._next_number = numbers
+                raise
+            if transaction.operations:
+                self._append_journal(transaction.operations)
+                self._apply(transaction.operations)
+        self._maybe_compact()
+
+    def _append_journal(self, operations: list[dict[str, Any]]) -> None:
+        self.journal_directory.mkdir(parents=True, exist_ok=True)
+        self._sequence += 1
+        path = self.journal_directory / f"{self._sequence:010d}.yaml"
+        _write_atomic(path, _dump(operations))
+        self._journal.append(path)
+
+    def save_many(
+        self, nodes: Iterable[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """
+        Create or replace nodes as one journaled batch.
+
+        Nodes without an ``id`` are numbered per layer (``TSK-7``).
+        Parents go in ``links.parents`` (or a top-level ``parents``
+        list) and may be nodes of the same batch listed earlier.
+
+        Returns:
+            The saved nodes, with IDs and ``links.children``
+
+        Raises:
+            ValueError: If a node is invalid; nothing is saved then
+        """
+        with self.transaction() as transaction:
+            node_ids = [transaction.save(node) for node in nodes]
+        return self.get_many(node_ids)
+
+    def delete_many(self, node_ids: Iterable[str]) -> int:
+        """
+        Delete nodes as one journaled batch.
+
+        Children stay, without the link to a deleted parent.
+
+        Returns:
+            Number of nodes that existed and were deleted
+        """
+        deleted = 0
+        with self.transaction() as transaction:
+            for node_id in dict.fromkeys(node_ids):
+                if transaction.staged(node_id) is not None:
+                    transaction.delete(node_id)
+                    deleted += 1
+        return deleted
+
+    def get(self, node_id: str) -> dict[str, Any] | None:
+        """One node by ID (None if missing)."""
+        with self._lock:
+            node = self._nodes.get(node_id)
+            return None if node is None else self._materialize(node)
+
+    def get_many(
+        self, node_ids: Iterable[str]
+    ) -> list[dict[str, Any] | None]:
+        """Nodes by ID, in the order asked for (None where missing)."""
+        with self._lock:
+            return [
+                None if node is None else self._materialize(node)
+                for node in map(self._nodes.get, node_ids)
+            ]
+
+    def children(self, node_id: str) -> list[str]:
+        """IDs of a node's children."""
+        with self._lock:
+            return list(self._children.get(node_id, {}))
+
+    def parents(self, node_id: str) -> list[str]:
+        """IDs of a node's parents."""
+        with self._lock:
+            node = self._nodes.get(node_id)
+            return [] if node is None else list(node["links"]["parents"])
+
+    def layer_ids(self, layer: str) -> list[str]:
+        """IDs of a layer's nodes, in load and creation order."""
+        if layer not in self._layers:
+            raise ValueError(f"Unknown layer: {layer}")
+        with self._lock:
+            return list(self._layers[layer])
+
+    def iter_layer(
+        self, layer: str, batch_size: int = 1000
+    ) -> Iterator[dict[str, Any]]:
+        """Yield a layer's nodes, copying ``batch_size`` at a time.
+
+        Raises:
+            ValueError: If the layer is unknown
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        return self._iter_layer(self.layer_ids(layer), batch_size)
+
+    def _iter_layer(
+        self, node_ids: list[str], batch_size: int
+    ) -> Iterator[dict[str, Any]]:
+        for start in range(0, len(node_ids), batch_size):
+            yield from (
+                node
+                for node in self.get_many(node_ids[start : start + batch_size])
+                if node is not None
+            )
+
+    def _maybe_compact(self) -> None:
+        if len(self._journal) < self.compact_after:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(
+            target=self.compact, name="todowrite-yaml-compactor", daemon=True
+        )
+        self._compactor.start()
+
+    def compact(self) -> int:
+        """
+        Rewrite changed canonical files and drop the journal they cover.
+
+        Returns:
+            Number of canonical files written or removed
+        """
+        with self._compacting:
+            with self._lock:
+                journal, self._journal = self._journal, []
+                dirty, self._dirty = self._dirty, set()
+                snapshot = {
+                    node_id: (
+                        None
+                        if node_id not in self._nodes
+                        else self._materialize(self._nodes[node_id])
+                    )
+                    for node_id in dirty
+                }
+
+            for node_id, node in snapshot.items():
+                path = (
+                    self.directory
+                    / LAYER_DIRECTORIES[_layer_of(node_id)]
+                    / f"{node_id}.yaml"
+                )
+                if node is None:
+                    path.unlink(missing_ok=True)
+                else:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    _write_atomic(path, _dump(node))
+            for path in journal:
+                path.unlink(missing_ok=True)
+
+        if snapshot:
+            logger.info(
+                "Compacted %d YAML nodes and %d journal files",
+                len(snapshot),
+                len(journal),
+            )
+        return len(snapshot)
+
+    def stats(self) -> dict[str, Any]:
+        """Node count, pending journal files and the last load time."""
+        with self._lock:
+            return {
+                "nodes": len(self._nodes),
+                "journal_files": len(self._journal),
+                "dirty_nodes": len(self._dirty),
+                "load_seconds": self.load_seconds,
+            }
+
+    def disconnect(self) -> None:
+        """Compact everything and drop the in-memory store."""
+        if not self._connected:
+            return
+        if self._compactor is not None:
+            self._compactor.join()
+        self.compact()
+        with self._lock:
+            self._connected = False
+            self._reset()
+
+    def test_connection(self) -> bool:
+        """Whether the plan directory is loaded."""
+        return self._connected
+
+
+__all__ = [
+    "COMPACT_AFTER",
+    "JOURNAL_DIRECTORY",
+    "LAYER_DIRECTORIES",
+    "YAMLBackend",
+    "YAMLTransaction",
+]
@@ -152,3 +152,18 @@ def sample_node_data() -> dict[str, Any]:
         },
         "links": {"parents": [], "children": []},
     }
+
+
+def pytest_terminal_summary(terminalreporter: Any) -> None:
+    """Report the figures benchmark tests recorded with record_property."""
+    reports = [
+        report
+        for report in terminalreporter.getreports("passed")
+        if "benchmark" in report.keywords and report.user_properties
+    ]
+    if not reports:
+        return
+    terminalreporter.section("benchmarks")
+    for report in reports:
+        for name, value in report.user_properties:
+            terminalreporter.write_line(f"{report.nodeid}: {name} = {value}")
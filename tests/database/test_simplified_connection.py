@@ -11,11 +11,13 @@ from __future__ import annotations
 import tempfile
 from pathlib import Path
 
+import pytest
 from todowrite.database.config import (
     StorageType,
     check_postgresql_connection,
     check_sqlite_connection,
     determine_storage_backend,
+    get_pool_settings,
     get_postgresql_candidates,
     get_sqlite_candidates,
 )
@@ -307,3 +309,36 @@ class TestRealDatabaseBehavior:
                     text("SELECT name FROM test_table WHERE name = 'test'")
                 ).fetchone()
                 assert result[0] == "test"
+
+
+class TestPoolSettings:
+    """Test connection pool settings read from the environment."""
+
+    def test_defaults_and_overrides(self, monkeypatch) -> None:
+        """Unset variables fall back to defaults; set ones are parsed."""
+        for variable in (
+            "TODOWRITE_DB_POOL_SIZE",
+            "TODOWRITE_DB_MAX_OVERFLOW",
+            "TODOWRITE_DB_POOL_TIMEOUT",
+            "TODOWRITE_DB_POOL_RECYCLE",
+        ):
+            monkeypatch.delenv(variable, raising=False)
+        assert get_pool_settings() == {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_timeout": 30.0,
+            "pool_recycle": 1800,
+        }
+
+        monkeypatch.setenv("TODOWRITE_DB_POOL_SIZE", "4")
+        monkeypatch.setenv("TODOWRITE_DB_POOL_TIMEOUT", "2.5")
+        settings = get_pool_settings()
+        assert settings["pool_size"] == 4
+        assert settings["pool_timeout"] == 2.5
+
+    def test_invalid_value_is_rejected(self, monkeypatch) -> None:
+        """A non-numeric setting names the offending variable."""
+        monkeypatch.setenv("TODOWRITE_DB_MAX_OVERFLOW", "lots")
+
+        with pytest.raises(ValueError, match="TODOWRITE_DB_MAX_OVERFLOW"):
+            get_pool_settings()
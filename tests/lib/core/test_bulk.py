@@ -0,0 +1,217 @@
+"""Bulk Create/Upsert Tests
+
+Tests that bulk writes assign ids in input order, attach labels and parent
+links in the same batch, keep the node registry, closure table and count
+cache in step with what per-row ORM writes would produce, update matched
+rows on upsert, resolve file-local refs on import, and reject bad input
+without writing anything.
+"""
+
+from __future__ import annotations
+
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from todowrite.core.bulk import bulk_create, bulk_upsert, import_items
+from todowrite.core.counts import count_items
+from todowrite.core.hierarchy import ancestors, descendants, rebuild_closure
+from todowrite.core.models import (
+    Base,
+    Goal,
+    Label,
+    NodeClosure,
+    Phase,
+    Step,
+    Task,
+)
+from todowrite.core.node_registry import get_node_id
+from todowrite.core.sequence_manager import SequenceManager
+
+
+class TestBulk:
+    """Test bulk create, upsert and import."""
+
+    @pytest.fixture
+    def session(self):
+        """Create a session on a fresh temporary database."""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as temp_file:
+            engine = create_engine(f"sqlite:///{temp_file.name}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+        engine.dispose()
+
+    @staticmethod
+    def closure_rows(session):
+        """Snapshot of the closure table."""
+        return sorted(session.execute(select(NodeClosure.__table__)).all())
+
+    def test_create_with_labels_and_parents(self, session):
+        """Rows, labels, parent links and closure rows land in one call."""
+        goal = Goal(title="Goal")
+        phase = Phase(title="Phase")
+        step = Step(title="Step")
+        goal.phases.append(phase)
+        phase.steps.append(step)
+        session.add_all([goal, Label(name="existing")])
+        session.commit()
+
+        result = bulk_create(
+            session,
+            "Task",
+            [
+                {
+                    "title": f"Task {i}",
+                    "labels": ["existing", "new"] if i % 2 else [],
+                    "parents": ["Goal-1", get_node_id(session, step)],
+                    "extra_data": {"n": i},
+                }
+                for i in range(25)
+            ],
+            batch_size=10,
+        )
+
+        assert result.ids == list(range(1, 26))
+        assert (result.created, result.updated) == (25, 0)
+        assert (result.labels, result.links) == (24, 50)
+        assert result.rows_per_second > 0
+
+        session.expire_all()
+        task = session.get(Task, 2)
+        assert task.title == "Task 1"
+        assert task.extra_data == '{"n": 1}'
+        assert task.created_at is not None
+        assert sorted(label.name for label in task.labels) == ["existing", "new"]
+        assert session.query(Label).count() == 2
+        assert get_node_id(session, task) is not None
+
+        assert ancestors(session, task) == [goal, phase, step]
+        assert len(descendants(session, goal, layer="Task")) == 25
+        maintained = self.closure_rows(session)
+        rebuild_closure(session)
+        assert self.closure_rows(session) == maintained
+
+        # Later ORM writes pick up after the reserved ids
+        session.add(Task(title="After"))
+        session.commit()
+        assert session.query(Task).filter_by(title="After").one().id == 26
+        assert count_items(session).layers["Task"] == 26
+
+    def test_ids_come_from_the_sequence_manager(self, session, monkeypatch):
+        """Each batch draws its ids from the engine's hi/lo allocator."""
+        calls = []
+        allocate_ids = SequenceManager.allocate_ids
+
+        def spy(manager, table_name, count=1, connection=None):
+            calls.append((table_name, count))
+            return allocate_ids(manager, table_name, count, connection)
+
+        monkeypatch.setattr(SequenceManager, "allocate_ids", spy)
+        result = bulk_create(
+            session, "Goal", [{"title": str(i)} for i in range(5)], batch_size=2
+        )
+
+        assert calls == [("goals", 2), ("goals", 2), ("goals", 1)]
+        assert result.ids == [1, 2, 3, 4, 5]
+
+    def test_upsert_updates_matched_rows(self, session):
+        """Matched ids are updated, others created, existing links kept."""
+        bulk_create(
+            session,
+            "Task",
+            [{"title": "a", "labels": ["x"]}, {"title": "b"}],
+        )
+        session.add(Goal(title="Goal"))
+        session.commit()
+
+        result = bulk_upsert(
+            session,
+            "Task",
+            [
+                {"id": 2, "status": "done", "labels": ["x"]},
+                {"title": "c"},
+                {"id": 1, "title": "a2", "labels": ["x", "y"]},
+                {"id": 2, "parents": ["Goal-1"]},
+            ],
+        )
+
+        assert result.ids == [2, 3, 1, 2]
+        assert (result.created, result.updated) == (1, 3)
+        assert (result.labels, result.links) == (2, 1)
+
+        session.expire_all()
+        first, second = session.get(Task, 1), session.get(Task, 2)
+        assert first.title == "a2"
+        assert sorted(label.name for label in first.labels) == ["x", "y"]
+        assert second.title == "b"
+        assert second.status == "done"
+        assert descendants(session, "Goal-1") == [second]
+        assert count_items(session).statuses["Task"] == {
+            "planned": 2,
+            "done": 1,
+        }
+
+    def test_import_resolves_refs_across_layers(self, session):
+        """Items listed out of order link to each other through refs."""
+        results = import_items(
+            session,
+            [
+                {"layer": "task", "title": "T", "parents": ["s", "g"]},
+                {"layer": "Step", "title": "S", "ref": "s", "parents": ["p"]},
+                {"layer": "Phase", "title": "P", "ref": "p", "parents": ["g"]},
+                {"layer": "goal", "title": "G", "ref": "g"},
+                {"layer": "label", "name": "l"},
+            ],
+        )
+
+        assert [r.layer for r in results] == [
+            "Label",
+            "Goal",
+            "Phase",
+            "Step",
+            "Task",
+        ]
+        task = session.query(Task).one()
+        titles = [node.title for node in ancestors(session, task)]
+        assert titles == ["G", "P", "S"]
+
+        results = import_items(
+            session,
+            [{"layer": "label", "name": "l"}, {"layer": "label", "name": "m"}],
+            upsert=True,
+        )
+        assert (results[0].created, results[0].updated) == (1, 1)
+        assert results[0].ids == [1, 2]
+        assert session.query(Label).count() == 2
+
+    @pytest.mark.parametrize(
+        ("layer", "rows", "message"),
+        [
+            ("Nope", [{"title": "t"}], "Unknown layer"),
+            ("Task", [{"title": "t", "bogus": 1}], "Unknown Task field"),
+            ("Task", [{"title": "t", "id": 5}], "assigns ids"),
+            ("Task", [{"title": "t", "parents": ["Goal-9"]}], "Goal-9"),
+            ("Goal", [{"title": "t", "parents": ["Task-1"]}], "cannot parent"),
+        ],
+    )
+    def test_invalid_rows_write_nothing(self, session, layer, rows, message):
+        """Bad layers, fields, ids and parents raise before committing."""
+        session.add(Task(title="existing"))
+        session.commit()
+
+        with pytest.raises(ValueError, match=message):
+            bulk_create(session, layer, [{"title": "ok"}, *rows])
+        session.rollback()
+
+        assert session.query(Task).count() == 1
+        assert session.query(Goal).count() == 0
+
+    def test_upsert_rejects_unknown_ids_and_keys(self, session):
+        """Upserts need a unique key, and ids must already exist."""
+        with pytest.raises(ValueError, match="not a unique column"):
+            bulk_upsert(session, "Task", [{"title": "t"}], key="title")
+        with pytest.raises(ValueError, match="No Task with id 99"):
+            bulk_upsert(session, "Task", [{"id": 99, "title": "t"}])
@@ -0,0 +1,97 @@
+"""Columnar Export Tests
+
+Tests that layer tables, hierarchy edges and item labels are written to
+Parquet and Arrow IPC files with typed columns (dictionary-encoded
+statuses, native UTC timestamps), across several record batches.
+"""
+
+from __future__ import annotations
+
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from todowrite.core.bulk import bulk_create
+from todowrite.core.columnar import export_columnar
+from todowrite.core.models import Base, Goal
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.ipc  # noqa: E402
+import pyarrow.parquet  # noqa: E402
+
+
+class TestColumnarExport:
+    """Test the Parquet/Arrow export."""
+
+    @pytest.fixture
+    def session(self):
+        """A goal with ten labelled child tasks in mixed statuses."""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as temp_file:
+            engine = create_engine(f"sqlite:///{temp_file.name}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add(Goal(title="Goal"))
+        session.commit()
+        bulk_create(
+            session,
+            "Task",
+            [
+                {
+                    "title": f"Task {i}",
+                    # "blocked" first shows up in a later batch
+                    "status": "blocked" if i == 9 else ("done", "planned")[i % 2],
+                    "labels": ["x"],
+                    "parents": ["Goal-1"],
+                }
+                for i in range(10)
+            ],
+        )
+        yield session
+        session.close()
+        engine.dispose()
+
+    @staticmethod
+    def read(path, export_format):
+        """Load one exported file as a table."""
+        if export_format == "parquet":
+            return pyarrow.parquet.read_table(path)
+        with pyarrow.ipc.open_file(path) as reader:
+            return reader.read_all()
+
+    @pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+    def test_typed_files(self, session, tmp_path, export_format):
+        """Every file round-trips with the expected column types."""
+        rows = export_columnar(
+            session, tmp_path, format=export_format, batch_size=4
+        )
+        assert rows["tasks"] == 10
+        assert rows["goals"] == 1
+        assert rows["edges"] == 10
+        assert rows["item_labels"] == 10
+        assert rows["commands"] == 0
+
+        tasks = self.read(tmp_path / f"tasks.{export_format}", export_format)
+        schema = tasks.schema
+        assert pa.types.is_dictionary(schema.field("status").type)
+        assert schema.field("created_at").type == pa.timestamp("us", tz="UTC")
+        assert schema.field("id").type == pa.int64()
+        assert tasks.column("status").to_pylist() == [
+            *(("done", "planned") * 4),
+            "done",
+            "blocked",
+        ]
+        assert tasks.column("title").to_pylist()[0] == "Task 0"
+
+        edges = self.read(tmp_path / f"edges.{export_format}", export_format)
+        assert set(edges.column("parent_layer").to_pylist()) == {"Goal"}
+        assert sorted(edges.column("child_id").to_pylist()) == list(range(1, 11))
+
+        empty = self.read(tmp_path / f"commands.{export_format}", export_format)
+        assert empty.num_rows == 0
+        assert "cmd" in empty.schema.names
+
+    def test_rejects_unknown_format(self, session, tmp_path):
+        """Only parquet and arrow are accepted."""
+        with pytest.raises(ValueError, match="Unknown columnar format"):
+            export_columnar(session, tmp_path, format="csv")
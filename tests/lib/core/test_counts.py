@@ -0,0 +1,164 @@
+"""Item Count Tests
+
+Tests the grouped per-layer/per-status counts: one query for all layers,
+cache reuse, invalidation by ORM commits and by writes from another
+connection (SQLite data_version), closing the watcher connection with
+the engine, and the optional trigger-maintained counters table, whose
+presence is re-checked when another process adds or drops it.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from todowrite.core.counts import (
+    _cache_for,
+    count_items,
+    count_tables,
+    counters_enabled,
+    disable_counters,
+    enable_counters,
+    query_counts,
+)
+from todowrite.core.models import Base, Goal, Label, Task
+
+
+class TestCounts:
+    """Test cached item counts."""
+
+    @pytest.fixture
+    def engine(self):
+        """Create a fresh temporary database."""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as temp_file:
+            engine = create_engine(f"sqlite:///{temp_file.name}")
+        Base.metadata.create_all(engine)
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def session(self, engine):
+        """Session with a few items in three layers."""
+        session = sessionmaker(bind=engine)()
+        session.add_all(
+            [
+                Task(title="a"),
+                Task(title="b", status="done"),
+                Goal(title="g"),
+                Label(name="l"),
+            ]
+        )
+        session.commit()
+        yield session
+        session.close()
+
+    @staticmethod
+    def count_statements(engine):
+        """Record how many statements the engine executes."""
+        statements = []
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        return statements
+
+    def test_single_query_counts(self, engine, session):
+        """Per-layer and per-status counts come from one statement."""
+        assert not counters_enabled(session)  # probed once per transaction
+        statements = self.count_statements(engine)
+        counts = count_items(session, use_cache=False)
+
+        assert counts.layers["Task"] == 2
+        assert counts.layers["Label"] == 1
+        assert counts.layers["Command"] == 0
+        assert counts.statuses["Task"] == {"planned": 1, "done": 1}
+        assert counts.statuses["Label"] == {None: 1}
+        assert counts.total == 4
+        assert len(statements) == 1
+
+    def test_cache_and_commit_invalidation(self, engine, session):
+        """Repeat reads are free until a commit changes layer rows."""
+        first = count_items(session)
+        statements = self.count_statements(engine)
+        assert count_items(session) is first
+        assert statements == []
+
+        session.get(Task, 1).status = "done"
+        session.flush()
+        # Uncommitted changes are visible to their own session only
+        assert count_items(session).statuses["Task"] == {"done": 2}
+        session.commit()
+
+        assert count_items(session).statuses["Task"] == {"done": 2}
+        assert count_items(session) is count_items(session)
+
+    def test_other_connection_write_invalidates(self, engine, session):
+        """A commit from outside SQLAlchemy is caught by data_version."""
+        assert count_items(session).layers["Label"] == 1
+
+        raw = sqlite3.connect(engine.url.database)
+        raw.execute("INSERT INTO labels (name) VALUES ('raw')")
+        raw.commit()
+        raw.close()
+
+        assert count_items(session).layers["Label"] == 2
+
+    def test_counters_table_follows_writes(self, engine, session):
+        """The maintained table tracks inserts, deletes and status changes."""
+        assert not counters_enabled(session)
+        grouped = query_counts(session)
+        assert enable_counters(session) == grouped
+        assert counters_enabled(session)
+
+        session.add(Task(title="c"))
+        session.get(Task, 2).status = "blocked"
+        session.delete(session.get(Goal, 1))
+        session.commit()
+
+        counts = count_items(session)
+        assert counts.statuses["Task"] == {"planned": 2, "blocked": 1}
+        assert counts.layers["Goal"] == 0
+
+        disable_counters(session)
+        assert not counters_enabled(session)
+        assert count_items(session, use_cache=False) == counts
+
+    def test_dispose_closes_watcher(self, engine, session):
+        """The data_version connection does not outlive the engine pool."""
+        count_items(session)
+        watcher = _cache_for(engine).watcher
+        session.close()
+        engine.dispose()
+
+        with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+            watcher.execute("PRAGMA data_version")
+        # A disposed engine can still be used; it gets a new watcher
+        with sessionmaker(bind=engine)() as fresh:
+            assert count_items(fresh).layers["Task"] == 2
+        assert _cache_for(engine).watcher is not watcher
+
+    def test_counters_toggled_elsewhere(self, engine, session):
+        """Another process enabling or dropping counters is noticed."""
+        other = sessionmaker(bind=create_engine(engine.url))()
+        assert count_items(session).layers["Task"] == 2
+        session.commit()
+
+        enable_counters(other)
+        assert counters_enabled(session)
+        session.commit()
+
+        disable_counters(other)
+        assert count_items(session).layers["Task"] == 2
+        assert not counters_enabled(session)
+        other.close()
+        other.get_bind().dispose()
+
+    def test_count_tables_reports_missing_as_zero(self, engine, session):
+        """Arbitrary tables are counted together; absent ones count 0."""
+        with engine.connect() as connection:
+            counts = count_tables(connection, ["tasks", "labels", "missing"])
+        assert counts == {"tasks": 2, "labels": 1, "missing": 0}
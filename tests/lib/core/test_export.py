@@ -0,0 +1,175 @@
+"""Streaming Export Tests
+
+Tests that exported nodes validate against the ToDoWrite schema with
+resolved labels, links and command acceptance criteria, that NDJSON and
+YAML output round-trip, that rows are streamed without loading ORM
+objects, and that bad options are rejected.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import tempfile
+from pathlib import Path
+
+import jsonschema
+import pytest
+import yaml
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from todowrite.core.bulk import bulk_create
+from todowrite.core.export import export_nodes, iter_nodes
+from todowrite.core.models import (
+    AcceptanceCriteria,
+    Base,
+    Command,
+    Goal,
+    InterfaceContract,
+    Phase,
+    Step,
+    SubTask,
+    Task,
+)
+
+SCHEMA = json.loads(
+    (
+        Path(__file__).resolve().parents[3]
+        / "configs"
+        / "schemas"
+        / "todowrite.schema.json"
+    ).read_text()
+)
+
+
+class TestExport:
+    """Test the streaming node export."""
+
+    @pytest.fixture
+    def session(self):
+        """A goal with labelled child tasks and a command."""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as temp_file:
+            engine = create_engine(f"sqlite:///{temp_file.name}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add(Goal(title="Goal", owner="alice"))
+        session.commit()
+        bulk_create(
+            session,
+            "Task",
+            [
+                {
+                    "title": f"Task {i}",
+                    "labels": ["b", "a"],
+                    "parents": ["Goal-1"],
+                    "extra_data": {"n": i},
+                }
+                for i in range(5)
+            ],
+        )
+        session.add(
+            Command(
+                title="Run tests",
+                cmd="pytest",
+                cmd_params="-q",
+                runtime_env='{"CI": "1"}',
+                artifacts='["report.xml"]',
+                acceptance_criteria_id=7,
+            )
+        )
+        session.commit()
+        yield session
+        session.close()
+        engine.dispose()
+
+    def test_schema_shape(self, session):
+        """Nodes carry schema IDs, metadata, labels and both link directions."""
+        nodes = {node["id"]: node for node in iter_nodes(session)}
+
+        assert list(nodes) == [
+            "GOAL-1",
+            "TSK-1",
+            "TSK-2",
+            "TSK-3",
+            "TSK-4",
+            "TSK-5",
+            "CMD-1",
+        ]
+        goal, task = nodes["GOAL-1"], nodes["TSK-2"]
+        assert goal["links"] == {
+            "parents": [],
+            "children": ["TSK-1", "TSK-2", "TSK-3", "TSK-4", "TSK-5"],
+        }
+        assert goal["metadata"]["owner"] == "alice"
+        assert goal["description"] == ""
+        assert task["links"] == {"parents": ["GOAL-1"], "children": []}
+        assert task["metadata"]["labels"] == ["a", "b"]
+        assert task["metadata"]["extra_data"] == {"n": 1}
+        assert task["metadata"]["created_at"].endswith("+00:00")
+        assert nodes["CMD-1"]["command"] == {
+            "run": {"shell": "pytest -q", "env": {"CI": "1"}},
+            "ac_ref": "AC-7",
+            "artifacts": ["report.xml"],
+        }
+        assert "cmd" not in nodes["CMD-1"]["metadata"]
+
+    def test_every_node_matches_schema(self, session):
+        """Commands without an acceptance criteria id use the nearest AC."""
+        criteria = AcceptanceCriteria(title="Criteria")
+        contract = InterfaceContract(title="Contract")
+        phase = Phase(title="Phase")
+        step = Step(title="Step")
+        task = Task(title="Task")
+        sub_task = SubTask(title="SubTask")
+        criteria.interface_contracts.append(contract)
+        contract.phases.append(phase)
+        phase.steps.append(step)
+        step.tasks.append(task)
+        task.sub_tasks.append(sub_task)
+        sub_task.commands.append(Command(title="Lint", cmd="ruff"))
+        session.add(criteria)
+        session.commit()
+
+        nodes = list(iter_nodes(session))
+        validator = jsonschema.Draft202012Validator(SCHEMA)
+        for node in nodes:
+            validator.validate(node)
+        assert nodes[-1]["command"]["ac_ref"] == f"AC-{criteria.id}"
+
+    def test_command_without_criteria_fails(self, session):
+        """A command the schema cannot reference an AC for is an error."""
+        session.add(Command(title="Orphan", cmd="true"))
+        session.commit()
+
+        with pytest.raises(ValueError, match="CMD-2 has no acceptance"):
+            list(iter_nodes(session, layers=["Command"]))
+
+    @pytest.mark.parametrize("export_format", ["ndjson", "yaml"])
+    def test_formats_round_trip(self, session, export_format):
+        """Both formats parse back to the streamed documents."""
+        buffer = io.StringIO()
+        written = export_nodes(
+            session, buffer, format=export_format, layers=["task"]
+        )
+
+        if export_format == "ndjson":
+            parsed = [json.loads(line) for line in buffer.getvalue().splitlines()]
+        else:
+            parsed = yaml.safe_load(buffer.getvalue())
+        assert written == 5
+        assert parsed == list(iter_nodes(session, layers=["Task"]))
+
+    def test_streams_without_orm_objects(self, session):
+        """Partitions are read as rows; the identity map stays empty."""
+        session.expunge_all()
+        nodes = iter_nodes(session, layers=["Task"], batch_size=2)
+        next(nodes)
+        assert len(session.identity_map) == 0
+        assert len(list(nodes)) == 4
+
+    def test_rejects_unknown_options(self, session):
+        """Unknown formats and layers raise ValueError."""
+        with pytest.raises(ValueError, match="Unknown export format"):
+            export_nodes(session, io.StringIO(), format="xml")
+        with pytest.raises(ValueError, match="Unknown layer"):
+            export_nodes(session, io.StringIO(), layers=["Label"])
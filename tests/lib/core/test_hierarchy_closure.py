@@ -0,0 +1,208 @@
+"""Hierarchy Closure Table Tests
+
+Tests that the closure table follows hierarchy link changes made through
+the ORM, Core or raw SQL, that subtree/ancestor lookups use it, that a
+rebuild from the join tables reproduces the trigger-maintained state,
+and that the
+recursive subtree query walks the join tables to the requested depth.
+"""
+
+from __future__ import annotations
+
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, delete, event, insert, select, text
+from sqlalchemy.orm import sessionmaker
+from todowrite.core.hierarchy import (
+    TreeEdge,
+    ancestors,
+    descendants,
+    link,
+    rebuild_closure,
+    subtree_edges,
+    unlink,
+)
+from todowrite.core.models import (
+    Base,
+    Command,
+    Goal,
+    NodeClosure,
+    Phase,
+    Step,
+    SubTask,
+    Task,
+    goals_tasks,
+)
+
+
+class TestHierarchyClosure:
+    """Test the hierarchy closure table."""
+
+    @pytest.fixture
+    def session(self):
+        """Create a session on a fresh temporary database."""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as temp_file:
+            engine = create_engine(f"sqlite:///{temp_file.name}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+        engine.dispose()
+
+    @pytest.fixture
+    def tree(self, session):
+        """Goal -> Phase -> Step -> Task -> SubTask -> Command, plus Goal -> Task."""
+        goal = Goal(title="Goal")
+        phase = Phase(title="Phase")
+        step = Step(title="Step")
+        task = Task(title="Task")
+        sub_task = SubTask(title="SubTask")
+        command = Command(title="Command")
+        goal.phases.append(phase)
+        phase.steps.append(step)
+        step.tasks.append(task)
+        task.sub_tasks.append(sub_task)
+        sub_task.commands.append(command)
+        goal.tasks.append(task)
+        session.add(goal)
+        session.commit()
+        return goal, phase, step, task, sub_task, command
+
+    @staticmethod
+    def closure_rows(session):
+        """Snapshot of the closure table."""
+        return sorted(session.execute(select(NodeClosure.__table__)).all())
+
+    def test_descendants_and_ancestors(self, session, tree):
+        """Subtree and ancestor lookups span every level."""
+        goal, phase, step, task, sub_task, command = tree
+
+        assert descendants(session, goal, layer="Command") == [command]
+        assert descendants(session, step) == [task, sub_task, command]
+        assert ancestors(session, command) == [goal, phase, step, task, sub_task]
+        assert ancestors(session, "Command-1", layer="Goal") == [goal]
+        assert descendants(session, command) == []
+
+    def test_lookups_use_one_statement(self, session, tree):
+        """Mixed-layer results load with a single query."""
+        goal, phase, step, task, sub_task, command = tree
+        statements = []
+        event.listen(
+            session.get_bind(),
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        session.expire_all()
+
+        assert descendants(session, goal) == [phase, step, task, sub_task, command]
+        assert len(statements) == 2  # refreshing the expired goal, the load
+        assert ancestors(session, "Command-1") == [goal, phase, step, task, sub_task]
+        assert len(statements) == 3
+
+    def test_second_route_counts_paths(self, session, tree):
+        """A node reached two ways survives unlinking one of them."""
+        goal, _phase, step, task, sub_task, command = tree
+
+        routes = session.execute(
+            select(NodeClosure.depth, NodeClosure.paths).where(
+                NodeClosure.ancestor_layer == "Goal",
+                NodeClosure.descendant_layer == "Command",
+            )
+        ).all()
+        assert sorted(routes) == [(3, 1), (5, 1)]
+
+        goal.tasks.remove(task)
+        session.commit()
+        assert descendants(session, goal, layer="Command") == [command]
+
+        step.tasks.remove(task)
+        session.commit()
+        assert descendants(session, goal, layer="Command") == []
+        assert ancestors(session, command) == [task, sub_task]
+
+    def test_delete_node_removes_its_routes(self, session, tree):
+        """Deleting a mid-level node cuts the routes that ran through it."""
+        goal, phase, step, task, sub_task, command = tree
+
+        session.delete(step)
+        session.commit()
+
+        assert ancestors(session, command) == [goal, task, sub_task]
+        assert descendants(session, phase) == []
+
+    def test_child_side_append_is_tracked(self, session, tree):
+        """Linking from the child's collection updates the closure too."""
+        *_rest, command = tree
+        other = Goal(title="Other")
+        session.add(other)
+        session.commit()
+
+        command.sub_tasks[0].tasks[0].goals.append(other)
+        session.commit()
+
+        assert descendants(session, other, layer="Command") == [command]
+
+    def test_rebuild_matches_incremental_state(self, session, tree):
+        """A rebuild reproduces the table the triggers maintained."""
+        maintained = self.closure_rows(session)
+
+        assert rebuild_closure(session) == len(maintained)
+        assert self.closure_rows(session) == maintained
+
+    def test_raw_sql_and_core_writes_are_tracked(self, session, tree):
+        """Links written around the ORM update the closure too."""
+        goal, phase, step, task, sub_task, command = tree
+        extra = Task(title="Raw")
+        session.add(extra)
+        session.commit()
+
+        session.execute(insert(goals_tasks).values(goal_id=goal.id, task_id=extra.id))
+        assert extra in descendants(session, goal, layer="Task")
+
+        # Detach the task from both of its parents
+        session.execute(
+            text("DELETE FROM steps_tasks WHERE step_id = :s AND task_id = :t"),
+            {"s": step.id, "t": task.id},
+        )
+        session.execute(delete(goals_tasks).where(goals_tasks.c.task_id == task.id))
+        assert descendants(session, goal, layer="Command") == []
+        assert ancestors(session, command) == [task, sub_task]
+        session.commit()
+
+        before = self.closure_rows(session)
+        rebuild_closure(session)
+        assert self.closure_rows(session) == before
+
+    def test_link_and_unlink(self, session, tree):
+        """link/unlink write the join row; the closure follows."""
+        goal, phase, step, task, sub_task, command = tree
+        other = Goal(title="Other")
+        session.add(other)
+        session.flush()
+
+        assert link(session, ("Goal", other.id), ("Phase", phase.id))
+        assert not link(session, ("Goal", other.id), ("Phase", phase.id))
+        assert descendants(session, other, layer="Command") == [command]
+        assert unlink(session, ("Goal", other.id), ("Phase", phase.id))
+        assert not unlink(session, ("Goal", other.id), ("Phase", phase.id))
+        assert descendants(session, other) == []
+        with pytest.raises(ValueError, match="No hierarchy link"):
+            link(session, ("Command", command.id), ("Goal", goal.id))
+
+    def test_subtree_edges_respects_max_depth(self, session, tree):
+        """The recursive CTE returns every link down to max_depth."""
+        goal, phase, step, task, sub_task, command = tree
+
+        assert subtree_edges(session, goal, 1) == [
+            TreeEdge(1, "Goal", goal.id, "Phase", phase.id),
+            TreeEdge(1, "Goal", goal.id, "Task", task.id),
+        ]
+
+        links = subtree_edges(session, "Goal-1", 10)
+        assert max(link.depth for link in links) == 5
+        # Task is reached directly and via Phase/Step, so its subtree repeats
+        assert TreeEdge(2, "Task", task.id, "SubTask", sub_task.id) in links
+        assert TreeEdge(4, "Task", task.id, "SubTask", sub_task.id) in links
+        assert subtree_edges(session, command, 3) == []
+        assert subtree_edges(session, goal, 0) == []
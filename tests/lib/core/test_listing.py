@@ -0,0 +1,131 @@
+"""Cross-Layer Listing Tests
+
+Tests the UNION ALL listing across layer tables: global newest-first
+ordering, keyset cursor pagination without gaps or repeats, filters that
+skip layers lacking the filtered column, timestamp range filters, and
+cursor validation.
+"""
+
+from __future__ import annotations
+
+import tempfile
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from todowrite.core.listing import decode_cursor, list_items
+from todowrite.core.models import Base, Goal, Label, Task
+
+
+
+def day(n: int) -> datetime:
+    """Midnight UTC on 2026-01-``n``."""
+    return datetime(2026, 1, n, tzinfo=timezone.utc)
+
+
+class TestListing:
+    """Test the cross-layer listing engine."""
+
+    @pytest.fixture
+    def session(self):
+        """Create a session on a fresh temporary database."""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as temp_file:
+            engine = create_engine(f"sqlite:///{temp_file.name}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+        engine.dispose()
+
+    @pytest.fixture
+    def items(self, session):
+        """Tasks and goals sharing timestamps, plus one label."""
+        rows = [
+            Task(
+                title=f"Task {i}",
+                updated_at=day(i % 5 + 1),
+                completion_date=day(i + 1),
+                owner="ann",
+            )
+            for i in range(12)
+        ]
+        rows += [
+            Goal(title=f"Goal {i}", updated_at=day(i % 5 + 1)) for i in range(8)
+        ]
+        rows.append(Label(name="urgent", updated_at=day(3)))
+        session.add_all(rows)
+        session.commit()
+        return rows
+
+    def test_first_page_is_globally_ordered(self, session, items):
+        """One page mixes layers in (updated_at, layer, id) descending order."""
+        page = list_items(session, limit=100)
+
+        keys = [(item.updated_at, item.layer, item.id) for item in page.items]
+        assert len(keys) == len(items)
+        assert keys == sorted(keys, reverse=True)
+        assert page.next_cursor is None
+        assert all(item.node_id is not None for item in page.items)
+
+        label = next(item for item in page.items if item.layer == "Label")
+        assert (label.title, label.status, label.owner) == ("urgent", None, None)
+
+    def test_cursor_walk_covers_every_row_once(self, session, items):
+        """Following next_cursor visits each row exactly once, in order."""
+        walked = []
+        cursor = None
+        while True:
+            page = list_items(session, limit=4, cursor=cursor)
+            assert len(page.items) <= 4
+            walked.extend((item.layer, item.id) for item in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        expected = [
+            (item.layer, item.id) for item in list_items(session, limit=100).items
+        ]
+        assert walked == expected
+
+    def test_filters_and_layer(self, session, items):
+        """Filters apply to every branch; layers without the column drop out."""
+        owned = list_items(session, owner="ann", limit=100).items
+        assert len(owned) == 12
+        assert {item.layer for item in owned} == {"Task"}
+
+        goals = list_items(session, layer="Goal", limit=3)
+        assert [item.layer for item in goals.items] == ["Goal"] * 3
+        rest = list_items(session, layer="Goal", limit=100, cursor=goals.next_cursor)
+        assert len(rest.items) == 5
+
+        assert list_items(session, layer="Label", status="planned").items == []
+
+    def test_timestamp_range_filters(self, session, items):
+        """updated_since and completed_between bound every branch."""
+        recent = list_items(session, updated_since=day(4), limit=100).items
+        assert len(recent) == 6  # tasks 3, 4, 8, 9 and goals 3, 4
+        assert all(item.updated_at >= day(4) for item in recent)
+        assert recent[0].updated_at.tzinfo is not None
+
+        completed = list_items(
+            session, completed_between=(day(3), day(6)), limit=2
+        )
+        assert {item.layer for item in completed.items} == {"Task"}
+        rest = list_items(
+            session,
+            completed_between=(day(3), day(6)),
+            limit=100,
+            cursor=completed.next_cursor,
+        )
+        titles = {item.title for item in completed.items + rest.items}
+        assert titles == {"Task 2", "Task 3", "Task 4", "Task 5"}
+
+    def test_invalid_arguments(self, session):
+        """Unknown layers and malformed cursors are rejected."""
+        with pytest.raises(ValueError, match="Unknown layer"):
+            list_items(session, layer="Epic")
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            list_items(session, cursor="not-a-cursor")
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor("WyJ4IiwgIkVwaWMiLCAxXQ")  # ["x", "Epic", 1]
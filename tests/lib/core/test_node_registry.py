@@ -0,0 +1,101 @@
+"""Global Node Registry Tests
+
+Tests that every layer row gets one global node ID, that lookups resolve
+through the registry, and that the backfill repairs existing databases.
+"""
+
+from __future__ import annotations
+
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.orm import sessionmaker
+from todowrite.core.models import Base, Goal, NodeRegistry, Task
+from todowrite.core.node_registry import (
+    backfill_node_registry,
+    format_node_id,
+    get_node_id,
+    lookup_node,
+    parse_node_id,
+    resolve_node,
+)
+
+
+class TestNodeRegistry:
+    """Test the global node registry."""
+
+    @pytest.fixture
+    def session(self):
+        """Create a session on a fresh temporary database."""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as temp_file:
+            engine = create_engine(f"sqlite:///{temp_file.name}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+        engine.dispose()
+
+    def test_insert_registers_unique_global_ids(self, session):
+        """Rows sharing a row id in different tables get distinct node IDs."""
+        goal = Goal(title="Goal")
+        task = Task(title="Task")
+        session.add_all([goal, task])
+        session.commit()
+
+        assert goal.id == task.id == 1
+        goal_node = get_node_id(session, goal)
+        task_node = get_node_id(session, task)
+        assert goal_node != task_node
+        assert lookup_node(session, goal_node) == ("Goal", 1)
+        assert lookup_node(session, task_node) == ("Task", 1)
+
+    def test_resolve_by_global_and_typed_id(self, session):
+        """Both ID forms resolve to the right layer, never a colliding row."""
+        session.add(Goal(title="Goal"))
+        task = Task(title="Task")
+        session.add(task)
+        session.commit()
+
+        node_id = get_node_id(session, task)
+        assert resolve_node(session, node_id) is task
+        assert resolve_node(session, str(node_id)) is task
+        assert resolve_node(session, "task-1") is task
+        assert resolve_node(session, 999) is None
+        assert resolve_node(session, "Unknown-1") is None
+
+    def test_delete_unregisters(self, session):
+        """Deleting a row removes its registry entry."""
+        task = Task(title="Task")
+        session.add(task)
+        session.commit()
+        node_id = get_node_id(session, task)
+
+        session.delete(task)
+        session.commit()
+
+        assert lookup_node(session, node_id) is None
+
+    def test_backfill_registers_missing_and_prunes_orphans(self, session):
+        """Backfill repairs a registry that drifted from the layer tables."""
+        session.add_all([Goal(title="A"), Goal(title="B"), Task(title="C")])
+        session.commit()
+        session.execute(delete(NodeRegistry).where(NodeRegistry.layer == "Goal"))
+        session.add(NodeRegistry(layer="Task", row_id=42))
+        session.commit()
+
+        added = backfill_node_registry(session)
+
+        assert added["Goal"] == 2
+        assert added["Task"] == 0
+        assert session.execute(select(func.count()).select_from(NodeRegistry)).scalar() == 3
+        assert lookup_node(session, 999) is None
+        assert backfill_node_registry(session)["Goal"] == 0
+
+    def test_typed_id_round_trip(self):
+        """Typed node IDs format and parse symmetrically."""
+        assert format_node_id("SubTask", 7) == "SubTask-7"
+        assert parse_node_id("SubTask-7") == ("SubTask", 7)
+        assert parse_node_id("subtask-7") == ("SubTask", 7)
+        assert parse_node_id("17") is None
+        assert parse_node_id("Task-x") is None
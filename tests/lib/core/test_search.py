@@ -0,0 +1,123 @@
+"""Full-Text Search Tests
+
+Tests the SQLite FTS5 search index: field-weighted ranking, word-prefix
+matching, layer filtering and pagination, global node IDs on the hits,
+trigger maintenance on insert, update and delete, and a full rebuild from
+the layer tables.
+"""
+
+from __future__ import annotations
+
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from todowrite.core.models import Base, Goal, Label, Task
+from todowrite.core.node_registry import get_node_id
+from todowrite.core.search import rebuild_search_index, search
+
+
+class TestSearch:
+    """Test ranked full-text search."""
+
+    @pytest.fixture
+    def session(self):
+        """Create a session on a fresh temporary database."""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as temp_file:
+            engine = create_engine(f"sqlite:///{temp_file.name}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        yield session
+        session.close()
+        engine.dispose()
+
+    @staticmethod
+    def titles(results):
+        """Titles (or label names) of the hits, in rank order."""
+        return [getattr(hit.item, "title", None) or hit.item.name for hit in results.hits]
+
+    def test_title_outranks_description_and_owner(self, session):
+        """Matches are weighted title > description > owner."""
+        session.add_all(
+            [
+                Task(title="Plain", owner="release-team"),
+                Task(title="Notes", description="cut the release branch"),
+                Goal(title="Release 2.0"),
+            ]
+        )
+        session.commit()
+
+        results = search(session, "release")
+
+        assert results.total == 3
+        assert self.titles(results) == ["Release 2.0", "Notes", "Plain"]
+        assert [hit.layer for hit in results.hits] == ["Goal", "Task", "Task"]
+        assert results.hits[0].rank > results.hits[1].rank > results.hits[2].rank
+        assert [hit.node_id for hit in results.hits] == [
+            get_node_id(session, hit.item) for hit in results.hits
+        ]
+
+    def test_prefix_and_all_terms(self, session):
+        """Each word matches as a prefix and every word must match."""
+        session.add_all(
+            [
+                Task(title="Deployment checklist"),
+                Task(title="Deploy docs"),
+                Label(name="deployable"),
+            ]
+        )
+        session.commit()
+
+        assert search(session, "depl").total == 3
+        assert self.titles(search(session, "deploy doc")) == ["Deploy docs"]
+        assert search(session, "deployments").total == 0
+
+    def test_operator_characters_are_ignored(self, session):
+        """Query syntax characters cannot break the MATCH expression."""
+        session.add(Task(title="Fix OR bug"))
+        session.commit()
+
+        assert search(session, 'fix" OR (bug* -"').total == 1
+        assert search(session, "***").total == 0
+
+    def test_layer_filter_and_pagination(self, session):
+        """The total counts all matches while only one page is hydrated."""
+        session.add_all([Task(title=f"Sprint task {i}") for i in range(5)])
+        session.add(Goal(title="Sprint goal"))
+        session.commit()
+
+        page = search(session, "sprint", layer="Task", limit=2, offset=4)
+        assert page.total == 5
+        assert len(page.hits) == 1
+        assert all(hit.layer == "Task" for hit in page.hits)
+        assert search(session, "sprint", limit=2).total == 6
+
+        with pytest.raises(ValueError, match="Unknown layer"):
+            search(session, "sprint", layer="Sprint")
+
+    def test_triggers_follow_updates_and_deletes(self, session):
+        """Edits and deletes through the ORM are reflected immediately."""
+        task = Task(title="Old wording")
+        session.add(task)
+        session.commit()
+
+        task.title = "New wording"
+        session.commit()
+        assert search(session, "old").total == 0
+        assert search(session, "new").hits[0].item is task
+
+        session.delete(task)
+        session.commit()
+        assert search(session, "wording").total == 0
+
+    def test_rebuild_restores_index(self, session):
+        """A rebuild reindexes rows whose index entries were lost."""
+        session.add_all([Task(title="Alpha"), Goal(title="Alpha goal")])
+        session.commit()
+        session.execute(text("DELETE FROM search_index"))
+        session.commit()
+        assert search(session, "alpha").total == 0
+
+        assert rebuild_search_index(session) == 2
+        assert search(session, "alpha").total == 2
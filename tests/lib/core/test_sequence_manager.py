@@ -0,0 +1,189 @@
+"""Sequence Manager Tests
+
+Tests that sequence health is read for every managed table with a fixed
+number of statements, that drifted AUTOINCREMENT sequences are healed
+in one transaction, that the per-insert check and the background
+monitor reuse recent results, that ids are allocated in blocks
+that other writers do not reuse, and that allocated ids let a linked
+subtree be written in one flush.
+"""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from todowrite.core.models import Base, Goal, Task
+from todowrite.core.sequence_manager import (
+    SequenceManager,
+    SequenceMonitor,
+    sequence_manager_for,
+)
+from todowrite.database.engines import dispose_engines
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """A manager over a database where goals use AUTOINCREMENT."""
+    url = f"sqlite:///{tmp_path / 'todowrite.db'}"
+    manager = SequenceManager(url)
+    with manager.engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE goals "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT)"
+            )
+        )
+        conn.execute(text("CREATE TABLE labels (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO goals (title) VALUES ('a'), ('b')"))
+        conn.execute(text("INSERT INTO labels (id) VALUES (7)"))
+    yield manager
+    dispose_engines()
+
+
+def drift(manager):
+    """Make the goals sequence lag behind its rows, as after a restore."""
+    with manager.engine.begin() as conn:
+        conn.execute(text("INSERT INTO goals (id, title) VALUES (10, 'c')"))
+        conn.execute(
+            text("UPDATE sqlite_sequence SET seq = 1 WHERE name = 'goals'")
+        )
+
+
+def count_statements(engine):
+    """A list that collects the statements run on ``engine``."""
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    return statements
+
+
+def test_health_of_all_tables_in_two_statements(manager):
+    """Existing tables are read at once; missing ones are errors."""
+    drift(manager)
+    statements = count_statements(manager.engine)
+    health = manager.validate_all_sequences()
+
+    assert len(statements) == 3  # tables, sqlite_sequence, max ids
+    assert health["goals"] == {
+        "max_id": 10,
+        "current_sequence": 1,
+        "needs_fix": True,
+        "sequence": "sqlite_sequence",
+    }
+    assert health["labels"]["needs_fix"] is False
+    assert health["labels"]["current_sequence"] == 7
+    assert "error" in health["tasks"]
+    assert "NEEDS FIX" in manager.report_status()
+
+
+def test_heal_fixes_drift_in_one_transaction(manager):
+    """The next insert after a heal gets a fresh id."""
+    drift(manager)
+    results = manager.fix_all_sequences()
+
+    assert results["goals"] is True
+    assert results["tasks"] is False
+    assert manager.get_table_status("goals")["needs_fix"] is False
+    with manager.engine.begin() as conn:
+        conn.execute(text("INSERT INTO goals (title) VALUES ('d')"))
+        assert conn.execute(text("SELECT MAX(id) FROM goals")).scalar() == 11
+
+
+def test_insert_check_reuses_recent_health(manager):
+    """A table found healthy is not checked again before each insert."""
+    manager.ensure_sequence_before_insert("goals")
+    statements = count_statements(manager.engine)
+    for _ in range(5):
+        manager.ensure_sequence_before_insert("goals")
+    assert statements == []
+
+    drift(manager)
+    manager.check_interval = 0
+    manager.ensure_sequence_before_insert("goals")
+    assert manager.validate_all_sequences()["goals"]["needs_fix"] is False
+
+
+def test_monitor_heals_in_background(manager):
+    """The monitor finds and fixes drift without being asked."""
+
+    def sequence():
+        with manager.engine.connect() as conn:
+            return conn.execute(
+                text("SELECT seq FROM sqlite_sequence WHERE name = 'goals'")
+            ).scalar()
+
+    monitor = SequenceMonitor(manager, interval=0.01).start()
+    try:
+        drift(manager)
+        deadline = time.monotonic() + 5
+        while sequence() != 10 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sequence() == 10
+    finally:
+        monitor.stop()
+    assert monitor.checks > 0
+    assert monitor.check() == []
+    assert monitor.last_error is None
+
+
+def test_allocate_ids_in_blocks(manager):
+    """One reservation serves many calls; other writers skip the block."""
+    manager.id_block_size = 10
+    statements = count_statements(manager.engine)
+    first = manager.allocate_ids("goals", 3)
+    reserved = len(statements)
+    second = manager.allocate_ids("goals", 7)
+
+    assert first == [3, 4, 5]
+    assert second == list(range(6, 13))
+    assert len(statements) == reserved  # served from the block
+    with manager.engine.begin() as conn:
+        conn.execute(text("INSERT INTO goals (title) VALUES ('other')"))
+        assert conn.execute(text("SELECT MAX(id) FROM goals")).scalar() == 13
+        conn.execute(
+            text("INSERT INTO goals (id, title) VALUES (:id, 'mine')"),
+            {"id": first[0]},
+        )
+    assert manager.allocate_ids("goals") == [14]
+
+
+def test_allocate_ids_for_rowid_tables(manager):
+    """Without AUTOINCREMENT, ids are reserved in the inserting transaction."""
+    with pytest.raises(ValueError, match="AUTOINCREMENT"):
+        manager.allocate_ids("labels")
+    with manager.engine.begin() as conn:
+        assert manager.allocate_ids("labels", 2, connection=conn) == [8, 9]
+    with pytest.raises(ValueError, match="not managed"):
+        manager.allocate_ids("node_registry")
+
+
+def test_subtree_written_in_one_flush(tmp_path):
+    """With ids allocated up front, nothing is read back mid-flush."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'todowrite.db'}")
+    Base.metadata.create_all(engine)
+    manager = sequence_manager_for(engine)
+    assert sequence_manager_for(engine) is manager
+
+    with Session(engine) as session:
+        connection = session.connection()
+        [goal_id] = manager.allocate_ids("goals", connection=connection)
+        task_ids = manager.allocate_ids("tasks", 3, connection=connection)
+        goal = Goal(id=goal_id, title="Goal")
+        goal.tasks = [Task(id=i, title=f"Task {i}") for i in task_ids]
+        session.add(goal)
+        statements = count_statements(engine)
+        session.flush()
+        session.commit()
+
+    assert all(sql.startswith("INSERT") for sql in statements)
+    assert any(sql.startswith("INSERT INTO goals_tasks") for sql in statements)
+    with Session(engine) as session:
+        tasks = session.get(Goal, goal_id).tasks
+        assert sorted(task.id for task in tasks) == task_ids
+    engine.dispose()
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import tempfile
+from datetime import timedelta
 from pathlib import Path
 
 import pytest
@@ -217,7 +218,7 @@ class TestUnifiedModelsAPI:
         assert goal.created_at is not None
         assert goal.updated_at is not None
         # Note: created_at and updated_at may differ by microseconds
-        assert goal.created_at[:19] == goal.updated_at[:19]  # Compare up to seconds
+        assert goal.updated_at - goal.created_at < timedelta(seconds=1)
 
         # Update and verify updated_at changes
         original_updated_at = goal.updated_at
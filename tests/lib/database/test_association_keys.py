@@ -0,0 +1,71 @@
+"""Association Table Key Tests
+
+Tests that every join table has a composite primary key plus a reverse
+index, so links cannot be duplicated and both lookup directions are index
+seeks.
+"""
+
+from __future__ import annotations
+
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, inspect, insert, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from todowrite.core.models import ASSOCIATION_TABLES, Base, Goal, Task, goals_tasks
+
+
+class TestAssociationKeys:
+    """Test primary keys and reverse indexes on join tables."""
+
+    @pytest.fixture
+    def engine(self):
+        """Create a fresh SQLite database with all tables."""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as temp_file:
+            engine = create_engine(f"sqlite:///{temp_file.name}")
+        Base.metadata.create_all(engine)
+        yield engine
+        engine.dispose()
+
+    def test_every_join_table_has_key_and_reverse_index(self, engine):
+        """Each join table is keyed on both columns and indexed on the second."""
+        inspector = inspect(engine)
+        assert len(ASSOCIATION_TABLES) == 28
+        for table in ASSOCIATION_TABLES:
+            first, second = (column.name for column in table.columns)
+            pk = inspector.get_pk_constraint(table.name)["constrained_columns"]
+            assert pk == [first, second]
+            indexed = [index["column_names"] for index in inspector.get_indexes(table.name)]
+            assert [second] in indexed
+
+    @pytest.mark.parametrize("column", ["goal_id", "task_id"])
+    def test_planner_seeks_in_both_directions(self, engine, column):
+        """Parent->child and child->parent lookups both search an index."""
+        with engine.connect() as conn:
+            plan = " ".join(
+                row[-1]
+                for row in conn.execute(
+                    text(f"EXPLAIN QUERY PLAN SELECT * FROM goals_tasks WHERE {column} = 1")
+                )
+            )
+        assert "SEARCH" in plan, plan
+        assert "INDEX" in plan, plan
+
+    def test_duplicate_link_is_rejected(self, engine):
+        """Inserting the same link twice violates the primary key."""
+        session = sessionmaker(bind=engine)()
+        goal = Goal(title="Goal")
+        task = Task(title="Task")
+        goal.tasks.append(task)
+        session.add(goal)
+        session.commit()
+
+        with pytest.raises(IntegrityError):
+            session.execute(insert(goals_tasks).values(goal_id=goal.id, task_id=task.id))
+            session.commit()
+        session.rollback()
+
+        assert [t.title for t in session.get(Goal, goal.id).tasks] == ["Task"]
+        assert [g.title for g in session.get(Task, task.id).goals] == ["Goal"]
+        session.close()
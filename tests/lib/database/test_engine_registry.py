@@ -0,0 +1,117 @@
+"""Engine Registry Tests
+
+Tests that get_engine shares one engine per URL and option set, resolves
+relative SQLite paths per call, never shares in-memory SQLite databases,
+reconnects when a SQLite file is replaced, bounds the number of open engines, and that the modules that
+used to build their own engines now share the registry's.
+"""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+from sqlalchemy import text
+from todowrite.core.models import Base
+from todowrite.core.schema_validator import DatabaseSchemaInitializer
+from todowrite.core.sequence_manager import SequenceManager
+from todowrite.database import engines
+from todowrite.database.config import check_sqlite_connection
+from todowrite.database.engines import (
+    dispose_engines,
+    engine_count,
+    get_engine,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    """Every test starts and ends with no registered engines."""
+    dispose_engines()
+    yield
+    dispose_engines()
+
+
+def test_same_url_and_options_share_an_engine(tmp_path):
+    """Equal requests get one engine; different options get another."""
+    url = f"sqlite:///{tmp_path / 'todowrite.db'}"
+    engine = get_engine(url)
+
+    assert get_engine(url) is engine
+    assert get_engine(url, connect_args={"timeout": 5}) is not engine
+    assert get_engine(url, connect_args={"timeout": 5}) is get_engine(
+        url, connect_args={"timeout": 5}
+    )
+    assert get_engine(url, sqlite_profile="durable") is not engine
+    assert engine_count() == 3
+
+
+def test_callers_share_the_registry(tmp_path):
+    """Status checks, schema helpers and sequences use one engine."""
+    url = f"sqlite:///{tmp_path / 'todowrite.db'}"
+    engine = DatabaseSchemaInitializer().create_database(url)
+
+    assert check_sqlite_connection(url)
+    assert DatabaseSchemaInitializer().verify_database_structure(url)
+    assert SequenceManager(url).engine is engine
+    assert engine_count() == 1
+
+
+def test_relative_paths_follow_the_current_directory(tmp_path, monkeypatch):
+    """sqlite:///name.db means the file under the directory of the call."""
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        monkeypatch.chdir(tmp_path / name)
+        engine = get_engine("sqlite:///todowrite.db")
+        Base.metadata.create_all(engine)
+        assert engine.url.database == os.path.join(
+            tmp_path, name, "todowrite.db"
+        )
+    assert engine_count() == 2
+
+
+@pytest.mark.parametrize("url", ["sqlite://", "sqlite:///:memory:"])
+def test_in_memory_databases_are_not_shared(url):
+    """Each caller gets its own empty in-memory database."""
+    first = get_engine(url)
+    with first.begin() as connection:
+        connection.execute(text("CREATE TABLE private (id INTEGER)"))
+
+    second = get_engine(url)
+    assert second is not first
+    with second.connect() as connection:
+        tables = connection.execute(
+            text("SELECT name FROM sqlite_master")
+        ).all()
+    assert tables == []
+    assert engine_count() == 0
+    first.dispose()
+    second.dispose()
+
+
+def test_replaced_sqlite_file_is_reopened(tmp_path):
+    """A pooled connection to a deleted file is not reused."""
+    path = tmp_path / "todowrite.db"
+    engine = get_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE old (id INTEGER)"))
+
+    path.unlink()
+    with engine.connect() as connection:
+        tables = connection.execute(
+            text("SELECT name FROM sqlite_master")
+        ).all()
+    assert tables == []
+
+
+def test_least_recently_used_engine_is_disposed(tmp_path, monkeypatch):
+    """The registry never holds more than MAX_ENGINES engines."""
+    monkeypatch.setattr(engines, "MAX_ENGINES", 2)
+    first = get_engine(f"sqlite:///{tmp_path / 'first.db'}")
+    get_engine(f"sqlite:///{tmp_path / 'second.db'}")
+    get_engine(f"sqlite:///{tmp_path / 'third.db'}")
+
+    assert engine_count() == 2
+    assert get_engine(f"sqlite:///{tmp_path / 'first.db'}") is not first
+    with first.connect() as connection:  # still usable
+        assert connection.execute(text("SELECT 1")).scalar() == 1
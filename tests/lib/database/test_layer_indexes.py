@@ -0,0 +1,63 @@
+"""Layer Filter Index Tests
+
+Tests that the hot filter columns of every layer table are indexed and
+that SQLite's query planner actually picks those indexes.
+"""
+
+from __future__ import annotations
+
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from todowrite.core.models import LAYER_MODELS, Base
+
+LAYER_TABLES = [model.__tablename__ for name, model in LAYER_MODELS.items() if name != "Label"]
+
+# WHERE clause -> index the planner is expected to use
+FILTER_PLANS = {
+    "status = 'planned' AND owner = 'alice'": "status_owner",
+    "assignee = 'bob' AND status = 'blocked'": "assignee_status",
+    "status = 'planned'": "status_owner",
+    "owner = 'alice'": "owner",
+    "severity = 'high'": "severity",
+    "work_type = 'feature'": "work_type",
+    "created_at >= '2025-01-01'": "created_at",
+    "updated_at >= '2025-01-01'": "updated_at_id",
+    "started_date >= '2025-01-01'": "started_date",
+    "completion_date BETWEEN '2025-01-01' AND '2025-02-01'": "completion_date",
+}
+
+
+class TestLayerIndexes:
+    """Test secondary indexes on layer tables."""
+
+    @pytest.fixture
+    def engine(self):
+        """Create a fresh SQLite database with all tables."""
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as temp_file:
+            engine = create_engine(f"sqlite:///{temp_file.name}")
+        Base.metadata.create_all(engine)
+        yield engine
+        engine.dispose()
+
+    def test_every_layer_table_has_filter_indexes(self, engine):
+        """All twelve layer tables carry the filter indexes."""
+        inspector = inspect(engine)
+        for table in LAYER_TABLES:
+            names = {index["name"] for index in inspector.get_indexes(table)}
+            for suffix in set(FILTER_PLANS.values()):
+                assert f"ix_{table}_{suffix}" in names
+
+    @pytest.mark.parametrize(("where", "suffix"), FILTER_PLANS.items())
+    def test_sqlite_planner_uses_filter_indexes(self, engine, where, suffix):
+        """EXPLAIN QUERY PLAN shows an index search, never a full scan."""
+        with engine.connect() as conn:
+            for table in LAYER_TABLES:
+                plan = " ".join(
+                    row[-1]
+                    for row in conn.execute(
+                        text(f"EXPLAIN QUERY PLAN SELECT * FROM {table} WHERE {where}")
+                    )
+                )
+                assert f"INDEX ix_{table}_{suffix}" in plan, plan
@@ -0,0 +1,131 @@
+"""
+PostgreSQL Backend Tests
+
+Tests that PostgreSQLBackend connects on a configured pool, round-trips
+records through the batch API, streams a layer through a server-side
+cursor, reports pool statistics and publishes cache invalidations with
+NOTIFY.
+"""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from todowrite.core.models import Base, Task
+from todowrite.storage import StorageConnectionError
+from todowrite.storage.cache import EntityCache
+from todowrite.storage.invalidation import (
+    InvalidationSubscriber,
+    publish_invalidations,
+    stop_publishing,
+)
+from todowrite.storage.postgresql_backend import PostgreSQLBackend
+
+try:
+    from .docker_utils import docker_manager, TestPostgreSQLConfig
+except ImportError:
+    # Fallback for when running directly
+    import sys
+    from pathlib import Path
+
+    # Add the parent directory to path so we can import docker_utils
+    parent_dir = Path(__file__).parent.parent.parent
+    if str(parent_dir) not in sys.path:
+        sys.path.insert(0, str(parent_dir))
+
+    from tests.lib.docker.docker_utils import docker_manager, TestPostgreSQLConfig
+
+
+def test_pool_settings_override_environment(monkeypatch):
+    """Explicit pool options win over TODOWRITE_DB_POOL_* defaults."""
+    monkeypatch.setenv("TODOWRITE_DB_POOL_SIZE", "7")
+    backend = PostgreSQLBackend("postgresql://localhost/todowrite", max_overflow=3)
+    assert (backend.pool_size, backend.max_overflow) == (7, 3)
+    with pytest.raises(StorageConnectionError):
+        backend.pool_stats()
+
+
+@pytest.mark.requires_docker
+class TestPostgreSQLBackend:
+    """Batch API, streaming and pool stats against PostgreSQL."""
+
+    @pytest.fixture(scope="class")
+    def backend(self: "TestPostgreSQLBackend"):
+        """Start PostgreSQL and connect a small pool."""
+        if not docker_manager.start_postgresql_container():
+            pytest.skip("Failed to start PostgreSQL container")
+
+        backend = PostgreSQLBackend(
+            TestPostgreSQLConfig.get_connection_url(),
+            pool_size=2,
+            max_overflow=1,
+        )
+        backend.connect()
+
+        yield backend
+
+        backend.disconnect()
+        docker_manager.stop_postgresql_container()
+
+    @pytest.fixture(autouse=True)
+    def fresh_tables(self: "TestPostgreSQLBackend", backend):
+        """Empty tables for every test."""
+        Base.metadata.drop_all(backend.engine)
+        Base.metadata.create_all(backend.engine)
+
+    def test_batch_round_trip(self: "TestPostgreSQLBackend", backend) -> None:
+        """save_many, get_many and delete_many work in batches."""
+        tasks = backend.save_many(Task(title=f"Task {i}") for i in range(50))
+        ids = [task.id for task in tasks]
+
+        found = backend.get_many(Task, [ids[1], -1, ids[0]])
+        assert [task and task.title for task in found] == [
+            "Task 1",
+            None,
+            "Task 0",
+        ]
+        assert backend.delete_many(Task, ids[:10]) == 10
+        assert backend.get_record(Task, ids[0]) is None
+
+    def test_iter_layer_streams(self: "TestPostgreSQLBackend", backend) -> None:
+        """A layer is read in id order through a server-side cursor."""
+        backend.save_many(Task(title=f"Task {i}") for i in range(25))
+        titles = [task.title for task in backend.iter_layer("Task", batch_size=10)]
+        assert titles == [f"Task {i}" for i in range(25)]
+        with pytest.raises(ValueError, match="Unknown layer"):
+            list(backend.iter_layer("Nope"))
+
+    def test_pool_stats(self: "TestPostgreSQLBackend", backend) -> None:
+        """Pool occupancy reflects checked-out sessions."""
+        with backend.get_session() as session:
+            session.connection()
+            stats = backend.pool_stats()
+            assert stats["size"] == 2
+            assert stats["max_overflow"] == 1
+            assert stats["checked_out"] == 1
+        assert backend.pool_stats()["checked_out"] == 0
+
+    def test_invalidation_bus(self: "TestPostgreSQLBackend", backend) -> None:
+        """Commits reach a LISTENing subscriber as NOTIFY events."""
+        received = []
+        cache = EntityCache()
+        publish_invalidations(backend.engine)
+        subscriber = InvalidationSubscriber(
+            backend.engine, [cache], poll_interval=0.05, on_events=received.extend
+        ).start()
+        try:
+            time.sleep(0.2)  # let LISTEN start
+            task = backend.save_record(Task(title="Task"))
+            cache.put(("Task", task.id), task, cache.generation)
+            backend.delete_record(task)
+
+            deadline = time.monotonic() + 5
+            while len(received) < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert [(e.layer, e.id) for e in received] == [("Task", task.id)] * 2
+            assert cache.get(("Task", task.id)) is None
+        finally:
+            subscriber.stop()
+            stop_publishing(backend.engine)
@@ -0,0 +1,265 @@
+"""
+COPY Export/Import Tests with PostgreSQL
+
+Tests that the COPY pipeline round-trips every table in chunks, in both
+formats, that an interrupted export or import resumes where it stopped,
+that a target already holding rows is refused, truncated or merged as
+asked, that imported rows are registered under the target's own node
+IDs, and that sequences continue after the imported ids.
+"""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from todowrite.core.bulk import bulk_create
+from todowrite.core.models import Base, Goal, NodeRegistry, Task
+from todowrite.core.node_registry import get_node_id
+from todowrite.storage import postgresql_copy
+from todowrite.storage.postgresql_copy import (
+    IMPORT_PROGRESS,
+    MANIFEST,
+    export_tables,
+    import_tables,
+)
+
+try:
+    from .docker_utils import docker_manager, TestPostgreSQLConfig
+except ImportError:
+    # Fallback for when running directly
+    import sys
+    from pathlib import Path
+
+    # Add the parent directory to path so we can import docker_utils
+    parent_dir = Path(__file__).parent.parent.parent
+    if str(parent_dir) not in sys.path:
+        sys.path.insert(0, str(parent_dir))
+
+    from tests.lib.docker.docker_utils import docker_manager, TestPostgreSQLConfig
+
+
+def test_copy_requires_postgresql(tmp_path):
+    """Other databases are refused before anything is written."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'todowrite.db'}")
+    with pytest.raises(ValueError, match="needs a PostgreSQL database"):
+        export_tables(engine, tmp_path / "export")
+    assert not (tmp_path / "export").exists()
+
+
+@pytest.mark.requires_docker
+class TestPostgreSQLCopy:
+    """Round-trip tests for COPY export and import."""
+
+    @pytest.fixture(scope="class")
+    def engine(self: "TestPostgreSQLCopy"):
+        """Start PostgreSQL."""
+        if not docker_manager.start_postgresql_container():
+            pytest.skip("Failed to start PostgreSQL container")
+
+        engine = create_engine(TestPostgreSQLConfig.get_connection_url())
+
+        yield engine
+
+        engine.dispose()
+        docker_manager.stop_postgresql_container()
+
+    @pytest.fixture
+    def session(self: "TestPostgreSQLCopy", engine):
+        """Fresh tables holding a goal with linked, labelled tasks."""
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add(Goal(title="Goal"))
+        session.commit()
+        bulk_create(
+            session,
+            "Task",
+            [
+                {"title": f"Task {i}", "labels": ["a"], "parents": ["Goal-1"]}
+                for i in range(25)
+            ],
+        )
+        yield session
+        session.close()
+
+    @staticmethod
+    def snapshot(engine):
+        """Every row of every table, including the trigger-built closure.
+
+        Node registry entries are compared without their global ids,
+        which each database allocates on its own.
+        """
+        registry = NodeRegistry.__table__
+        with engine.connect() as connection:
+            return {
+                table.name: sorted(
+                    connection.execute(
+                        select(registry.c.layer, registry.c.row_id)
+                        if table is registry
+                        else select(table)
+                    ).all()
+                )
+                for table in Base.metadata.sorted_tables
+            }
+
+    def reset(self: "TestPostgreSQLCopy", engine) -> None:
+        """Empty the database, keeping the schema."""
+        Base.metadata.drop_all(engine)
+        IMPORT_PROGRESS.drop(engine, checkfirst=True)
+        Base.metadata.create_all(engine)
+
+    @pytest.mark.parametrize("copy_format", ["csv", "binary"])
+    def test_round_trip(
+        self: "TestPostgreSQLCopy", engine, session, tmp_path, copy_format
+    ) -> None:
+        """Chunked export then import reproduces every table."""
+        before = self.snapshot(engine)
+
+        exported = export_tables(
+            engine, tmp_path, format=copy_format, chunk_rows=10
+        )
+        assert exported["tasks"] == 25
+        manifest = json.loads((tmp_path / MANIFEST).read_text())
+        assert len(manifest["tables"]["tasks"]["chunks"]) == 3
+
+        self.reset(engine)
+        imported = import_tables(engine, tmp_path)
+        assert imported == exported
+        assert self.snapshot(engine) == before
+
+        # New rows are numbered after the imported ones
+        session.add(Task(title="After"))
+        session.commit()
+        assert session.query(Task).filter_by(title="After").one().id == 26
+
+    def test_interrupted_runs_resume(
+        self: "TestPostgreSQLCopy", engine, session, tmp_path, monkeypatch
+    ) -> None:
+        """A rerun continues an export, and an import after its last chunk."""
+        export_tables(engine, tmp_path, tables=["tasks"], chunk_rows=10)
+
+        # Forget the last chunk, as if the export died while writing it
+        manifest = json.loads((tmp_path / MANIFEST).read_text())
+        entry = manifest["tables"]["tasks"]
+        entry["chunks"].pop()
+        entry["done"] = False
+        (tmp_path / MANIFEST).write_text(json.dumps(manifest))
+
+        assert export_tables(engine, tmp_path, tables=["tasks"]) == {
+            "tasks": 5
+        }
+        with pytest.raises(ValueError, match="cannot resume it as binary"):
+            export_tables(engine, tmp_path, format="binary")
+
+        self.reset(engine)
+        copy_in = postgresql_copy._copy_in
+        calls = []
+
+        def fail_second_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            copy_in(*args)
+
+        monkeypatch.setattr(postgresql_copy, "_copy_in", fail_second_chunk)
+        with pytest.raises(RuntimeError, match="connection lost"):
+            import_tables(engine, tmp_path)
+        assert session.query(Task).count() == 10
+
+        assert import_tables(engine, tmp_path) == {"tasks": 15}
+        assert session.query(Task).count() == 25
+        # Progress is cleared once the import completes
+        with engine.connect() as connection:
+            assert connection.execute(select(IMPORT_PROGRESS)).all() == []
+
+    def test_partly_populated_target(
+        self: "TestPostgreSQLCopy", engine, session, tmp_path
+    ) -> None:
+        """Existing rows are refused unless truncated or merged."""
+        before = self.snapshot(engine)
+        export_tables(engine, tmp_path, chunk_rows=10)
+
+        self.reset(engine)
+        session.add(Goal(title="Stale"))
+        session.commit()
+        with pytest.raises(ValueError, match="already hold rows: goals"):
+            import_tables(engine, tmp_path)
+        assert session.query(Task).count() == 0
+
+        # Upsert overwrites the clashing goal and adds everything else
+        assert import_tables(engine, tmp_path, mode="upsert")["tasks"] == 25
+        assert self.snapshot(engine) == before
+
+        # Local edits and rows survive an upsert, but not a truncate
+        session.expire_all()
+        session.get(Task, 1).title = "Local edit"
+        session.add(Task(title="Local"))
+        session.commit()
+        import_tables(engine, tmp_path, mode="upsert")
+        assert session.get(Task, 1).title == "Task 0"
+        assert session.query(Task).count() == 26
+
+        import_tables(engine, tmp_path, mode="truncate")
+        assert self.snapshot(engine) == before
+
+    def test_upsert_keeps_target_node_ids(
+        self: "TestPostgreSQLCopy", engine, session, tmp_path
+    ) -> None:
+        """Target rows keep their node IDs; imported rows get new ones."""
+        export_tables(engine, tmp_path)
+
+        self.reset(engine)
+        session.add_all([Goal(title="Stale"), Goal(title="Local")])
+        session.commit()
+        node_ids = {
+            goal.id: get_node_id(session, goal)
+            for goal in session.query(Goal)
+        }
+
+        assert import_tables(engine, tmp_path, mode="upsert")["tasks"] == 25
+        session.expire_all()
+        assert session.get(Goal, 1).title == "Goal"
+        for goal_id, node_id in node_ids.items():
+            assert get_node_id(session, session.get(Goal, goal_id)) == node_id
+        # Every imported row is registered exactly once
+        tasks = session.query(NodeRegistry).filter_by(layer="Task")
+        assert tasks.count() == 25
+        assert session.query(NodeRegistry).count() == (
+            session.query(NodeRegistry.layer, NodeRegistry.row_id)
+            .distinct()
+            .count()
+        )
+
+    def test_truncate_subset_needs_referencing_tables(
+        self: "TestPostgreSQLCopy", engine, session, tmp_path
+    ) -> None:
+        """Truncating goals alone is refused; with its links it reloads."""
+        before = self.snapshot(engine)
+        export_tables(engine, tmp_path)
+
+        with pytest.raises(ValueError, match="goals_labels, goals_phases"):
+            import_tables(
+                engine, tmp_path, tables=["goals"], mode="truncate"
+            )
+        assert self.snapshot(engine) == before
+
+        session.get(Goal, 1).title = "Local edit"
+        session.commit()
+        goal_tables = [
+            table.name
+            for table in Base.metadata.sorted_tables
+            if table.name == "goals"
+            or any(
+                key.column.table.name == "goals" for key in table.foreign_keys
+            )
+        ]
+        imported = import_tables(
+            engine, tmp_path, tables=goal_tables, mode="truncate"
+        )
+        assert imported["goals"] == 1
+        assert imported["goals_tasks"] == 25
+        assert self.snapshot(engine) == before
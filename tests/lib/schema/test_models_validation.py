@@ -6,6 +6,7 @@ Tests for validating ToDoWrite models using modern SQLAlchemy patterns.
 
 import json
 import tempfile
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import pytest
@@ -177,12 +178,32 @@ class TestModelsValidation:
         # Verify timestamps are set and valid
         assert goal.created_at is not None
         assert goal.updated_at is not None
-        assert len(goal.created_at) >= 19  # ISO format: "2025-01-01T00:00:00"
-        assert len(goal.updated_at) >= 19
 
-        # Verify timestamp format (basic check for ISO datetime)
-        assert "T" in goal.created_at
-        assert goal.created_at.count("-") == 2  # YYYY-MM-DD
+        # Verify timestamps are timezone-aware UTC datetimes
+        assert goal.created_at.utcoffset() == timedelta(0)
+        assert goal.updated_at.utcoffset() == timedelta(0)
+        assert goal.created_at <= goal.updated_at
+
+    def test_model_date_normalization(self, temp_session):
+        """Dates given with any offset, or as ISO strings, read back in UTC."""
+        started = datetime(2026, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+        task = Task(
+            title="Dated",
+            started_date=started,
+            completion_date="2026-01-02T00:00:00+00:00",
+        )
+        temp_session.add(task)
+        temp_session.commit()
+        temp_session.expire_all()
+
+        assert task.started_date == started
+        assert task.started_date.tzinfo == timezone.utc
+        assert task.started_date.hour == 10
+        assert task.completion_date == datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+        # Stored values order chronologically, so range filters work
+        found = temp_session.query(Task).filter(Task.completion_date > started).all()
+        assert found == [task]
 
     def test_model_field_length_validation(self, temp_session):
         """Test model field length validation."""
@@ -0,0 +1,174 @@
+"""Storage Backend Contract Tests
+
+Tests that save_many, get_many and delete_many (and the single-record
+methods built on them), iter_layer and transaction behave the same on
+SQLiteBackend in its default and single-writer modes, keep the node
+registry and hierarchy closure in step with the rows, and that the
+factory builds backends honouring the contract.
+"""
+
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+from todowrite.core.hierarchy import descendants
+from todowrite.core.models import Goal, Label, NodeClosure, Task
+from todowrite.core.node_registry import get_node_id
+from todowrite.storage import StorageBackend, create_storage_backend
+from todowrite.storage.backends import ID_CHUNK_SIZE
+from todowrite.storage.factory import (
+    create_storage_backend_for_environment,
+    detect_storage_backend_type,
+)
+from todowrite.storage.postgresql_backend import PostgreSQLBackend
+from todowrite.storage.sqlite_backend import SQLiteBackend
+
+
+class TestBackendBatches:
+    """Test the batch record API on SQLite."""
+
+    @pytest.fixture(params=[False, True], ids=["shared", "single-writer"])
+    def backend(self, request):
+        """A connected SQLite backend in each concurrency mode."""
+        with tempfile.TemporaryDirectory() as directory:
+            backend = SQLiteBackend(
+                Path(directory) / "todowrite.db", single_writer=request.param
+            )
+            backend.connect()
+            yield backend
+            backend.disconnect()
+
+    def test_is_storage_backend(self, backend):
+        """SQLite implements the shared contract."""
+        assert isinstance(backend, StorageBackend)
+        assert backend.backend_name == "sqlite"
+
+    def test_save_get_delete_many(self, backend):
+        """Records round-trip in batches, in the order asked for."""
+        tasks = backend.save_many(
+            Task(title=f"Task {i}") for i in range(ID_CHUNK_SIZE + 5)
+        )
+        assert [task.id for task in tasks[:3]] == [1, 2, 3]
+        assert tasks[0].status == "planned"
+
+        found = backend.get_many(Task, [3, 99999, 1, 3])
+        assert [task and task.title for task in found] == [
+            "Task 2",
+            None,
+            "Task 0",
+            "Task 2",
+        ]
+        everything = backend.get_many(Task, [task.id for task in tasks])
+        assert None not in everything
+
+        assert backend.delete_many(Task, range(1, ID_CHUNK_SIZE + 1)) == (
+            ID_CHUNK_SIZE
+        )
+        assert backend.delete_many(Task, [1, 2]) == 0
+        with backend.get_session() as session:
+            assert session.query(Task).count() == 5
+
+    def test_save_many_updates_loaded_records(self, backend):
+        """Records changed after loading are updated, not duplicated."""
+        first, second = backend.save_many(
+            [Task(title="a"), Task(title="b")]
+        )
+        first.status = "done"
+        backend.save_many([first, Task(title="c")])
+
+        assert backend.get_record(Task, first.id).status == "done"
+        assert backend.get_record(Task, second.id).status == "planned"
+        with backend.get_session() as session:
+            assert session.query(Task).count() == 3
+
+    def test_single_record_methods(self, backend):
+        """save_record/get_record/delete_record wrap the batch calls."""
+        label = backend.save_record(Label(name="x"))
+        assert backend.get_record(Label, label.id).name == "x"
+        assert backend.delete_record(label)
+        assert not backend.delete_record(label)
+        assert backend.get_record(Label, label.id) is None
+
+    def test_links_follow_batch_writes(self, backend):
+        """Registry entries and closure rows appear and go with records."""
+        goal = Goal(title="Goal")
+        goal.tasks.extend(Task(title=f"Task {i}") for i in range(3))
+        backend.save_many([goal])
+
+        with backend.get_session() as session:
+            assert len(descendants(session, "Goal-1", layer="Task")) == 3
+            assert get_node_id(session, session.get(Task, 1)) is not None
+
+        backend.delete_many(Task, [1, 2, 3])
+        with backend.get_session() as session:
+            assert descendants(session, "Goal-1") == []
+            assert session.execute(select(NodeClosure.__table__)).all() == []
+
+    def test_iter_layer_streams_in_order(self, backend):
+        """Every record of a layer comes back, batch after batch."""
+        backend.save_many(Task(title=f"Task {i}") for i in range(25))
+
+        titles = [task.title for task in backend.iter_layer("Task", 10)]
+        assert titles == [f"Task {i}" for i in range(25)]
+        assert list(backend.iter_layer("Goal")) == []
+        with pytest.raises(ValueError, match="Unknown layer"):
+            backend.iter_layer("Nope")
+
+    def test_transaction_commits_together(self, backend):
+        """A block's changes land at once, or not at all on error."""
+        with backend.transaction() as session:
+            goal = Goal(title="Goal")
+            session.add(goal)
+            session.flush()
+            goal.tasks.append(Task(title="Task"))
+        assert backend.get_record(Task, 1).title == "Task"
+
+        with pytest.raises(KeyError), backend.transaction() as session:
+            session.add(Task(title="Lost"))
+            session.flush()
+            raise KeyError("abort")
+        with backend.get_session() as session:
+            assert session.query(Task).count() == 1
+
+
+def test_factory_builds_contract_backends(tmp_path):
+    """create_storage_backend returns a StorageBackend for SQLite paths."""
+    backend = create_storage_backend(str(tmp_path / "todowrite.db"))
+    assert isinstance(backend, StorageBackend)
+    backend.connect()
+    try:
+        assert backend.save_record(Goal(title="g")).id == 1
+    finally:
+        backend.disconnect()
+
+
+@pytest.mark.parametrize(
+    "url", ["postgresql://h/db", "postgresql+psycopg://h/db"]
+)
+def test_factory_builds_postgresql_with_pool_settings(url, monkeypatch):
+    """Any postgresql driver URL gets a PostgreSQLBackend sized by env."""
+    monkeypatch.setenv("TODOWRITE_DB_POOL_SIZE", "3")
+    monkeypatch.setenv("TODOWRITE_DB_MAX_OVERFLOW", "4")
+    assert detect_storage_backend_type(url) == "postgresql"
+    for backend in (
+        create_storage_backend(url),
+        create_storage_backend_for_environment("production", url),
+    ):
+        assert isinstance(backend, PostgreSQLBackend)
+        assert (backend.pool_size, backend.max_overflow) == (3, 4)
+
+
+def test_single_writer_transaction_refuses_queued_writes(tmp_path):
+    """Queueing a write while holding the writer would deadlock."""
+    backend = SQLiteBackend(tmp_path / "todowrite.db", single_writer=True)
+    backend.connect()
+    try:
+        with pytest.raises(RuntimeError, match="inside a write"):
+            with backend.transaction():
+                backend.save_record(Goal(title="g"))
+        assert backend.save_record(Goal(title="g")).id == 1
+    finally:
+        backend.disconnect()
@@ -0,0 +1,149 @@
+"""Entity Cache Tests
+
+Tests that CachedBackend answers repeated reads from memory, that the
+LRU and TTL bounds hold, and that commits (ORM or bulk Core writes, in
+either SQLite concurrency mode) drop the entries of changed rows before
+the next read, while rollbacks and stale concurrent reads do not.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from todowrite.core.bulk import bulk_upsert
+from todowrite.core.models import Goal, Label, Task
+from todowrite.storage.cache import CachedBackend, EntityCache
+from todowrite.storage.sqlite_backend import SQLiteBackend
+
+
+@pytest.fixture(params=[False, True], ids=["shared", "single-writer"])
+def backend(request, tmp_path):
+    """A connected, cached SQLite backend in each concurrency mode."""
+    backend = CachedBackend(
+        SQLiteBackend(tmp_path / "todowrite.db", single_writer=request.param)
+    )
+    backend.connect()
+    yield backend
+    backend.disconnect()
+
+
+def test_repeated_reads_hit(backend):
+    """Only the first read of a record goes to the database."""
+    backend.save_many(Goal(title=f"Goal {i}") for i in range(3))
+
+    first = backend.get_many(Goal, [1, 2, 99])
+    second = backend.get_many(Goal, [2, 1, 1])
+    assert [goal and goal.title for goal in first] == [
+        "Goal 0",
+        "Goal 1",
+        None,
+    ]
+    assert second[1] is first[0]
+    assert backend.get_record(Goal, 99) is None
+
+    stats = backend.cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (2, 4, 2)
+    assert backend.backend_name == "sqlite"
+
+
+def test_commit_invalidates_changed_rows(backend):
+    """Updates and deletes are never served stale after commit."""
+    goal, label = backend.save_many([Goal(title="Old"), Label(name="x")])
+    assert backend.get_record(Goal, goal.id).title == "Old"
+    assert backend.get_record(Label, label.id).name == "x"
+
+    with backend.transaction() as session:
+        session.get(Goal, goal.id).title = "New"
+    assert backend.get_record(Goal, goal.id).title == "New"
+
+    backend.delete_many(Label, [label.id])
+    assert backend.get_record(Label, label.id) is None
+    assert backend.cache.stats().invalidations == 2
+
+
+def test_rollback_is_not_served(backend):
+    """Changes that never committed are not served."""
+    goal = backend.save_record(Goal(title="Kept"))
+    backend.get_record(Goal, goal.id)
+
+    with pytest.raises(KeyError), backend.transaction() as session:
+        session.get(Goal, goal.id).title = "Lost"
+        session.flush()
+        raise KeyError("abort")
+    assert backend.get_record(Goal, goal.id).title == "Kept"
+
+
+def test_bulk_upsert_invalidates(backend):
+    """Core writes reported by the bulk API drop cached rows."""
+    task = backend.save_record(Task(title="Before"))
+    backend.get_record(Task, task.id)
+
+    with backend.transaction() as session:
+        bulk_upsert(
+            session, "Task", [{"id": task.id, "title": "After"}], commit=False
+        )
+    assert backend.get_record(Task, task.id).title == "After"
+
+
+def test_lru_and_ttl_bounds():
+    """The least recently used entry goes first; old entries expire."""
+    cache = EntityCache(max_entries=2, ttl=0.05)
+    generation = cache.generation
+    cache.put(("Goal", 1), "one", generation)
+    cache.put(("Goal", 2), "two", generation)
+    assert cache.get(("Goal", 1)) == "one"
+    cache.put(("Goal", 3), "three", generation)
+
+    assert cache.get(("Goal", 2)) is None
+    assert cache.get(("Goal", 1)) == "one"
+    time.sleep(0.06)
+    assert cache.get(("Goal", 1)) is None
+
+    stats = cache.stats()
+    assert (stats.evictions, stats.expired, stats.size) == (1, 1, 1)
+    with pytest.raises(ValueError):
+        EntityCache(ttl=0)
+
+
+def test_read_older_than_invalidation_is_not_stored():
+    """A result read before an invalidation is not cached."""
+    cache = EntityCache()
+    generation = cache.generation
+    cache.invalidate([("Goal", 1)])
+    cache.put(("Goal", 1), "stale", generation)
+    assert cache.get(("Goal", 1)) is None
+
+
+def test_concurrent_readers_and_writer(tmp_path):
+    """Readers on other threads see every committed title."""
+    backend = CachedBackend(SQLiteBackend(tmp_path / "todowrite.db"))
+    backend.connect()
+    goal = backend.save_record(Goal(title="0"))
+    stop = threading.Event()
+    errors = []
+
+    def read() -> None:
+        seen = 0
+        while not stop.is_set():
+            title = int(backend.get_record(Goal, goal.id).title)
+            if title < seen:
+                errors.append((seen, title))
+            seen = title
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i in range(1, 30):
+            with backend.transaction() as session:
+                session.get(Goal, goal.id).title = str(i)
+            assert backend.get_record(Goal, goal.id).title == str(i)
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+        backend.disconnect()
+    assert errors == []
+    assert backend.cache.stats().hits > 0
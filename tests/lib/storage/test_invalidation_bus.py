@@ -0,0 +1,143 @@
+"""Invalidation Bus Tests
+
+Tests that commits on a publishing engine record one change per written
+row (and nothing on rollback), that a subscriber following the same
+SQLite file from another engine drops exactly the changed keys, and
+that it clears its cache when it may have missed changes.
+"""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from todowrite.core.models import Goal, Label
+from todowrite.storage import invalidation
+from todowrite.storage.cache import CachedBackend, EntityCache
+from todowrite.storage.invalidation import (
+    CHANGES_TABLE,
+    InvalidationSubscriber,
+    connect_invalidation_bus,
+    publish_invalidations,
+    stop_publishing,
+)
+from todowrite.storage.sqlite_backend import SQLiteBackend
+
+
+def changes(backend):
+    """Published (layer, row_id) pairs in order."""
+    with backend.get_session() as session:
+        return session.execute(
+            text(f"SELECT layer, row_id FROM {CHANGES_TABLE} ORDER BY seq")
+        ).all()
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until ``condition()`` holds."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def writer(tmp_path):
+    """A backend standing in for another process, publishing commits."""
+    backend = SQLiteBackend(tmp_path / "todowrite.db")
+    backend.connect()
+    publish_invalidations(backend.engine)
+    yield backend
+    stop_publishing(backend.engine)
+    backend.disconnect()
+
+
+def test_commits_publish_written_rows(writer):
+    """Each committed row is published once; rollbacks publish nothing."""
+    writer.save_many([Goal(title="g"), Label(name="x")])
+    with pytest.raises(KeyError), writer.transaction() as session:
+        session.add(Goal(title="lost"))
+        session.flush()
+        raise KeyError("abort")
+    with writer.transaction() as session:
+        session.get(Goal, 1).title = "changed"
+        with session.begin_nested():
+            session.add(Goal(title="nested"))
+
+    assert [tuple(row) for row in changes(writer)] == [
+        ("Goal", 1),
+        ("Label", 1),
+        ("Goal", 1),
+        ("Goal", 2),
+    ]
+
+
+def test_single_writer_publishes_group_commits(tmp_path):
+    """Writes committed as one group are published together."""
+    backend = SQLiteBackend(tmp_path / "todowrite.db", single_writer=True)
+    backend.connect()
+    try:
+        publish_invalidations(backend.writer.engine)
+        backend.save_many([Goal(title="g")])
+        backend.delete_many(Goal, [1])
+        assert [tuple(row) for row in changes(backend)] == [
+            ("Goal", 1),
+            ("Goal", 1),
+        ]
+    finally:
+        stop_publishing(backend.writer.engine)
+        backend.disconnect()
+
+
+def test_subscriber_drops_changed_keys(writer, tmp_path):
+    """Another process's commit evicts only the rows it changed."""
+    writer.save_many([Goal(title="one"), Goal(title="two")])
+    reader = CachedBackend(SQLiteBackend(tmp_path / "todowrite.db"))
+    reader.connect()
+    subscriber = connect_invalidation_bus(reader, poll_interval=0.01)
+    try:
+        assert [goal.title for goal in reader.get_many(Goal, [1, 2])] == [
+            "one",
+            "two",
+        ]
+        with writer.transaction() as session:
+            session.get(Goal, 1).title = "ONE"
+
+        assert wait_for(lambda: subscriber.events == 1)
+        assert reader.get_record(Goal, 1).title == "ONE"
+        assert reader.cache.stats().size == 2
+        assert reader.cache.stats().invalidations == 1
+        assert subscriber.last_version is not None
+    finally:
+        subscriber.stop()
+        stop_publishing(reader.backend.engine)
+        reader.disconnect()
+
+
+def test_subscriber_resets_when_pruned_past(writer, monkeypatch):
+    """Changes pruned before they were read clear the whole cache."""
+    cache = EntityCache()
+    cache.put(("Goal", 42), "cached", cache.generation)
+    subscriber = InvalidationSubscriber(
+        writer.engine, [cache], poll_interval=0.2
+    ).start()
+    try:
+        # The first commit prunes every change before the subscriber
+        # has read it
+        monkeypatch.setattr(invalidation, "RETAIN_CHANGES", 0)
+        invalidation._publishers[writer.engine].published = 99
+        writer.save_many([Label(name="pruned")])
+        writer.save_many([Label(name="kept")])
+
+        assert wait_for(lambda: subscriber.resets == 1)
+        assert cache.get(("Goal", 42)) is None
+    finally:
+        subscriber.stop()
+
+
+def test_unsupported_database():
+    """Only SQLite and PostgreSQL have a bus."""
+    engine = create_engine("sqlite://")
+    engine.dialect.name = "mysql"
+    with pytest.raises(ValueError, match="No invalidation bus"):
+        publish_invalidations(engine)
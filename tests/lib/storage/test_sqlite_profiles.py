@@ -0,0 +1,119 @@
+"""SQLite Pragma Profile Tests
+
+Tests that each named profile's pragmas are applied to every connection
+an engine opens (by SQLiteBackend, or by hand with apply_sqlite_profile),
+that the profile comes from TODOWRITE_SQLITE_PROFILE when not given, and
+that unknown names are refused. The opt-in benchmark (``pytest -m
+benchmark``) measures commit-heavy write throughput per profile against
+SQLite's default settings and reports it in the test summary.
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from todowrite.core.models import Base, Task
+from todowrite.storage.sqlite_backend import (
+    SQLITE_PROFILES,
+    SQLiteBackend,
+    apply_sqlite_profile,
+)
+
+# PRAGMA synchronous reads back as a number
+SYNCHRONOUS = {"OFF": 0, "NORMAL": 1, "FULL": 2}
+
+
+class TestSQLiteProfiles:
+    """Test SQLite pragma profiles."""
+
+    @pytest.fixture
+    def database_path(self):
+        """Path of a fresh temporary database."""
+        with tempfile.TemporaryDirectory() as directory:
+            yield Path(directory) / "todowrite.db"
+
+    @staticmethod
+    def pragmas(connection):
+        """Current values of the pragmas profiles set."""
+        return {
+            name: connection.execute(text(f"PRAGMA {name}")).scalar()
+            for name in (
+                "journal_mode",
+                "synchronous",
+                "cache_size",
+                "busy_timeout",
+            )
+        }
+
+    @pytest.mark.parametrize("profile", list(SQLITE_PROFILES))
+    def test_backend_applies_profile(self, database_path, profile):
+        """Every pooled connection of the backend runs the profile."""
+        backend = SQLiteBackend(database_path, profile=profile)
+        backend.connect()
+        try:
+            settings = SQLITE_PROFILES[profile]
+            with backend.get_session() as session:
+                assert self.pragmas(session.connection()) == {
+                    "journal_mode": "wal",
+                    "synchronous": SYNCHRONOUS[settings["synchronous"]],
+                    "cache_size": settings["cache_size"],
+                    "busy_timeout": settings["busy_timeout"],
+                }
+            assert backend.test_connection()
+        finally:
+            backend.disconnect()
+
+    def test_profile_from_environment(self, database_path, monkeypatch):
+        """Without a profile name, the environment (or balanced) decides."""
+        assert SQLiteBackend(database_path).profile == "balanced"
+
+        monkeypatch.setenv("TODOWRITE_SQLITE_PROFILE", "bulk-load")
+        engine = create_engine(f"sqlite:///{database_path}")
+        apply_sqlite_profile(engine)
+        with engine.connect() as connection:
+            assert self.pragmas(connection)["synchronous"] == 0
+        engine.dispose()
+
+    def test_unknown_profile(self, database_path, monkeypatch):
+        """Unknown names fail before any connection is opened."""
+        with pytest.raises(ValueError, match="Unknown SQLite profile"):
+            SQLiteBackend(database_path, profile="fast")
+        monkeypatch.setenv("TODOWRITE_SQLITE_PROFILE", "fast")
+        with pytest.raises(ValueError, match="Unknown SQLite profile"):
+            apply_sqlite_profile(create_engine("sqlite://"))
+
+    @pytest.mark.benchmark
+    def test_profile_write_throughput(self, database_path, record_property):
+        """Rows/s committing one small transaction per row, per profile."""
+        rows = 200
+        throughput = {}
+        # None: SQLite's own defaults (rollback journal, synchronous=FULL)
+        for profile in (None, *SQLITE_PROFILES):
+            path = database_path.with_name(f"{profile or 'default'}.db")
+            engine = create_engine(f"sqlite:///{path}")
+            if profile is not None:
+                apply_sqlite_profile(engine, profile)
+            Base.metadata.create_all(engine)
+            session = sessionmaker(bind=engine)()
+
+            start = time.perf_counter()
+            for i in range(rows):
+                session.add(Task(title=f"Task {i}"))
+                session.commit()
+            throughput[profile or "default"] = rows / (
+                time.perf_counter() - start
+            )
+
+            assert session.query(Task).count() == rows
+            session.close()
+            engine.dispose()
+
+        for name, rate in throughput.items():
+            record_property(f"{name} rows/s", round(rate))
+        # Skipping the per-commit sync is the point of the bulk-load profile
+        assert throughput["bulk-load"] > throughput["default"]
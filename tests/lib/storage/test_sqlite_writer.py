@@ -0,0 +1,196 @@
+"""SQLite Single-Writer Tests
+
+Tests that concurrent writes through SQLiteBackend(single_writer=True)
+are all committed, in groups, by one writer; that a failing write is
+rolled back without its group; that sessions only read; that two
+backends on one file serialize on the lock file; and that the queue
+reports depth and lock wait metrics.
+"""
+
+from __future__ import annotations
+
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from todowrite.core.models import Task
+from todowrite.storage import StorageConnectionError
+from todowrite.storage.sqlite_backend import SQLiteBackend
+from todowrite.storage.sqlite_writer import SQLiteWriteQueue
+
+
+class TestSQLiteSingleWriter:
+    """Test the single-writer SQLite mode."""
+
+    @pytest.fixture
+    def database_path(self):
+        """Path of a fresh temporary database."""
+        with tempfile.TemporaryDirectory() as directory:
+            yield Path(directory) / "todowrite.db"
+
+    @pytest.fixture
+    def backend(self, database_path):
+        """A connected single-writer backend."""
+        backend = SQLiteBackend(database_path, single_writer=True)
+        backend.connect()
+        yield backend
+        backend.disconnect()
+
+    @staticmethod
+    def write_tasks(backend, threads, writes):
+        """Write ``threads * writes`` tasks from concurrent threads."""
+
+        def worker(n):
+            for i in range(writes):
+                backend.write(
+                    lambda session, i=i: session.add(Task(title=f"{n}-{i}"))
+                )
+
+        workers = [
+            threading.Thread(target=worker, args=(n,)) for n in range(threads)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+    def test_concurrent_writes_group_commit(self, backend):
+        """Every queued write lands; bursts share commits."""
+        self.write_tasks(backend, threads=8, writes=25)
+
+        with backend.get_session() as session:
+            assert session.query(Task).count() == 200
+
+        metrics = backend.metrics()
+        assert metrics.writes == 200
+        assert metrics.failed_writes == 0
+        assert metrics.queue_depth == 0
+        assert 1 <= metrics.commits <= 200
+        assert metrics.max_queue_depth >= 1
+        assert metrics.lock_waits == metrics.commits
+        assert metrics.lock_wait_seconds >= 0
+
+    def test_failed_write_rolls_back_alone(self, backend):
+        """A write that raises is undone; its group still commits."""
+        backend.write(lambda session: None)  # writer is idle again
+        failing = backend.submit(lambda session: session.add(Task()))
+        passing = backend.submit(
+            lambda session: session.add(Task(title="kept"))
+        )
+
+        with pytest.raises(IntegrityError):
+            failing.result()
+        passing.result()
+
+        with backend.get_session() as session:
+            assert [task.title for task in session.query(Task)] == ["kept"]
+        assert backend.metrics().failed_writes == 1
+
+    def test_interrupted_transaction_rolls_back(self, backend):
+        """KeyboardInterrupt in a transaction reaches the caller only."""
+        with pytest.raises(KeyboardInterrupt), backend.transaction() as s:
+            s.add(Task(title="dropped"))
+            raise KeyboardInterrupt
+
+        backend.write(lambda session: session.add(Task(title="kept")))
+        with backend.get_session() as session:
+            assert [task.title for task in session.query(Task)] == ["kept"]
+
+    def test_base_exception_in_write_fails_its_future(self, backend):
+        """A write raising SystemExit fails alone; the writer keeps going."""
+
+        def exit_write(session):
+            raise SystemExit(1)
+
+        with pytest.raises(SystemExit):
+            backend.write(exit_write)
+        backend.write(lambda session: session.add(Task(title="kept")))
+        with backend.get_session() as session:
+            assert session.query(Task).count() == 1
+
+    def test_transaction_fails_when_begin_fails(self, database_path):
+        """A group that cannot BEGIN fails the transaction, not hangs."""
+        missing = database_path.parent / "missing" / "todowrite.db"
+        writer = SQLiteWriteQueue(create_engine(f"sqlite:///{missing}"))
+        errors = []
+
+        def borrow():
+            try:
+                with writer.transaction():
+                    pass
+            except OperationalError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=borrow, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+        try:
+            assert not thread.is_alive()
+            assert len(errors) == 1
+        finally:
+            writer.close()
+
+    def test_write_returns_loaded_objects(self, backend):
+        """Results come back after commit, with database defaults set."""
+
+        def create(session):
+            task = Task(title="t")
+            session.add(task)
+            return task
+
+        task = backend.write(create)
+        assert task.id == 1
+        assert task.status == "planned"
+
+    def test_sessions_are_read_only(self, backend):
+        """Reads bypass the writer and cannot write."""
+        with backend.get_session() as session:
+            with pytest.raises(OperationalError, match="readonly"):
+                session.execute(text("INSERT INTO tasks (title) VALUES ('x')"))
+
+    def test_nested_write_refused(self, backend):
+        """Queueing a write from inside a write would deadlock."""
+        with pytest.raises(RuntimeError, match="inside a write"):
+            backend.write(lambda session: backend.write(lambda s: None))
+
+    def test_backends_share_lock_file(self, database_path):
+        """Two writers on one file (as from two processes) both commit."""
+        first = SQLiteBackend(database_path, single_writer=True)
+        second = SQLiteBackend(database_path, single_writer=True)
+        first.connect()
+        second.connect()
+        try:
+            threads = [
+                threading.Thread(
+                    target=self.write_tasks, args=(backend, 2, 20)
+                )
+                for backend in (first, second)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert first.lock_path.exists()
+            with first.get_session() as session:
+                assert session.query(Task).count() == 80
+        finally:
+            first.disconnect()
+            second.disconnect()
+
+    def test_shared_mode_writes_directly(self, database_path):
+        """Without single_writer, write() commits on its own."""
+        backend = SQLiteBackend(database_path)
+        backend.connect()
+        try:
+            backend.write(lambda session: session.add(Task(title="t")))
+            with backend.get_session() as session:
+                assert session.query(Task).count() == 1
+            assert backend.metrics() is None
+            with pytest.raises(StorageConnectionError):
+                backend.submit(lambda session: None)
+        finally:
+            backend.disconnect()
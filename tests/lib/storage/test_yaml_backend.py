@@ -0,0 +1,200 @@
+"""YAML Backend Tests
+
+Tests that YAMLBackend loads a plan directory into its in-memory index,
+numbers and links saved nodes, rejects an invalid batch whole (IDs
+included), journals every batch so a restart loses nothing, compacts the
+journal into the canonical node files, and is built by the storage
+factory from a yaml:// URL.
+"""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+import yaml
+from todowrite.storage import StorageConnectionError, create_storage_backend
+from todowrite.storage.yaml_backend import JOURNAL_DIRECTORY, YAMLBackend
+
+
+def write_node(directory, layer_directory, node):
+    """Write one canonical node file."""
+    path = directory / layer_directory / f"{node['id']}.yaml"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(node))
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """A connected backend on an empty plan directory."""
+    backend = YAMLBackend(tmp_path)
+    backend.connect()
+    yield backend
+    backend.disconnect()
+
+
+def test_loads_existing_plan_directory(tmp_path):
+    """Canonical files are indexed, children lists included."""
+    write_node(
+        tmp_path,
+        "goals",
+        {
+            "id": "GOAL-1",
+            "layer": "Goal",
+            "title": "Ship",
+            "links": {"parents": [], "children": ["TSK-2"]},
+        },
+    )
+    write_node(
+        tmp_path,
+        "tasks",
+        {"id": "TSK-2", "layer": "Task", "title": "Write", "links": {}},
+    )
+    backend = YAMLBackend(tmp_path)
+    backend.connect()
+
+    assert backend.children("GOAL-1") == ["TSK-2"]
+    assert backend.parents("TSK-2") == ["GOAL-1"]
+    assert backend.get("GOAL-1")["links"]["children"] == ["TSK-2"]
+    assert backend.save_many([{"layer": "Task", "title": "Next"}])[0][
+        "id"
+    ] == "TSK-3"
+
+
+def test_unreadable_file_fails_connect(tmp_path):
+    """A file that is not a node document is reported, not skipped."""
+    (tmp_path / "tasks").mkdir()
+    (tmp_path / "tasks" / "TSK-1.yaml").write_text("- not a node\n")
+    with pytest.raises(StorageConnectionError, match="not a node"):
+        YAMLBackend(tmp_path).connect()
+
+
+def test_save_many_numbers_and_links(backend):
+    """IDs are numbered per layer; parents may come earlier in a batch."""
+    goal, first, second = backend.save_many(
+        [
+            {"layer": "Goal", "title": "Ship"},
+            {"layer": "task", "title": "A", "parents": ["GOAL-1"]},
+            {"layer": "Task", "title": "B", "links": {"parents": ["GOAL-1"]}},
+        ]
+    )
+    assert (goal["id"], first["id"], second["id"]) == (
+        "GOAL-1",
+        "TSK-1",
+        "TSK-2",
+    )
+    assert first["layer"] == "Task"
+    assert backend.get("GOAL-1")["links"]["children"] == ["TSK-1", "TSK-2"]
+    assert backend.get_many(["TSK-2", "TSK-9"])[0]["title"] == "B"
+    assert backend.get_many(["TSK-9"]) == [None]
+    assert [node["id"] for node in backend.iter_layer("Task", 1)] == [
+        "TSK-1",
+        "TSK-2",
+    ]
+    with pytest.raises(ValueError, match="Unknown layer"):
+        backend.iter_layer("Nope")
+
+
+def test_invalid_batch_writes_nothing(backend, tmp_path):
+    """One bad node rejects its whole batch."""
+    for bad in (
+        {"layer": "Task"},
+        {"layer": "Task", "title": "t", "parents": ["GOAL-9"]},
+        {"layer": "Task", "title": "t", "command": {"ac_ref": "AC-1"}},
+        {"layer": "Nope", "title": "t"},
+    ):
+        with pytest.raises(ValueError):
+            backend.save_many([{"layer": "Goal", "title": "Ok"}, bad])
+    assert backend.layer_ids("Goal") == []
+    assert not (tmp_path / JOURNAL_DIRECTORY).exists()
+
+    # Rejected batches use up no IDs
+    [goal] = backend.save_many([{"layer": "Goal", "title": "Next"}])
+    assert goal["id"] == "GOAL-1"
+
+
+def test_delete_removes_links(backend):
+    """Children outlive a deleted parent, without the link to it."""
+    backend.save_many(
+        [
+            {"layer": "Goal", "title": "Ship"},
+            {"layer": "Task", "title": "A", "parents": ["GOAL-1"]},
+        ]
+    )
+    assert backend.delete_many(["GOAL-1", "GOAL-1", "GOAL-7"]) == 1
+    assert backend.get("GOAL-1") is None
+    assert backend.parents("TSK-1") == []
+    assert backend.children("GOAL-1") == []
+
+
+def test_journal_survives_restart(tmp_path):
+    """Batches not yet compacted are replayed on the next connect."""
+    backend = YAMLBackend(tmp_path)
+    backend.connect()
+    backend.save_many(
+        [
+            {"layer": "Goal", "title": "Ship"},
+            {"layer": "Task", "title": "A", "parents": ["GOAL-1"]},
+        ]
+    )
+    backend.delete_many(["TSK-1"])
+    assert not (tmp_path / "goals").exists()
+
+    reopened = YAMLBackend(tmp_path)
+    reopened.connect()
+    assert reopened.layer_ids("Goal") == ["GOAL-1"]
+    assert reopened.get("TSK-1") is None
+    assert reopened.stats()["journal_files"] == 2
+
+
+def test_compact_writes_canonical_files(backend, tmp_path):
+    """Compaction rewrites changed files and drops the journal."""
+    backend.save_many(
+        [
+            {"layer": "Goal", "title": "Ship"},
+            {"layer": "Task", "title": "A", "parents": ["GOAL-1"]},
+            {"layer": "Task", "title": "B", "parents": ["GOAL-1"]},
+        ]
+    )
+    backend.delete_many(["TSK-2"])
+    assert backend.compact() == 3
+
+    goal = yaml.safe_load((tmp_path / "goals" / "GOAL-1.yaml").read_text())
+    assert goal["links"]["children"] == ["TSK-1"]
+    assert not (tmp_path / "tasks" / "TSK-2.yaml").exists()
+    assert list((tmp_path / JOURNAL_DIRECTORY).iterdir()) == []
+
+    # Moving a child rewrites the parent it left
+    backend.save_many(
+        [{"id": "TSK-1", "title": "A"}, {"layer": "Goal", "title": "Two"}]
+    )
+    backend.disconnect()
+    reopened = YAMLBackend(tmp_path)
+    reopened.connect()
+    assert reopened.children("GOAL-1") == []
+    assert reopened.get("GOAL-2")["title"] == "Two"
+
+
+def test_background_compaction(tmp_path):
+    """Enough journal files start a compaction on its own thread."""
+    backend = YAMLBackend(tmp_path, compact_after=3)
+    backend.connect()
+    for i in range(3):
+        backend.save_many([{"layer": "Goal", "title": f"Goal {i}"}])
+
+    journal = tmp_path / JOURNAL_DIRECTORY
+    deadline = time.monotonic() + 5
+    while any(journal.iterdir()) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert backend.stats()["journal_files"] == 0
+    assert len(list((tmp_path / "goals").glob("*.yaml"))) == 3
+    backend.disconnect()
+
+
+def test_factory_builds_yaml_backend(tmp_path):
+    """yaml:// URLs name a plan directory; single files are refused."""
+    backend = create_storage_backend(f"yaml://{tmp_path}")
+    assert isinstance(backend, YAMLBackend)
+    assert backend.directory == tmp_path
+    with pytest.raises(StorageConnectionError, match="plan directory"):
+        create_storage_backend(str(tmp_path / "plan.yaml"))
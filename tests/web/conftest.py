@@ -0,0 +1,69 @@
+"""
+Pytest configuration for the web API tests.
+
+The web application binds its asyncio engine to ``TODOWRITE_DATABASE_URL``
+on import. Each test swaps in an engine of its own on a temporary SQLite
+file (aiosqlite), so the routes never touch the shared test database that
+the root conftest points that variable at.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from todowrite.core.models import Base
+from todowrite_web import database, main
+from todowrite_web.main import app
+from todowrite_web.metrics import pool_metrics
+
+
+@pytest.fixture
+def database_url(tmp_path: Path) -> str:
+    """URL of a fresh SQLite database with the ToDoWrite tables."""
+    url = f"sqlite:///{tmp_path / 'todowrite_web.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def web_engine(
+    database_url: str, monkeypatch: pytest.MonkeyPatch
+) -> Generator[AsyncEngine, None, None]:
+    """The application's asyncio engine, bound to this test's database."""
+    monkeypatch.setattr(pool_metrics, "pool", pool_metrics.pool)
+    engine = database.create_web_engine(database_url)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(
+        database,
+        "SessionLocal",
+        async_sessionmaker(engine, expire_on_commit=False),
+    )
+    monkeypatch.setattr(main, "engine", engine)
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def db(database_url: str, web_engine: AsyncEngine) -> Generator[Session, None, None]:
+    """A synchronous session on the web database."""
+    engine = create_engine(database_url)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(db: Session) -> Generator[TestClient, None, None]:
+    """A client for the web application; disposes its pool on exit."""
+    with TestClient(app) as client:
+        yield client
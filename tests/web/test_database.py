@@ -0,0 +1,106 @@
+"""Web Database Tests
+
+Tests that the web engine runs on aiosqlite for sqlite:// URLs, that
+get_db hands out a session on a checked-out connection and rolls back
+when the handler fails, that execute_concurrently returns each
+statement's rows in order, and that /metrics reports the checkouts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from todowrite.core.models import Goal, Task
+from todowrite_web import database
+from todowrite_web.database import (
+    async_database_url,
+    execute_concurrently,
+    get_db,
+)
+from todowrite_web.metrics import pool_metrics
+
+
+def run(coroutine):
+    """Run a coroutine to completion, then release the pooled connections."""
+
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await database.engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_async_driver_for_each_url(web_engine):
+    """Plain URLs get an asyncio driver; explicit drivers are kept."""
+    assert web_engine.dialect.driver == "aiosqlite"
+    assert async_database_url("postgresql://h/db") == "postgresql+asyncpg://h/db"
+    assert async_database_url("sqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+    assert (
+        async_database_url("postgresql+psycopg://h/db")
+        == "postgresql+psycopg://h/db"
+    )
+    with pytest.raises(ValueError, match="requires PostgreSQL"):
+        async_database_url("mysql://h/db")
+
+
+def test_get_db_rolls_back_failed_requests(db):
+    """Work of a handler that raises is not committed."""
+
+    async def request(fail):
+        sessions = get_db()
+        session = await anext(sessions)
+        assert session.in_transaction()  # connection checked out up front
+        session.add(Goal(title="fails" if fail else "kept"))
+        await session.flush()
+        if fail:
+            with pytest.raises(RuntimeError):
+                await sessions.athrow(RuntimeError("handler failed"))
+        else:
+            await session.commit()
+            await sessions.aclose()
+
+    run(request(fail=True))
+    run(request(fail=False))
+    assert [goal.title for goal in db.query(Goal)] == ["kept"]
+
+
+def test_execute_concurrently_keeps_statement_order(db):
+    """Each statement's rows come back in the order given."""
+    db.add_all([Goal(title="g"), Task(title="t1"), Task(title="t2")])
+    db.commit()
+    checkouts = pool_metrics.checkouts
+
+    tasks, goals = run(
+        execute_concurrently(
+            [
+                select(Task.title).order_by(Task.title),
+                select(Goal.title),
+            ]
+        )
+    )
+
+    assert [row.title for row in tasks] == ["t1", "t2"]
+    assert [row.title for row in goals] == ["g"]
+    assert pool_metrics.checkouts == checkouts + 2  # one connection each
+
+
+def test_metrics_report_pool_usage(client):
+    """The Prometheus page counts the request's checkout and its wait."""
+    before = pool_metrics.checkouts
+    assert client.get("/api/stats").status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = dict(
+        line.rsplit(" ", 1)
+        for line in response.text.splitlines()
+        if not line.startswith("#")
+    )
+    assert int(lines["todowrite_db_pool_checkouts_total"]) > before
+    assert lines["todowrite_db_pool_checked_out"] == "0"
+    assert int(lines["todowrite_db_pool_checkout_wait_seconds_count"]) > 0
@@ -0,0 +1,94 @@
+"""Hierarchy API Tests
+
+Tests that the tree endpoint nests a node once per parent with the depth
+of each placement, and that moves rewrite the real join table columns
+and keep the closure table in step.
+"""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select
+from todowrite.core.hierarchy import ancestors, descendants
+from todowrite.core.models import Goal, Phase, Step, Task, goals_tasks
+
+
+@pytest.fixture
+def tree(db):
+    """Goal -> Phase -> Step -> Task, plus Goal -> Task, and a second Goal."""
+    goal = Goal(title="Goal")
+    phase = Phase(title="Phase")
+    step = Step(title="Step")
+    task = Task(title="Task")
+    other = Goal(title="Other")
+    goal.phases.append(phase)
+    phase.steps.append(step)
+    step.tasks.append(task)
+    goal.tasks.append(task)
+    db.add_all([goal, other])
+    db.commit()
+    return goal, phase, step, task, other
+
+
+def nested(node):
+    """Every (type, id, depth) placement below ``node``, depth first."""
+    for child in node["children"]:
+        yield child["type"], child["id"], child["depth"]
+        yield from nested(child)
+
+
+def test_tree_places_shared_node_per_parent(client, tree):
+    """A task under the goal and under its step gets a depth for each."""
+    goal, *_rest = tree
+    response = client.get(f"/api/hierarchy/tree/goal/{goal.id}?max_depth=5")
+
+    assert response.status_code == 200
+    root = response.json()["tree"]
+    assert (root["type"], root["depth"]) == ("goal", 0)
+    assert sorted(nested(root)) == [
+        ("phase", 1, 1),
+        ("step", 1, 2),
+        ("task", 1, 1),
+        ("task", 1, 3),
+    ]
+
+
+def test_move_to_parent_updates_join_rows_and_closure(client, db, tree):
+    """Moving the task detaches it from both parents and links the new one."""
+    goal, _phase, step, task, other = tree
+    response = client.post(
+        "/api/hierarchy/move",
+        json={
+            "dragged_item_id": task.id,
+            "dragged_item_type": "task",
+            "target_item_id": other.id,
+            "target_item_type": "goal",
+            "new_parent_id": other.id,
+            "new_parent_type": "goal",
+            "operation_type": "move_to_parent",
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    db.expire_all()
+    assert db.execute(select(goals_tasks)).all() == [(other.id, task.id)]
+    assert step.tasks == []
+    assert ancestors(db, task) == [other]
+    assert descendants(db, goal, layer="Task") == []
+
+
+def test_move_rejects_invalid_parent(client, tree):
+    """A goal cannot be dropped under a task."""
+    goal, *_rest, task, _other = tree
+    response = client.post(
+        "/api/hierarchy/move",
+        json={
+            "dragged_item_id": goal.id,
+            "dragged_item_type": "goal",
+            "target_item_id": task.id,
+            "target_item_type": "task",
+            "operation_type": "move_between_parents",
+        },
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,125 @@
+"""Item API Tests
+
+Tests that items are fetched by global or typed node ID, that rows with
+no progress recorded are served rather than failing validation, that a
+created item comes back with its database-set timestamps, that the
+batch endpoint writes items with their labels and links in one
+transaction, and that listing and stats read what it wrote.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from todowrite.core.hierarchy import ancestors
+from todowrite.core.models import Goal, Task
+from todowrite.core.node_registry import get_node_id
+
+
+@pytest.fixture
+def task(db):
+    """A task with no progress recorded, created after a goal."""
+    db.add(Goal(title="Goal"))
+    task = Task(title="Task", progress=None)
+    db.add(task)
+    db.commit()
+    return task
+
+
+def test_get_item_by_global_and_typed_id(client, db, task):
+    """Both ID forms return the same item with its global node ID."""
+    node_id = get_node_id(db, task)
+    by_global = client.get(f"/api/items/{node_id}")
+    by_typed = client.get(f"/api/items/Task-{task.id}")
+
+    assert by_global.status_code == 200, by_global.text
+    assert by_typed.json() == by_global.json()
+    assert by_global.json()["node_id"] == node_id
+    assert by_global.json()["layer"] == "task"
+    assert by_global.json()["progress"] == 0
+
+
+def test_search_returns_global_node_ids(client, db, task):
+    """Search hits carry the same node ID as the item endpoint."""
+    response = client.get("/api/search", params={"q": "task"})
+
+    assert response.status_code == 200, response.text
+    [hit] = response.json()["items"]
+    assert hit["node_id"] == get_node_id(db, task)
+
+
+def test_get_item_not_found(client, task):
+    """Unknown or malformed IDs are 404s, not validation errors."""
+    assert client.get("/api/items/Task-99").status_code == 404
+    assert client.get("/api/items/999").status_code == 404
+    assert client.get("/api/items/nonsense").status_code == 404
+
+
+def test_create_item_returns_server_defaults(client, db):
+    """The response carries the id and timestamps the database set."""
+    response = client.post(
+        "/api/items", json={"layer": "task", "title": "Created"}
+    )
+
+    assert response.status_code == 200, response.text
+    created = response.json()
+    task = db.get(Task, created["id"])
+    assert created["node_id"] == get_node_id(db, task)
+    assert datetime.fromisoformat(created["created_at"]) == task.created_at
+    assert datetime.fromisoformat(created["updated_at"]) == task.updated_at
+
+
+def test_batch_creates_linked_items(client, db):
+    """Items, labels and ref-based parents are written in one call."""
+    response = client.post(
+        "/api/items:batch",
+        json={
+            "items": [
+                {"layer": "goal", "title": "Ship", "ref": "ship"},
+                {
+                    "layer": "task",
+                    "title": "Build",
+                    "labels": ["ci"],
+                    "parents": ["ship"],
+                },
+                {"layer": "task", "title": "Test", "parents": ["ship"]},
+            ]
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    results = {result["layer"]: result for result in response.json()["results"]}
+    assert results["Goal"]["created"] == 1
+    assert results["Task"]["created"] == 2
+    assert results["Task"]["labels"] == 1
+    assert results["Task"]["links"] == 2
+    task = db.get(Task, results["Task"]["ids"][0])
+    assert [label.name for label in task.labels] == ["ci"]
+    assert ancestors(db, task) == [db.get(Goal, results["Goal"]["ids"][0])]
+
+    listed = client.get("/api/items", params={"layer": "task"}).json()
+    assert sorted(item["title"] for item in listed["items"]) == [
+        "Build",
+        "Test",
+    ]
+    stats = client.get("/api/stats").json()
+    assert (stats["goals"], stats["tasks"], stats["total"]) == (1, 2, 4)
+
+
+def test_batch_is_all_or_nothing(client, db):
+    """An invalid item rejects the whole batch with a 400."""
+    response = client.post(
+        "/api/items:batch",
+        json={
+            "items": [
+                {"layer": "goal", "title": "Kept?"},
+                {"layer": "nonsense", "title": "Bad"},
+            ]
+        },
+    )
+
+    assert response.status_code == 400
+    assert "Unknown layer" in response.json()["detail"]
+    assert db.query(Goal).count() == 0
+
@@ -4,34 +4,33 @@ Handles cross-layer moves and reordering of the 12-layer hierarchy.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel
 
 from todowrite import (
-    Goal, Concept, Context, Constraint, Requirement,
+    Goal, Concept, Context, Constraints, Requirements,
     AcceptanceCriteria, InterfaceContract, Phase, Step,
     Task, SubTask, Command, Base
 )
-from todowrite_web.database import get_db
+from todowrite.core.hierarchy import (
+    HIERARCHY_EDGES,
+    NodeKey,
+    link,
+    subtree_edges,
+    unlink,
+)
+from todowrite.core.models import LAYER_MODELS, NodeClosure
+from todowrite.core.node_registry import format_node_id, layer_of
+from todowrite_web.database import execute_concurrently, get_db
 
 router = APIRouter(prefix="/api/hierarchy", tags=["hierarchy"])
 
-# Layer hierarchy mapping for validation
-LAYER_HIERARCHY = {
-    "goal": [],
-    "concept": ["goal"],
-    "context": ["goal", "concept"],
-    "constraints": ["goal", "concept", "context"],
-    "requirement": ["goal", "concept", "context", "constraints"],
-    "acceptancecriteria": ["goal", "concept", "context", "constraints", "requirement"],
-    "interfacecontract": ["goal", "concept", "context", "constraints", "requirement", "acceptancecriteria"],
-    "phase": ["goal", "concept", "context", "constraints", "requirement", "acceptancecriteria", "interfacecontract"],
-    "step": ["goal", "concept", "context", "constraints", "requirement", "acceptancecriteria", "interfacecontract", "phase"],
-    "task": ["goal", "concept", "context", "constraints", "requirement", "acceptancecriteria", "interfacecontract", "phase", "step"],
-    "subtask": ["goal", "concept", "context", "constraints", "requirement", "acceptancecriteria", "interfacecontract", "phase", "step", "task"],
-    "command": ["goal", "concept", "context", "constraints", "requirement", "acceptancecriteria", "interfacecontract", "phase", "step", "task", "subtask"]
+# (parent layer, child layer) pairs that have a join table
+HIERARCHY_LINKS = {
+    (edge.parent_layer, edge.child_layer) for edge in HIERARCHY_EDGES
 }
 
 # Model mapping for dynamic access
@@ -39,8 +38,8 @@ MODEL_MAPPING = {
     "goal": Goal,
     "concept": Concept,
     "context": Context,
-    "constraint": Constraint,
-    "requirement": Requirement,
+    "constraint": Constraints,
+    "requirement": Requirements,
     "acceptancecriteria": AcceptanceCriteria,
     "interfacecontract": InterfaceContract,
     "phase": Phase,
@@ -50,38 +49,8 @@ MODEL_MAPPING = {
     "command": Command
 }
 
-# Association table mappings
-ASSOCIATION_TABLES = {
-    ("goal", "concept"): "goals_concepts",
-    ("goal", "context"): "goals_contexts",
-    ("goal", "constraint"): "constraints_goals",
-    ("goal", "requirement"): "goals_requirements",
-    ("goal", "phase"): "goals_phases",
-    ("goal", "task"): "goals_tasks",
-    ("goal", "label"): "goals_labels",
-    ("concept", "context"): "concepts_contexts",
-    ("concept", "label"): "concepts_labels",
-    ("context", "label"): "contexts_labels",
-    ("constraint", "goal"): "constraints_goals",
-    ("constraint", "requirement"): "constraints_requirements",
-    ("constraint", "label"): "constraints_labels",
-    ("requirement", "acceptancecriteria"): "requirements_acceptance_criteria",
-    ("requirement", "concept"): "requirements_concepts",
-    ("requirement", "context"): "requirements_contexts",
-    ("requirement", "label"): "requirements_labels",
-    ("acceptancecriteria", "interfacecontract"): "acceptance_criteria_interface_contracts",
-    ("acceptancecriteria", "label"): "acceptance_criteria_labels",
-    ("interfacecontract", "phase"): "interface_contracts_phases",
-    ("interfacecontract", "label"): "interface_contracts_labels",
-    ("phase", "step"): "phases_steps",
-    ("phase", "label"): "phases_labels",
-    ("step", "task"): "steps_tasks",
-    ("step", "label"): "steps_labels",
-    ("task", "subtask"): "tasks_sub_tasks",
-    ("task", "label"): "tasks_labels",
-    ("subtask", "command"): "sub_tasks_commands",
-    ("subtask", "label"): "sub_tasks_labels"
-}
+# Model class -> API type string
+MODEL_TYPES = {model: model_type for model_type, model in MODEL_MAPPING.items()}
 
 class MoveOperation(BaseModel):
     """Request model for move operations."""
@@ -116,30 +85,33 @@ def get_model_class(model_type: str):
 
 def validate_parent_child(parent_type: str, child_type: str) -> bool:
     """Validate if a child can be placed under a parent according to hierarchy rules."""
-    parent_type = parent_type.lower()
-    child_type = child_type.lower()
-
-    if parent_type == "constraints":
-        parent_type = "constraint"
-    elif child_type == "acceptancecriteria":
-        child_type = "acceptancecriteria"
-
-    return child_type in LAYER_HIERARCHY.get(parent_type, [])
+    parent_layer = layer_of(get_model_class(parent_type))
+    child_layer = layer_of(get_model_class(child_type))
+    return (parent_layer, child_layer) in HIERARCHY_LINKS
 
-def get_association_table(parent_type: str, child_type: str) -> Optional[str]:
-    """Get association table name for parent-child relationship."""
-    parent_type = parent_type.lower()
-    child_type = child_type.lower()
-
-    if parent_type == "constraints":
-        parent_type = "constraint"
+def move_node(session: Session, child: NodeKey, parent: NodeKey) -> None:
+    """
+    Detach ``child`` from its current parents and link it under ``parent``.
 
-    return ASSOCIATION_TABLES.get((parent_type, child_type))
+    Goes through ``link``/``unlink``, so the join rows use the real column
+    names and the closure table follows the move.
+    """
+    closure = NodeClosure.__table__.c
+    current = session.execute(
+        select(closure.ancestor_layer, closure.ancestor_id).where(
+            closure.descendant_layer == child[0],
+            closure.descendant_id == child[1],
+            closure.depth == 1,
+        )
+    ).all()
+    for parent_layer, parent_id in current:
+        unlink(session, (parent_layer, parent_id), child)
+    link(session, parent, child)
 
 @router.post("/move", response_model=HierarchyResponse)
 async def move_hierarchy_item(
     operation: MoveOperation,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> HierarchyResponse:
     """
     Move an item within the hierarchy.
@@ -155,13 +127,8 @@ async def move_hierarchy_item(
         target_model = get_model_class(operation.target_item_type)
 
         # Get the actual database items
-        dragged_item = db.query(dragged_model).filter(
-            dragged_model.id == operation.dragged_item_id
-        ).first()
-
-        target_item = db.query(target_model).filter(
-            target_model.id == operation.target_item_id
-        ).first()
+        dragged_item = await db.get(dragged_model, operation.dragged_item_id)
+        target_item = await db.get(target_model, operation.target_item_id)
 
         if not dragged_item:
             raise HTTPException(
@@ -191,7 +158,7 @@ async def move_hierarchy_item(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Move operation failed: {str(e)}"
@@ -199,7 +166,7 @@ async def move_hierarchy_item(
 
 async def handle_move_to_parent(
     operation: MoveOperation,
-    db: Session,
+    db: AsyncSession,
     dragged_item: Base
 ) -> HierarchyResponse:
     """Handle moving an item to a new parent."""
@@ -219,9 +186,7 @@ async def handle_move_to_parent(
 
     # Get the new parent
     parent_model = get_model_class(operation.new_parent_type)
-    new_parent = db.query(parent_model).filter(
-        parent_model.id == operation.new_parent_id
-    ).first()
+    new_parent = await db.get(parent_model, operation.new_parent_id)
 
     if not new_parent:
         raise HTTPException(
@@ -229,21 +194,12 @@ async def handle_move_to_parent(
             detail=f"New parent not found: {operation.new_parent_type} #{operation.new_parent_id}"
         )
 
-    # Remove from old parent if exists
-    await remove_from_current_parent(operation, db)
-
-    # Add to new parent
-    association_table = get_association_table(operation.new_parent_type, operation.dragged_item_type)
-    if association_table:
-        # Use association table
-        query = text(f"""
-            INSERT INTO {association_table}
-            ({operation.new_parent_type}_id, {operation.dragged_item_type}_id)
-            VALUES (:parent_id, :child_id)
-        """)
-        db.execute(query, {"parent_id": operation.new_parent_id, "child_id": operation.dragged_item_id})
-
-    db.commit()
+    await db.run_sync(
+        move_node,
+        (layer_of(dragged_item), dragged_item.id),
+        (layer_of(new_parent), new_parent.id),
+    )
+    await db.commit()
 
     return HierarchyResponse(
         success=True,
@@ -252,7 +208,7 @@ async def handle_move_to_parent(
 
 async def handle_reorder(
     operation: MoveOperation,
-    db: Session,
+    db: AsyncSession,
     dragged_item: Base,
     target_item: Base
 ) -> HierarchyResponse:
@@ -261,7 +217,7 @@ async def handle_reorder(
     # For now, we'll implement a basic reordering logic
     # In a full implementation, you'd want to add order columns to association tables
 
-    db.commit()
+    await db.commit()
 
     return HierarchyResponse(
         success=True,
@@ -270,50 +226,36 @@ async def handle_reorder(
 
 async def handle_cross_parent_move(
     operation: MoveOperation,
-    db: Session,
+    db: AsyncSession,
     dragged_item: Base,
     target_item: Base
 ) -> HierarchyResponse:
     """Handle moving an item from one parent to another."""
 
-    # Remove from current parent
-    await remove_from_current_parent(operation, db)
-
-    # Add to new parent (target)
-    association_table = get_association_table(operation.target_item_type, operation.dragged_item_type)
-    if association_table:
-        query = text(f"""
-            INSERT INTO {association_table}
-            ({operation.target_item_type}_id, {operation.dragged_item_type}_id)
-            VALUES (:parent_id, :child_id)
-        """)
-        db.execute(query, {"parent_id": operation.target_item_id, "child_id": operation.dragged_item_id})
+    if not validate_parent_child(operation.target_item_type, operation.dragged_item_type):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot move {operation.dragged_item_type} under {operation.target_item_type}"
+        )
 
-    db.commit()
+    await db.run_sync(
+        move_node,
+        (layer_of(dragged_item), dragged_item.id),
+        (layer_of(target_item), target_item.id),
+    )
+    await db.commit()
 
     return HierarchyResponse(
         success=True,
         message=f"Successfully moved {operation.dragged_item_type} to new parent"
     )
 
-async def remove_from_current_parent(operation: MoveOperation, db: Session) -> None:
-    """Remove item from its current parent relationships."""
-
-    # Check all possible association tables and remove the relationship
-    for (parent_type, child_type), table_name in ASSOCIATION_TABLES.items():
-        if child_type == operation.dragged_item_type.lower():
-            query = text(f"""
-                DELETE FROM {table_name}
-                WHERE {child_type}_id = :child_id
-            """)
-            db.execute(query, {"child_id": operation.dragged_item_id})
-
 @router.get("/tree/{parent_type}/{parent_id}")
 async def get_hierarchy_tree(
     parent_type: str,
     parent_id: int,
     max_depth: int = 3,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """
     Get a hierarchical tree view of items starting from a parent.
@@ -326,9 +268,7 @@ async def get_hierarchy_tree(
 
     try:
         parent_model = get_model_class(parent_type)
-        parent_item = db.query(parent_model).filter(
-            parent_model.id == parent_id
-        ).first()
+        parent_item = await db.get(parent_model, parent_id)
 
         if not parent_item:
             raise HTTPException(
@@ -357,22 +297,64 @@ async def build_hierarchy_tree(
     parent_type: str,
     parent_id: int,
     max_depth: int,
-    db: Session,
-    current_depth: int = 0
+    db: AsyncSession
 ) -> Dict[str, Any]:
-    """Recursively build hierarchy tree."""
+    """
+    Build the nested tree below a parent, down to ``max_depth`` levels.
 
-    if current_depth >= max_depth:
-        return {}
+    All links of the subtree come from one recursive CTE; node fields are
+    then read with one query per layer present, issued concurrently, and the
+    nesting is assembled from the depth-ordered links. A node linked under
+    two parents appears under both, each copy with the depth it sits at.
+    """
+    root_layer = layer_of(get_model_class(parent_type))
+    links = await db.run_sync(
+        subtree_edges, format_node_id(root_layer, parent_id), max_depth
+    )
+
+    ids_by_layer: Dict[str, set] = {root_layer: {parent_id}}
+    for _depth, _parent_layer, _parent_row, child_layer, child_row in links:
+        ids_by_layer.setdefault(child_layer, set()).add(child_row)
+
+    # The per-layer reads are independent, so they run concurrently
+    models = [LAYER_MODELS[layer] for layer in ids_by_layer]
+    layer_rows = await execute_concurrently([
+        select(model.id, model.title, model.status).where(model.id.in_(ids))
+        for model, ids in zip(models, ids_by_layer.values())
+    ])
+
+    fields: Dict[tuple, Dict[str, Any]] = {}
+    for layer, model, rows in zip(ids_by_layer, models, layer_rows):
+        node_type = MODEL_TYPES[model]
+        for row_id, title, item_status in rows:
+            fields[(layer, row_id)] = {
+                "id": row_id,
+                "type": node_type,
+                "title": title,
+                "status": item_status,
+            }
+
+    # Children of each (depth, parent) placement; a link reached along
+    # several routes of the same length is listed once
+    children: Dict[tuple, List[tuple]] = {}
+    for depth, parent_layer, parent_row, child_layer, child_row in links:
+        placed = children.setdefault((depth, (parent_layer, parent_row)), [])
+        if (child_layer, child_row) not in placed:
+            placed.append((child_layer, child_row))
+
+    def place(key: tuple, depth: int) -> Dict[str, Any]:
+        # Each placement gets its own dict, so a node under two parents
+        # reports the depth it sits at under each
+        return {
+            **fields[key],
+            "depth": depth,
+            "children": [
+                place(child, depth + 1)
+                for child in children.get((depth + 1, key), [])
+            ],
+        }
 
-    # This would need to be implemented based on your specific schema
-    # For now, return a placeholder structure
-    return {
-        "id": parent_id,
-        "type": parent_type,
-        "children": [],
-        "depth": current_depth
-    }
+    return place((root_layer, parent_id), 0)
 
 @router.get("/validate-move/{item_type}/{item_id}/to/{parent_type}/{parent_id}")
 async def validate_move(
@@ -380,7 +362,7 @@ async def validate_move(
     item_id: int,
     parent_type: str,
     parent_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """
     Validate if an item can be moved to a new parent.
@@ -393,8 +375,8 @@ async def validate_move(
         item_model = get_model_class(item_type)
         parent_model = get_model_class(parent_type)
 
-        item_exists = db.query(item_model).filter(item_model.id == item_id).first() is not None
-        parent_exists = db.query(parent_model).filter(parent_model.id == parent_id).first() is not None
+        item_exists = await db.get(item_model, item_id) is not None
+        parent_exists = await db.get(parent_model, parent_id) is not None
 
         if not item_exists:
             return {
@@ -1,19 +1,143 @@
 """
 Database configuration and session management for ToDoWrite web application.
+
+The web service runs on an asyncio engine so a slow query suspends only the
+request that issued it instead of stalling the uvicorn event loop. Plain
+``postgresql://`` URLs use asyncpg; ``sqlite://`` URLs (local development)
+use aiosqlite.
+
+Library helpers written against a synchronous ``Session`` (search, listing,
+node registry, hierarchy) are called through ``AsyncSession.run_sync``.
+
+Pool size, overflow, timeout and recycle come from the ``TODOWRITE_DB_POOL_*``
+environment variables (see ``todowrite.database.config.get_pool_settings``);
+checkouts are instrumented by ``todowrite_web.metrics``. SQLite connections are
+tuned with the ``TODOWRITE_SQLITE_PROFILE`` pragma profile.
 """
 
-from sqlalchemy.orm import Session
-from todowrite_web.main import SessionLocal
+import asyncio
+import os
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+
+from sqlalchemy import Executable, Row, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from todowrite.database.config import get_pool_settings
+from todowrite.storage.sqlite_backend import apply_sqlite_profile
+
+from todowrite_web.metrics import pool_metrics
+
+# Async driver used for each plain database URL scheme
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Map a plain database URL onto its asyncio driver.
+
+    URLs that already name a driver (``postgresql+psycopg://``) are kept.
 
-def get_db() -> Session:
+    Raises:
+        ValueError: If the database is neither PostgreSQL nor SQLite
     """
-    Dependency function to get a database session.
+    scheme, sep, rest = url.partition("://")
+    if not sep or scheme.split("+")[0] not in ASYNC_DRIVERS:
+        raise ValueError(
+            "Web application requires PostgreSQL (or SQLite for local "
+            "development). Please set TODOWRITE_DATABASE_URL to a "
+            "postgresql:// or sqlite:// connection string."
+        )
+    if "+" in scheme:
+        return url
+    return f"{ASYNC_DRIVERS[scheme]}://{rest}"
+
+
+def create_web_engine(url: str) -> AsyncEngine:
+    """
+    Create the instrumented asyncio engine for a plain database URL.
+
+    Pool settings, the SQLite pragma profile and the pool metrics listeners
+    are applied here, so every engine the application runs on is built the
+    same way.
+
+    Raises:
+        ValueError: If the database is neither PostgreSQL nor SQLite
+    """
+    async_url = async_database_url(url)
+    options: dict[str, Any] = {
+        "pool_pre_ping": True,
+        "echo": False,  # Set to True for SQL debugging in development
+    }
+    # In-memory SQLite runs on a single static connection, not a queue pool
+    parsed = make_url(async_url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database not in (None, "", ":memory:"):
+        options.update(get_pool_settings())
+
+    web_engine = create_async_engine(async_url, **options)
+    apply_sqlite_profile(web_engine.sync_engine)
+    pool_metrics.instrument(web_engine)
+    return web_engine
+
+
+DATABASE_URL = os.environ.get("TODOWRITE_DATABASE_URL")
+if not DATABASE_URL:
+    raise ValueError("TODOWRITE_DATABASE_URL environment variable must be set for PostgreSQL")
+
+ASYNC_DATABASE_URL = async_database_url(DATABASE_URL)
+
+engine = create_web_engine(DATABASE_URL)
+
+# Objects stay readable after commit without a lazy (blocking) refresh
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency function to get a request-scoped database session.
+
+    The connection is checked out up front, so the pool wait is measured
+    once per request, and is returned to the pool when the response is
+    done. Uncommitted work is rolled back if the handler raises.
 
     Yields:
-        Session: SQLAlchemy database session
+        AsyncSession: SQLAlchemy asyncio session, closed after the request
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+    async with SessionLocal() as db:
+        await pool_metrics.timed(db.connection())
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+
+
+async def execute_concurrently(statements: Sequence[Executable]) -> list[list[Row]]:
+    """
+    Run independent read statements concurrently.
+
+    Each statement gets its own pooled connection, so the round trips
+    overlap instead of queueing on one session.
+
+    Args:
+        statements: Read-only statements with no ordering between them
+
+    Returns:
+        The rows of each statement, in the order given
+    """
+
+    async def fetch(statement: Executable) -> list[Row]:
+        connection = await pool_metrics.timed(engine.connect())
+        try:
+            return list((await connection.execute(statement)).all())
+        finally:
+            await connection.close()
+
+    return await asyncio.gather(*(fetch(statement) for statement in statements))
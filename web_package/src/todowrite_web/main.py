@@ -1,13 +1,14 @@
 """FastAPI backend for ToDoWrite web application."""
 
-import os
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from datetime import datetime
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import ToDoWrite models using the modern API
 from todowrite import (
@@ -25,24 +26,29 @@ from todowrite import (
     Command,
     Label,
 )
+from todowrite.core.bulk import import_items
+from todowrite.core.counts import count_items
+from todowrite.core.export import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_FORMATS,
+    export_layers,
+    layer_query,
+    node_documents,
+)
+from todowrite.core.listing import list_items as list_layer_items
+from todowrite.core.models import LAYER_MODELS
+from todowrite.core.node_registry import (
+    get_node_id,
+    layer_of,
+    resolve_node,
+)
+from todowrite.core.search import search
 
-# Database configuration - PostgreSQL required for web application
-DATABASE_URL = os.environ.get("TODOWRITE_DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("TODOWRITE_DATABASE_URL environment variable must be set for PostgreSQL")
-
-if not DATABASE_URL.startswith("postgresql://"):
-    raise ValueError("Web application requires PostgreSQL database. Please set TODOWRITE_DATABASE_URL to a PostgreSQL connection string.")
-
-# Create PostgreSQL engine with optimized settings
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    echo=False,  # Set to True for SQL debugging in development
+from todowrite_web.database import (
+    engine,
+    get_db as get_database_session,
 )
-SessionLocal = sessionmaker(bind=engine)
+from todowrite_web.metrics import pool_metrics
 
 
 @asynccontextmanager
@@ -51,7 +57,7 @@ async def lifespan(app: FastAPI):
     # Startup
     yield
     # Shutdown
-    engine.dispose()
+    await engine.dispose()
 
 
 # FastAPI application with CORS support for React frontend
@@ -71,25 +77,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include hierarchy API for drag-and-drop functionality
-# app.include_router(hierarchy_router)
-
-
-def get_database_session() -> Session:
-    """Dependency for database session."""
-    db = SessionLocal()
-    try:
-        return db
-    finally:
-        db.close()
-
-
 # Pydantic models for API request/response
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
+
+# Include hierarchy API for drag-and-drop functionality
+from todowrite_web.api.hierarchy import router as hierarchy_router
 
-# Import hierarchy API for drag-and-drop functionality
-# from todowrite_web.api.hierarchy import router as hierarchy_router
+app.include_router(hierarchy_router)
 
 
 class ItemBase(BaseModel):
@@ -110,14 +105,70 @@ class ItemCreate(ItemBase):
 class ItemResponse(ItemBase):
     """Model for item responses."""
     id: int
+    node_id: Optional[int] = None
     layer: str
-    created_at: str
-    updated_at: str
+    created_at: datetime
+    updated_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class ItemSummary(BaseModel):
+    """Model for one row of the cross-layer item listing."""
+    id: int
+    node_id: Optional[int] = None
+    layer: str
+    title: str
+    owner: Optional[str] = None
+    status: str
+    progress: int
+    updated_at: datetime
+
+
+class ItemListResponse(BaseModel):
+    """Model for one page of the item listing."""
+    items: List[ItemSummary]
+    next_cursor: Optional[str] = None
+
+
+class SearchHitResponse(ItemResponse):
+    """Model for a ranked search hit."""
+    rank: float
+
+
+class SearchResponse(BaseModel):
+    """Model for one page of search results."""
+    query: str
+    total: int
+    limit: int
+    offset: int
+    items: List[SearchHitResponse]
+
+
+class BatchRequest(BaseModel):
+    """Model for a bulk create/upsert request."""
+    items: List[Dict[str, Any]]
+    upsert: bool = False
+
+
+class BatchLayerResult(BaseModel):
+    """Model for the outcome of one layer of a batch."""
+    layer: str
+    ids: List[int]
+    created: int
+    updated: int
+    labels: int
+    links: int
+    rows_per_second: float
+
+
+class BatchResponse(BaseModel):
+    """Model for a bulk create/upsert response."""
+    results: List[BatchLayerResult]
+    seconds: float
+
+
 # API endpoints
 @app.get("/")
 async def root() -> dict[str, str]:
@@ -131,115 +182,193 @@ async def health_check() -> dict[str, str]:
     return {"status": "healthy", "service": "todowrite-web-api"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    """Database connection pool metrics in the Prometheus text format."""
+    return pool_metrics.render()
+
+
 @app.get("/api/items")
 async def list_items(
     layer: Optional[str] = None,
     owner: Optional[str] = None,
     status: Optional[str] = None,
-    limit: int = 20,
-    db: Session = Depends(get_database_session),
-) -> List[ItemResponse]:
-    """List ToDoWrite items with optional filtering."""
-    model_map = {
-        "goal": Goal,
-        "task": Task,
-        "concept": Concept,
-        "context": Context,
-        "constraints": Constraints,
-        "requirements": Requirements,
-        "acceptancecriteria": AcceptanceCriteria,
-        "interfacecontract": InterfaceContract,
-        "phase": Phase,
-        "step": Step,
-        "subtask": SubTask,
-        "command": Command,
-        "label": Label,
-    }
+    limit: int = Query(20, ge=1, le=500),
+    cursor: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+    completed_between: Optional[List[datetime]] = Query(None),
+    db: AsyncSession = Depends(get_database_session),
+) -> ItemListResponse:
+    """List ToDoWrite items across layers, most recently updated first.
+
+    Pass the returned ``next_cursor`` back as ``cursor`` to fetch the next page.
+    ``completed_between`` is given twice, start then end
+    (``?completed_between=2026-01-01&completed_between=2026-02-01``).
+    """
+    if completed_between is not None and len(completed_between) != 2:
+        raise HTTPException(
+            status_code=400, detail="completed_between takes a start and an end"
+        )
+
+    layer_name = None
+    if layer:
+        layer_name = next(
+            (name for name in LAYER_MODELS if name.lower() == layer.lower()), None
+        )
+        if layer_name is None:
+            raise HTTPException(status_code=400, detail=f"Unknown layer: {layer}")
+
+    try:
+        page = await db.run_sync(
+            list_layer_items,
+            layer=layer_name,
+            owner=owner,
+            status=status,
+            limit=limit,
+            cursor=cursor,
+            updated_since=updated_since,
+            completed_between=tuple(completed_between) if completed_between else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return ItemListResponse(
+        items=[
+            ItemSummary(
+                id=item.id,
+                node_id=item.node_id,
+                layer=item.layer.lower(),
+                title=item.title or "No title",
+                owner=item.owner,
+                status=item.status or "unknown",
+                progress=item.progress or 0,
+                updated_at=item.updated_at,
+            )
+            for item in page.items
+        ],
+        next_cursor=page.next_cursor,
+    )
 
-    if layer and layer.lower() not in model_map:
-        raise HTTPException(status_code=400, detail=f"Unknown layer: {layer}")
 
-    items = []
-    models_to_query = [model_map.get(layer.lower())] if layer else list(model_map.values())
-
-    for model_class in models_to_query:
-        if not model_class:
-            continue
-
-        query = db.query(model_class)
-
-        # Apply filters
-        if owner:
-            query = query.filter(model_class.owner == owner)
-        if status:
-            query = query.filter(model_class.status == status)
-
-        results = query.limit(limit).all()
-
-        for item in results:
-            items.append(
-                ItemResponse(
-                    id=item.id,
-                    layer=model_class.__name__.lower(),
-                    title=getattr(item, "title", getattr(item, "name", "No title")),
-                    description=getattr(item, "description", None),
-                    owner=getattr(item, "owner", None),
-                    severity=getattr(item, "severity", None),
-                    status=getattr(item, "status", "unknown"),
-                    progress=getattr(item, "progress", 0),
-                    created_at=str(getattr(item, "created_at", "")),
-                    updated_at=str(getattr(item, "updated_at", "")),
+@app.get("/api/export")
+async def export_nodes(
+    format: str = "ndjson",
+    layer: Optional[List[str]] = Query(None),
+) -> StreamingResponse:
+    """Stream every node as NDJSON or YAML in the ToDoWrite schema shape.
+
+    Rows are read per layer through a streaming cursor on a connection of
+    its own (the request session closes before the body is sent), and
+    each partition is sent as soon as its labels and links are resolved.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown export format: {format}")
+    try:
+        layers = export_layers(layer)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    formatter, media_type = EXPORT_FORMATS[format]
+
+    async def stream() -> AsyncIterator[str]:
+        connection = await pool_metrics.timed(engine.connect())
+        try:
+            for name in layers:
+                result = await connection.stream(
+                    layer_query(name).execution_options(yield_per=EXPORT_BATCH_SIZE)
                 )
-            )
+                async for partition in result.partitions():
+                    nodes = await connection.run_sync(node_documents, name, partition)
+                    yield "".join(formatter(node) for node in nodes)
+        finally:
+            await connection.close()
 
-    return items
+    return StreamingResponse(stream(), media_type=media_type)
 
 
-@app.get("/api/items/{item_id}")
-async def get_item(
-    item_id: int,
-    db: Session = Depends(get_database_session),
-) -> ItemResponse:
-    """Get a specific item by ID."""
-    model_classes = [
-        Goal,
-        Task,
-        Concept,
-        Context,
-        Constraints,
-        Requirements,
-        AcceptanceCriteria,
-        InterfaceContract,
-        Phase,
-        Step,
-        SubTask,
-        Command,
-        Label,
-    ]
-
-    for model_class in model_classes:
-        item = db.query(model_class).filter(model_class.id == item_id).first()
-        if item:
-            return ItemResponse(
+@app.get("/api/search")
+async def search_items(
+    q: str,
+    layer: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_database_session),
+) -> SearchResponse:
+    """Ranked full-text search across all layers."""
+    layer_name = None
+    if layer:
+        layer_name = next(
+            (name for name in LAYER_MODELS if name.lower() == layer.lower()), None
+        )
+        if layer_name is None:
+            raise HTTPException(status_code=400, detail=f"Unknown layer: {layer}")
+
+    results = await db.run_sync(
+        search, q, layer=layer_name, limit=limit, offset=offset
+    )
+
+    items = []
+    for hit in results.hits:
+        item = hit.item
+        items.append(
+            SearchHitResponse(
                 id=item.id,
-                layer=model_class.__name__.lower(),
+                node_id=hit.node_id,
+                layer=hit.layer.lower(),
+                rank=hit.rank,
                 title=getattr(item, "title", getattr(item, "name", "No title")),
                 description=getattr(item, "description", None),
                 owner=getattr(item, "owner", None),
                 severity=getattr(item, "severity", None),
                 status=getattr(item, "status", "unknown"),
-                progress=getattr(item, "progress", 0),
-                created_at=str(getattr(item, "created_at", "")),
-                updated_at=str(getattr(item, "updated_at", "")),
+                progress=getattr(item, "progress", None) or 0,
+                created_at=item.created_at,
+                updated_at=item.updated_at,
             )
+        )
+
+    return SearchResponse(
+        query=results.query,
+        total=results.total,
+        limit=results.limit,
+        offset=results.offset,
+        items=items,
+    )
+
+
+@app.get("/api/items/{item_id}")
+async def get_item(
+    item_id: str,
+    db: AsyncSession = Depends(get_database_session),
+) -> ItemResponse:
+    """Get a specific item by its global node ID or typed ID (``Task-3``)."""
+    item = await db.run_sync(resolve_node, item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail=f"Item with ID {item_id} not found")
 
-    raise HTTPException(status_code=404, detail=f"Item with ID {item_id} not found")
+    if item_id.strip().isdigit():
+        node_id = int(item_id)
+    else:
+        node_id = await db.run_sync(get_node_id, item)
+
+    return ItemResponse(
+        id=item.id,
+        node_id=node_id,
+        layer=layer_of(item).lower(),
+        title=getattr(item, "title", getattr(item, "name", "No title")),
+        description=getattr(item, "description", None),
+        owner=getattr(item, "owner", None),
+        severity=getattr(item, "severity", None),
+        status=getattr(item, "status", "unknown"),
+        progress=getattr(item, "progress", None) or 0,
+        created_at=item.created_at,
+        updated_at=item.updated_at,
+    )
 
 
 @app.post("/api/items")
 async def create_item(
     item: ItemCreate,
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_database_session),
 ) -> ItemResponse:
     """Create a new item."""
     model_map = {
@@ -274,12 +403,15 @@ async def create_item(
         progress=item.progress,
     )
 
+    # eager_defaults loads the server-set columns (id, timestamps) in the
+    # INSERT itself, and commit does not expire them, so no refresh
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    node_id = await db.run_sync(get_node_id, db_item)
 
     return ItemResponse(
         id=db_item.id,
+        node_id=node_id,
         layer=item.layer,
         title=db_item.title,
         description=db_item.description,
@@ -287,13 +419,50 @@ async def create_item(
         severity=db_item.severity,
         status=db_item.status,
         progress=db_item.progress,
-        created_at=str(db_item.created_at),
-        updated_at=str(db_item.updated_at),
+        created_at=db_item.created_at,
+        updated_at=db_item.updated_at,
+    )
+
+
+@app.post("/api/items:batch")
+async def create_items_batch(
+    batch: BatchRequest,
+    db: AsyncSession = Depends(get_database_session),
+) -> BatchResponse:
+    """Create (or upsert) many items, with labels and parents, in one call.
+
+    Items take the same fields as the library's ``import_items``: a
+    ``layer``, column values, optional ``labels``, ``parents`` and a
+    request-local ``ref``. Nothing is written if any item is invalid.
+    """
+    try:
+        results = await db.run_sync(
+            import_items, batch.items, upsert=batch.upsert, commit=False
+        )
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    await db.commit()
+
+    return BatchResponse(
+        results=[
+            BatchLayerResult(
+                layer=result.layer,
+                ids=result.ids,
+                created=result.created,
+                updated=result.updated,
+                labels=result.labels,
+                links=result.links,
+                rows_per_second=result.rows_per_second,
+            )
+            for result in results
+        ],
+        seconds=sum(result.seconds for result in results),
     )
 
 
 @app.get("/api/stats")
-async def get_stats(db: Session = Depends(get_database_session)) -> dict[str, int]:
+async def get_stats(db: AsyncSession = Depends(get_database_session)) -> dict[str, int]:
     """Get database statistics."""
     model_map = {
         "goals": Goal,
@@ -311,16 +480,26 @@ async def get_stats(db: Session = Depends(get_database_session)) -> dict[str, in
         "labels": Label,
     }
 
-    stats = {}
-    total = 0
+    # One grouped query, cached until the layer tables change
+    counts = await db.run_sync(count_items)
+    stats = {name: counts.layers[layer_of(model)] for name, model in model_map.items()}
+    stats["total"] = counts.total
+    return stats
 
-    for name, model_class in model_map.items():
-        count = db.query(model_class).count()
-        stats[name] = count
-        total += count
 
-    stats["total"] = total
-    return stats
+@app.get("/api/stats/status")
+async def get_status_stats(
+    db: AsyncSession = Depends(get_database_session),
+) -> dict[str, dict[str, int]]:
+    """Get item counts per layer and status."""
+    counts = await db.run_sync(count_items)
+    return {
+        LAYER_MODELS[layer].__tablename__: {
+            status: n for status, n in statuses.items() if status is not None
+        }
+        for layer, statuses in counts.statuses.items()
+        if statuses
+    }
 
 
 if __name__ == "__main__":
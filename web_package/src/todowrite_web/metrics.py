@@ -0,0 +1,148 @@
+"""
+Connection pool metrics for the ToDoWrite web application.
+
+Tracks how the database pool behaves under load so ``pool_size`` and
+``max_overflow`` can be tuned from data:
+
+- checked-out connections, idle connections, pool size and overflow
+- how long requests wait for a connection (checkout wait histogram)
+- how long connections stay checked out (hold time histogram)
+- checkouts and pool timeouts
+
+Metrics are rendered in the Prometheus text exposition format by the
+``/metrics`` endpoint.
+"""
+
+import time
+from bisect import bisect_left
+from collections.abc import Awaitable, Sequence
+from typing import Any, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import Pool
+
+T = TypeVar("T")
+
+# Bucket upper bounds in seconds
+WAIT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0,
+)
+HOLD_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets (Prometheus semantics)."""
+
+    def __init__(
+        self, name: str, description: str, buckets: Sequence[float]
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def render(self) -> list[str]:
+        """Render as Prometheus text lines."""
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"{self.name}_sum {self.total}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+class PoolMetrics:
+    """Connection pool instrumentation for one engine."""
+
+    def __init__(self) -> None:
+        self.checkout_wait = Histogram(
+            "todowrite_db_pool_checkout_wait_seconds",
+            "Time spent waiting for a pooled connection.",
+            WAIT_BUCKETS,
+        )
+        self.hold_time = Histogram(
+            "todowrite_db_pool_connection_hold_seconds",
+            "Time a connection stayed checked out of the pool.",
+            HOLD_BUCKETS,
+        )
+        self.checked_out = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.pool: Pool | None = None
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        """Attach checkout/checkin listeners to the engine's pool."""
+        self.pool = engine.sync_engine.pool
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "checkin", self._on_checkin)
+
+    def _on_checkout(
+        self, _dbapi_connection: Any, record: Any, _proxy: Any
+    ) -> None:
+        record.info["checked_out_at"] = time.perf_counter()
+        self.checked_out += 1
+        self.checkouts += 1
+
+    def _on_checkin(self, _dbapi_connection: Any, record: Any) -> None:
+        started = record.info.pop("checked_out_at", None)
+        if started is None:
+            return  # never reported as checked out
+        self.checked_out -= 1
+        self.hold_time.observe(time.perf_counter() - started)
+
+    async def timed(self, acquire: Awaitable[T]) -> T:
+        """Await a connection checkout, recording the wait and any timeout."""
+        started = time.perf_counter()
+        try:
+            return await acquire
+        except sa_exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - started)
+
+    def render(self) -> str:
+        """Render all pool metrics in the Prometheus text format."""
+        lines: list[str] = []
+
+        def sample(suffix: str, kind: str, description: str, value: float) -> None:
+            name = f"todowrite_db_pool_{suffix}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+
+        sample("checked_out", "gauge", "Connections checked out.", self.checked_out)
+        if hasattr(self.pool, "overflow"):
+            # Queue pools also report size, idle connections and overflow;
+            # QueuePool.overflow() counts up from -pool_size, hence the clamp
+            sample("size", "gauge", "Configured pool size.", self.pool.size())
+            sample("idle", "gauge", "Idle pooled connections.", self.pool.checkedin())
+            overflow = max(self.pool.overflow(), 0)
+            sample("overflow", "gauge", "Connections beyond the pool size.", overflow)
+        sample("checkouts_total", "counter", "Connections handed out.", self.checkouts)
+        sample("timeouts_total", "counter", "Checkouts that timed out.", self.timeouts)
+        lines += self.checkout_wait.render()
+        lines += self.hold_time.render()
+        return "\n".join(lines) + "\n"
+
+
+# Metrics for the application engine (instrumented in todowrite_web.database)
+pool_metrics = PoolMetrics()